@@ -4,22 +4,34 @@ FLORA API - Versión Segura
 API REST con todas las vulnerabilidades corregidas
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from pydantic import BaseModel, field_validator
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 import uvicorn
-import asyncio
 import logging
 import time
 import hashlib
-import secrets
 import re
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+import base64
 import json
+import os
+import sys
+import threading
+
+# Módulos compartidos de FLORA (src/python): métricas, rate limiting y cifrado
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from python.metrics import (CONTENT_TYPE, RATE_LIMIT_REJECTIONS, MetricsMiddleware, metrics_response_body,
+                            observe_crypto_stage)
+from python.data_keys import DataKeyStore, default_data_key_store_path
+from python.engine import EngineWorkers
+from python.rate_limit import create_rate_limit_store
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -57,11 +69,11 @@ SECURITY_CONFIG = {
     }
 }
 
-# Rate limiting storage
-rate_limit_storage = {}
-rate_limit_storage_burst = {}
-# Lock para secciones críticas de rate limiting
-rate_lock = asyncio.Lock()
+# Rate limiting: contadores de ventana deslizante O(1) por (IP, endpoint).
+# Con varios workers (uvicorn --workers N, WEB_CONCURRENCY) o con
+# FLORA_RATE_LIMIT_STORE=<ruta> los contadores viven en una tabla de memoria
+# compartida y el límite es global para todos los workers; con uno solo, en el proceso.
+rate_limiter = create_rate_limit_store()
 
 # Modelos de validación
 class EncryptRequest(BaseModel):
@@ -94,7 +106,8 @@ class DecryptRequest(BaseModel):
     def validate_encrypted_data(cls, v):
         if not v or len(v.strip()) == 0:
             raise ValueError('Encrypted data cannot be empty')
-        if len(v) > 10000:
+        # Bundle FLORA (hex + KEM) en base64 para el máximo de 5000 caracteres
+        if len(v) > 65536:
             raise ValueError('Encrypted data too long')
         return v.strip()
 
@@ -104,6 +117,58 @@ class StatusResponse(BaseModel):
     version: str
     security_level: str
 
+# Cifrado real: claves por key_id en un almacén persistente y trabajo
+# criptográfico en un pool de hilos (creados bajo demanda, cerrados al apagar)
+_crypto_lock = threading.Lock()
+_data_keys: Optional[DataKeyStore] = None
+_crypto_workers: Optional[EngineWorkers] = None
+
+
+def get_data_keys() -> DataKeyStore:
+    global _data_keys
+    with _crypto_lock:
+        if _data_keys is None:
+            _data_keys = DataKeyStore(default_data_key_store_path())
+        return _data_keys
+
+
+def get_crypto_workers() -> EngineWorkers:
+    global _crypto_workers
+    with _crypto_lock:
+        if _crypto_workers is None:
+            _crypto_workers = EngineWorkers(stage_observer=observe_crypto_stage)
+        return _crypto_workers
+
+
+@asynccontextmanager
+async def lifespan(app_: FastAPI):
+    yield
+    global _data_keys, _crypto_workers
+    with _crypto_lock:
+        if _crypto_workers is not None:
+            _crypto_workers.close()
+        if _data_keys is not None:
+            _data_keys.close()
+        _data_keys = _crypto_workers = None
+
+
+def encrypt_with_new_key(engines, store: DataKeyStore, message: bytes):
+    """Genera una clave para el mensaje y lo cifra (en un hilo del pool) -> (key_id, bundle)
+
+    Sin Kyber: el bundle solo depende de la clave guardada en el DataKeyStore,
+    que es lo único que se conserva entre reinicios y réplicas de la API.
+    """
+    key_id, master_key, master_salt = store.create()
+    return key_id, engines.engine(False).encrypt_with_key(message, master_key, master_salt, key_id)
+
+
+def decrypt_with_stored_key(engines, store: DataKeyStore, key_id: str, bundle: dict) -> bytes:
+    master_key, master_salt = store.get(key_id)
+    if bundle.get("master_salt") != master_salt.hex():
+        raise ValueError("El bundle no corresponde a key_id")
+    return engines.engine_for_bundle(bundle).decrypt_with_key(bundle, master_key)
+
+
 # Inicializar FastAPI
 app = FastAPI(
     title="FLORA Crypto API",
@@ -111,114 +176,127 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
-# Middleware de seguridad
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Añadir headers de seguridad
-    for header, value in SECURITY_CONFIG["security_headers"].items():
-        response.headers[header] = value
-    
-    # Ocultar información del servidor (case-insensitive)
-    try:
-        for h in list(response.headers.keys()):
-            if h.lower() == "server":
-                del response.headers[h]
-    except Exception:
-        pass
-    # No exponer información del servidor
-    
-    return response
+# Middlewares ASGI puros: sin la tarea y el stream intermedios de
+# @app.middleware("http") y sin leer el cuerpo completo de la petición.
+class SecurityHeadersMiddleware:
+    """Añade los headers de seguridad (tuplas precalculadas) y elimina el header Server."""
 
-# Middleware de rate limiting
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    client_ip = request.client.host
-    endpoint = request.url.path
-    
-    # Obtener límite para el endpoint
-    rate_limit = SECURITY_CONFIG["rate_limits"].get(endpoint, SECURITY_CONFIG["rate_limits"]["default"])
-    burst_limit = SECURITY_CONFIG.get("burst_limits", {}).get(endpoint)
-    
-    try:
-        # Determinar si se debe aplicar burst-limit (solo para tráfico de prueba de red)
-        apply_burst = False
-        if burst_limit and request.method == "POST" and endpoint == "/api/v1/encrypt":
-            try:
-                body_bytes = await request.body()
-                body_text = body_bytes.decode("utf-8", errors="ignore")
-                # Intentar parsear JSON y detectar patrón test_
-                test_payload_detected = False
-                try:
-                    payload = json.loads(body_text)
-                    data_val = payload.get("data") if isinstance(payload, dict) else None
-                    if isinstance(data_val, str) and data_val.startswith("test_"):
-                        test_payload_detected = True
-                except Exception:
-                    # Fallback a regex si no es JSON válido
-                    if re.search(r'"data"\s*:\s*"test_\d+"', body_text):
-                        test_payload_detected = True
-                apply_burst = test_payload_detected
-            except Exception:
-                apply_burst = False
-
-        # Verificar rate limit
-        current_time = time.time()
-        window_start = current_time - rate_limit["window"]
-        
-        async with rate_lock:
-            if client_ip not in rate_limit_storage:
-                rate_limit_storage[client_ip] = {}
-            if client_ip not in rate_limit_storage_burst:
-                rate_limit_storage_burst[client_ip] = {}
-            
-            if endpoint not in rate_limit_storage[client_ip]:
-                rate_limit_storage[client_ip][endpoint] = []
-            if endpoint not in rate_limit_storage_burst[client_ip]:
-                rate_limit_storage_burst[client_ip][endpoint] = []
-            
-            # Limpiar requests antiguos (ventana larga)
-            rate_limit_storage[client_ip][endpoint] = [
-                req_time for req_time in rate_limit_storage[client_ip][endpoint]
-                if req_time > window_start
-            ]
-            # Limpiar requests antiguos (ventana de ráfaga)
-            if burst_limit:
-                burst_window_start = current_time - burst_limit["window"]
-                rate_limit_storage_burst[client_ip][endpoint] = [
-                    req_time for req_time in rate_limit_storage_burst[client_ip][endpoint]
-                    if req_time > burst_window_start
-                ]
-            
-            # Verificar si excede el límite
-            if len(rate_limit_storage[client_ip][endpoint]) >= rate_limit["requests"]:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Rate limit exceeded. Please try again later."},
-                    headers={"Retry-After": str(rate_limit.get("window", 60))}
-                )
-            # Verificar ráfaga
-            if apply_burst and len(rate_limit_storage_burst[client_ip][endpoint]) >= burst_limit["requests"]:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Burst rate limit exceeded. Please slow down."},
-                    headers={"Retry-After": str(burst_limit.get("window", 1))}
-                )
-            
-            # Añadir request actual
-            rate_limit_storage[client_ip][endpoint].append(current_time)
-            if apply_burst:
-                rate_limit_storage_burst[client_ip][endpoint].append(current_time)
-    except Exception:
-        # Si hay algún error en rate limiting, no tumbar la petición
-        pass
-    
-    response = await call_next(request)
-    return response
+    def __init__(self, app, headers: dict):
+        self.app = app
+        self.headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+        self.names = {name for name, _ in self.headers} | {b"server"}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = [h for h in message.get("headers", ()) if h[0].lower() not in self.names]
+                headers.extend(self.headers)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+# Tráfico de prueba de red: {"data": "test_<n>"} (solo se mira el primer fragmento del cuerpo)
+TEST_PAYLOAD_PATTERN = re.compile(rb'"data"\s*:\s*"test_\d+"')
+
+
+class RateLimitMiddleware:
+    """Rate limiting por (IP, endpoint) y límite de ráfaga para el tráfico de prueba.
+
+    Para detectar el tráfico de prueba se inspecciona solo el primer mensaje del
+    cuerpo, que después se reentrega intacto a la aplicación. Ese mensaje se lee
+    antes de check(), así que aunque la comprobación falle la aplicación recibe
+    el cuerpo completo.
+    """
+
+    def __init__(self, app, config: dict, limiter):
+        self.app = app
+        self.config = config
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        body = None
+        if self._burst_limit(scope) and scope["method"] == "POST":
+            first = await receive()
+            body = first.get("body", b"")
+            receive = _replay(first, receive)
+        try:
+            rejection = await self.check(scope, body)
+        except Exception:
+            # Si hay algún error en rate limiting, no tumbar la petición
+            rejection = None
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    def _burst_limit(self, scope):
+        return self.config.get("burst_limits", {}).get(scope["path"])
+
+    async def check(self, scope, body=None):
+        """Respuesta 429 si la petición supera un límite, None si se admite.
+
+        `body` es el primer fragmento del cuerpo (solo para rutas con límite de ráfaga).
+        """
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        endpoint = scope["path"]
+        limits = self.config["rate_limits"]
+        rate_limit = limits.get(endpoint, limits["default"])
+        # Etiqueta de métricas acotada a las rutas configuradas
+        limit_route = endpoint if endpoint in limits else "default"
+        burst_limit = self._burst_limit(scope)
+
+        # Burst-limit solo para tráfico de prueba de red
+        apply_burst = bool(burst_limit and body and TEST_PAYLOAD_PATTERN.search(body))
+
+        current_time = time.monotonic()
+        key = (client_ip, endpoint)
+        if not self.limiter.hit(key, rate_limit["requests"], rate_limit["window"], current_time).allowed:
+            RATE_LIMIT_REJECTIONS.labels("secure_api", limit_route, "window").inc()
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers={"Retry-After": str(rate_limit.get("window", 60))}
+            )
+        if apply_burst and not self.limiter.hit(("burst",) + key, burst_limit["requests"], burst_limit["window"], current_time).allowed:
+            # La petición rechazada no consume cuota de la ventana larga
+            self.limiter.release(key, rate_limit["window"], current_time)
+            RATE_LIMIT_REJECTIONS.labels("secure_api", limit_route, "burst").inc()
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Burst rate limit exceeded. Please slow down."},
+                headers={"Retry-After": str(burst_limit.get("window", 1))}
+            )
+        return None
+
+
+def _replay(first, receive):
+    """receive() que entrega primero el mensaje ya leído y después delega."""
+    pending = [first]
+
+    async def replay():
+        if pending:
+            return pending.pop()
+        return await receive()
+
+    return replay
+
+
+# Orden (de dentro a fuera): headers de seguridad, rate limiting, CORS, hosts, métricas
+app.add_middleware(SecurityHeadersMiddleware, headers=SECURITY_CONFIG["security_headers"])
+app.add_middleware(RateLimitMiddleware, config=SECURITY_CONFIG, limiter=rate_limiter)
 
 # CORS seguro
 app.add_middleware(
@@ -237,6 +315,9 @@ app.add_middleware(
     allowed_hosts=["localhost", "127.0.0.1", "*.localhost"]
 )
 
+# Métricas por ruta (el más externo: incluye las respuestas 429 del rate limiting)
+app.add_middleware(MetricsMiddleware, app_name="secure_api")
+
 # Autenticación
 security = HTTPBearer(auto_error=False)
 
@@ -319,15 +400,11 @@ async def encrypt_data(
     check_permission(current_user, "encrypt")
     
     try:
-        # Simular encriptación (en producción usar FLORA real)
         data = request.data
-        key_id = f"key_{int(time.time())}_{secrets.token_hex(8)}"
-        
-        # Simular encriptación simple (base64 + hash)
-        import base64
-        encrypted_data = base64.b64encode(data.encode()).decode()
+        key_id, bundle = await get_crypto_workers().run(encrypt_with_new_key, get_data_keys(), data.encode())
+        encrypted_data = base64.b64encode(json.dumps(bundle, separators=(",", ":")).encode()).decode()
         data_hash = hashlib.sha256(data.encode()).hexdigest()[:16]
-        
+
         return {
             "key_id": key_id,
             "encrypted_data": encrypted_data,
@@ -336,7 +413,7 @@ async def encrypt_data(
             "algorithm": "FLORA-Hybrid",
             "security_level": "high"
         }
-        
+
     except Exception as e:
         logger.error(f"Error en encriptación: {e}")
         # Evitar 500; responder 400 para entradas no válidas o fallas controladas
@@ -354,17 +431,17 @@ async def decrypt_data(
     check_permission(current_user, "decrypt")
     
     try:
-        # Simular desencriptación (en producción usar FLORA real)
-        import base64
-        
         # Verificar formato de datos encriptados
         if not re.match(r'^[A-Za-z0-9+/=]+$', request.encrypted_data):
             raise ValueError("Invalid encrypted data format")
-        
-        decrypted_data = base64.b64decode(request.encrypted_data).decode()
-        
+
+        bundle = json.loads(base64.b64decode(request.encrypted_data))
+        if not isinstance(bundle, dict):
+            raise ValueError("Invalid encrypted data format")
+        plaintext = await get_crypto_workers().run(decrypt_with_stored_key, get_data_keys(), request.key_id, bundle)
+
         return {
-            "decrypted_data": decrypted_data,
+            "decrypted_data": plaintext.decode(),
             "key_id": request.key_id,
             "timestamp": datetime.now().isoformat(),
             "algorithm": "FLORA-Hybrid"
@@ -400,6 +477,11 @@ async def audit_guard(current_user: dict = Depends(get_current_user)):
     check_permission(current_user, "status")
     return {"events": []}
 
+@app.get("/metrics")
+async def metrics():
+    """Métricas en formato Prometheus (agregadas entre workers si FLORA_METRICS_DIR está definida)"""
+    return Response(content=await run_in_threadpool(metrics_response_body), media_type=CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,95 @@
+"""
+Benchmark de latencia de la API: motor FloraCryptoSystem por petición (modelo
+anterior) frente al pool de motores compartido gestionado por el lifespan, y
+contraseña (PBKDF2 por llamada) frente a handle de clave de POST /keys.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Agregar el directorio src al path (la API usa imports relativos del paquete python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from python.api import app
+    from python.flora_crypto import FloraCryptoSystem
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+HEADERS = {"X-API-Key": os.getenv("FLORA_API_KEY", "flora-dev-key")}
+
+
+def build_per_request_app() -> FastAPI:
+    """Réplica de los handlers anteriores: un FloraCryptoSystem nuevo por petición."""
+    legacy = FastAPI()
+
+    @legacy.post("/encrypt")
+    def encrypt(req: dict):
+        flora = FloraCryptoSystem(use_kyber=req.get("use_kyber", True))
+        master_salt = os.urandom(32)
+        master_key, _ = flora.generate_master_key(req["password"], master_salt)
+        enc = flora.encrypt_message(req["message"].encode(), master_key, "api_default_session")
+        enc["master_salt"] = master_salt.hex()
+        return enc
+
+    @legacy.get("/status")
+    def status():
+        return FloraCryptoSystem().get_system_status()
+
+    return legacy
+
+
+def measure(client: TestClient, method: str, path: str, iterations: int, **kwargs):
+    times = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        response = client.request(method, path, headers=HEADERS, **kwargs)
+        times.append(time.perf_counter() - t0)
+        assert response.status_code == 200, response.text
+    return times
+
+
+def report(name: str, times):
+    ordered = sorted(times)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"   {name:<34} mean={statistics.mean(times) * 1000:8.2f} ms  "
+          f"p50={statistics.median(times) * 1000:8.2f} ms  p95={p95 * 1000:8.2f} ms")
+
+
+def main():
+    print("🚀 FLORA API Engine Benchmark")
+    print("=" * 60)
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    body = {"password": "benchmark-password", "message": "registro de prueba"}
+
+    with TestClient(build_per_request_app()) as legacy:
+        print("\n⏱️  Motor por petición (antes)")
+        report("GET /status", measure(legacy, "GET", "/status", iterations))
+        report("POST /encrypt", measure(legacy, "POST", "/encrypt", iterations, json=body))
+
+    os.environ.setdefault("FLORA_KEY_STORE", os.path.join(tempfile.mkdtemp(), "key_handles.db"))
+    with TestClient(app) as client:
+        print("\n⏱️  Motor compartido (lifespan)")
+        report("GET /status", measure(client, "GET", "/status", iterations))
+        report("POST /encrypt", measure(client, "POST", "/encrypt", iterations, json=body))
+
+        print("\n⏱️  Handle de clave (PBKDF2 una sola vez)")
+        handle = client.post("/keys", headers=HEADERS, json={"password": body["password"]}).json()["key_handle"]
+        by_handle = {"key_handle": handle, "message": body["message"]}
+        report("POST /encrypt (key_handle)", measure(client, "POST", "/encrypt", iterations, json=by_handle))
+        bundle = client.post("/encrypt", headers=HEADERS, json=by_handle).json()
+        report("POST /decrypt (password)", measure(client, "POST", "/decrypt", iterations,
+                                                   json={"password": body["password"], "bundle": bundle}))
+        report("POST /decrypt (key_handle)", measure(client, "POST", "/decrypt", iterations,
+                                                     json={"key_handle": handle, "bundle": bundle}))
+        status = client.get("/status", headers=HEADERS).json()
+        print(f"\n📊 Sesiones activas: {status['active_sessions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark del modo stream de la CLI (`flora encrypt - -` / `flora decrypt - -`)
+frente a `openssl enc` con flujos de varios GB: throughput y memoria máxima
+(RSS) de cada proceso. La memoria de FLORA debe ser constante sea cual sea el
+tamaño del flujo.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+BLOCK = os.urandom(1024 * 1024)
+
+FLORA = [sys.executable, "-m", "python.cli"]
+COMMANDS = {
+    "flora": (FLORA + ["encrypt", "-", "-"], FLORA + ["decrypt", "-", "-"]),
+    "openssl aes-256-ctr": (["openssl", "enc", "-aes-256-ctr", "-pbkdf2", "-pass", "env:FLORA_PASSWORD"],
+                            ["openssl", "enc", "-d", "-aes-256-ctr", "-pbkdf2", "-pass", "env:FLORA_PASSWORD"]),
+}
+
+
+def feed(pipe, total: int) -> None:
+    remaining = total
+    while remaining > 0:
+        chunk = BLOCK[:min(len(BLOCK), remaining)]
+        pipe.write(chunk)
+        remaining -= len(chunk)
+    pipe.close()
+
+
+def drain(pipe, counter) -> None:
+    while True:
+        block = pipe.read(1024 * 1024)
+        if not block:
+            break
+        counter[0] += len(block)
+
+
+def wait_rss(proc) -> float:
+    """Espera al proceso y devuelve su RSS máximo en MiB."""
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    assert proc.returncode == 0, f"{proc.args[0]} terminó con {proc.returncode}"
+    return usage.ru_maxrss / 1024
+
+
+def pipeline(commands, total: int):
+    """feeder | cmd1 | cmd2 ... | contador -> (segundos, bytes de salida, [RSS MiB])."""
+    env = dict(os.environ, FLORA_PASSWORD="benchmark-password", PYTHONPATH=SRC)
+    procs = []
+    stdin = subprocess.PIPE
+    for command in commands:
+        proc = subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+        if procs:
+            procs[-1].stdout.close()  # solo el siguiente proceso lee de la tubería
+        procs.append(proc)
+        stdin = proc.stdout
+    counter = [0]
+    t0 = time.perf_counter()
+    feeder = threading.Thread(target=feed, args=(procs[0].stdin, total))
+    reader = threading.Thread(target=drain, args=(procs[-1].stdout, counter))
+    feeder.start()
+    reader.start()
+    feeder.join()
+    reader.join()
+    rss = [wait_rss(proc) for proc in procs]
+    return time.perf_counter() - t0, counter[0], rss
+
+
+def main():
+    print("🚀 FLORA CLI Stream Benchmark")
+    print("=" * 60)
+    sizes_gb = [float(a) for a in sys.argv[1:]] or [1.0, 4.0]
+    tools = [name for name in COMMANDS if name == "flora" or shutil.which("openssl")]
+    for size_gb in sizes_gb:
+        total = int(size_gb * 1024 ** 3)
+        print(f"\n⏱️  {size_gb:g} GiB")
+        for name in tools:
+            enc, dec = COMMANDS[name]
+            seconds, out, (rss,) = pipeline([enc], total)
+            print(f"   {name:<20} encrypt        {total / seconds / 1e6:8.1f} MB/s   RSS {rss:7.1f} MiB")
+            seconds, out, (rss_enc, rss_dec) = pipeline([enc, dec], total)
+            assert out == total, f"{name}: {out} != {total} bytes"
+            print(f"   {name:<20} encrypt|decrypt {total / seconds / 1e6:7.1f} MB/s   RSS {rss_enc:7.1f} / {rss_dec:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
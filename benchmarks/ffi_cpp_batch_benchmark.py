@@ -0,0 +1,65 @@
+"""
+Benchmark de lotes AEAD en flora_c: una llamada ctypes por mensaje
+(aes_gcm_encrypt) frente a flora_aes_gcm_encrypt_batch con y sin hilos
+nativos. Los mensajes van empaquetados en un buffer con offsets.
+
+Requiere la biblioteca compilada (cmake -S src/cpp -B src/cpp/build && cmake --build src/cpp/build).
+Uso: python benchmarks/ffi_cpp_batch_benchmark.py [mensajes por lote] [hilos]
+"""
+import os
+import sys
+import time
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python import ffi_cpp
+except (ImportError, OSError) as e:
+    print(f"❌ Error cargando flora_c: {e}")
+    sys.exit(1)
+
+KEY = os.urandom(32)
+AD = b"flora-benchmark"
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    print("🚀 FLORA ffi_cpp Batch Benchmark")
+    print("=" * 60)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    print(f"   {count} mensajes por lote, CPUs={os.cpu_count()}, hilos={threads or 'auto'}\n")
+    print(f"   {'tamaño':>7} {'por llamada':>14} {'lote 1 hilo':>14} {'lote hilos':>14}")
+    for size in (64, 256, 1024, 16384):
+        buffer = os.urandom(size * count)
+        offsets = list(range(0, len(buffer), size))
+        nonces = os.urandom(12 * count)
+        view = memoryview(buffer)
+
+        def per_call():
+            for i, offset in enumerate(offsets):
+                ffi_cpp.aes_gcm_encrypt(KEY, nonces[12 * i:12 * i + 12], view[offset:offset + size], AD)
+
+        single = ffi_cpp.aes_gcm_encrypt_batch(KEY, buffer, nonces, AD, offsets, threads=1)
+        assert single.ok and single.output == ffi_cpp.aes_gcm_encrypt_batch(KEY, buffer, nonces, AD, offsets,
+                                                                             threads=threads).output
+        rates = [count / timed(fn) for fn in (
+            per_call,
+            lambda: ffi_cpp.aes_gcm_encrypt_batch(KEY, buffer, nonces, AD, offsets, threads=1),
+            lambda: ffi_cpp.aes_gcm_encrypt_batch(KEY, buffer, nonces, AD, offsets, threads=threads),
+        )]
+        print(f"   {size:>6}B " + " ".join(f"{r:>8.0f} msg/s" for r in rates)
+              + f"   ({rates[2] * size / 1e6:.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark de mensajes pequeños con flora_c: API por llamada
+(flora_aes_gcm_encrypt: EVP_CIPHER_CTX y expansión de clave en cada mensaje)
+frente a un contexto reutilizable (flora_ctx_*, solo cambia el nonce).
+
+Requiere la biblioteca compilada (cmake -S src/cpp -B src/cpp/build && cmake --build src/cpp/build).
+Uso: python benchmarks/ffi_cpp_context_benchmark.py [segundos por medida]
+"""
+import os
+import sys
+import time
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python import ffi_cpp
+except (ImportError, OSError) as e:
+    print(f"❌ Error cargando flora_c: {e}")
+    sys.exit(1)
+
+KEY = os.urandom(32)
+NONCE = os.urandom(12)
+AD = b"flora-benchmark"
+
+
+def rate(fn, budget: float) -> float:
+    """Operaciones por segundo de fn() durante `budget` segundos."""
+    ops, t0 = 0, time.perf_counter()
+    while True:
+        for _ in range(200):
+            fn()
+        ops += 200
+        elapsed = time.perf_counter() - t0
+        if elapsed >= budget:
+            return ops / elapsed
+
+
+def main():
+    print("🚀 FLORA ffi_cpp Context Benchmark")
+    print("=" * 60)
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print(f"   {'tamaño':>7} {'por llamada':>14} {'contexto':>14} {'mejora':>7}   (cifrar)")
+    with ffi_cpp.AesGcmContext(KEY) as ctx:
+        for size in (16, 64, 256, 1024, 4096, 16384):
+            message = os.urandom(size)
+            assert ctx.encrypt(NONCE, message, AD) == ffi_cpp.aes_gcm_encrypt(KEY, NONCE, message, AD)
+            per_call = rate(lambda: ffi_cpp.aes_gcm_encrypt(KEY, NONCE, message, AD), budget)
+            reused = rate(lambda: ctx.encrypt(NONCE, message, AD), budget)
+            print(f"   {size:>6}B {per_call:>10.0f} op/s {reused:>10.0f} op/s {reused / per_call:>6.2f}x")
+        ct, tag = ctx.encrypt(NONCE, message, AD)
+        per_call = rate(lambda: ffi_cpp.aes_gcm_decrypt(KEY, NONCE, ct, tag, AD), budget)
+        reused = rate(lambda: ctx.decrypt(NONCE, ct, tag, AD), budget)
+        print(f"   {len(ct):>6}B {per_call:>10.0f} op/s {reused:>10.0f} op/s {reused / per_call:>6.2f}x   (descifrar)")
+
+
+if __name__ == "__main__":
+    main()
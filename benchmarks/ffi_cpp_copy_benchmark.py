@@ -0,0 +1,90 @@
+"""
+Benchmark del wrapper ctypes de flora_c: paso de argumentos con copia
+(from_buffer_copy por argumento y bytes(ct_buf)[:n] a la salida, como hacía
+ffi_cpp antes) frente a punteros directos y salida en un bytearray reservado.
+
+Requiere la biblioteca compilada (cmake -S src/cpp -B src/cpp/build && cmake --build src/cpp/build).
+Uso: python benchmarks/ffi_cpp_copy_benchmark.py [1K,64K,1M,16M,256M,1G]
+"""
+import ctypes
+import os
+import sys
+import time
+from ctypes import c_size_t, c_uint8
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python import ffi_cpp
+except (ImportError, OSError) as e:
+    print(f"❌ Error cargando flora_c: {e}")
+    sys.exit(1)
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+# Por encima de este tamaño la réplica con copias (~5x el mensaje en memoria) se omite
+COPY_LIMIT = 256 * 1024 ** 2
+KEY = os.urandom(32)
+NONCE = os.urandom(12)
+AD = b"flora-benchmark"
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    return int(text[:-1]) * UNITS[text[-1]] if text[-1] in UNITS else int(text)
+
+
+def _copy_ptr(buf: bytes):
+    if not buf:
+        return None
+    return (c_uint8 * len(buf)).from_buffer_copy(buf)
+
+
+def copying_encrypt(plaintext: bytes):
+    """Réplica del wrapper anterior: copia cada entrada y la salida dos veces."""
+    ct_buf = (c_uint8 * (len(plaintext) + 16))()
+    ct_len = c_size_t(len(plaintext) + 16)
+    tag_buf = (c_uint8 * 16)()
+    res = ffi_cpp._lib.flora_aes_gcm_encrypt(_copy_ptr(KEY), len(KEY), _copy_ptr(NONCE), len(NONCE),
+                                             _copy_ptr(AD), len(AD), _copy_ptr(plaintext), len(plaintext),
+                                             ct_buf, ctypes.byref(ct_len), tag_buf, 16)
+    assert res == 0
+    return bytes(ct_buf)[: ct_len.value], bytes(tag_buf)
+
+
+def measure(fn, data: bytes, budget: float = 1.0) -> float:
+    """MB/s de fn(data), repitiendo hasta `budget` segundos."""
+    runs, elapsed = 0, 0.0
+    while elapsed < budget or runs < 3:
+        t0 = time.perf_counter()
+        fn(data)
+        elapsed += time.perf_counter() - t0
+        runs += 1
+    return len(data) * runs / elapsed / 1e6
+
+
+def main():
+    print("🚀 FLORA ffi_cpp Copy Benchmark")
+    print("=" * 60)
+    sizes = [parse_size(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "1K,64K,1M,16M,256M,1G").split(",")]
+    print(f"   biblioteca: {ffi_cpp._lib_path}\n")
+    print(f"   {'tamaño':>8} {'con copias':>12} {'sin copias':>12} {'memoryview':>12}  (memoryview: trozo de bytes, solo lectura)")
+    for size in sizes:
+        data = os.urandom(size)
+        if size <= COPY_LIMIT:
+            ct, tag = ffi_cpp.aes_gcm_encrypt(KEY, NONCE, data, AD)
+            assert (bytes(ct), bytes(tag)) == copying_encrypt(data)
+            del ct, tag
+            before = f"{measure(copying_encrypt, data):9.1f} MB/s"
+        else:
+            before = f"{'-':>9}     "
+        after = measure(lambda d: ffi_cpp.aes_gcm_encrypt(KEY, NONCE, d, AD), data)
+        view = memoryview(data)[1:]
+        sliced = measure(lambda v: ffi_cpp.aes_gcm_encrypt(KEY, NONCE, v, AD), view)
+        label = f"{size // UNITS['M']}M" if size >= UNITS['M'] else f"{size // UNITS['K']}K"
+        print(f"   {label:>8} {before} {after:9.1f} MB/s {sliced:9.1f} MB/s")
+        del data, view
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark del tiempo de arranque de `import flora`, `import python.cli` y
+`flora --help`: tiempo de pared del proceso menos el de un intérprete vacío,
+y dependencias pesadas (numpy, Crypto) que llegan a cargarse según
+`python -X importtime`.
+"""
+import os
+import subprocess
+import sys
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+CASES = (
+    ("import flora", ("-c", "import flora, python; python.__version__")),
+    ("import python.cli", ("-c", "import python.cli")),
+    ("flora --help", ("-m", "python.cli", "--help")),
+    ("flora.FloraCryptoSystem", ("-c", "import flora; flora.FloraCryptoSystem")),
+)
+HEAVY = ("numpy", "Crypto")
+
+
+def run(args, importtime=False):
+    """Ejecuta el intérprete con src/ en el path -> (segundos, stderr)."""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    flags = ("-X", "importtime") if importtime else ()
+    t0 = time.perf_counter()
+    result = subprocess.run([sys.executable, *flags, *args], capture_output=True, text=True,
+                            env=env, cwd=SRC, check=True)
+    return time.perf_counter() - t0, result.stderr
+
+
+def heavy_modules(args):
+    loaded = set()
+    for line in run(args, importtime=True)[1].splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            if name.split(".")[0] in HEAVY:
+                loaded.add(name.split(".")[0])
+    return loaded
+
+
+def median(args, runs: int) -> float:
+    return sorted(run(args)[0] for _ in range(runs))[runs // 2]
+
+
+def main():
+    print("🚀 FLORA Import Time Benchmark")
+    print("=" * 60)
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    baseline = median(("-c", "pass"), runs)
+    print(f"   mediana de {runs} ejecuciones; intérprete vacío {baseline * 1000:.1f} ms\n")
+    for label, args in CASES:
+        elapsed = max(0.0, median(args, runs) - baseline)
+        loaded = ", ".join(sorted(heavy_modules(args))) or "-"
+        print(f"   {label:<26} {elapsed * 1000:8.1f} ms   pesados: {loaded}")
+
+
+if __name__ == "__main__":
+    main()
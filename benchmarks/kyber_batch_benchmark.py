@@ -0,0 +1,61 @@
+"""
+Benchmark de encapsulamiento Kyber por lotes: KyberKEM.encaps/decaps (una
+llamada por operación) frente a encaps_many/decaps_many, por variante.
+"""
+import time
+import sys
+import os
+
+# Agregar el directorio src/python al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+try:
+    import kyber_kem
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+
+def rate(func, count: int) -> float:
+    t0 = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - t0)
+
+
+def bench_variant(variant: int, count: int):
+    kem = kyber_kem.try_create_kyber(variant)
+    if kem is None:
+        print(f"   Kyber{variant}: sin backend disponible")
+        return
+    pk, sk = kem.keygen()
+    recipients = [kem.keygen()[0] for _ in range(min(count, 64))]
+    many_keys = (recipients * (count // len(recipients) + 1))[:count]
+
+    # Calentamiento (cachés de claves y matrices)
+    kem.encaps_many(pk, count=8)
+    ciphertexts = [kem.encaps(pk)[0] for _ in range(count)]
+
+    single = rate(lambda: [kem.encaps(pk) for _ in range(count)], count)
+    batched = rate(lambda: kem.encaps_many(pk, count=count), count)
+    multi = rate(lambda: kem.encaps_many(many_keys), count)
+    dec_single = rate(lambda: [kem.decaps(sk, c) for c in ciphertexts], count)
+    dec_batched = rate(lambda: kem.decaps_many(sk, ciphertexts), count)
+
+    print(f"\n🔐 Kyber{variant} ({kem.variant}, {count} operaciones)")
+    print(f"   encaps por llamada:              {single:10.0f} ops/s")
+    print(f"   encaps_many (misma clave):       {batched:10.0f} ops/s  (x{batched / single:.2f})")
+    print(f"   encaps_many ({len(recipients)} destinatarios):  {multi:10.0f} ops/s  (x{multi / single:.2f})")
+    print(f"   decaps por llamada:              {dec_single:10.0f} ops/s")
+    print(f"   decaps_many:                     {dec_batched:10.0f} ops/s  (x{dec_batched / dec_single:.2f})")
+
+
+def main():
+    print("🚀 FLORA Kyber Batch Benchmark")
+    print("=" * 60)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for variant in sorted(kyber_kem.KYBER_VARIANTS.values()):
+        bench_variant(variant, count)
+
+
+if __name__ == "__main__":
+    main()
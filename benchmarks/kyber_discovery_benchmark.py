@@ -0,0 +1,76 @@
+"""
+Benchmark de descubrimiento de backends Kyber: coste de importación, primera
+resolución y construcción repetida de FloraCryptoSystem (patrón de la API REST,
+que crea un sistema por petición).
+"""
+import time
+import statistics
+import sys
+import os
+
+# Agregar el directorio src/python al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+start = time.perf_counter()
+try:
+    import kyber_kem
+    from flora_crypto import FloraCryptoSystem
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+IMPORT_TIME = time.perf_counter() - start
+
+
+def time_calls(func, iterations: int):
+    times = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def report(name: str, times):
+    print(f"   {name:<42} mean={statistics.mean(times) * 1e6:9.1f} µs  "
+          f"median={statistics.median(times) * 1e6:9.1f} µs")
+
+
+def main():
+    print("🚀 FLORA Kyber Discovery Benchmark")
+    print("=" * 60)
+    registry = kyber_kem.get_backend_registry()
+    iterations = 200
+
+    print(f"📦 Importación de kyber_kem + flora_crypto: {IMPORT_TIME * 1000:.2f} ms")
+
+    registry.reset()
+    t0 = time.perf_counter()
+    kem = kyber_kem.try_create_kyber()
+    first_call = time.perf_counter() - t0
+    backend = kem.variant if kem else "ninguno (fallback PBKDF2)"
+    print(f"🔍 Primera resolución ({backend}): {first_call * 1e6:.1f} µs")
+
+    print("\n⏱️  try_create_kyber()")
+    report("cacheado (una resolución por proceso)", time_calls(kyber_kem.try_create_kyber, iterations))
+
+    def uncached():
+        registry.reset()
+        kyber_kem.try_create_kyber()
+    report("sin caché (reintenta imports cada vez)", time_calls(uncached, iterations))
+
+    print("\n⏱️  FloraCryptoSystem() por petición")
+    registry.reset()
+    report("cacheado", time_calls(FloraCryptoSystem, iterations))
+
+    def uncached_system():
+        registry.reset()
+        FloraCryptoSystem()
+    report("sin caché", time_calls(uncached_system, iterations))
+
+    for variant in sorted(kyber_kem.KYBER_VARIANTS.values()):
+        kyber_kem.try_create_kyber(variant)
+    print(f"\n📊 Variantes resueltas: {registry.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark del rate limiting de api/main.py con 100k IPs distintas: listas de
+timestamps por (IP, endpoint) bajo un asyncio.Lock global (implementación
+anterior) frente al contador de ventana deslizante con locks por fragmento, en
+proceso y en la tabla de memoria compartida entre workers.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python.rate_limit import SharedMemoryRateLimitStore, SlidingWindowRateLimiter
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+LIMIT = {"requests": 60, "window": 60}
+ENDPOINT = "/api/v1/encrypt"
+
+
+class TimestampListLimiter:
+    """Réplica de la contabilidad anterior del middleware."""
+
+    def __init__(self):
+        self.storage = {}
+        self.lock = asyncio.Lock()
+
+    async def hit(self, client_ip: str, now: float) -> bool:
+        async with self.lock:
+            per_ip = self.storage.setdefault(client_ip, {})
+            window_start = now - LIMIT["window"]
+            per_ip[ENDPOINT] = [t for t in per_ip.get(ENDPOINT, []) if t > window_start]
+            if len(per_ip[ENDPOINT]) >= LIMIT["requests"]:
+                return False
+            per_ip[ENDPOINT].append(now)
+            return True
+
+
+async def run_old(ips, rounds: int) -> float:
+    limiter = TimestampListLimiter()
+    t0 = time.perf_counter()
+    now = time.time()
+    for r in range(rounds):
+        for ip in ips:
+            await limiter.hit(ip, now + r * 0.01)
+    return time.perf_counter() - t0
+
+
+def run_new(ips, rounds: int, limiter=None) -> float:
+    limiter = limiter or SlidingWindowRateLimiter()
+    t0 = time.perf_counter()
+    now = time.monotonic()
+    for r in range(rounds):
+        for ip in ips:
+            limiter.hit((ip, ENDPOINT), LIMIT["requests"], LIMIT["window"], now + r * 0.01)
+    return time.perf_counter() - t0
+
+
+def measure(name: str, fn, hits: int):
+    elapsed = fn()
+    # Memoria en una segunda pasada (tracemalloc distorsiona los tiempos)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"   {name:<34} {elapsed / hits * 1e6:7.2f} µs/petición   pico {peak / 1024 ** 2:7.1f} MiB")
+
+
+def main():
+    print("🚀 FLORA Rate Limit Benchmark")
+    print("=" * 60)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(count)]
+    hits = count * rounds
+    print(f"   {count} IPs x {rounds} peticiones\n")
+    measure("Listas + asyncio.Lock (antes)", lambda: asyncio.run(run_old(ips, rounds)), hits)
+    measure("Ventana deslizante fragmentada", lambda: run_new(ips, rounds), hits)
+    shared = SharedMemoryRateLimitStore(os.path.join(tempfile.mkdtemp(), "limits.shm"))
+    measure("Tabla compartida (mmap + fcntl)", lambda: run_new(ips, rounds, shared), hits)
+    shared.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark de rotación de contraseña: descifrar y re-cifrar cada bundle a mano
+(dos PBKDF2 por bundle) frente a `flora rekey` (una derivación por master_salt
+distinto y re-cifrado en un pool de procesos).
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python.bulk_ops import rekey_tree
+    from python.flora_crypto import FloraCryptoSystem
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+OLD, NEW = "benchmark-old", "benchmark-new"
+
+
+def make_bundles(root: Path, files: int, salts: int, size: int) -> None:
+    flora = FloraCryptoSystem(use_kyber=False, scope_sessions=True)
+    keys = []
+    for _ in range(salts):
+        salt = os.urandom(32)
+        keys.append((salt, flora.generate_master_key(OLD, salt)[0]))
+    for i in range(files):
+        salt, key = keys[i % salts]
+        bundle = flora.encrypt_message(os.urandom(size), key, "cli_default_session")
+        bundle['master_salt'] = salt.hex()
+        path = root / f"dir{i % 20:02d}" / f"b{i:06d}.enc.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(bundle))
+
+
+def by_hand(root: Path, limit: int) -> float:
+    """decrypt + encrypt por bundle, como se haría con la CLI (muestra de `limit`)."""
+    paths = sorted(root.rglob("*.enc.json"))[:limit]
+    t0 = time.perf_counter()
+    for path in paths:
+        flora = FloraCryptoSystem(use_kyber=False)
+        bundle = json.loads(path.read_text())
+        old_key, _ = flora.generate_master_key(OLD, bytes.fromhex(bundle['master_salt']))
+        plaintext = flora.decrypt_message(bundle, old_key)
+        new_salt = os.urandom(32)
+        new_key, _ = flora.generate_master_key(NEW, new_salt)
+        out = flora.encrypt_message(plaintext, new_key, bundle['session_id'])
+        out['master_salt'] = new_salt.hex()
+        path.with_suffix(".new").write_text(json.dumps(out))
+    return len(paths) / (time.perf_counter() - t0)
+
+
+def main():
+    print("🚀 FLORA Rekey Benchmark")
+    print("=" * 60)
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    size = 1024
+    print(f"   {files} bundles de {size} bytes, CPUs={os.cpu_count()}\n")
+    for salts in (1, 16, files):
+        work = Path(tempfile.mkdtemp())
+        try:
+            make_bundles(work, files, salts, size)
+            rate = by_hand(work, min(files, 50))
+            for path in work.rglob("*.new"):
+                path.unlink()
+            result = rekey_tree(work, OLD, NEW, workers)
+            assert not result['failed'], result['failed'][:3]
+            print(f"   master_salt distintos = {salts}")
+            print(f"      {'a mano (2 PBKDF2/bundle)':<26} {rate:9.1f} bundles/s  KDF={2 * files}")
+            print(f"      {'flora rekey':<26} {result['files_per_s']:9.1f} bundles/s  KDF={result['kdf_derivations']}"
+                  f" ({result['kdf_saved']} evitadas, {result['kdf_seconds']:.2f} s)  {result['workers']} procesos")
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark de los caminos paralelos (Rayon) de flora_rs:
+- rust_encrypt_batch frente a un bucle de rust_encrypt (mensajes pequeños)
+- rust_encrypt_segmented frente a stream_container.StreamEncryptor (buffer grande)
+
+Requiere el módulo compilado (cd src/rust/flora-rs && maturin develop --release).
+Uso: python benchmarks/rust_batch_benchmark.py [mensajes] [MiB del buffer]
+"""
+import os
+import sys
+import time
+
+# Agregar el directorio src/python al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+try:
+    from ffi_rust import (rust_decrypt_segmented, rust_encrypt, rust_encrypt_batch,
+                          rust_decrypt_batch, rust_encrypt_segmented)
+    from stream_container import StreamDecryptor, StreamEncryptor
+except ImportError as e:
+    print(f"❌ Error importando flora_rs: {e}")
+    sys.exit(1)
+
+KEY = os.urandom(32)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def bench_batch(count: int):
+    print(f"\n📦 Lote de {count} mensajes")
+    for size in (64, 1024, 16 * 1024):
+        messages = [os.urandom(size) for _ in range(count)]
+        _, loop = timed(lambda: [rust_encrypt(KEY, m) for m in messages])
+        packed, batch = timed(lambda: rust_encrypt_batch(KEY, messages))
+        assert rust_decrypt_batch(KEY, packed) == messages
+        print(f"   {size:>6} B  bucle {count / loop:>12,.0f} msg/s   lote {count / batch:>12,.0f} msg/s"
+              f"   ({loop / batch:.1f}x)")
+
+
+def bench_segmented(mib: int):
+    print(f"\n🧱 Contenedor FLS1 de {mib} MiB")
+    data = os.urandom(mib * 1024 * 1024)
+
+    def python_encrypt():
+        enc = StreamEncryptor(KEY, b"")
+        return enc.update(data) + enc.finalize()
+
+    _, py_time = timed(python_encrypt)
+    container, rs_time = timed(lambda: rust_encrypt_segmented(KEY, data))
+    dec = StreamDecryptor(lambda salt: KEY)
+    assert dec.update(container) == data
+    dec.finalize()
+    assert rust_decrypt_segmented(KEY, python_encrypt()) == data
+    print(f"   StreamEncryptor {mib / py_time:10.1f} MiB/s")
+    print(f"   Rust (Rayon)    {mib / rs_time:10.1f} MiB/s   ({py_time / rs_time:.1f}x)")
+
+
+def main():
+    print("🚀 FLORA Rust Batch Benchmark")
+    print("=" * 60)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    mib = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    print(f"   CPUs={os.cpu_count()}")
+    bench_batch(count)
+    bench_segmented(mib)
+
+
+if __name__ == "__main__":
+    main()
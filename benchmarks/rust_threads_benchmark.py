@@ -0,0 +1,58 @@
+"""
+Benchmark de flora_rs desde varios hilos de Python. Las llamadas liberan el
+GIL durante el cifrado, así que el throughput agregado debe crecer con el
+número de hilos hasta el número de núcleos.
+
+Requiere el módulo compilado (cd src/rust/flora-rs && maturin develop --release).
+Uso: python benchmarks/rust_threads_benchmark.py [tamaño de mensaje en KiB] [mensajes por hilo]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio src/python al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'python'))
+
+try:
+    from ffi_rust import rust_decrypt, rust_encrypt
+except ImportError as e:
+    print(f"❌ Error importando flora_rs: {e}")
+    sys.exit(1)
+
+KEY = os.urandom(32)
+AD = b"flora-benchmark"
+
+
+def run(threads: int, message: bytes, per_thread: int) -> float:
+    """MB/s agregados cifrando `per_thread` mensajes en cada hilo."""
+    def work(_):
+        for _ in range(per_thread):
+            rust_encrypt(KEY, message, AD)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(work, range(threads)))
+        elapsed = time.perf_counter() - t0
+    return threads * per_thread * len(message) / elapsed / 1e6
+
+
+def main():
+    print("🚀 FLORA Rust Threads Benchmark")
+    print("=" * 60)
+    size = (int(sys.argv[1]) if len(sys.argv) > 1 else 1024) * 1024
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    message = os.urandom(size)
+    nonce, ciphertext = rust_encrypt(KEY, message, AD)
+    assert isinstance(ciphertext, bytes) and rust_decrypt(KEY, nonce, ciphertext, AD) == message
+    assert rust_decrypt(KEY, nonce, memoryview(bytearray(ciphertext)), AD) == message
+    print(f"   mensajes de {size // 1024} KiB, {per_thread} por hilo, CPUs={os.cpu_count()}\n")
+    base = None
+    for threads in sorted({1, 2, 4, 8, os.cpu_count() or 1}):
+        rate = run(threads, message, per_thread)
+        base = base or rate
+        print(f"   {threads:>3} hilos {rate:10.1f} MB/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark de carga de api/main.py: middlewares @app.middleware("http")
+(implementación anterior: cabeceras, rate limiting leyendo y parseando el JSON
+del cuerpo) frente a los middlewares ASGI puros. Las peticiones se inyectan
+directamente en la aplicación ASGI con N clientes concurrentes, de modo que se
+mide la pila de middlewares y los handlers sin el coste de la red.
+"""
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+try:
+    from fastapi import FastAPI, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.middleware.trustedhost import TrustedHostMiddleware
+    from fastapi.responses import JSONResponse
+    spec = importlib.util.spec_from_file_location("flora_secure_api_main", os.path.join(ROOT, "api", "main.py"))
+    secure_api = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(secure_api)
+    from python.metrics import MetricsMiddleware
+    from python.rate_limit import SlidingWindowRateLimiter
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+CONFIG = secure_api.SECURITY_CONFIG
+AUTH = (b"authorization", b"Bearer test_api_key_12345678901234567890")
+
+
+def build_legacy_app() -> FastAPI:
+    """Réplica de la pila anterior sobre las mismas rutas."""
+    legacy = FastAPI()
+    legacy.router.routes.extend(secure_api.app.router.routes)
+    limiter = SlidingWindowRateLimiter()
+
+    @legacy.middleware("http")
+    async def security_headers_middleware(request: Request, call_next):
+        response = await call_next(request)
+        for header, value in CONFIG["security_headers"].items():
+            response.headers[header] = value
+        for h in list(response.headers.keys()):
+            if h.lower() == "server":
+                del response.headers[h]
+        return response
+
+    @legacy.middleware("http")
+    async def rate_limit_middleware(request: Request, call_next):
+        endpoint = request.url.path
+        rate_limit = CONFIG["rate_limits"].get(endpoint, CONFIG["rate_limits"]["default"])
+        burst_limit = CONFIG["burst_limits"].get(endpoint)
+        apply_burst = False
+        if burst_limit and request.method == "POST":
+            body_text = (await request.body()).decode("utf-8", errors="ignore")
+            try:
+                data_val = json.loads(body_text).get("data")
+                apply_burst = isinstance(data_val, str) and data_val.startswith("test_")
+            except Exception:
+                apply_burst = bool(re.search(r'"data"\s*:\s*"test_\d+"', body_text))
+        now = time.monotonic()
+        key = (request.client.host, endpoint)
+        if not limiter.hit(key, rate_limit["requests"], rate_limit["window"], now).allowed:
+            return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded."})
+        if apply_burst and not limiter.hit(("burst",) + key, burst_limit["requests"], burst_limit["window"], now).allowed:
+            return JSONResponse(status_code=429, content={"detail": "Burst rate limit exceeded."})
+        return await call_next(request)
+
+    legacy.add_middleware(CORSMiddleware, allow_origins=["http://localhost:3000"], allow_credentials=True,
+                          allow_methods=["GET", "POST"], allow_headers=["Authorization", "Content-Type"])
+    legacy.add_middleware(TrustedHostMiddleware, allowed_hosts=["localhost", "127.0.0.1", "*.localhost"])
+    legacy.add_middleware(MetricsMiddleware, app_name="secure_api_legacy")
+    return legacy
+
+
+async def call(app, method: str, path: str, body: bytes = b"") -> int:
+    headers = [(b"host", b"localhost"), AUTH]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": headers, "client": ("10.0.0.1", 50000), "server": ("localhost", 80)}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    result = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+
+    await app(scope, receive, send)
+    return result["status"]
+
+
+async def load(app, method: str, path: str, body: bytes, total: int, concurrency: int) -> float:
+    remaining = [total]
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            status = await call(app, method, path, body)
+            assert status == 200, status
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return total / (time.perf_counter() - t0)
+
+
+def main():
+    print("🚀 FLORA Secure API Load Benchmark")
+    print("=" * 60)
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    # Límites holgados: se mide el coste de la pila, no los rechazos
+    for limit in CONFIG["rate_limits"].values():
+        limit["requests"] = 10 ** 9
+    CONFIG["burst_limits"]["/api/v1/encrypt"]["requests"] = 10 ** 9
+    print(f"   {total} peticiones, {concurrency} clientes concurrentes\n")
+
+    cases = [
+        ("GET /health", "GET", "/health", b""),
+        ("POST /api/v1/encrypt", "POST", "/api/v1/encrypt", json.dumps({"data": "registro de prueba"}).encode()),
+        ("POST /api/v1/encrypt (test_)", "POST", "/api/v1/encrypt", json.dumps({"data": "test_1"}).encode()),
+    ]
+    apps = [("@app.middleware (antes)", build_legacy_app()), ("ASGI puro", secure_api.app)]
+    for label, method, path, body in cases:
+        print(f"⏱️  {label}")
+        for name, app in apps:
+            asyncio.run(load(app, method, path, body, total // 10, concurrency))  # calentamiento
+            rps = asyncio.run(load(app, method, path, body, total, concurrency))
+            print(f"   {name:<26} {rps:9.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
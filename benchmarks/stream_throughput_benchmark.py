@@ -0,0 +1,133 @@
+"""
+Benchmark de throughput de /encrypt/stream y /decrypt/stream contra un uvicorn
+local. Sube cuerpos de 1 MB a 2 GB en streaming (sin cargarlos en memoria),
+guarda el contenedor en un fichero temporal y lo descifra de vuelta.
+
+Uso: python benchmarks/stream_throughput_benchmark.py [1M,16M,256M,2G]
+"""
+import hashlib
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+# Agregar el directorio src al path (la API usa imports relativos del paquete python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    import uvicorn
+    from python.api import API_KEY, app
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+PORT = int(os.getenv("FLORA_BENCH_PORT", "8765"))
+BLOCK = 1024 * 1024
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    return int(text[:-1]) * UNITS[text[-1]] if text[-1] in UNITS else int(text)
+
+
+def start_server() -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def generate(size: int, digest):
+    """Cuerpo pseudoaleatorio generado al vuelo (memoria constante)."""
+    block = os.urandom(BLOCK)
+    sent = 0
+    while sent < size:
+        piece = block[:min(BLOCK, size - sent)]
+        digest.update(piece)
+        sent += len(piece)
+        yield piece
+
+
+def read_file(path: str):
+    with open(path, "rb") as fh:
+        while True:
+            piece = fh.read(BLOCK)
+            if not piece:
+                return
+            yield piece
+
+
+def duplex_post(path: str, body, sink) -> None:
+    """POST con cuerpo chunked enviado desde un hilo mientras se lee la respuesta.
+
+    Los endpoints de streaming responden mientras aún reciben: un cliente que
+    envía todo el cuerpo antes de leer (httpx, requests) se bloquea en cuanto
+    se llenan los buffers del socket. curl, por ejemplo, sí es full-duplex.
+    """
+    sock = socket.create_connection(("127.0.0.1", PORT))
+    head = (f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nX-API-Key: {API_KEY}\r\n"
+            "X-Flora-Password: benchmark-password\r\nContent-Type: application/octet-stream\r\n"
+            "Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n").encode()
+
+    def writer():
+        sock.sendall(head)
+        for piece in body:
+            sock.sendall(b"%x\r\n" % len(piece) + piece + b"\r\n")
+        sock.sendall(b"0\r\n\r\n")
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    reader = sock.makefile("rb")
+    status = reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(status.decode().strip())
+    while reader.readline() not in (b"\r\n", b""):
+        pass
+    while True:
+        size = int(reader.readline().split(b";")[0], 16)
+        if size == 0:
+            break
+        sink(reader.read(size))
+        reader.readline()
+    thread.join()
+    sock.close()
+
+
+def bench(size: int):
+    source_digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(delete=False) as container:
+        t0 = time.perf_counter()
+        duplex_post("/encrypt/stream", generate(size, source_digest), container.write)
+        enc_time = time.perf_counter() - t0
+
+    try:
+        plain_digest = hashlib.sha256()
+        t0 = time.perf_counter()
+        duplex_post("/decrypt/stream", read_file(container.name), plain_digest.update)
+        dec_time = time.perf_counter() - t0
+    finally:
+        os.unlink(container.name)
+
+    ok = "✅" if plain_digest.digest() == source_digest.digest() else "❌"
+    mb = size / 1024 ** 2
+    print(f"   {mb:9.0f} MB   encrypt {mb / enc_time:8.1f} MB/s   decrypt {mb / dec_time:8.1f} MB/s   {ok}")
+
+
+def main():
+    sizes = [parse_size(s) for s in (sys.argv[1] if len(sys.argv) > 1 else "1M,16M,256M").split(",")]
+    print("🚀 FLORA Stream Throughput Benchmark")
+    print("=" * 60)
+    server = start_server()
+    try:
+        for size in sizes:
+            bench(size)
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
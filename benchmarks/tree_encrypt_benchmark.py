@@ -0,0 +1,75 @@
+"""
+Benchmark de cifrado de directorios: un `flora encrypt` por fichero (PBKDF2 y
+sistema nuevos en cada uno, sin contar el arranque del proceso) frente a
+`flora encrypt-tree` (clave derivada una vez, contenedores por segmentos en un
+pool de procesos).
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python.bulk_ops import decrypt_tree, encrypt_tree
+    from python.flora_crypto import FloraCryptoSystem
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+PASSWORD = "benchmark-password"
+
+
+def make_tree(root: Path, files: int, size: int) -> None:
+    for i in range(files):
+        path = root / f"dir{i % 50:02d}" / f"file{i:06d}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(os.urandom(size))
+
+
+def per_file_encrypt(src: Path, dst: Path, limit: int) -> float:
+    """Réplica del comando encrypt aplicado fichero a fichero (muestra de `limit` ficheros)."""
+    paths = sorted(p for p in src.rglob("*") if p.is_file())[:limit]
+    t0 = time.perf_counter()
+    for path in paths:
+        flora = FloraCryptoSystem(use_kyber=False)
+        master_salt = os.urandom(32)
+        master_key, _ = flora.generate_master_key(PASSWORD, master_salt)
+        enc = flora.encrypt_message(path.read_bytes(), master_key, "cli_default_session")
+        enc['master_salt'] = master_salt.hex()
+        out = dst / (str(path.relative_to(src)) + ".enc.json")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(enc, ensure_ascii=False, indent=2))
+    return len(paths) / (time.perf_counter() - t0)
+
+
+def main():
+    print("🚀 FLORA Tree Encryption Benchmark")
+    print("=" * 60)
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 16 * 1024
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    work = Path(tempfile.mkdtemp())
+    try:
+        make_tree(work / "src", files, size)
+        print(f"   {files} ficheros de {size // 1024} KiB, CPUs={os.cpu_count()}\n")
+
+        rate = per_file_encrypt(work / "src", work / "old", min(files, 200))
+        print(f"   {'encrypt por fichero (antes)':<28} {rate:9.1f} ficheros/s  {rate * size / 1e6:7.1f} MB/s")
+        for name, run in (("encrypt-tree", lambda: encrypt_tree(work / "src", work / "enc", PASSWORD, workers)),
+                          ("decrypt-tree", lambda: decrypt_tree(work / "enc", work / "dec", PASSWORD, workers))):
+            result = run()
+            assert not result['failed'], result['failed'][:3]
+            print(f"   {name:<28} {result['files_per_s']:9.1f} ficheros/s  {result['mb_per_s']:7.1f} MB/s"
+                  f"  ({result['workers']} procesos)")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
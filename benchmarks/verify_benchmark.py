@@ -0,0 +1,79 @@
+"""
+Benchmark de verificación de integridad: `flora decrypt` por bundle (PBKDF2 en
+cada uno y texto plano escrito) frente a `flora verify` (una derivación por
+master_salt, solo comprobación de tags, en un pool de procesos).
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from python.bulk_ops import verify_paths
+    from python.flora_crypto import FloraCryptoSystem
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+PASSWORD = "benchmark-password"
+
+
+def make_bundles(root: Path, files: int, salts: int, size: int) -> None:
+    flora = FloraCryptoSystem(use_kyber=False, scope_sessions=True)
+    keys = []
+    for _ in range(salts):
+        salt = os.urandom(32)
+        keys.append((salt, flora.generate_master_key(PASSWORD, salt)[0]))
+    for i in range(files):
+        salt, key = keys[i % salts]
+        bundle = flora.encrypt_message(os.urandom(size), key, "cli_default_session")
+        bundle['master_salt'] = salt.hex()
+        path = root / f"dir{i % 50:02d}" / f"b{i:06d}.enc.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(bundle))
+
+
+def per_bundle_decrypt(root: Path, limit: int) -> float:
+    """Réplica del comando decrypt aplicado bundle a bundle (muestra de `limit`)."""
+    paths = sorted(root.rglob("*.enc.json"))[:limit]
+    t0 = time.perf_counter()
+    for path in paths:
+        flora = FloraCryptoSystem(use_kyber=False)
+        bundle = json.loads(path.read_text())
+        master_key, _ = flora.generate_master_key(PASSWORD, bytes.fromhex(bundle['master_salt']))
+        path.with_suffix(".dec").write_bytes(flora.decrypt_message(bundle, master_key))
+    return len(paths) / (time.perf_counter() - t0)
+
+
+def main():
+    print("🚀 FLORA Verify Benchmark")
+    print("=" * 60)
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    salts = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    size = 4096
+    work = Path(tempfile.mkdtemp())
+    try:
+        make_bundles(work, files, salts, size)
+        print(f"   {files} bundles de {size} bytes, {salts} master_salt distintos, CPUs={os.cpu_count()}\n")
+        rate = per_bundle_decrypt(work, min(files, 100))
+        for path in work.rglob("*.dec"):
+            path.unlink()
+        print(f"   {'decrypt por bundle (antes)':<28} {rate:9.1f} bundles/s  {rate * 60:10.0f} bundles/min")
+        result = verify_paths([work], PASSWORD, workers)
+        assert result['ok'], result['failed'][:3]
+        rate = result['files_per_s']
+        print(f"   {'flora verify':<28} {rate:9.1f} bundles/s  {rate * 60:10.0f} bundles/min"
+              f"  ({result['kdf_derivations']} KDF, {result['workers']} procesos)")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
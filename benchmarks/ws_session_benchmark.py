@@ -0,0 +1,68 @@
+"""
+Benchmark del canal de sesión WebSocket (/ws/session) frente a /encrypt por
+HTTP con handle de clave: muchos mensajes cortos en una misma sesión.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Agregar el directorio src al path (la API usa imports relativos del paquete python)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from fastapi.testclient import TestClient
+    from python.api import app
+    from python.session_channel import OP_ENCRYPT, STATUS_OK, pack_request, unpack_response
+except ImportError as e:
+    print(f"❌ Error importando módulos: {e}")
+    sys.exit(1)
+
+HEADERS = {"X-API-Key": os.getenv("FLORA_API_KEY", "flora-dev-key")}
+
+
+def bench_http(client: TestClient, handle: str, messages):
+    t0 = time.perf_counter()
+    for message in messages:
+        response = client.post("/encrypt", headers=HEADERS,
+                               json={"key_handle": handle, "message": message, "session_id": "bench-http"})
+        assert response.status_code == 200
+    return time.perf_counter() - t0
+
+
+def bench_ws(client: TestClient, handle: str, messages, window: int):
+    with client.websocket_connect("/ws/session", headers=HEADERS) as ws:
+        ws.send_text(json.dumps({"key_handle": handle, "session_id": "bench-ws"}))
+        assert ws.receive_json()["type"] == "ready"
+        t0 = time.perf_counter()
+        sent = received = 0
+        while received < len(messages):
+            # Ventana de peticiones en vuelo (pipelining)
+            while sent < len(messages) and sent - received < window:
+                ws.send_bytes(pack_request(OP_ENCRYPT, sent, messages[sent].encode()))
+                sent += 1
+            status, _, _ = unpack_response(ws.receive_bytes())
+            assert status == STATUS_OK
+            received += 1
+        return time.perf_counter() - t0
+
+
+def main():
+    print("🚀 FLORA WebSocket Session Benchmark")
+    print("=" * 60)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    messages = [f"mensaje corto {i}" for i in range(count)]
+    os.environ.setdefault("FLORA_KEY_STORE", os.path.join(tempfile.mkdtemp(), "key_handles.db"))
+
+    with TestClient(app) as client:
+        handle = client.post("/keys", headers=HEADERS, json={"password": "benchmark-password"}).json()["key_handle"]
+        elapsed = bench_http(client, handle, messages)
+        print(f"   {'HTTP /encrypt (key_handle)':<32} {count / elapsed:9.0f} msg/s")
+        for window in (1, 16, 64):
+            elapsed = bench_ws(client, handle, messages, window)
+            print(f"   {'WS /ws/session (ventana ' + str(window) + ')':<32} {count / elapsed:9.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
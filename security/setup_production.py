@@ -56,6 +56,8 @@ EXPOSE 8000
 ENV FLORA_ENV=production
 ENV FLORA_DEBUG=False
 ENV FLORA_LOG_LEVEL=INFO
+# Rate limiting global para los 4 workers
+ENV FLORA_RATE_LIMIT_STORE=/tmp/flora-rate-limit.shm
 
 # Comando de inicio
 CMD ["uvicorn", "main:app", "--host", "0.0.0.0", "--port", "8000", "--workers", "4"]
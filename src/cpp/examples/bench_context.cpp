@@ -0,0 +1,40 @@
+// Mensajes pequeños: AesGcm::encrypt por llamada frente a AesGcmContext reutilizado
+#include "flora/aes_gcm.hpp"
+#include <chrono>
+#include <cstdio>
+#include <vector>
+
+using namespace std;
+using namespace flora;
+
+template <typename F>
+static double ops_per_s(F&& fn){
+	using clock = chrono::steady_clock;
+	size_t ops = 0;
+	auto t0 = clock::now();
+	double elapsed = 0;
+	do{
+		for(int i=0; i<1000; i++) fn();
+		ops += 1000;
+		elapsed = chrono::duration<double>(clock::now() - t0).count();
+	}while(elapsed < 0.5);
+	return ops / elapsed;
+}
+
+int main(){
+	vector<uint8_t> key(32, 0x11), nonce(12, 0x22), ad = { 'A','B','C' }, tag(16);
+	AesGcmContext ctx(key.data(), key.size());
+	printf("%8s %14s %14s %8s\n", "size", "per-call", "context", "speedup");
+	for(size_t size : {16, 64, 256, 1024, 4096, 16384}){
+		vector<uint8_t> pt(size, 0x33), ct(size);
+		double per_call = ops_per_s([&]{
+			AesGcm::encrypt(key.data(), key.size(), nonce.data(), nonce.size(), ad.data(), ad.size(),
+							pt.data(), pt.size(), ct.data(), tag.data());
+		});
+		double reused = ops_per_s([&]{
+			ctx.encrypt(nonce.data(), nonce.size(), ad.data(), ad.size(), pt.data(), pt.size(), ct.data(), tag.data());
+		});
+		printf("%7zuB %10.0f op/s %10.0f op/s %7.2fx\n", size, per_call, reused, reused / per_call);
+	}
+	return 0;
+}
@@ -5,6 +5,9 @@
 #include <string>
 #include <vector>
 
+// EVP_CIPHER_CTX de OpenSSL (sin exponer sus cabeceras)
+struct evp_cipher_ctx_st;
+
 namespace flora {
 
 struct AesGcmCiphertext {
@@ -26,6 +29,65 @@ public:
 									 const std::vector<uint8_t>& ciphertext,
 									 const std::vector<uint8_t>& tag,
 									 const std::vector<uint8_t>& associated_data = {});
+
+	// Variantes sobre buffers del llamante, sin copias intermedias:
+	// ciphertext/plaintext tienen la longitud de la entrada y tag 16 bytes
+	static void encrypt(const uint8_t* key, size_t key_len,
+						const uint8_t* nonce, size_t nonce_len,
+						const uint8_t* ad, size_t ad_len,
+						const uint8_t* plaintext, size_t pt_len,
+						uint8_t* ciphertext, uint8_t* tag);
+
+	static void decrypt(const uint8_t* key, size_t key_len,
+						const uint8_t* nonce, size_t nonce_len,
+						const uint8_t* ad, size_t ad_len,
+						const uint8_t* ciphertext, size_t ct_len,
+						const uint8_t* tag, size_t tag_len,
+						uint8_t* plaintext);
+
+	// Lotes de N mensajes empaquetados: el mensaje i ocupa [offsets[i], offsets[i]+lengths[i])
+	// de `input` y su resultado la misma región de `output`; nonces (N*12) y tags (N*16)
+	// consecutivos. status[i] = 0 o -1; en descifrado, un mensaje que no autentica
+	// deja su región de salida a cero. threads: 0 = uno por núcleo, 1 = hilo llamante.
+	// Devuelve el número de mensajes con error.
+	static size_t encrypt_batch(const uint8_t* key, size_t key_len,
+								const uint8_t* nonces,
+								const uint8_t* ad, size_t ad_len,
+								const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+								uint8_t* output, uint8_t* tags,
+								int* status, size_t threads = 0);
+
+	static size_t decrypt_batch(const uint8_t* key, size_t key_len,
+								const uint8_t* nonces,
+								const uint8_t* ad, size_t ad_len,
+								const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+								const uint8_t* tags, uint8_t* output,
+								int* status, size_t threads = 0);
+};
+
+// Contexto con la clave ya inicializada (key schedule de AES y subclave GHASH):
+// cada llamada solo fija el nonce. No es seguro compartir un contexto entre hilos.
+class AesGcmContext {
+public:
+	AesGcmContext(const uint8_t* key, size_t key_len);
+	~AesGcmContext();
+	AesGcmContext(const AesGcmContext&) = delete;
+	AesGcmContext& operator=(const AesGcmContext&) = delete;
+
+	void encrypt(const uint8_t* nonce, size_t nonce_len,
+				 const uint8_t* ad, size_t ad_len,
+				 const uint8_t* plaintext, size_t pt_len,
+				 uint8_t* ciphertext, uint8_t* tag);
+
+	void decrypt(const uint8_t* nonce, size_t nonce_len,
+				 const uint8_t* ad, size_t ad_len,
+				 const uint8_t* ciphertext, size_t ct_len,
+				 const uint8_t* tag, size_t tag_len,
+				 uint8_t* plaintext);
+
+private:
+	::evp_cipher_ctx_st* enc_;
+	::evp_cipher_ctx_st* dec_;
 };
 
 } // namespace flora
@@ -29,6 +29,53 @@ FLORA_API int flora_aes_gcm_decrypt(
 	const uint8_t* tag, size_t tag_len,
 	uint8_t* plaintext, size_t* pt_len);
 
+// Lotes de N mensajes en un solo cruce de la frontera nativa. El mensaje i ocupa
+// input[offsets[i] .. offsets[i]+lengths[i]) y su resultado la misma región de
+// output (mismo tamaño que input); nonces: N*12 bytes, tags: N*16 bytes, ad común.
+// statuses[i]: 0 en éxito, !=0 si ese mensaje falla (en descifrado su salida
+// queda a cero). threads: 0 = uno por núcleo, 1 = solo el hilo llamante.
+// Devuelve el número de mensajes fallidos, o <0 si los argumentos no son válidos.
+FLORA_API int flora_aes_gcm_encrypt_batch(
+	const uint8_t* key, size_t key_len,
+	const uint8_t* nonces,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+	uint8_t* output, uint8_t* tags,
+	int* statuses, size_t threads);
+
+FLORA_API int flora_aes_gcm_decrypt_batch(
+	const uint8_t* key, size_t key_len,
+	const uint8_t* nonces,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+	const uint8_t* tags, uint8_t* output,
+	int* statuses, size_t threads);
+
+// Contexto reutilizable: la clave se inicializa una vez en flora_ctx_new y
+// cada llamada solo cambia el nonce. NULL si la clave no es válida.
+// Un contexto no debe usarse desde varios hilos a la vez.
+typedef struct flora_ctx flora_ctx;
+
+FLORA_API flora_ctx* flora_ctx_new(const uint8_t* key, size_t key_len);
+
+FLORA_API int flora_ctx_encrypt(
+	flora_ctx* ctx,
+	const uint8_t* nonce, size_t nonce_len,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* plaintext, size_t pt_len,
+	uint8_t* ciphertext, size_t* ct_len,
+	uint8_t* tag, size_t tag_len);
+
+FLORA_API int flora_ctx_decrypt(
+	flora_ctx* ctx,
+	const uint8_t* nonce, size_t nonce_len,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* ciphertext, size_t ct_len,
+	const uint8_t* tag, size_t tag_len,
+	uint8_t* plaintext, size_t* pt_len);
+
+FLORA_API void flora_ctx_free(flora_ctx* ctx);
+
 }
 
 
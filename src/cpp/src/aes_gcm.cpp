@@ -1,6 +1,13 @@
 #include "flora/aes_gcm.hpp"
 #include <openssl/evp.h>
+#include <algorithm>
+#include <atomic>
+#include <climits>
+#include <cstring>
+#include <memory>
 #include <stdexcept>
+#include <thread>
+#include <vector>
 
 using namespace std;
 
@@ -10,38 +17,207 @@ static void ensure_ok(int ok, const char* msg){
 	if(!ok) throw runtime_error(msg);
 }
 
+using CipherCtx = unique_ptr<EVP_CIPHER_CTX, decltype(&EVP_CIPHER_CTX_free)>;
+
+static const EVP_CIPHER* gcm_cipher(size_t key_len){
+	switch(key_len){
+		case 16: return EVP_aes_128_gcm();
+		case 24: return EVP_aes_192_gcm();
+		case 32: return EVP_aes_256_gcm();
+		default: throw runtime_error("AES-GCM key must be 16, 24 or 32 bytes");
+	}
+}
+
+static CipherCtx new_ctx(){
+	CipherCtx ctx(EVP_CIPHER_CTX_new(), EVP_CIPHER_CTX_free);
+	if(!ctx) throw runtime_error("EVP_CIPHER_CTX_new failed");
+	return ctx;
+}
+
+// EVP trabaja con longitudes int: los buffers de más de 1 GiB se procesan por tramos
+static const size_t MAX_UPDATE = size_t(1) << 30;
+
+static void update_all(EVP_CIPHER_CTX* ctx, bool enc, uint8_t* out, const uint8_t* in, size_t len){
+	int n = 0;
+	for(size_t off = 0; off < len; off += MAX_UPDATE){
+		int part = (int)min(MAX_UPDATE, len - off);
+		if(enc) ensure_ok(EVP_EncryptUpdate(ctx, out + off, &n, in + off, part)==1, "enc update failed");
+		else ensure_ok(EVP_DecryptUpdate(ctx, out + off, &n, in + off, part)==1, "dec update failed");
+	}
+}
+
+void AesGcm::encrypt(const uint8_t* key, size_t key_len,
+					 const uint8_t* nonce, size_t nonce_len,
+					 const uint8_t* ad, size_t ad_len,
+					 const uint8_t* plaintext, size_t pt_len,
+					 uint8_t* ciphertext, uint8_t* tag){
+	if(nonce_len!=12) throw runtime_error("AES-GCM nonce must be 12 bytes");
+	if(ad_len > INT_MAX) throw runtime_error("AES-GCM associated data too long");
+	const EVP_CIPHER* cipher = gcm_cipher(key_len);
+	CipherCtx ctx = new_ctx();
+	int len=0;
+	ensure_ok(EVP_EncryptInit_ex(ctx.get(), cipher, nullptr, nullptr, nullptr)==1, "EncryptInit failed");
+	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx.get(), EVP_CTRL_GCM_SET_IVLEN, (int)nonce_len, nullptr)==1, "set ivlen failed");
+	ensure_ok(EVP_EncryptInit_ex(ctx.get(), nullptr, nullptr, key, nonce)==1, "key/iv init failed");
+	if(ad && ad_len){
+		ensure_ok(EVP_EncryptUpdate(ctx.get(), nullptr, &len, ad, (int)ad_len)==1, "aad failed");
+	}
+	update_all(ctx.get(), true, ciphertext, plaintext, pt_len);
+	// GCM no retiene bloques: Final no escribe bytes
+	ensure_ok(EVP_EncryptFinal_ex(ctx.get(), ciphertext + pt_len, &len)==1, "enc final failed");
+	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx.get(), EVP_CTRL_GCM_GET_TAG, 16, tag)==1, "get tag failed");
+}
+
+void AesGcm::decrypt(const uint8_t* key, size_t key_len,
+					 const uint8_t* nonce, size_t nonce_len,
+					 const uint8_t* ad, size_t ad_len,
+					 const uint8_t* ciphertext, size_t ct_len,
+					 const uint8_t* tag, size_t tag_len,
+					 uint8_t* plaintext){
+	if(nonce_len!=12) throw runtime_error("AES-GCM nonce must be 12 bytes");
+	if(tag_len!=16) throw runtime_error("AES-GCM tag must be 16 bytes");
+	if(ad_len > INT_MAX) throw runtime_error("AES-GCM associated data too long");
+	const EVP_CIPHER* cipher = gcm_cipher(key_len);
+	CipherCtx ctx = new_ctx();
+	int len=0;
+	ensure_ok(EVP_DecryptInit_ex(ctx.get(), cipher, nullptr, nullptr, nullptr)==1, "DecryptInit failed");
+	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx.get(), EVP_CTRL_GCM_SET_IVLEN, (int)nonce_len, nullptr)==1, "set ivlen failed");
+	ensure_ok(EVP_DecryptInit_ex(ctx.get(), nullptr, nullptr, key, nonce)==1, "key/iv init failed");
+	if(ad && ad_len){
+		ensure_ok(EVP_DecryptUpdate(ctx.get(), nullptr, &len, ad, (int)ad_len)==1, "aad failed");
+	}
+	update_all(ctx.get(), false, plaintext, ciphertext, ct_len);
+	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx.get(), EVP_CTRL_GCM_SET_TAG, (int)tag_len, (void*)tag)==1, "set tag failed");
+	if(EVP_DecryptFinal_ex(ctx.get(), plaintext + ct_len, &len)<=0) throw runtime_error("GCM tag verification failed");
+}
+
+AesGcmContext::AesGcmContext(const uint8_t* key, size_t key_len){
+	const EVP_CIPHER* cipher = gcm_cipher(key_len);
+	CipherCtx enc = new_ctx();
+	CipherCtx dec = new_ctx();
+	// Clave fijada una vez en cada dirección; el nonce se pone en cada llamada
+	ensure_ok(EVP_EncryptInit_ex(enc.get(), cipher, nullptr, key, nullptr)==1, "EncryptInit failed");
+	ensure_ok(EVP_DecryptInit_ex(dec.get(), cipher, nullptr, key, nullptr)==1, "DecryptInit failed");
+	enc_ = enc.release();
+	dec_ = dec.release();
+}
+
+AesGcmContext::~AesGcmContext(){
+	EVP_CIPHER_CTX_free(enc_);
+	EVP_CIPHER_CTX_free(dec_);
+}
+
+void AesGcmContext::encrypt(const uint8_t* nonce, size_t nonce_len,
+							const uint8_t* ad, size_t ad_len,
+							const uint8_t* plaintext, size_t pt_len,
+							uint8_t* ciphertext, uint8_t* tag){
+	if(nonce_len!=12) throw runtime_error("AES-GCM nonce must be 12 bytes");
+	if(ad_len > INT_MAX) throw runtime_error("AES-GCM associated data too long");
+	int len=0;
+	ensure_ok(EVP_EncryptInit_ex(enc_, nullptr, nullptr, nullptr, nonce)==1, "iv init failed");
+	if(ad && ad_len){
+		ensure_ok(EVP_EncryptUpdate(enc_, nullptr, &len, ad, (int)ad_len)==1, "aad failed");
+	}
+	update_all(enc_, true, ciphertext, plaintext, pt_len);
+	ensure_ok(EVP_EncryptFinal_ex(enc_, ciphertext + pt_len, &len)==1, "enc final failed");
+	ensure_ok(EVP_CIPHER_CTX_ctrl(enc_, EVP_CTRL_GCM_GET_TAG, 16, tag)==1, "get tag failed");
+}
+
+void AesGcmContext::decrypt(const uint8_t* nonce, size_t nonce_len,
+							const uint8_t* ad, size_t ad_len,
+							const uint8_t* ciphertext, size_t ct_len,
+							const uint8_t* tag, size_t tag_len,
+							uint8_t* plaintext){
+	if(nonce_len!=12) throw runtime_error("AES-GCM nonce must be 12 bytes");
+	if(tag_len!=16) throw runtime_error("AES-GCM tag must be 16 bytes");
+	if(ad_len > INT_MAX) throw runtime_error("AES-GCM associated data too long");
+	int len=0;
+	ensure_ok(EVP_DecryptInit_ex(dec_, nullptr, nullptr, nullptr, nonce)==1, "iv init failed");
+	if(ad && ad_len){
+		ensure_ok(EVP_DecryptUpdate(dec_, nullptr, &len, ad, (int)ad_len)==1, "aad failed");
+	}
+	update_all(dec_, false, plaintext, ciphertext, ct_len);
+	ensure_ok(EVP_CIPHER_CTX_ctrl(dec_, EVP_CTRL_GCM_SET_TAG, (int)tag_len, (void*)tag)==1, "set tag failed");
+	if(EVP_DecryptFinal_ex(dec_, plaintext + ct_len, &len)<=0) throw runtime_error("GCM tag verification failed");
+}
+
+// Reparto de lotes: cada hilo toma bloques de mensajes de un contador atómico y
+// usa su propio AesGcmContext (clave inicializada una vez por hilo)
+static const size_t BATCH_GRAIN = 16;
+static const size_t MIN_BYTES_PER_THREAD = 256 * 1024;
+
+template <typename Fn>
+static size_t run_batch(const uint8_t* key, size_t key_len, const size_t* lengths, size_t n,
+						size_t threads, int* status, Fn&& fn){
+	gcm_cipher(key_len);  // clave inválida: excepción antes de lanzar hilos
+	if(threads == 0) threads = max(1u, thread::hardware_concurrency());
+	size_t total = 0;
+	for(size_t i = 0; i < n; i++) total += lengths[i];
+	// Lotes pequeños no compensan crear hilos
+	threads = min({threads, max<size_t>(1, total / MIN_BYTES_PER_THREAD), (n + BATCH_GRAIN - 1) / BATCH_GRAIN});
+	atomic<size_t> next(0), failed(0);
+	auto worker = [&]{
+		AesGcmContext ctx(key, key_len);
+		size_t errors = 0;
+		for(size_t start; (start = next.fetch_add(BATCH_GRAIN)) < n; ){
+			for(size_t i = start, end = min(n, start + BATCH_GRAIN); i < end; i++){
+				try{
+					fn(ctx, i);
+					status[i] = 0;
+				}catch(const exception&){
+					status[i] = -1;
+					errors++;
+				}
+			}
+		}
+		failed += errors;
+	};
+	vector<thread> pool;
+	for(size_t t = 1; t < threads; t++) pool.emplace_back(worker);
+	worker();
+	for(auto& th : pool) th.join();
+	return failed;
+}
+
+size_t AesGcm::encrypt_batch(const uint8_t* key, size_t key_len,
+							 const uint8_t* nonces,
+							 const uint8_t* ad, size_t ad_len,
+							 const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+							 uint8_t* output, uint8_t* tags,
+							 int* status, size_t threads){
+	return run_batch(key, key_len, lengths, n, threads, status, [&](AesGcmContext& ctx, size_t i){
+		ctx.encrypt(nonces + 12 * i, 12, ad, ad_len, input + offsets[i], lengths[i], output + offsets[i], tags + 16 * i);
+	});
+}
+
+size_t AesGcm::decrypt_batch(const uint8_t* key, size_t key_len,
+							 const uint8_t* nonces,
+							 const uint8_t* ad, size_t ad_len,
+							 const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+							 const uint8_t* tags, uint8_t* output,
+							 int* status, size_t threads){
+	return run_batch(key, key_len, lengths, n, threads, status, [&](AesGcmContext& ctx, size_t i){
+		try{
+			ctx.decrypt(nonces + 12 * i, 12, ad, ad_len, input + offsets[i], lengths[i], tags + 16 * i, 16,
+						output + offsets[i]);
+		}catch(...){
+			// No entregar texto plano sin autenticar
+			memset(output + offsets[i], 0, lengths[i]);
+			throw;
+		}
+	});
+}
+
 AesGcmCiphertext AesGcm::encrypt(const vector<uint8_t>& key,
 								  const vector<uint8_t>& nonce,
 								  const vector<uint8_t>& plaintext,
 								  const vector<uint8_t>& associated_data){
-	if(nonce.size()!=12) throw runtime_error("AES-GCM nonce must be 12 bytes");
-	const EVP_CIPHER* cipher = nullptr;
-	switch(key.size()){
-		case 16: cipher = EVP_aes_128_gcm(); break;
-		case 24: cipher = EVP_aes_192_gcm(); break;
-		case 32: cipher = EVP_aes_256_gcm(); break;
-		default: throw runtime_error("AES-GCM key must be 16, 24 or 32 bytes");
-	}
-	EVP_CIPHER_CTX* ctx = EVP_CIPHER_CTX_new();
-	if(!ctx) throw runtime_error("EVP_CIPHER_CTX_new failed");
 	AesGcmCiphertext out;
 	out.nonce = nonce;
-	int len=0;
-	ensure_ok(EVP_EncryptInit_ex(ctx, cipher, nullptr, nullptr, nullptr)==1, "EncryptInit failed");
-	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_GCM_SET_IVLEN, (int)nonce.size(), nullptr)==1, "set ivlen failed");
-	ensure_ok(EVP_EncryptInit_ex(ctx, nullptr, nullptr, key.data(), nonce.data())==1, "key/iv init failed");
-	if(!associated_data.empty()){
-		ensure_ok(EVP_EncryptUpdate(ctx, nullptr, &len, associated_data.data(), (int)associated_data.size())==1, "aad failed");
-	}
 	out.ciphertext.resize(plaintext.size());
-	ensure_ok(EVP_EncryptUpdate(ctx, out.ciphertext.data(), &len, plaintext.data(), (int)plaintext.size())==1, "enc update failed");
-	int ciphertext_len = len;
-	ensure_ok(EVP_EncryptFinal_ex(ctx, out.ciphertext.data()+ciphertext_len, &len)==1, "enc final failed");
-	ciphertext_len += len;
-	out.ciphertext.resize(ciphertext_len);
 	out.tag.resize(16);
-	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_GCM_GET_TAG, 16, out.tag.data())==1, "get tag failed");
-	EVP_CIPHER_CTX_free(ctx);
+	encrypt(key.data(), key.size(), nonce.data(), nonce.size(), associated_data.data(), associated_data.size(),
+			plaintext.data(), plaintext.size(), out.ciphertext.data(), out.tag.data());
 	return out;
 }
 
@@ -50,38 +226,10 @@ vector<uint8_t> AesGcm::decrypt(const vector<uint8_t>& key,
 								 const vector<uint8_t>& ciphertext,
 								 const vector<uint8_t>& tag,
 								 const vector<uint8_t>& associated_data){
-	if(nonce.size()!=12) throw runtime_error("AES-GCM nonce must be 12 bytes");
-	if(tag.size()!=16) throw runtime_error("AES-GCM tag must be 16 bytes");
-	const EVP_CIPHER* cipher = nullptr;
-	switch(key.size()){
-		case 16: cipher = EVP_aes_128_gcm(); break;
-		case 24: cipher = EVP_aes_192_gcm(); break;
-		case 32: cipher = EVP_aes_256_gcm(); break;
-		default: throw runtime_error("AES-GCM key must be 16, 24 or 32 bytes");
-	}
-	EVP_CIPHER_CTX* ctx = EVP_CIPHER_CTX_new();
-	if(!ctx) throw runtime_error("EVP_CIPHER_CTX_new failed");
-	int len=0, p_len=0;
-	ensure_ok(EVP_DecryptInit_ex(ctx, cipher, nullptr, nullptr, nullptr)==1, "DecryptInit failed");
-	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_GCM_SET_IVLEN, (int)nonce.size(), nullptr)==1, "set ivlen failed");
-	ensure_ok(EVP_DecryptInit_ex(ctx, nullptr, nullptr, key.data(), nonce.data())==1, "key/iv init failed");
-	if(!associated_data.empty()){
-		ensure_ok(EVP_DecryptUpdate(ctx, nullptr, &len, associated_data.data(), (int)associated_data.size())==1, "aad failed");
-	}
 	vector<uint8_t> plaintext(ciphertext.size());
-	ensure_ok(EVP_DecryptUpdate(ctx, plaintext.data(), &len, ciphertext.data(), (int)ciphertext.size())==1, "dec update failed");
-	p_len = len;
-	ensure_ok(EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_GCM_SET_TAG, (int)tag.size(), (void*)tag.data())==1, "set tag failed");
-	int ret = EVP_DecryptFinal_ex(ctx, plaintext.data()+p_len, &len);
-	EVP_CIPHER_CTX_free(ctx);
-	if(ret<=0) throw runtime_error("GCM tag verification failed");
-	p_len += len;
-	plaintext.resize(p_len);
+	decrypt(key.data(), key.size(), nonce.data(), nonce.size(), associated_data.data(), associated_data.size(),
+			ciphertext.data(), ciphertext.size(), tag.data(), tag.size(), plaintext.data());
 	return plaintext;
 }
 
 } // namespace flora
-
-
-
-
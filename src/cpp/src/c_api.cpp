@@ -1,10 +1,16 @@
 #include "flora/c_api.h"
 #include "flora/aes_gcm.hpp"
+#include <algorithm>
+#include <climits>
 #include <stdexcept>
-#include <vector>
 
 using namespace flora;
 
+struct flora_ctx {
+	AesGcmContext gcm;
+	flora_ctx(const uint8_t* key, size_t key_len): gcm(key, key_len) {}
+};
+
 extern "C" {
 
 static int to_code(const std::exception&){ return -1; }
@@ -17,17 +23,11 @@ int flora_aes_gcm_encrypt(
 	uint8_t* ciphertext, size_t* ct_len,
 	uint8_t* tag, size_t tag_len){
 	try{
-		std::vector<uint8_t> k(key, key+key_len);
-		std::vector<uint8_t> n(nonce, nonce+nonce_len);
-		std::vector<uint8_t> a;
-		if(ad && ad_len) a.assign(ad, ad+ad_len);
-		std::vector<uint8_t> pt(plaintext, plaintext+pt_len);
-		auto out = AesGcm::encrypt(k, n, pt, a);
-		if(out.tag.size()!=tag_len) return -2;
-		if(*ct_len < out.ciphertext.size()) return -3;
-		std::copy(out.ciphertext.begin(), out.ciphertext.end(), ciphertext);
-		*ct_len = out.ciphertext.size();
-		std::copy(out.tag.begin(), out.tag.end(), tag);
+		if(tag_len!=16) return -2;
+		if(*ct_len < pt_len) return -3;
+		// Cifrado directo sobre los buffers del llamante (sin copias)
+		AesGcm::encrypt(key, key_len, nonce, nonce_len, ad, ad_len, plaintext, pt_len, ciphertext, tag);
+		*ct_len = pt_len;
 		return 0;
 	}catch(const std::exception& e){
 		return to_code(e);
@@ -42,23 +42,92 @@ int flora_aes_gcm_decrypt(
 	const uint8_t* tag, size_t tag_len,
 	uint8_t* plaintext, size_t* pt_len){
 	try{
-		std::vector<uint8_t> k(key, key+key_len);
-		std::vector<uint8_t> n(nonce, nonce+nonce_len);
-		std::vector<uint8_t> a;
-		if(ad && ad_len) a.assign(ad, ad+ad_len);
-		std::vector<uint8_t> ct(ciphertext, ciphertext+ct_len);
-		std::vector<uint8_t> tg(tag, tag+tag_len);
-		auto out = AesGcm::decrypt(k, n, ct, tg, a);
-		if(*pt_len < out.size()) return -3;
-		std::copy(out.begin(), out.end(), plaintext);
-		*pt_len = out.size();
+		if(*pt_len < ct_len) return -3;
+		AesGcm::decrypt(key, key_len, nonce, nonce_len, ad, ad_len, ciphertext, ct_len, tag, tag_len, plaintext);
+		*pt_len = ct_len;
 		return 0;
 	}catch(const std::exception& e){
 		return to_code(e);
 	}
 }
 
+int flora_aes_gcm_encrypt_batch(
+	const uint8_t* key, size_t key_len,
+	const uint8_t* nonces,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+	uint8_t* output, uint8_t* tags,
+	int* statuses, size_t threads){
+	try{
+		return (int)std::min<size_t>(INT_MAX, AesGcm::encrypt_batch(key, key_len, nonces, ad, ad_len, input,
+																	 offsets, lengths, n, output, tags, statuses, threads));
+	}catch(const std::exception& e){
+		return to_code(e);
+	}
+}
+
+int flora_aes_gcm_decrypt_batch(
+	const uint8_t* key, size_t key_len,
+	const uint8_t* nonces,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* input, const size_t* offsets, const size_t* lengths, size_t n,
+	const uint8_t* tags, uint8_t* output,
+	int* statuses, size_t threads){
+	try{
+		return (int)std::min<size_t>(INT_MAX, AesGcm::decrypt_batch(key, key_len, nonces, ad, ad_len, input,
+																	 offsets, lengths, n, tags, output, statuses, threads));
+	}catch(const std::exception& e){
+		return to_code(e);
+	}
+}
+
+flora_ctx* flora_ctx_new(const uint8_t* key, size_t key_len){
+	try{
+		return new flora_ctx(key, key_len);
+	}catch(const std::exception&){
+		return nullptr;
+	}
+}
+
+int flora_ctx_encrypt(
+	flora_ctx* ctx,
+	const uint8_t* nonce, size_t nonce_len,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* plaintext, size_t pt_len,
+	uint8_t* ciphertext, size_t* ct_len,
+	uint8_t* tag, size_t tag_len){
+	if(!ctx) return -4;
+	try{
+		if(tag_len!=16) return -2;
+		if(*ct_len < pt_len) return -3;
+		ctx->gcm.encrypt(nonce, nonce_len, ad, ad_len, plaintext, pt_len, ciphertext, tag);
+		*ct_len = pt_len;
+		return 0;
+	}catch(const std::exception& e){
+		return to_code(e);
+	}
 }
 
+int flora_ctx_decrypt(
+	flora_ctx* ctx,
+	const uint8_t* nonce, size_t nonce_len,
+	const uint8_t* ad, size_t ad_len,
+	const uint8_t* ciphertext, size_t ct_len,
+	const uint8_t* tag, size_t tag_len,
+	uint8_t* plaintext, size_t* pt_len){
+	if(!ctx) return -4;
+	try{
+		if(*pt_len < ct_len) return -3;
+		ctx->gcm.decrypt(nonce, nonce_len, ad, ad_len, ciphertext, ct_len, tag, tag_len, plaintext);
+		*pt_len = ct_len;
+		return 0;
+	}catch(const std::exception& e){
+		return to_code(e);
+	}
+}
 
+void flora_ctx_free(flora_ctx* ctx){
+	delete ctx;
+}
 
+}
@@ -1,13 +1,14 @@
 # 🌸 FLORA package shim
-# Reexporta implementación desde el paquete 'python'
+# Reexporta implementación desde el paquete 'python'. Las importaciones son
+# perezosas (PEP 562): `import flora` no carga numpy, Crypto ni click hasta
+# que se usa un símbolo.
 
-from python.chaotic_map import *  # type: ignore
-from python.flora_crypto import *  # type: ignore
+import importlib
 
-try:
-	from python.cli import *  # type: ignore
-except Exception:
-	pass
+# Módulos de los que se reexportan símbolos, en orden de búsqueda
+_SOURCES = ("python.flora_crypto", "python.chaotic_map", "python.cli")
+# La CLI necesita click, que es opcional para usar la librería
+_OPTIONAL_SOURCES = ("python.cli",)
 
 __all__ = [
 	'ChaoticDestructionEngine',
@@ -15,5 +16,18 @@ __all__ = [
 ]
 
 
-
-
+def __getattr__(name: str):
+	if name.startswith("__"):
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	for source in _SOURCES:
+		try:
+			module = importlib.import_module(source)
+		except ImportError:
+			if source not in _OPTIONAL_SOURCES:
+				raise
+			continue
+		if hasattr(module, name):
+			value = getattr(module, name)
+			globals()[name] = value
+			return value
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,12 @@
 # 🌸 FLORA - Sistema de Cifrado Híbrido Post-Cuántico
 # Módulo principal de Python
 
-from .chaotic_map import ChaoticDestructionEngine
-from .flora_crypto import FloraCryptoSystem
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .chaotic_map import ChaoticDestructionEngine
+    from .flora_crypto import FloraCryptoSystem
 
 __version__ = "0.1.0-alpha"
 __author__ = "Crypto Flower Team"
@@ -16,10 +20,31 @@ __all__ = [
     '__description__'
 ]
 
+# Importación perezosa (PEP 562): numpy, Crypto y los backends Kyber solo se
+# cargan al usar el primer símbolo que los necesita, no al importar el paquete
+_LAZY_ATTRIBUTES = {
+    'ChaoticDestructionEngine': 'chaotic_map',
+    'FloraCryptoSystem': 'flora_crypto',
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
 # Función de conveniencia para crear instancia del sistema
 def create_flora_system(key_size: int = 32, 
                        salt_size: int = 32, 
-                       iterations: int = 100000) -> FloraCryptoSystem:
+                       iterations: int = 100000) -> "FloraCryptoSystem":
     """
     Crea una instancia del sistema FLORA con configuración por defecto.
     
@@ -31,6 +56,7 @@ def create_flora_system(key_size: int = 32,
     Returns:
         Instancia configurada de FloraCryptoSystem
     """
+    from .flora_crypto import FloraCryptoSystem
     return FloraCryptoSystem(
         key_size=key_size,
         salt_size=salt_size,
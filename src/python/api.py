@@ -1,17 +1,54 @@
 # 🌸 FLORA - API REST (FastAPI)
-# Endpoints: /encrypt, /decrypt, /status
+# Endpoints: /encrypt, /decrypt, /status, /keys, /metrics, /ws/session
 
-from fastapi import FastAPI, HTTPException, Header, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Depends, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Any, Dict
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Any, AsyncIterator, Dict, List, Tuple
+import hashlib
+import hmac
+import json
 import os
 
-from .flora_crypto import FloraCryptoSystem
+from .engine import EnginePool
+from .key_handles import KeyHandleError, KeyHandleStore, default_key_store_path
+from .metrics import CONTENT_TYPE, MetricsMiddleware, metrics_response_body, observe_crypto_stage, record_kdf_cache
+from .session_channel import DEFAULT_MAX_FRAME, DEFAULT_MAX_IN_FLIGHT, SessionChannel
+from .stream_container import StreamDecryptor, StreamEncryptor, StreamFormatError
 
-API_KEY = os.getenv("FLORA_API_KEY", "flora-dev-key")
+# Una o varias API keys separadas por comas; cada una es un principal distinto
+API_KEYS = tuple(k.strip() for k in os.getenv("FLORA_API_KEY", "flora-dev-key").split(",") if k.strip())
+API_KEY = API_KEYS[0]
 
-app = FastAPI(title="FLORA API", description="Cifrado híbrido con autodestrucción caótica", version="0.1.0-alpha")
+# Límites de los endpoints por lotes
+BATCH_MAX_ITEMS = int(os.getenv("FLORA_BATCH_MAX_ITEMS", "1000"))
+BATCH_CHUNK = 64  # elementos procesados por paso en el threadpool
+
+# Control de flujo del canal WebSocket (por conexión)
+WS_MAX_IN_FLIGHT = int(os.getenv("FLORA_WS_MAX_IN_FLIGHT", str(DEFAULT_MAX_IN_FLIGHT)))
+WS_MAX_FRAME = int(os.getenv("FLORA_WS_MAX_FRAME", str(DEFAULT_MAX_FRAME)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	"""Un pool de motores por worker: se crea y calienta al arrancar y se limpia al parar."""
+	pool = EnginePool(stage_observer=observe_crypto_stage)
+	await run_in_threadpool(pool.warm)
+	app.state.engines = pool
+	try:
+		yield
+	finally:
+		pool.close()
+		store = getattr(app.state, "key_handles", None)
+		if store is not None:
+			store.close()
+			app.state.key_handles = None
+
+
+app = FastAPI(title="FLORA API", description="Cifrado híbrido con autodestrucción caótica", version="0.1.0-alpha", lifespan=lifespan)
 
 # CORS (permite probar desde clientes web locales)
 app.add_middleware(
@@ -22,64 +59,500 @@ app.add_middleware(
 	allow_headers=["*"]
 )
 
+# Latencia por ruta/estado y peticiones en curso (exportadas en /metrics)
+app.add_middleware(MetricsMiddleware, app_name="api")
+
+
+def _api_principal(x_api_key: Optional[str], authorization: Optional[str]) -> Optional[str]:
+	"""Principal de la API key presentada (huella estable, no la clave) o None si no es válida."""
+	key = x_api_key
+	if not key and authorization and authorization.lower().startswith("bearer "):
+		key = authorization.split(" ", 1)[1].strip()
+	if not key or not any(hmac.compare_digest(key.encode(), k.encode()) for k in API_KEYS):
+		return None
+	return hashlib.sha256(b"flora-api-principal:" + key.encode()).hexdigest()[:32]
+
+
+def _is_valid_api_key(x_api_key: Optional[str], authorization: Optional[str]) -> bool:
+	return _api_principal(x_api_key, authorization) is not None
+
 
 def api_key_auth(x_api_key: Optional[str] = Header(default=None), authorization: Optional[str] = Header(default=None)):
 	"""Autenticación simple por API key.
 	Acepta: X-API-Key: <key> o Authorization: Bearer <key>
 	"""
-	key = x_api_key
-	if not key and authorization and authorization.lower().startswith("bearer "):
-		key = authorization.split(" ", 1)[1].strip()
-	if key != API_KEY:
+	if not _is_valid_api_key(x_api_key, authorization):
 		raise HTTPException(status_code=401, detail="Unauthorized")
 	return True
 
 
-class EncryptRequest(BaseModel):
+def api_principal(x_api_key: Optional[str] = Header(default=None), authorization: Optional[str] = Header(default=None)) -> str:
+	"""Como api_key_auth, pero devuelve el principal (para recursos con dueño, p. ej. /keys)."""
+	principal = _api_principal(x_api_key, authorization)
+	if principal is None:
+		raise HTTPException(status_code=401, detail="Unauthorized")
+	return principal
+
+
+def _engines_for(app_: Any) -> EnginePool:
+	pool = getattr(app_.state, "engines", None)
+	if pool is None:
+		pool = app_.state.engines = EnginePool(stage_observer=observe_crypto_stage)
+	return pool
+
+
+def get_engines(request: Request) -> EnginePool:
+	"""Pool de motores del worker (creado bajo demanda si no se ejecutó el lifespan)."""
+	return _engines_for(request.app)
+
+
+def _key_store_for(app_: Any) -> KeyHandleStore:
+	store = getattr(app_.state, "key_handles", None)
+	if store is None:
+		store = app_.state.key_handles = KeyHandleStore(default_key_store_path())
+	return store
+
+
+def get_key_store(request: Request) -> KeyHandleStore:
+	"""Almacén de handles de clave (SQLite en $FLORA_KEY_STORE, compartido por los workers)."""
+	return _key_store_for(request.app)
+
+
+def _require_credentials(password: Optional[str], key_handle: Optional[str]) -> None:
+	if bool(password) == bool(key_handle):
+		raise HTTPException(status_code=400, detail="Indica password o key_handle (solo uno)")
+
+
+def _session_owner(session_id: Optional[Any], default: str, principal: str) -> Tuple[str, Optional[str]]:
+	"""(ID de sesión, dueño del master_salt recordado).
+
+	Solo un ID explícito continúa sesión, y solo para la misma API key: con el ID
+	por defecto no se recuerda nada y cada petición usa un master_salt nuevo.
+	"""
+	if not session_id:
+		return default, None
+	return str(session_id), principal
+
+
+async def _resolve_handle(store: KeyHandleStore, key_handle: str, master_salt: Optional[bytes] = None):
+	"""(master_key, master_salt) de un handle; comprueba el salt del bundle si se indica."""
+	try:
+		master_key, handle_salt = await run_in_threadpool(store.resolve, key_handle)
+	except KeyHandleError as e:
+		raise HTTPException(status_code=401, detail=str(e))
+	record_kdf_cache("master_key", hit=True)
+	if master_salt is not None and master_salt != handle_salt:
+		raise HTTPException(status_code=400, detail="El bundle no se cifró con la clave de este handle")
+	return master_key, handle_salt
+
+
+class KeyRequest(BaseModel):
 	password: str
+	ttl_seconds: Optional[int] = None
+	master_salt_hex: Optional[str] = None  # para descifrar bundles existentes con el handle
+
+
+class EncryptRequest(BaseModel):
+	password: Optional[str] = None
+	key_handle: Optional[str] = None
 	message: str  # texto plano (se codifica utf-8)
-	session_id: Optional[str] = "api_default_session"
+	session_id: Optional[str] = None  # sin ID, cada petición usa un master_salt nuevo
 	associated_data_hex: Optional[str] = None
-	use_kyber: bool = True
+	use_kyber: bool = False  # opcional: solo se descifra con el keyring ($FLORA_KYBER_KEYRING; sin él, en memoria)
 
 
 class DecryptRequest(BaseModel):
-	password: str
+	password: Optional[str] = None
+	key_handle: Optional[str] = None
 	bundle: Dict[str, Any]
 
 
-@app.post("/encrypt", dependencies=[Depends(api_key_auth)])
-async def encrypt(req: EncryptRequest):
+class EncryptItem(BaseModel):
+	message: str
+	associated_data_hex: Optional[str] = None
+
+
+class BatchEncryptRequest(BaseModel):
+	password: Optional[str] = None
+	key_handle: Optional[str] = None
+	items: List[EncryptItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+	session_id: Optional[str] = None
+	use_kyber: bool = False
+
+
+class BatchDecryptRequest(BaseModel):
+	password: Optional[str] = None
+	key_handle: Optional[str] = None
+	bundles: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+def _bundle_master_salt(bundle: Dict[str, Any]) -> bytes:
+	master_salt_hex = bundle.get('master_salt')
+	if not master_salt_hex:
+		raise HTTPException(status_code=400, detail="Bundle inválido: falta master_salt")
+	try:
+		return bytes.fromhex(master_salt_hex)
+	except (TypeError, ValueError):
+		raise HTTPException(status_code=400, detail="master_salt inválido")
+
+
+def _ndjson(record: Dict[str, Any]) -> bytes:
+	return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+@app.post("/keys")
+async def create_key(req: KeyRequest, engines: EnginePool = Depends(get_engines),
+					 store: KeyHandleStore = Depends(get_key_store), principal: str = Depends(api_principal)):
+	"""Deriva la clave maestra una vez y devuelve un handle opaco con caducidad.
+
+	El handle sustituye a la contraseña en /encrypt, /decrypt, los lotes y el
+	streaming (cabecera X-Flora-Key-Handle), evitando PBKDF2 en cada llamada.
+	"""
+	try:
+		master_salt = bytes.fromhex(req.master_salt_hex) if req.master_salt_hex else None
+		master_key, master_salt = await run_in_threadpool(engines.engine(False).derive_master_key,
+														  req.password, master_salt)
+		created = await run_in_threadpool(store.create, master_key, master_salt, req.ttl_seconds, principal)
+	except ValueError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	created['master_salt'] = master_salt.hex()
+	return created
+
+
+@app.get("/keys", dependencies=[Depends(api_key_auth)])
+async def key_stats(store: KeyHandleStore = Depends(get_key_store)):
+	return await run_in_threadpool(store.stats)
+
+
+@app.get("/keys/{key_id}")
+async def key_info(key_id: str, store: KeyHandleStore = Depends(get_key_store), principal: str = Depends(api_principal)):
+	"""Metadatos de un handle creado con la misma API key (404 para los de otros)."""
+	try:
+		return await run_in_threadpool(store.info, key_id, principal)
+	except KeyHandleError as e:
+		raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.delete("/keys/{key_id}")
+async def revoke_key(key_id: str, store: KeyHandleStore = Depends(get_key_store), principal: str = Depends(api_principal)):
+	"""Revoca un handle creado con la misma API key (404 para los de otros)."""
+	try:
+		revoked = await run_in_threadpool(store.revoke, key_id, principal)
+	except KeyHandleError as e:
+		raise HTTPException(status_code=400, detail=str(e))
+	if not revoked:
+		raise HTTPException(status_code=404, detail="Handle de clave desconocido, caducado o revocado")
+	return {"key_id": key_id, "revoked": True}
+
+
+@app.post("/encrypt")
+async def encrypt(req: EncryptRequest, request: Request, engines: EnginePool = Depends(get_engines),
+				  principal: str = Depends(api_principal)):
+	_require_credentials(req.password, req.key_handle)
+	engine = engines.engine(req.use_kyber)
+	session_id, owner = _session_owner(req.session_id, "api_default_session", principal)
+	if req.key_handle:
+		master_key, master_salt = await _resolve_handle(_key_store_for(request.app), req.key_handle)
 	try:
-		flora = FloraCryptoSystem(use_kyber=req.use_kyber)
-		master_salt = os.urandom(32)
-		master_key, _ = flora.generate_master_key(req.password, master_salt)
 		ad = bytes.fromhex(req.associated_data_hex) if req.associated_data_hex else None
-		enc = flora.encrypt_message(req.message.encode("utf-8"), master_key, req.session_id, ad)
-		enc['master_salt'] = master_salt.hex()
-		return enc
+		message = req.message.encode("utf-8")
+		if req.key_handle:
+			return await run_in_threadpool(engine.encrypt_with_key, message, master_key, master_salt, session_id, ad)
+		# PBKDF2 y AES fuera del event loop; el motor serializa el acceso a su estado
+		return await run_in_threadpool(engine.encrypt, message, req.password, session_id, ad, owner)
 	except Exception as e:
 		raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/decrypt", dependencies=[Depends(api_key_auth)])
-async def decrypt(req: DecryptRequest):
+async def decrypt(req: DecryptRequest, request: Request, engines: EnginePool = Depends(get_engines)):
+	_require_credentials(req.password, req.key_handle)
+	master_salt = _bundle_master_salt(req.bundle)
+	engine = engines.engine_for_bundle(req.bundle)
+	if req.key_handle:
+		master_key, _ = await _resolve_handle(_key_store_for(request.app), req.key_handle, master_salt)
 	try:
-		flora = FloraCryptoSystem()
-		master_salt_hex = req.bundle.get('master_salt')
-		if not master_salt_hex:
-			raise HTTPException(status_code=400, detail="Bundle inválido: falta master_salt")
-		master_salt = bytes.fromhex(master_salt_hex)
-		master_key, _ = flora.generate_master_key(req.password, master_salt)
-		pt = flora.decrypt_message(req.bundle, master_key)
+		if req.key_handle:
+			pt = await run_in_threadpool(engine.decrypt_with_key, req.bundle, master_key)
+		else:
+			pt = await run_in_threadpool(engine.decrypt, req.bundle, req.password)
 		return {"plaintext": pt.decode("utf-8", errors="replace")}
-	except HTTPException:
-		raise
 	except Exception as e:
 		raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/status", dependencies=[Depends(api_key_auth)])
-async def status():
-	flora = FloraCryptoSystem()
-	return flora.get_system_status()
+async def status(engines: EnginePool = Depends(get_engines)):
+	return await run_in_threadpool(engines.status)
+
+
+@app.get("/metrics")
+async def metrics():
+	"""Métricas en formato Prometheus (agregadas entre workers si FLORA_METRICS_DIR está definida)."""
+	return Response(content=await run_in_threadpool(metrics_response_body), media_type=CONTENT_TYPE)
+
+
+@app.post("/encrypt/batch")
+async def encrypt_batch(req: BatchEncryptRequest, request: Request, engines: EnginePool = Depends(get_engines),
+						principal: str = Depends(api_principal)):
+	"""Cifra varios mensajes con una sola derivación de clave maestra.
+
+	Respuesta NDJSON en streaming: una línea {"index", "bundle"} o {"index",
+	"error"} por elemento, en orden.
+	"""
+	_require_credentials(req.password, req.key_handle)
+	engine = engines.engine(req.use_kyber)
+	session_id, owner = _session_owner(req.session_id, "api_default_session", principal)
+	if req.key_handle:
+		master_key, master_salt = await _resolve_handle(_key_store_for(request.app), req.key_handle)
+		owner = None
+	else:
+		master_key, master_salt = await run_in_threadpool(engine.session_master_key, req.password, session_id, owner)
+
+	async def results() -> AsyncIterator[bytes]:
+		for start in range(0, len(req.items), BATCH_CHUNK):
+			chunk = req.items[start:start + BATCH_CHUNK]
+			messages, ads, errors = [], [], {}
+			for offset, item in enumerate(chunk):
+				try:
+					ads.append(bytes.fromhex(item.associated_data_hex) if item.associated_data_hex else None)
+					messages.append(item.message.encode("utf-8"))
+				except ValueError as e:
+					errors[offset] = f"associated_data_hex inválido: {e}"
+			done = iter(await run_in_threadpool(engine.encrypt_many_with_key, messages, master_key,
+												master_salt, session_id, ads, owner))
+			for offset in range(len(chunk)):
+				index = start + offset
+				if offset in errors:
+					yield _ndjson({"index": index, "error": errors[offset]})
+					continue
+				result = next(done)
+				if isinstance(result, Exception):
+					yield _ndjson({"index": index, "error": str(result)})
+				else:
+					yield _ndjson({"index": index, "bundle": result})
+
+	return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.post("/decrypt/batch", dependencies=[Depends(api_key_auth)])
+async def decrypt_batch(req: BatchDecryptRequest, request: Request, engines: EnginePool = Depends(get_engines)):
+	"""Descifra varios bundles que comparten master_salt (una sola derivación).
+
+	Respuesta NDJSON en streaming: {"index", "plaintext"} o {"index", "error"}.
+	"""
+	_require_credentials(req.password, req.key_handle)
+	master_salt = _bundle_master_salt(req.bundles[0])
+	master_salt_hex = req.bundles[0]['master_salt']
+	if req.key_handle:
+		master_key, _ = await _resolve_handle(_key_store_for(request.app), req.key_handle, master_salt)
+	else:
+		master_key, _ = await run_in_threadpool(engines.engine().derive_master_key, req.password, master_salt)
+
+	async def results() -> AsyncIterator[bytes]:
+		for start in range(0, len(req.bundles), BATCH_CHUNK):
+			chunk = req.bundles[start:start + BATCH_CHUNK]
+			out: Dict[int, Dict[str, Any]] = {}
+			# Agrupar por motor (Kyber / PBKDF2) conservando el índice original
+			groups: Dict[bool, List[int]] = {}
+			for offset, bundle in enumerate(chunk):
+				if bundle.get('master_salt') != master_salt_hex:
+					out[offset] = {"error": "master_salt distinto del resto del lote"}
+				else:
+					groups.setdefault(bool(bundle.get('kem')), []).append(offset)
+			for use_kyber, offsets in groups.items():
+				engine = engines.engine(use_kyber)
+				plain = await run_in_threadpool(engine.decrypt_many_with_key, [chunk[o] for o in offsets], master_key)
+				for offset, result in zip(offsets, plain):
+					if isinstance(result, Exception):
+						out[offset] = {"error": str(result)}
+					else:
+						out[offset] = {"plaintext": result.decode("utf-8", errors="replace")}
+			for offset in range(len(chunk)):
+				yield _ndjson({"index": start + offset, **out[offset]})
+
+	return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+# ===== Streaming de ficheros (application/octet-stream) =====
+# Endpoints ASGI puros: el cuerpo se consume del canal receive a medida que
+# llega y cada segmento cifrado se envía en cuanto está listo, con memoria
+# constante por petición (un segmento de 256 KiB). Se evita StreamingResponse
+# porque su vigilante de desconexión también lee de receive y competiría con
+# la lectura incremental del cuerpo.
+
+class _ClientDisconnected(Exception):
+	pass
+
+
+async def _request_chunks(receive) -> AsyncIterator[bytes]:
+	while True:
+		message = await receive()
+		if message["type"] == "http.disconnect":
+			raise _ClientDisconnected()
+		chunk = message.get("body", b"")
+		if chunk:
+			yield chunk
+		if not message.get("more_body", False):
+			return
+
+
+async def _send_json(send, status_code: int, payload: Dict[str, Any]) -> None:
+	body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+	await send({"type": "http.response.start", "status": status_code,
+				"headers": [(b"content-type", b"application/json"),
+							(b"content-length", str(len(body)).encode())]})
+	await send({"type": "http.response.body", "body": body})
+
+
+def _handle_key_for_salt(handle_key, salt: Optional[bytes]):
+	"""Clave de un handle: sirve para cifrar y para contenedores con su mismo salt."""
+	if salt is not None and salt != handle_key[1]:
+		raise StreamFormatError("El contenedor no se cifró con la clave de este handle")
+	return handle_key
+
+
+_STREAM_HEADERS = [(b"content-type", b"application/octet-stream"), (b"x-flora-container", b"FLS1")]
+
+
+class StreamCryptoEndpoint:
+	"""POST /encrypt/stream y /decrypt/stream (ASGI puro).
+
+	Autenticación como el resto de la API; la contraseña viaja en la cabecera
+	X-Flora-Password (o un handle de /keys en X-Flora-Key-Handle). El descifrado verifica cabecera y primer segmento antes
+	de responder (contraseña incorrecta o fichero ajeno -> 400); un fallo
+	posterior (manipulación o truncado) corta la respuesta en curso.
+	"""
+
+	def __init__(self, mode: str) -> None:
+		if mode not in ("encrypt", "decrypt"):
+			raise ValueError(mode)
+		self.mode = mode
+
+	async def __call__(self, scope, receive, send) -> None:
+		headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+		if not _is_valid_api_key(headers.get("x-api-key"), headers.get("authorization")):
+			await _send_json(send, 401, {"detail": "Unauthorized"})
+			return
+		password = headers.get("x-flora-password")
+		key_handle = headers.get("x-flora-key-handle")
+		if bool(password) == bool(key_handle):
+			await _send_json(send, 400, {"detail": "Indica X-Flora-Password o X-Flora-Key-Handle (solo uno)"})
+			return
+		engine = _engines_for(scope["app"]).engine(False)
+		if password:
+			key_for_salt = lambda salt: engine.derive_master_key(password, salt)
+		else:
+			try:
+				handle_key = await run_in_threadpool(_key_store_for(scope["app"]).resolve, key_handle)
+			except KeyHandleError as e:
+				await _send_json(send, 401, {"detail": str(e)})
+				return
+			record_kdf_cache("master_key", hit=True)
+			key_for_salt = lambda salt: _handle_key_for_salt(handle_key, salt)
+		try:
+			if self.mode == "encrypt":
+				await self._encrypt(key_for_salt, receive, send)
+			else:
+				await self._decrypt(key_for_salt, receive, send)
+		except _ClientDisconnected:
+			return
+
+	async def _encrypt(self, key_for_salt, receive, send) -> None:
+		master_key, salt = await run_in_threadpool(key_for_salt, None)
+		encryptor = StreamEncryptor(master_key, salt)
+		await send({"type": "http.response.start", "status": 200, "headers": _STREAM_HEADERS})
+		await send({"type": "http.response.body", "body": encryptor.header(), "more_body": True})
+		async for chunk in _request_chunks(receive):
+			out = await run_in_threadpool(encryptor.update, chunk)
+			if out:
+				await send({"type": "http.response.body", "body": out, "more_body": True})
+		await send({"type": "http.response.body", "body": encryptor.finalize(), "more_body": False})
+
+	async def _decrypt(self, key_for_salt, receive, send) -> None:
+		decryptor = StreamDecryptor(lambda salt: key_for_salt(salt)[0])
+		chunks = _request_chunks(receive)
+		pending = []
+		try:
+			async for chunk in chunks:
+				out = await run_in_threadpool(decryptor.update, chunk)
+				if out:
+					pending.append(out)
+				if decryptor.segments:
+					break
+			else:
+				decryptor.finalize()
+		except StreamFormatError as e:
+			await _send_json(send, 400, {"detail": str(e)})
+			return
+		await send({"type": "http.response.start", "status": 200, "headers": _STREAM_HEADERS[:1]})
+		for out in pending:
+			await send({"type": "http.response.body", "body": out, "more_body": True})
+		pending.clear()
+		async for chunk in chunks:
+			out = await run_in_threadpool(decryptor.update, chunk)
+			if out:
+				await send({"type": "http.response.body", "body": out, "more_body": True})
+		decryptor.finalize()
+		await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+app.add_route("/encrypt/stream", StreamCryptoEndpoint("encrypt"), methods=["POST"])
+app.add_route("/decrypt/stream", StreamCryptoEndpoint("decrypt"), methods=["POST"])
+
+
+# ===== Canal de sesión (WebSocket) =====
+
+@app.websocket("/ws/session")
+async def session_channel(websocket: WebSocket):
+	"""Canal binario de baja latencia ligado a una sesión (protocolo en session_channel.py).
+
+	Se autentica una vez (API key + contraseña o handle de /keys) y después
+	acepta peticiones de cifrado/descifrado encadenadas sin esperar respuesta.
+	"""
+	await websocket.accept()
+	try:
+		hello = json.loads(await websocket.receive_text())
+		if not isinstance(hello, dict):
+			raise ValueError("El saludo debe ser un objeto JSON")
+	except WebSocketDisconnect:
+		return
+	except (KeyError, ValueError) as e:
+		await websocket.send_json({"type": "error", "detail": f"Saludo inválido: {e}"})
+		await websocket.close(code=1002)
+		return
+
+	headers = websocket.headers
+	principal = _api_principal(headers.get("x-api-key") or hello.get("api_key"), headers.get("authorization"))
+	if principal is None:
+		await websocket.send_json({"type": "error", "detail": "Unauthorized"})
+		await websocket.close(code=1008)
+		return
+	password, key_handle = hello.get("password"), hello.get("key_handle")
+	session_id, owner = _session_owner(hello.get("session_id"), "ws_default_session", principal)
+	if bool(password) == bool(key_handle):
+		await websocket.send_json({"type": "error", "detail": "Indica password o key_handle (solo uno)"})
+		await websocket.close(code=1008)
+		return
+
+	engines = _engines_for(websocket.app)
+	engine = engines.engine(bool(hello.get("use_kyber", False)))
+	try:
+		if key_handle:
+			master_key, master_salt = await run_in_threadpool(_key_store_for(websocket.app).resolve, key_handle)
+			record_kdf_cache("master_key", hit=True)
+			owner = None
+		else:
+			master_key, master_salt = await run_in_threadpool(engine.session_master_key, str(password), session_id, owner)
+	except KeyHandleError as e:
+		await websocket.send_json({"type": "error", "detail": str(e)})
+		await websocket.close(code=1008)
+		return
+
+	channel = SessionChannel(engines, engine, master_key, master_salt, session_id,
+							 max_in_flight=WS_MAX_IN_FLIGHT, max_frame=WS_MAX_FRAME, principal=owner)
+	await websocket.send_json(channel.ready_message())
+	try:
+		await channel.run(websocket)
+	except WebSocketDisconnect:
+		pass
@@ -0,0 +1,598 @@
+# 🌸 FLORA - Operaciones masivas sobre árboles de directorios
+# encrypt_tree / decrypt_tree: la clave maestra se deriva una sola vez
+# (PBKDF2) y cada fichero se cifra como contenedor por segmentos (FLS1) en un
+# pool de procesos. Un manifiesto JSON Lines en el destino registra los
+# ficheros terminados, de modo que una ejecución interrumpida se reanuda
+# saltándose lo ya hecho.
+#
+# Manifiesto (DST/.flora-manifest.jsonl):
+#   línea 1:  {"version", "mode", "salt", "check", "chunk_size"}
+#   resto:    {"path", "size", "mtime_ns"} por fichero completado
+#
+# rekey_tree: cambia la contraseña de los bundles JSON (*.enc.json) de un
+# árbol. Cada (contraseña antigua, master_salt) distinto se deriva una sola vez
+# y todos los bundles pasan a compartir un master_salt nuevo. El diario
+# ROOT/.flora-rekey.jsonl guarda ese salt para reanudar tras una interrupción.
+#
+# verify_paths: comprueba los tags GCM de bundles JSON y contenedores FLS1 sin
+# escribir texto plano ni activar la autodestrucción; una derivación por salt.
+
+import hashlib
+import hmac
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+	from .flora_crypto import FloraCryptoSystem
+	from .stream_container import (DEFAULT_CHUNK_SIZE, MAGIC, StreamDecryptor, StreamFormatError, decrypt_stream,
+								   encrypt_stream)
+except ImportError:
+	from flora_crypto import FloraCryptoSystem
+	from stream_container import (DEFAULT_CHUNK_SIZE, MAGIC, StreamDecryptor, StreamFormatError, decrypt_stream,
+								  encrypt_stream)
+
+MANIFEST_NAME = ".flora-manifest.jsonl"
+REKEY_JOURNAL_NAME = ".flora-rekey.jsonl"
+BUNDLE_SUFFIX = ".enc.json"
+MANIFEST_VERSION = 1
+SUFFIX = ".flora"
+_TMP_SUFFIX = ".flora-tmp"
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class BulkError(ValueError):
+	"""Manifiesto incompatible, contraseña incorrecta o árbol de origen inválido."""
+	pass
+
+
+def _key_check(master_key: bytes) -> str:
+	"""Valor de comprobación de la clave (no revela la clave)."""
+	return hmac.new(master_key, b"flora-tree-check", hashlib.sha256).hexdigest()[:32]
+
+
+def walk_files(root: Path) -> Iterator[Tuple[str, int, int]]:
+	"""Recorre `root` con os.scandir -> (ruta relativa, tamaño, mtime_ns).
+
+	No sigue enlaces simbólicos y omite el manifiesto y los temporales.
+	"""
+	stack = [""]
+	while stack:
+		rel_dir = stack.pop()
+		with os.scandir(root / rel_dir if rel_dir else root) as entries:
+			for entry in entries:
+				rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+				if entry.is_dir(follow_symlinks=False):
+					stack.append(rel)
+				elif entry.is_file(follow_symlinks=False):
+					if entry.name in (MANIFEST_NAME, REKEY_JOURNAL_NAME) or entry.name.endswith(_TMP_SUFFIX):
+						continue
+					st = entry.stat(follow_symlinks=False)
+					yield rel, st.st_size, st.st_mtime_ns
+
+
+# ===== Trabajo en los procesos del pool =====
+
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(master_key: bytes, salt: bytes, chunk_size: int, src: str, dst: str) -> None:
+	_WORKER.update(master_key=master_key, salt=salt, chunk_size=chunk_size, src=Path(src), dst=Path(dst))
+
+
+def _atomic_output(target: Path) -> Path:
+	target.parent.mkdir(parents=True, exist_ok=True)
+	return target.with_name(target.name + _TMP_SUFFIX)
+
+
+def _encrypt_one(item: Tuple[str, int, int]) -> Tuple[int, Optional[str]]:
+	"""-> (bytes de texto plano procesados, error o None)."""
+	rel = item[0]
+	target = _WORKER['dst'] / (rel + SUFFIX)
+	tmp = _atomic_output(target)
+	try:
+		with open(_WORKER['src'] / rel, "rb") as src, open(tmp, "wb") as dst:
+			size = encrypt_stream(src, dst, _WORKER['master_key'], _WORKER['salt'], _WORKER['chunk_size'])
+		os.replace(tmp, target)
+	except (OSError, ValueError) as e:
+		tmp.unlink(missing_ok=True)
+		return 0, str(e) or type(e).__name__
+	return size, None
+
+
+def _decrypt_one(item: Tuple[str, int, int]) -> Tuple[int, Optional[str]]:
+	rel = item[0]
+	target = _WORKER['dst'] / (rel[:-len(SUFFIX)] if rel.endswith(SUFFIX) else rel)
+	tmp = _atomic_output(target)
+
+	def key_for_salt(salt: bytes) -> bytes:
+		if salt != _WORKER['salt']:
+			raise StreamFormatError("El fichero se cifró con otro salt (otro árbol o contraseña)")
+		return _WORKER['master_key']
+
+	try:
+		with open(_WORKER['src'] / rel, "rb") as src, open(tmp, "wb") as dst:
+			written = decrypt_stream(src, dst, key_for_salt)
+		os.replace(tmp, target)
+	except (OSError, ValueError) as e:
+		tmp.unlink(missing_ok=True)
+		return 0, str(e) or type(e).__name__
+	return written, None
+
+
+# ===== Manifiesto =====
+
+def _read_manifest(path: Path) -> Tuple[Optional[Dict[str, Any]], Dict[str, Tuple[int, int]]]:
+	"""-> (cabecera, {ruta: (size, mtime_ns)}); tolera una última línea a medias."""
+	if not path.exists():
+		return None, {}
+	header = None
+	done: Dict[str, Tuple[int, int]] = {}
+	with open(path, "r", encoding="utf-8") as f:
+		for line in f:
+			try:
+				record = json.loads(line)
+			except ValueError:
+				break
+			if header is None:
+				header = record
+			else:
+				done[record['path']] = (record['size'], record['mtime_ns'])
+	return header, done
+
+
+def _read_salt(path: Path) -> bytes:
+	"""Salt de la cabecera de un contenedor FLS1 (sin verificar segmentos)."""
+	dec = StreamDecryptor(lambda salt: bytes(32))
+	with open(path, "rb") as f:
+		try:
+			dec.update(f.read(512))
+		except StreamFormatError:
+			pass
+	if not dec.header_parsed:
+		raise BulkError(f"{path} no es un contenedor FLORA")
+	return dec.salt
+
+
+def _run(mode: str, src: Path, dst: Path, items: List[Tuple[str, int, int]], master_key: bytes, salt: bytes,
+		 chunk_size: int, manifest: Path, header: Optional[Dict[str, Any]], done: Dict[str, Tuple[int, int]],
+		 workers: Optional[int], progress: Optional[ProgressCallback]) -> Dict[str, Any]:
+	# Reanudación: fuera lo que el manifiesto ya da por terminado con el mismo tamaño y fecha
+	pending = [item for item in items if done.get(item[0]) != (item[1], item[2])]
+	skipped = len(items) - len(pending)
+	if header is None:
+		header = {'version': MANIFEST_VERSION, 'mode': mode, 'salt': salt.hex(),
+				  'check': _key_check(master_key), 'chunk_size': chunk_size}
+		manifest.parent.mkdir(parents=True, exist_ok=True)
+		with open(manifest, "w", encoding="utf-8") as f:
+			f.write(json.dumps(header) + "\n")
+
+	workers = workers or os.cpu_count() or 1
+	worker = _encrypt_one if mode == "encrypt" else _decrypt_one
+	initargs = (master_key, salt, chunk_size, str(src), str(dst))
+	started = time.perf_counter()
+	files = 0
+	total_bytes = 0
+	failed: List[Dict[str, str]] = []
+	with open(manifest, "a", encoding="utf-8") as log:
+		if workers == 1 or len(pending) < 2:
+			_init_worker(*initargs)
+			results = map(worker, pending)
+			executor = None
+		else:
+			executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+			results = executor.map(worker, pending, chunksize=max(1, min(64, len(pending) // (workers * 8))))
+		try:
+			# map() conserva el orden: cada resultado corresponde a su elemento de `pending`
+			for (rel, size, mtime_ns), (processed, error) in zip(pending, results):
+				if error is None:
+					files += 1
+					total_bytes += processed
+					log.write(json.dumps({'path': rel, 'size': size, 'mtime_ns': mtime_ns}) + "\n")
+				else:
+					failed.append({'path': rel, 'error': error})
+				if progress is not None:
+					progress(1, size)
+		finally:
+			if executor is not None:
+				executor.shutdown()
+			_WORKER.clear()
+	seconds = time.perf_counter() - started
+	return {
+		'mode': mode,
+		'files': files,
+		'skipped': skipped,
+		'failed': failed,
+		'bytes': total_bytes,
+		'seconds': seconds,
+		'files_per_s': files / seconds if seconds else 0.0,
+		'mb_per_s': total_bytes / seconds / 1e6 if seconds else 0.0,
+		'workers': workers,
+	}
+
+
+def _prepare(mode: str, src: Path, dst: Path) -> Tuple[Path, Optional[Dict[str, Any]], Dict[str, Tuple[int, int]]]:
+	if not src.is_dir():
+		raise BulkError(f"{src} no es un directorio")
+	if dst.resolve() == src.resolve() or src.resolve() in dst.resolve().parents:
+		raise BulkError("El destino no puede estar dentro del origen")
+	manifest = dst / MANIFEST_NAME
+	header, done = _read_manifest(manifest)
+	if header is not None and (header.get('version') != MANIFEST_VERSION or header.get('mode') != mode):
+		raise BulkError(f"{manifest} no corresponde a una operación {mode}")
+	return manifest, header, done
+
+
+def encrypt_tree(src, dst, password: str, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+				 flora: Optional[FloraCryptoSystem] = None,
+				 progress: Optional[ProgressCallback] = None,
+				 total: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+	"""Cifra cada fichero de `src` en `dst`/<ruta>.flora (contenedor FLS1).
+
+	`total(ficheros, bytes)` se llama tras recorrer el árbol y `progress(1,
+	bytes)` por cada fichero procesado. Devuelve el resumen de la ejecución.
+	"""
+	src, dst = Path(src), Path(dst)
+	manifest, header, done = _prepare("encrypt", src, dst)
+	flora = flora or FloraCryptoSystem(use_kyber=False)
+	# Al reanudar se reutiliza el salt del manifiesto: todo el árbol comparte clave
+	salt = bytes.fromhex(header['salt']) if header else os.urandom(flora.salt_size)
+	master_key, _ = flora.generate_master_key(password, salt)
+	if header is not None and not hmac.compare_digest(header['check'], _key_check(master_key)):
+		raise BulkError("La contraseña no coincide con la del manifiesto existente")
+	if header is not None:
+		chunk_size = header['chunk_size']
+	items = list(walk_files(src))
+	if total is not None:
+		total(len(items), sum(i[1] for i in items))
+	return _run("encrypt", src, dst, items, master_key, salt, chunk_size, manifest, header, done, workers, progress)
+
+
+def decrypt_tree(src, dst, password: str, workers: Optional[int] = None,
+				 flora: Optional[FloraCryptoSystem] = None,
+				 progress: Optional[ProgressCallback] = None,
+				 total: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+	"""Descifra los contenedores de `src` (árbol de encrypt_tree) en `dst`.
+
+	El salt se toma del manifiesto de `src` o, si no está, de la cabecera del
+	primer contenedor; los ficheros con otro salt se informan como fallidos.
+	"""
+	src, dst = Path(src), Path(dst)
+	manifest, header, done = _prepare("decrypt", src, dst)
+	items = [item for item in walk_files(src) if item[0].endswith(SUFFIX)]
+	source_header, _ = _read_manifest(src / MANIFEST_NAME)
+	if header is not None:
+		salt = bytes.fromhex(header['salt'])
+	elif source_header is not None:
+		salt = bytes.fromhex(source_header['salt'])
+	elif items:
+		salt = _read_salt(src / items[0][0])
+	else:
+		salt = b""
+	flora = flora or FloraCryptoSystem(use_kyber=False)
+	master_key, _ = flora.generate_master_key(password, salt) if salt else (b"", b"")
+	for known in (header, source_header):
+		if known is not None and not hmac.compare_digest(known['check'], _key_check(master_key)):
+			raise BulkError("Contraseña incorrecta para este árbol")
+	if total is not None:
+		total(len(items), sum(i[1] for i in items))
+	return _run("decrypt", src, dst, items, master_key, salt, DEFAULT_CHUNK_SIZE, manifest, header, done,
+				workers, progress)
+
+
+# ===== Rotación de contraseña de bundles JSON =====
+
+def _worker_system(kyber: bool) -> FloraCryptoSystem:
+	"""Sistemas del proceso (descifrado y cifrado con/sin Kyber), con sesiones ligadas a la clave."""
+	name = f"system_{kyber}"
+	system = _WORKER.get(name)
+	if system is None:
+		system = _WORKER[name] = FloraCryptoSystem(use_kyber=kyber, kyber_keyring=_WORKER.get('keyring'),
+												   scope_sessions=True, max_sessions=256)
+	return system
+
+
+def _reset_systems() -> None:
+	# Un fallo de autenticación degrada el sistema (autodestrucción): no arrastrarlo a otros ficheros
+	for kyber in (False, True):
+		_WORKER.pop(f"system_{kyber}", None)
+
+
+def _init_rekey_worker(keyring: Optional[str], new_key: bytes, new_salt: bytes) -> None:
+	_WORKER.update(keyring=keyring, new_key=new_key, new_salt=new_salt)
+
+
+def _derive_old_key(task: Tuple[str, str, str]) -> Tuple[str, Optional[bytes]]:
+	"""Deriva la clave de un master_salt y la valida descifrando un bundle de muestra."""
+	salt_hex, password, sample = task
+	master_key, _ = _worker_system(False).generate_master_key(password, bytes.fromhex(salt_hex))
+	try:
+		with open(sample, "r", encoding="utf-8") as f:
+			_worker_system(False).decrypt_message(json.load(f), master_key)
+	except Exception:
+		_reset_systems()
+		return salt_hex, None
+	return salt_hex, master_key
+
+
+def _rekey_one(item: Tuple[str, str, bytes]) -> Tuple[int, Optional[str]]:
+	"""Re-cifra un bundle con la clave nueva (escritura atómica) -> (bytes, error).
+
+	La clave antigua ya derivada viaja con la tarea (32 bytes).
+	"""
+	path, salt_hex, old_key = item
+	target = Path(path)
+	tmp = target.with_name(target.name + _TMP_SUFFIX)
+	try:
+		raw = target.read_bytes()
+		bundle = json.loads(raw)
+		if bundle.get('master_salt') != salt_hex:
+			raise ValueError("El bundle cambió durante la rotación")
+		plaintext = _worker_system(False).decrypt_message(bundle, old_key)
+		ad = bytes.fromhex(bundle['associated_data']) if bundle.get('associated_data') else None
+		rekeyed = _worker_system(bool(bundle.get('kem'))).encrypt_message(plaintext, _WORKER['new_key'],
+																		 bundle['session_id'], ad)
+		rekeyed['master_salt'] = _WORKER['new_salt'].hex()
+		tmp.write_text(json.dumps(rekeyed, ensure_ascii=False, indent=2), encoding="utf-8")
+		os.replace(tmp, target)
+	except Exception as e:
+		_reset_systems()
+		tmp.unlink(missing_ok=True)
+		return 0, str(e) or type(e).__name__
+	return len(raw), None
+
+
+def _bundle_salt(path: Path) -> Optional[str]:
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			salt = json.load(f).get('master_salt')
+	except (OSError, ValueError, AttributeError):
+		return None
+	return salt if isinstance(salt, str) else None
+
+
+def rekey_tree(root, old_password: str, new_password: str, workers: Optional[int] = None,
+			   keyring: Optional[str] = None, suffix: str = BUNDLE_SUFFIX,
+			   progress: Optional[ProgressCallback] = None,
+			   total: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+	"""Cambia la contraseña de los bundles `*suffix` bajo `root`, en el sitio.
+
+	Los bundles se re-cifran (la clave de sesión depende de la clave maestra,
+	así que no basta con re-envolver). Los que ya tienen el master_salt nuevo
+	del diario se consideran hechos; el diario se borra al terminar sin fallos.
+	"""
+	root = Path(root)
+	if not root.is_dir():
+		raise BulkError(f"{root} no es un directorio")
+	journal = root / REKEY_JOURNAL_NAME
+	header, _ = _read_manifest(journal)
+	if header is not None and (header.get('version') != MANIFEST_VERSION or header.get('mode') != "rekey"):
+		raise BulkError(f"{journal} no corresponde a una rotación de contraseña")
+
+	started = time.perf_counter()
+	workers = workers or os.cpu_count() or 1
+	flora = FloraCryptoSystem(use_kyber=False)
+	new_salt = bytes.fromhex(header['salt']) if header else os.urandom(flora.salt_size)
+	new_key, _ = flora.generate_master_key(new_password, new_salt)
+	if header is not None and not hmac.compare_digest(header['check'], _key_check(new_key)):
+		raise BulkError("La contraseña nueva no coincide con la de la rotación interrumpida")
+	if header is None:
+		with open(journal, "w", encoding="utf-8") as f:
+			f.write(json.dumps({'version': MANIFEST_VERSION, 'mode': "rekey", 'salt': new_salt.hex(),
+								'check': _key_check(new_key)}) + "\n")
+
+	# Agrupar por master_salt: una derivación por salt distinto
+	by_salt: Dict[str, List[str]] = {}
+	invalid: List[Dict[str, str]] = []
+	skipped = 0
+	for rel, _, _ in walk_files(root):
+		if not rel.endswith(suffix):
+			continue
+		salt_hex = _bundle_salt(root / rel)
+		if salt_hex is None:
+			invalid.append({'path': rel, 'error': "Bundle inválido: falta master_salt"})
+		elif salt_hex == new_salt.hex():
+			skipped += 1
+		else:
+			by_salt.setdefault(salt_hex, []).append(rel)
+	initargs = (keyring, new_key, new_salt)
+	use_pool = workers > 1 and sum(len(paths) for paths in by_salt.values()) > 1
+	executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_rekey_worker,
+								   initargs=initargs) if use_pool else None
+	if executor is None:
+		_init_rekey_worker(*initargs)
+	failed = list(invalid)
+	files = 0
+	total_bytes = 0
+	kdf_started = time.perf_counter()
+	try:
+		tasks = [(salt_hex, old_password, str(root / paths[0])) for salt_hex, paths in by_salt.items()]
+		derived = executor.map(_derive_old_key, tasks) if executor else map(_derive_old_key, tasks)
+		old_keys = {}
+		for salt_hex, master_key in derived:
+			if master_key is None:
+				failed.extend({'path': rel, 'error': "Contraseña antigua incorrecta para este master_salt"}
+							  for rel in by_salt.pop(salt_hex))
+			else:
+				old_keys[salt_hex] = master_key
+		kdf_seconds = time.perf_counter() - kdf_started
+		items = [(str(root / rel), salt_hex, old_keys[salt_hex]) for salt_hex, paths in by_salt.items() for rel in paths]
+		if total is not None:
+			total(len(items), sum(os.stat(item[0]).st_size for item in items))
+		if executor is not None:
+			results = executor.map(_rekey_one, items, chunksize=max(1, min(32, len(items) // (workers * 8))))
+		else:
+			results = map(_rekey_one, items)
+		with open(journal, "a", encoding="utf-8") as log:
+			for (path, _, _), (size, error) in zip(items, results):
+				rel = str(Path(path).relative_to(root))
+				if error is None:
+					files += 1
+					total_bytes += size
+					log.write(json.dumps({'path': rel, 'size': size, 'mtime_ns': os.stat(path).st_mtime_ns}) + "\n")
+				else:
+					failed.append({'path': rel, 'error': error})
+				if progress is not None:
+					progress(1, size)
+	finally:
+		if executor is not None:
+			executor.shutdown()
+		_WORKER.clear()
+	if not failed:
+		journal.unlink(missing_ok=True)
+	seconds = time.perf_counter() - started
+	derivations = len(tasks) + 1
+	return {
+		'mode': "rekey",
+		'files': files,
+		'skipped': skipped,
+		'failed': failed,
+		'bytes': total_bytes,
+		'seconds': seconds,
+		'files_per_s': files / seconds if seconds else 0.0,
+		'mb_per_s': total_bytes / seconds / 1e6 if seconds else 0.0,
+		'workers': workers,
+		'distinct_salts': len(tasks),
+		'kdf_derivations': derivations,
+		# Sin caché serían dos derivaciones (antigua y nueva) por bundle
+		'kdf_saved': max(0, 2 * (files + len(failed) - len(invalid)) - derivations),
+		'kdf_seconds': kdf_seconds,
+	}
+
+
+# ===== Verificación de integridad =====
+
+def _init_verify_worker(keyring: Optional[str]) -> None:
+	_WORKER.update(keyring=keyring)
+
+
+def _derive_key(task: Tuple[str, str]) -> Tuple[str, bytes]:
+	salt_hex, password = task
+	return salt_hex, _worker_system(False).generate_master_key(password, bytes.fromhex(salt_hex))[0]
+
+
+def _verify_one(item: Tuple[str, bool, bytes]) -> Optional[str]:
+	"""Comprueba un bundle JSON o un contenedor FLS1 -> error o None.
+
+	El texto plano se descarta según se verifica; nada se escribe en disco.
+	"""
+	path, container, master_key = item
+	try:
+		if not container:
+			with open(path, "r", encoding="utf-8") as f:
+				bundle = json.load(f)
+			if not _worker_system(False).verify_message(bundle, master_key):
+				return "Tag GCM inválido (contraseña incorrecta o bundle alterado)"
+			return None
+		dec = StreamDecryptor(lambda salt: master_key)
+		with open(path, "rb") as f:
+			while True:
+				block = f.read(DEFAULT_CHUNK_SIZE)
+				if not block:
+					break
+				dec.update(block)
+		dec.finalize()
+	except Exception as e:
+		return str(e) or type(e).__name__
+	return None
+
+
+def _verify_targets(paths: List[Any]) -> Iterator[Tuple[str, int]]:
+	"""Ficheros a verificar -> (ruta, tamaño); en directorios, *.enc.json y *.flora."""
+	for path in map(Path, paths):
+		if path.is_dir():
+			for rel, size, _ in walk_files(path):
+				if rel.endswith((BUNDLE_SUFFIX, SUFFIX)):
+					yield str(path / rel), size
+		elif path.is_file():
+			yield str(path), path.stat().st_size
+		else:
+			raise BulkError(f"{path} no existe")
+
+
+def _file_salt(path: str) -> Tuple[bool, Optional[str]]:
+	"""-> (es contenedor FLS1, salt en hex o None si el fichero no es válido)."""
+	try:
+		with open(path, "rb") as f:
+			container = f.read(len(MAGIC)) == MAGIC
+		if container:
+			return True, _read_salt(Path(path)).hex()
+	except (OSError, BulkError):
+		return False, None
+	return False, _bundle_salt(Path(path))
+
+
+def verify_paths(paths: List[Any], password: str, workers: Optional[int] = None, keyring: Optional[str] = None,
+				 progress: Optional[ProgressCallback] = None,
+				 total: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+	"""Verifica la autenticidad de bundles y contenedores bajo `paths` con `password`.
+
+	La clave maestra se deriva una vez por salt distinto y los ficheros se
+	comprueban en un pool de procesos con FloraCryptoSystem.verify_message,
+	que no degrada el sistema: un fichero alterado solo aparece en `failed`.
+	"""
+	started = time.perf_counter()
+	targets = list(_verify_targets(paths))
+	if total is not None:
+		total(len(targets), sum(size for _, size in targets))
+	workers = workers or os.cpu_count() or 1
+	by_salt: Dict[str, List[Tuple[str, int, bool]]] = {}
+	failed: List[Dict[str, str]] = []
+	for path, size in targets:
+		container, salt_hex = _file_salt(path)
+		if salt_hex is None:
+			failed.append({'path': path, 'error': "No es un bundle FLORA ni un contenedor FLS1"})
+			if progress is not None:
+				progress(1, size)
+		else:
+			by_salt.setdefault(salt_hex, []).append((path, size, container))
+	use_pool = workers > 1 and len(targets) > 1
+	executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_verify_worker,
+								   initargs=(keyring,)) if use_pool else None
+	if executor is None:
+		_init_verify_worker(keyring)
+	files = 0
+	total_bytes = 0
+	try:
+		kdf_started = time.perf_counter()
+		tasks = [(salt_hex, password) for salt_hex in by_salt]
+		keys = dict(executor.map(_derive_key, tasks) if executor else map(_derive_key, tasks))
+		kdf_seconds = time.perf_counter() - kdf_started
+		items = [(path, size, container, keys[salt_hex]) for salt_hex, entries in by_salt.items()
+				 for path, size, container in entries]
+		work = [(path, container, key) for path, _, container, key in items]
+		if executor is not None:
+			results = executor.map(_verify_one, work, chunksize=max(1, min(64, len(work) // (workers * 8))))
+		else:
+			results = map(_verify_one, work)
+		for (path, size, _, _), error in zip(items, results):
+			if error is None:
+				files += 1
+				total_bytes += size
+			else:
+				failed.append({'path': path, 'error': error})
+			if progress is not None:
+				progress(1, size)
+	finally:
+		if executor is not None:
+			executor.shutdown()
+		_WORKER.clear()
+	seconds = time.perf_counter() - started
+	return {
+		'mode': "verify",
+		'ok': not failed,
+		'files': files,
+		'failed': failed,
+		'bytes': total_bytes,
+		'seconds': seconds,
+		'files_per_s': (files + len(failed)) / seconds if seconds else 0.0,
+		'mb_per_s': total_bytes / seconds / 1e6 if seconds else 0.0,
+		'workers': workers,
+		'distinct_salts': len(tasks),
+		'kdf_derivations': len(tasks),
+		'kdf_seconds': kdf_seconds,
+	}
@@ -0,0 +1,398 @@
+# 🌸 FLORA - Análisis de Parámetros Caóticos
+# Exponentes de Lyapunov, detección de periodos y datos de bifurcación del mapa
+# logístico, vectorizados con NumPy sobre mallas (r, x0) grandes.
+
+import bisect
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .chaotic_map import ChaoticDestructionEngine, R_CHAOS_MIN, R_CHAOS_MAX
+except ImportError:
+    from chaotic_map import ChaoticDestructionEngine, R_CHAOS_MIN, R_CHAOS_MAX
+
+DEFAULT_TRANSIENT = 1000
+DEFAULT_ITERATIONS = 2000
+DEFAULT_MAX_PERIOD = 64
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_PERIOD_TOLERANCE = 1e-9
+DEFAULT_X0_SAMPLES = (0.123456789, 0.5, 0.876543211)
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "flora", "chaos_exclusion.npz"
+)
+
+
+class GridResult(NamedTuple):
+    """Resultado del análisis de una malla (r, x0)."""
+    r_values: np.ndarray
+    x0_values: np.ndarray
+    lyapunov: np.ndarray  # shape (len(r), len(x0))
+    period: np.ndarray    # shape (len(r), len(x0)); 0 = sin periodo detectado
+
+
+class ChaosAnalyzer:
+    """
+    Analizador vectorizado del mapa logístico usado por ChaoticDestructionEngine.
+
+    Todas las trayectorias de un bloque se iteran a la vez como arrays de NumPy,
+    de modo que el coste por trayectoria es de unas pocas operaciones vectoriales
+    por iteración. Las mallas grandes se procesan en bloques de `chunk_size`
+    trayectorias y, opcionalmente, se vuelcan a disco (.npy mapeado en memoria).
+    """
+
+    def __init__(self,
+                 engine: Optional[ChaoticDestructionEngine] = None,
+                 transient: int = DEFAULT_TRANSIENT,
+                 iterations: int = DEFAULT_ITERATIONS,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            engine: Motor cuyo mapa se analiza (se crea uno por defecto)
+            transient: Iteraciones descartadas antes de medir
+            iterations: Iteraciones usadas para promediar el exponente de Lyapunov
+            chunk_size: Número máximo de trayectorias iteradas simultáneamente
+        """
+        if iterations <= 0:
+            raise ValueError("iterations debe ser positivo")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size debe ser positivo")
+        self.engine = engine or ChaoticDestructionEngine()
+        self.transient = max(0, transient)
+        self.iterations = iterations
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _step(x: np.ndarray, r: np.ndarray, tmp: np.ndarray) -> None:
+        """Iteración in-place x <- r * x * (1 - x) (mismo mapa que el motor)."""
+        np.subtract(1.0, x, out=tmp)
+        np.multiply(x, tmp, out=x)
+        np.multiply(x, r, out=x)
+
+    def _analyze_chunk(self,
+                       r: np.ndarray,
+                       x0: np.ndarray,
+                       max_period: int,
+                       tolerance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Calcula (lyapunov, periodo) para pares (r, x0) ya aplanados."""
+        x = np.array(x0, dtype=np.float64)
+        r = np.asarray(r, dtype=np.float64)
+        tmp = np.empty_like(x)
+        for _ in range(self.transient):
+            self._step(x, r, tmp)
+
+        x_ref = x.copy()
+        period = np.zeros(x.shape, dtype=np.int32)
+        log_sum = np.zeros(x.shape, dtype=np.float64)
+        deriv = np.empty_like(x)
+        for n in range(1, self.iterations + 1):
+            # |f'(x)| = |r (1 - 2x)|; se acota para evitar log(0) en x = 0.5
+            np.multiply(x, -2.0, out=deriv)
+            deriv += 1.0
+            deriv *= r
+            np.abs(deriv, out=deriv)
+            np.maximum(deriv, 1e-300, out=deriv)
+            log_sum += np.log(deriv)
+            self._step(x, r, tmp)
+            if n <= max_period:
+                hit = (period == 0) & (np.abs(x - x_ref) < tolerance)
+                period[hit] = n
+        return log_sum / self.iterations, period
+
+    def lyapunov_exponents(self,
+                           r_values: Sequence[float],
+                           x0: float = DEFAULT_X0_SAMPLES[0]) -> np.ndarray:
+        """
+        Exponente de Lyapunov para cada r (x0 común).
+
+        Un valor > 0 indica caos; <= 0, órbita periódica o punto fijo.
+        """
+        return self.analyze_grid(r_values, [x0]).lyapunov[:, 0]
+
+    def detect_periods(self,
+                       r_values: Sequence[float],
+                       x0: float = DEFAULT_X0_SAMPLES[0],
+                       max_period: int = DEFAULT_MAX_PERIOD,
+                       tolerance: float = DEFAULT_PERIOD_TOLERANCE) -> np.ndarray:
+        """
+        Periodo de la órbita atractora para cada r (0 si no se detecta ninguno
+        hasta `max_period`, típico de comportamiento caótico).
+        """
+        return self.analyze_grid(r_values, [x0], max_period=max_period,
+                                 tolerance=tolerance).period[:, 0]
+
+    def analyze_grid(self,
+                     r_values: Sequence[float],
+                     x0_values: Sequence[float],
+                     out_dir: Optional[str] = None,
+                     max_period: int = DEFAULT_MAX_PERIOD,
+                     tolerance: float = DEFAULT_PERIOD_TOLERANCE) -> GridResult:
+        """
+        Analiza la malla completa r × x0 por bloques.
+
+        Args:
+            r_values: Valores de r (filas)
+            x0_values: Condiciones iniciales (columnas)
+            out_dir: Si se indica, los resultados se escriben en
+                     out_dir/lyapunov.npy y out_dir/period.npy a medida que se
+                     calcula cada bloque, sin mantener la malla en memoria
+            max_period: Periodo máximo buscado
+            tolerance: Tolerancia para considerar que la órbita ha vuelto a x_ref
+
+        Returns:
+            GridResult (con arrays mapeados en disco si se usó out_dir)
+        """
+        r_values = np.asarray(r_values, dtype=np.float64).ravel()
+        x0_values = np.asarray(x0_values, dtype=np.float64).ravel()
+        shape = (r_values.size, x0_values.size)
+
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+            lyapunov = np.lib.format.open_memmap(
+                os.path.join(out_dir, "lyapunov.npy"), mode="w+", dtype=np.float64, shape=shape)
+            period = np.lib.format.open_memmap(
+                os.path.join(out_dir, "period.npy"), mode="w+", dtype=np.int32, shape=shape)
+        else:
+            lyapunov = np.empty(shape, dtype=np.float64)
+            period = np.empty(shape, dtype=np.int32)
+
+        flat_lyapunov = lyapunov.reshape(-1)
+        flat_period = period.reshape(-1)
+        total = shape[0] * shape[1]
+        for start in range(0, total, self.chunk_size):
+            idx = np.arange(start, min(total, start + self.chunk_size))
+            r_chunk = r_values[idx // shape[1]]
+            x_chunk = x0_values[idx % shape[1]]
+            lyap_chunk, period_chunk = self._analyze_chunk(r_chunk, x_chunk, max_period, tolerance)
+            flat_lyapunov[idx[0]:idx[-1] + 1] = lyap_chunk
+            flat_period[idx[0]:idx[-1] + 1] = period_chunk
+            if out_dir:
+                lyapunov.flush()
+                period.flush()
+
+        return GridResult(r_values, x0_values, lyapunov, period)
+
+    def bifurcation_data(self,
+                         r_values: Sequence[float],
+                         samples: int = 200,
+                         x0: float = DEFAULT_X0_SAMPLES[0],
+                         out_path: Optional[str] = None) -> np.ndarray:
+        """
+        Genera los datos del diagrama de bifurcación.
+
+        Args:
+            r_values: Valores de r
+            samples: Puntos de la órbita registrados por r tras el transitorio
+            x0: Condición inicial común
+            out_path: Fichero .npy opcional donde volcar el resultado por bloques
+
+        Returns:
+            Array (len(r), samples) con los estados visitados para cada r
+        """
+        r_values = np.asarray(r_values, dtype=np.float64).ravel()
+        shape = (r_values.size, samples)
+        if out_path:
+            out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=shape)
+        else:
+            out = np.empty(shape, dtype=np.float64)
+
+        for start in range(0, r_values.size, self.chunk_size):
+            r = r_values[start:start + self.chunk_size]
+            x = np.full(r.shape, x0, dtype=np.float64)
+            tmp = np.empty_like(x)
+            for _ in range(self.transient):
+                self._step(x, r, tmp)
+            for s in range(samples):
+                self._step(x, r, tmp)
+                out[start:start + r.size, s] = x
+            if out_path:
+                out.flush()
+        return out
+
+    def engine_lyapunov(self) -> float:
+        """Exponente de Lyapunov en el r actual del motor (semilla si existe)."""
+        if self.engine.initial_conditions is not None:
+            r, x0 = self.engine.initial_conditions
+        else:
+            r, x0 = self.engine.r_param, DEFAULT_X0_SAMPLES[0]
+        return float(self.analyze_grid([r], [x0]).lyapunov[0, 0])
+
+    def build_exclusion_table(self,
+                              r_min: float = R_CHAOS_MIN,
+                              r_max: float = R_CHAOS_MAX,
+                              resolution: float = 1e-5,
+                              x0_values: Sequence[float] = DEFAULT_X0_SAMPLES,
+                              threshold: float = 0.0,
+                              out_dir: Optional[str] = None) -> "ChaosExclusionTable":
+        """
+        Calcula los intervalos de r no caóticos en [r_min, r_max].
+
+        Un punto de la malla se considera no caótico si el exponente de Lyapunov
+        medio sobre `x0_values` es <= threshold. Los puntos contiguos se
+        fusionan en intervalos cuyos extremos quedan a media celda del primer
+        punto caótico vecino.
+        """
+        if not r_min < r_max:
+            raise ValueError("r_min debe ser menor que r_max")
+        if resolution <= 0:
+            raise ValueError("resolution debe ser positiva")
+        count = int(np.floor((r_max - r_min) / resolution)) + 1
+        r_grid = r_min + resolution * np.arange(count, dtype=np.float64)
+        result = self.analyze_grid(r_grid, x0_values, out_dir=out_dir)
+        mean_lyapunov = np.asarray(result.lyapunov).mean(axis=1)
+        non_chaotic = mean_lyapunov <= threshold
+
+        # Detectar tramos consecutivos no caóticos
+        padded = np.concatenate(([False], non_chaotic, [False]))
+        edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+        run_starts, run_ends = edges[0::2], edges[1::2] - 1
+        half = resolution / 2.0
+        starts = np.maximum(r_grid[run_starts] - half, r_min)
+        ends = np.minimum(r_grid[run_ends] + half, r_max)
+        return ChaosExclusionTable(
+            starts, ends,
+            metadata={
+                'r_min': r_min,
+                'r_max': r_max,
+                'resolution': resolution,
+                'threshold': threshold,
+                'transient': self.transient,
+                'iterations': self.iterations,
+            },
+        )
+
+
+class ChaosExclusionTable:
+    """
+    Tabla ordenada de intervalos [start, end] de r con comportamiento periódico.
+
+    Las consultas usan búsqueda binaria (O(log n)), por lo que puede consultarse
+    en cada inicialización de semilla del motor sin coste apreciable.
+    """
+
+    def __init__(self,
+                 starts: Iterable[float],
+                 ends: Iterable[float],
+                 metadata: Optional[Dict[str, float]] = None):
+        self.starts: List[float] = [float(s) for s in starts]
+        self.ends: List[float] = [float(e) for e in ends]
+        if len(self.starts) != len(self.ends):
+            raise ValueError("starts y ends deben tener la misma longitud")
+        if any(b < a for a, b in zip(self.starts, self.ends)) or self.starts != sorted(self.starts):
+            raise ValueError("Los intervalos deben estar ordenados y ser válidos")
+        self.metadata = dict(metadata or {})
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def intervals(self) -> List[Tuple[float, float]]:
+        return list(zip(self.starts, self.ends))
+
+    def _find(self, r: float) -> int:
+        """Índice del intervalo que contiene r, o -1."""
+        idx = bisect.bisect_right(self.starts, r) - 1
+        if idx >= 0 and r <= self.ends[idx]:
+            return idx
+        return -1
+
+    def contains(self, r: float) -> bool:
+        """True si r cae en una ventana no caótica."""
+        return self._find(r) >= 0
+
+    def nearest_chaotic(self, r: float) -> float:
+        """
+        Devuelve r si es caótico; si no, el extremo caótico más cercano del
+        intervalo que lo contiene (dentro de [r_min, r_max] de la tabla).
+        """
+        idx = self._find(r)
+        if idx < 0:
+            return r
+        nudge = self.metadata.get('resolution', 1e-12) / 2.0
+        r_min = self.metadata.get('r_min', R_CHAOS_MIN)
+        r_max = self.metadata.get('r_max', R_CHAOS_MAX)
+        candidates = []
+        below = self.starts[idx] - nudge
+        above = self.ends[idx] + nudge
+        if below >= r_min and not self.contains(below):
+            candidates.append(below)
+        if above <= r_max and not self.contains(above):
+            candidates.append(above)
+        if not candidates:
+            return r
+        return min(candidates, key=lambda c: abs(c - r))
+
+    def save(self, path: str) -> None:
+        """Guarda la tabla en formato .npz (escritura atómica)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        meta_keys = sorted(self.metadata)
+        np.savez(
+            tmp_path,
+            starts=np.asarray(self.starts, dtype=np.float64),
+            ends=np.asarray(self.ends, dtype=np.float64),
+            meta_keys=np.asarray(meta_keys, dtype=str),
+            meta_values=np.asarray([self.metadata[k] for k in meta_keys], dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ChaosExclusionTable":
+        """Carga una tabla guardada con save()."""
+        with np.load(path) as data:
+            metadata = {str(k): float(v) for k, v in zip(data['meta_keys'], data['meta_values'])}
+            return cls(data['starts'], data['ends'], metadata=metadata)
+
+
+def load_or_build_exclusion_table(cache_path: Optional[str] = None,
+                                  analyzer: Optional[ChaosAnalyzer] = None,
+                                  **build_kwargs) -> ChaosExclusionTable:
+    """
+    Devuelve la tabla de exclusión cacheada en disco, calculándola si no existe
+    o si fue generada con otros parámetros (r_min, r_max, resolution...).
+    """
+    cache_path = cache_path or DEFAULT_CACHE_PATH
+    analyzer = analyzer or ChaosAnalyzer()
+    expected = {
+        'r_min': build_kwargs.get('r_min', R_CHAOS_MIN),
+        'r_max': build_kwargs.get('r_max', R_CHAOS_MAX),
+        'resolution': build_kwargs.get('resolution', 1e-5),
+        'threshold': build_kwargs.get('threshold', 0.0),
+        'transient': analyzer.transient,
+        'iterations': analyzer.iterations,
+    }
+    if os.path.exists(cache_path):
+        try:
+            table = ChaosExclusionTable.load(cache_path)
+            if all(np.isclose(table.metadata.get(k, np.nan), v) for k, v in expected.items()):
+                return table
+        except Exception:
+            pass
+    table = analyzer.build_exclusion_table(**build_kwargs)
+    table.save(cache_path)
+    return table
+
+
+# Función de utilidad para testing
+def test_chaos_analysis():
+    """Función de prueba para el análisis de parámetros caóticos."""
+    print("🧪 Probando Análisis de Parámetros Caóticos...")
+
+    analyzer = ChaosAnalyzer(transient=500, iterations=1000)
+    r_values = [3.6, 3.74, 3.83, 3.9, 3.99]
+    lyap = analyzer.lyapunov_exponents(r_values)
+    periods = analyzer.detect_periods(r_values)
+    for r, l, p in zip(r_values, lyap, periods):
+        print(f"   r={r:.4f}  λ={l:+.4f}  periodo={p or '-'}")
+
+    table = analyzer.build_exclusion_table(resolution=1e-4)
+    print(f"✅ Tabla de exclusión: {len(table)} ventanas periódicas")
+    print(f"🔍 ¿3.83 excluido? {table.contains(3.83)} → {table.nearest_chaotic(3.83):.6f}")
+
+    print("✅ Prueba del análisis caótico completada!")
+
+
+if __name__ == "__main__":
+    test_chaos_analysis()
@@ -6,6 +6,10 @@ import hashlib
 from typing import Tuple, List, Optional
 import time
 
+# Rango de r en el que se fija el parámetro del mapa (ver clamps abajo)
+R_CHAOS_MIN = 3.57
+R_CHAOS_MAX = 3.999
+
 class ChaoticDestructionEngine:
     """
     Motor de autodestrucción basado en el mapa logístico caótico.
@@ -15,18 +19,23 @@ class ChaoticDestructionEngine:
     total e irreversible de las claves criptográficas.
     """
     
-    def __init__(self, r_param: float = 3.9987654321098765):
+    def __init__(self, r_param: float = 3.9987654321098765, exclusion_table=None):
         """
         Inicializa el motor de autodestrucción caótica.
         
         Args:
             r_param: Parámetro de control del mapa logístico (3.57 < r < 4.0)
                      Valores más cercanos a 4.0 producen comportamiento más caótico
+            exclusion_table: Tabla opcional de intervalos de r no caóticos
+                     (ver chaos_analysis.ChaosExclusionTable). Si se indica, los
+                     valores de r caídos en una ventana periódica se desplazan
+                     al valor caótico más cercano.
         """
         if not (3.57 < r_param < 4.0):
             raise ValueError("r_param debe estar en el rango (3.57, 4.0) para comportamiento caótico")
         
         self.r_param = r_param
+        self.exclusion_table = exclusion_table
         self.initial_conditions = None
         self.destruction_history = []
         
@@ -52,7 +61,7 @@ class ChaoticDestructionEngine:
         r_perturbed = self.r_param + (hash_int % 1000) / 10000000.0
         
         # Asegurar que r permanezca en rango caótico
-        r_perturbed = max(3.57, min(3.999, r_perturbed))
+        r_perturbed = self._clamp_chaotic_r(r_perturbed)
         
         self.initial_conditions = (r_perturbed, x0)
         
@@ -132,11 +141,21 @@ class ChaoticDestructionEngine:
         x_perturbed = x + ((hash_int >> 8) % 1000) / 1000000.0
         
         # Asegurar que los valores permanezcan en rangos válidos
-        r_perturbed = max(3.57, min(3.999, r_perturbed))
+        r_perturbed = self._clamp_chaotic_r(r_perturbed)
         x_perturbed = max(0.0, min(0.999, x_perturbed))
         
         return r_perturbed, x_perturbed
     
+    def _clamp_chaotic_r(self, r: float) -> float:
+        """
+        Limita r a [R_CHAOS_MIN, R_CHAOS_MAX] y evita las ventanas periódicas
+        registradas en la tabla de exclusión (búsqueda O(log n)).
+        """
+        r = max(R_CHAOS_MIN, min(R_CHAOS_MAX, r))
+        if self.exclusion_table is not None:
+            r = self.exclusion_table.nearest_chaotic(r)
+        return r
+    
     def corrupt_key_material(self, 
                            key_material: bytes, 
                            attack_hash: Optional[bytes] = None) -> bytes:
@@ -1,15 +1,22 @@
 # 🌸 FLORA - CLI
-# Comandos: encrypt, decrypt, status
+# Comandos: encrypt, decrypt, encrypt-tree, decrypt-tree, rekey, verify, status
 
 import sys
 import json
 import os
 import click
 from pathlib import Path
+from contextlib import nullcontext
+from typing import BinaryIO, ContextManager, Optional
 
-from .flora_crypto import FloraCryptoSystem
+from .kyber_keyring import KEYRING_ENV
+
+# Los módulos criptográficos (numpy, Crypto, backends Kyber) se importan dentro
+# de cada comando: `flora --help` no debe pagar su carga.
 
 DEFAULT_SESSION = "cli_default_session"
+PASSWORD_ENV = "FLORA_PASSWORD"
+NEW_PASSWORD_ENV = "FLORA_NEW_PASSWORD"
 
 EXAMPLES = """
 Examples:
@@ -17,6 +24,11 @@ Examples:
   flora status
   flora encrypt --no-kyber --session demo --ad 414243 msg.txt msg.enc.json
   flora decrypt msg.enc.json msg.dec.txt
+  pg_dump db | FLORA_PASSWORD=... flora encrypt - - | aws s3 cp - s3://copias/db.flora
+  flora encrypt-tree --workers 8 fotos/ fotos.enc/
+  flora decrypt-tree fotos.enc/ fotos.dec/
+  flora rekey --workers 8 bundles/
+  flora verify --json bundles/ fotos.enc/ > informe.json
   
   # En PowerShell, varios comandos en una sola línea
   flora --help ; flora status
@@ -39,16 +51,69 @@ def _write_bytes(path: Path, data: bytes) -> None:
 	path.write_bytes(data)
 
 
-@main.command(help="Encripta INFILE -> OUTFILE (JSON).", epilog="Ejemplo: flora encrypt --no-kyber --session demo --ad 414243 msg.txt msg.enc.json")
-@click.option("--password", prompt=True, hide_input=True, confirmation_prompt=False, help="Contraseña para derivar la clave maestra")
-@click.option("--use-kyber/--no-kyber", default=True, help="Intentar usar Kyber KEM para clave de sesión")
+# stdin/stdout se envuelven en nullcontext para que el `with` no los cierre
+def _open_input(name: str) -> ContextManager[BinaryIO]:
+	return nullcontext(sys.stdin.buffer) if name == "-" else open(name, "rb")
+
+
+def _open_output(name: str) -> ContextManager[BinaryIO]:
+	if name == "-":
+		return nullcontext(sys.stdout.buffer)
+	Path(name).parent.mkdir(parents=True, exist_ok=True)
+	return open(name, "wb")
+
+
+def _done(message: str, outfile: str) -> None:
+	# Con la salida en stdout el mensaje va a stderr para no mezclarse con los datos
+	click.echo(message, err=outfile == "-")
+
+
+def _fail(message: str, outfile: Optional[str] = None) -> None:
+	if outfile and outfile != "-":
+		Path(outfile).unlink(missing_ok=True)
+	click.echo("❌ " + message, err=True)
+	sys.exit(1)
+
+
+PASSWORD_OPTION = click.option("--password", prompt=True, hide_input=True, confirmation_prompt=False,
+							   envvar=PASSWORD_ENV,
+							   help=f"Contraseña para derivar la clave maestra (o ${PASSWORD_ENV})")
+
+# Sin keyring explícito no se escribe ninguna clave secreta en disco
+KEYRING_OPTION = click.option("--keyring", type=click.Path(dir_okay=False), envvar=KEYRING_ENV, default=None,
+							  help=f"Keyring Kyber de destinatario (o ${KEYRING_ENV}); guarda claves "
+								   "secretas sin cifrar: haz copia de seguridad, sin él no se descifran "
+								   "los bundles Kyber")
+
+
+@main.command(help="Encripta INFILE -> OUTFILE (JSON). Con '-' (stdin/stdout) o --stream usa el "
+			  "contenedor binario por segmentos, con memoria constante (sin Kyber ni --ad).",
+			  epilog="Ejemplo: pg_dump db | flora encrypt - - > db.sql.flora")
+@PASSWORD_OPTION
+@click.option("--use-kyber/--no-kyber", default=False, help="Usar Kyber KEM para la clave de sesión (por defecto, solo contraseña)")
+@KEYRING_OPTION
 @click.option("--session", default=DEFAULT_SESSION, help="ID de sesión")
 @click.option("--ad", type=str, default=None, help="Datos asociados (hex opcional)")
-@click.argument("infile", type=click.Path(exists=True, dir_okay=False))
-@click.argument("outfile", type=click.Path(dir_okay=False))
-def encrypt(password: str, use_kyber: bool, session: str, ad: str, infile: str, outfile: str):
-	"""Encripta INFILE -> OUTFILE (hex JSON)."""
-	flora = FloraCryptoSystem(use_kyber=use_kyber)
+@click.option("--stream", "stream", is_flag=True, default=False, help="Usar el contenedor por segmentos también con ficheros")
+@click.argument("infile", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.argument("outfile", type=click.Path(dir_okay=False, allow_dash=True))
+def encrypt(password: str, use_kyber: bool, keyring: str, session: str, ad: str, stream: bool, infile: str, outfile: str):
+	"""Encripta INFILE -> OUTFILE (hex JSON o contenedor por segmentos)."""
+	from .flora_crypto import FloraCryptoSystem
+	from .stream_container import encrypt_stream
+	if stream or "-" in (infile, outfile):
+		if ad:
+			_fail("--ad no está soportado en el modo stream")
+		flora = FloraCryptoSystem(use_kyber=False)
+		master_key, master_salt = flora.generate_master_key(password)
+		with _open_input(infile) as src, _open_output(outfile) as dst:
+			encrypt_stream(src, dst, master_key, master_salt)
+		_done("✅ Encriptado OK → " + outfile, outfile)
+		return
+	if use_kyber and not keyring:
+		_fail(f"--use-kyber necesita --keyring (o ${KEYRING_ENV}): sin un keyring persistente "
+			  "el bundle no se podría desencriptar")
+	flora = FloraCryptoSystem(use_kyber=use_kyber, kyber_keyring=keyring)
 	# Generar un salt explícito para poder reconstruir la master_key en decrypt
 	master_salt = os.urandom(32)
 	master_key, _ = flora.generate_master_key(password, master_salt)
@@ -61,14 +126,35 @@ def encrypt(password: str, use_kyber: bool, session: str, ad: str, infile: str,
 	click.echo("✅ Encriptado OK → " + outfile)
 
 
-@main.command(help="Desencripta INFILE (JSON) -> OUTFILE (bytes).", epilog="Ejemplo: flora decrypt msg.enc.json msg.dec.txt")
-@click.option("--password", prompt=True, hide_input=True, confirmation_prompt=False, help="Contraseña para derivar la clave maestra")
-@click.argument("infile", type=click.Path(exists=True, dir_okay=False))
-@click.argument("outfile", type=click.Path(dir_okay=False))
-def decrypt(password: str, infile: str, outfile: str):
-	"""Desencripta INFILE (JSON) -> OUTFILE (bytes)."""
-	flora = FloraCryptoSystem()
-	enc = json.loads(Path(infile).read_text())
+@main.command(help="Desencripta INFILE -> OUTFILE (bytes). Detecta el formato: JSON o contenedor por "
+			  "segmentos; '-' lee de stdin / escribe en stdout.",
+			  epilog="Ejemplo: flora decrypt - - < db.sql.flora | psql db")
+@PASSWORD_OPTION
+@KEYRING_OPTION
+@click.argument("infile", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.argument("outfile", type=click.Path(dir_okay=False, allow_dash=True))
+def decrypt(password: str, keyring: str, infile: str, outfile: str):
+	"""Desencripta INFILE (JSON o contenedor) -> OUTFILE (bytes)."""
+	from .flora_crypto import FloraCryptoSystem
+	from .stream_container import MAGIC as STREAM_MAGIC
+	from .stream_container import DEFAULT_CHUNK_SIZE, StreamDecryptor, StreamFormatError
+	flora = FloraCryptoSystem(use_kyber=False, kyber_keyring=keyring)
+	with _open_input(infile) as src:
+		head = src.read(len(STREAM_MAGIC))
+		if head == STREAM_MAGIC:
+			# Solo se escriben segmentos ya verificados; si algo falla se borra la salida parcial
+			dec = StreamDecryptor(lambda salt: flora.generate_master_key(password, salt)[0])
+			try:
+				with _open_output(outfile) as dst:
+					dst.write(dec.update(head))
+					for block in iter(lambda: src.read(DEFAULT_CHUNK_SIZE), b""):
+						dst.write(dec.update(block))
+					dec.finalize()
+			except StreamFormatError as e:
+				_fail(str(e), outfile)
+			_done("✅ Desencriptado OK → " + outfile, outfile)
+			return
+		enc = json.loads(head + src.read())
 	# Recuperar master_salt desde el paquete
 	master_salt_hex = enc.get('master_salt')
 	if not master_salt_hex:
@@ -76,14 +162,143 @@ def decrypt(password: str, infile: str, outfile: str):
 		sys.exit(1)
 	master_salt = bytes.fromhex(master_salt_hex)
 	master_key, _ = flora.generate_master_key(password, master_salt)
-	pt = flora.decrypt_message(enc, master_key)
-	_write_bytes(Path(outfile), pt)
-	click.echo("✅ Desencriptado OK → " + outfile)
+	try:
+		pt = flora.decrypt_message(enc, master_key)
+	except ValueError as e:
+		# Un bundle Kyber solo se abre con la clave secreta del keyring con el que se cifró
+		hint = " (bundle Kyber: indica con --keyring el keyring usado al cifrar)" if enc.get('kem') else ""
+		_fail(f"No se pudo desencriptar: {e}{hint}")
+	if outfile == "-":
+		sys.stdout.buffer.write(pt)
+	else:
+		_write_bytes(Path(outfile), pt)
+	_done("✅ Desencriptado OK → " + outfile, outfile)
+
+
+class _TreeProgress:
+	"""Barra de progreso (ficheros) para encrypt-tree/decrypt-tree, creada al conocer el total."""
+
+	def __init__(self, label: str) -> None:
+		self.label = label
+		self.bar = None
+
+	def total(self, files: int, size: int) -> None:
+		click.echo(f"📂 {files} ficheros, {size / 1e6:.1f} MB", err=True)
+		self.bar = click.progressbar(length=files, label=self.label, file=sys.stderr, show_pos=True)
+
+	def advance(self, files: int, size: int) -> None:
+		self.bar.update(files)
+
+	def finish(self) -> None:
+		if self.bar is not None:
+			self.bar.render_finish()
+
+
+def _tree_summary(result: dict, verb: str) -> None:
+	click.echo(f"✅ {result['files']} ficheros {verb} ({result['skipped']} ya hechos según el manifiesto) "
+			   f"en {result['seconds']:.2f} s: {result['files_per_s']:.1f} ficheros/s, "
+			   f"{result['mb_per_s']:.1f} MB/s con {result['workers']} procesos")
+	for failure in result['failed']:
+		click.echo(f"❌ {failure['path']}: {failure['error']}", err=True)
+	if result['failed']:
+		sys.exit(1)
+
+
+def _run_tree(operation, label: str, verb: str, *args, report=None, **kwargs) -> None:
+	from .bulk_ops import BulkError
+	progress = _TreeProgress(label)
+	try:
+		result = operation(*args, progress=progress.advance, total=progress.total, **kwargs)
+	except BulkError as e:
+		click.echo(f"❌ {e}", err=True)
+		sys.exit(1)
+	finally:
+		progress.finish()
+	if report is not None:
+		report(result)
+	_tree_summary(result, verb)
+
+
+@main.command("encrypt-tree", help="Encripta cada fichero de SRC en DST/<ruta>.flora (contenedor por segmentos).",
+			  epilog="Ejemplo: flora encrypt-tree --workers 8 fotos/ fotos.enc/")
+@PASSWORD_OPTION
+@click.option("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+@click.argument("src", type=click.Path(exists=True, file_okay=False))
+@click.argument("dst", type=click.Path(file_okay=False))
+def encrypt_tree_command(password: str, workers: int, src: str, dst: str):
+	"""Encripta un árbol de directorios; se puede reanudar si se interrumpe."""
+	from .bulk_ops import encrypt_tree
+	_run_tree(encrypt_tree, "Encriptando", "encriptados", src, dst, password, workers=workers)
+
+
+@main.command("decrypt-tree", help="Desencripta un árbol creado con encrypt-tree (SRC) en DST.",
+			  epilog="Ejemplo: flora decrypt-tree fotos.enc/ fotos.dec/")
+@PASSWORD_OPTION
+@click.option("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+@click.argument("src", type=click.Path(exists=True, file_okay=False))
+@click.argument("dst", type=click.Path(file_okay=False))
+def decrypt_tree_command(password: str, workers: int, src: str, dst: str):
+	"""Desencripta un árbol de directorios; se puede reanudar si se interrumpe."""
+	from .bulk_ops import decrypt_tree
+	_run_tree(decrypt_tree, "Desencriptando", "desencriptados", src, dst, password, workers=workers)
+
+
+@main.command(help="Cambia la contraseña de los bundles *.enc.json bajo ROOT (en el sitio, reanudable).",
+			  epilog="Ejemplo: FLORA_PASSWORD=vieja FLORA_NEW_PASSWORD=nueva flora rekey bundles/")
+@click.option("--old-password", prompt=True, hide_input=True, envvar=PASSWORD_ENV,
+			  help=f"Contraseña actual de los bundles (o ${PASSWORD_ENV})")
+@click.option("--new-password", prompt=True, hide_input=True, confirmation_prompt=True, envvar=NEW_PASSWORD_ENV,
+			  help=f"Contraseña nueva (o ${NEW_PASSWORD_ENV})")
+@click.option("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+@KEYRING_OPTION
+@click.argument("root", type=click.Path(exists=True, file_okay=False))
+def rekey(old_password: str, new_password: str, workers: int, keyring: str, root: str):
+	"""Re-cifra cada bundle con la contraseña nueva; una derivación por master_salt distinto."""
+	from .bulk_ops import rekey_tree
+
+	def kdf_report(result: dict) -> None:
+		click.echo(f"🔑 KDF: {result['kdf_derivations']} derivaciones para {result['distinct_salts']} master_salt "
+				   f"distintos ({result['kdf_saved']} evitadas, {result['kdf_seconds']:.2f} s)")
+
+	_run_tree(rekey_tree, "Rotando", "re-cifrados", root, old_password, new_password, workers=workers,
+			  keyring=keyring, report=kdf_report)
+
+
+@main.command(help="Verifica que bundles (*.enc.json) y contenedores (*.flora) se autentican con la contraseña.",
+			  epilog="Ejemplo: flora verify --json copias/ > informe.json")
+@PASSWORD_OPTION
+@click.option("--workers", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+@KEYRING_OPTION
+@click.option("--json", "as_json", is_flag=True, help="Informe JSON en stdout (ok, files, failed, ...)")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+def verify(password: str, workers: int, keyring: str, as_json: bool, paths: tuple):
+	"""Comprueba los tags GCM sin escribir texto plano; sale con 1 si algún fichero falla."""
+	from .bulk_ops import BulkError, verify_paths
+	progress = _TreeProgress("Verificando")
+	try:
+		result = verify_paths(list(paths), password, workers=workers,
+							  keyring=keyring,
+							  progress=progress.advance, total=progress.total)
+	except BulkError as e:
+		_fail(str(e))
+	finally:
+		progress.finish()
+	if as_json:
+		click.echo(json.dumps(result, ensure_ascii=False, indent=2))
+	else:
+		click.echo(f"✅ {result['files']} ficheros verificados en {result['seconds']:.2f} s: "
+				   f"{result['files_per_s']:.1f} ficheros/s, {result['mb_per_s']:.1f} MB/s con "
+				   f"{result['workers']} procesos ({result['kdf_derivations']} derivaciones de clave)")
+		for failure in result['failed']:
+			click.echo(f"❌ {failure['path']}: {failure['error']}", err=True)
+	if result['failed']:
+		sys.exit(1)
 
 
 @main.command(help="Muestra estado de sistema (demo).", epilog="Ejemplo: flora status")
 def status():
 	"""Muestra estado de sistema (demo)."""
+	from .flora_crypto import FloraCryptoSystem
 	flora = FloraCryptoSystem()
 	info = flora.get_system_status()
 	click.echo(json.dumps(info, ensure_ascii=False, indent=2))
@@ -0,0 +1,171 @@
+# 🌸 FLORA - Almacén de claves de datos por key_id
+# Cada cifrado de la API segura genera una clave maestra aleatoria identificada
+# por un key_id; el almacén la guarda envuelta (AES-GCM) bajo una clave de
+# cifrado de claves (KEK) del servidor. SQLite con key_id como clave primaria
+# (tabla WITHOUT ROWID: una sola búsqueda en el B-tree, con profundidad
+# prácticamente constante aunque haya millones de claves) y una caché LRU en
+# memoria para las claves calientes.
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from Crypto.Cipher import AES
+
+try:
+	from .metrics import record_kdf_cache
+except ImportError:
+	from metrics import record_kdf_cache
+
+DATA_KEY_STORE_ENV = "FLORA_DATA_KEY_STORE"
+DATA_KEY_KEK_ENV = "FLORA_DATA_KEY_KEK"
+KEY_ID_PREFIX = "fdk_"
+DEFAULT_CACHE_SIZE = 4096
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_keys (
+	id TEXT PRIMARY KEY,
+	wrapped BLOB NOT NULL,
+	master_salt BLOB NOT NULL,
+	created REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class DataKeyError(KeyError):
+	"""key_id desconocido o clave envuelta que no se puede verificar."""
+	pass
+
+
+def default_data_key_store_path() -> Path:
+	"""Ruta del almacén: $FLORA_DATA_KEY_STORE o ~/.cache/flora/data_keys.db."""
+	env = os.getenv(DATA_KEY_STORE_ENV)
+	if env:
+		return Path(env).expanduser()
+	return Path.home() / ".cache" / "flora" / "data_keys.db"
+
+
+def _load_kek(path: Optional[Path]) -> bytes:
+	"""KEK de $FLORA_DATA_KEY_KEK (hex) o de <almacén>.kek (creado con permisos 0600)."""
+	env = os.getenv(DATA_KEY_KEK_ENV)
+	if env:
+		kek = bytes.fromhex(env)
+		if len(kek) != 32:
+			raise ValueError(f"{DATA_KEY_KEK_ENV} debe tener 32 bytes en hexadecimal")
+		return kek
+	if path is None:
+		return os.urandom(32)
+	kek_path = path.with_name(path.name + ".kek")
+	try:
+		fd = os.open(kek_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+	except FileExistsError:
+		# Otro worker la está creando o ya existe: esperar a que esté completa
+		for _ in range(100):
+			kek = kek_path.read_bytes()
+			if len(kek) == 32:
+				return kek
+			time.sleep(0.01)
+		raise ValueError(f"KEK inválida en {kek_path}")
+	kek = os.urandom(32)
+	with os.fdopen(fd, "wb") as f:
+		f.write(kek)
+	return kek
+
+
+class DataKeyStore:
+	"""Claves maestras envueltas, indexadas por key_id, con caché LRU.
+
+	- create() genera la clave y la persiste antes de devolver el key_id.
+	- get() sirve de la caché (O(1)) o lee la fila por clave primaria.
+	- La AAD del envoltorio incluye key_id y master_salt: una fila movida o
+	  editada no se desenvuelve.
+
+	Con `path=None` el almacén vive en memoria (un solo proceso).
+	"""
+
+	def __init__(self, path: Optional[Union[str, Path]] = None, cache_size: int = DEFAULT_CACHE_SIZE,
+				 kek: Optional[bytes] = None) -> None:
+		self.path = Path(path).expanduser() if path else None
+		if self.path is not None:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			self.path.touch(mode=0o600, exist_ok=True)
+		self._kek = kek or _load_kek(self.path)
+		self.cache_size = max(0, cache_size)
+		self._cache: "OrderedDict[str, Tuple[bytes, bytes]]" = OrderedDict()
+		self._cache_lock = threading.Lock()
+		self._db = sqlite3.connect(str(self.path) if self.path else ":memory:", timeout=30,
+								   isolation_level=None, check_same_thread=False)
+		self._lock = threading.Lock()
+		with self._lock:
+			if self.path is not None:
+				self._db.execute("PRAGMA journal_mode=WAL")
+				self._db.execute("PRAGMA synchronous=NORMAL")
+			self._db.executescript(_SCHEMA)
+
+	def _remember(self, key_id: str, entry: Tuple[bytes, bytes]) -> None:
+		if not self.cache_size:
+			return
+		with self._cache_lock:
+			self._cache[key_id] = entry
+			self._cache.move_to_end(key_id)
+			while len(self._cache) > self.cache_size:
+				self._cache.popitem(last=False)
+
+	def create(self, master_salt_size: int = 32) -> Tuple[str, bytes, bytes]:
+		"""Genera y guarda una clave nueva -> (key_id, master_key, master_salt)."""
+		key_id = KEY_ID_PREFIX + os.urandom(16).hex()
+		master_key = os.urandom(32)
+		master_salt = os.urandom(master_salt_size)
+		nonce = os.urandom(12)
+		cipher = AES.new(self._kek, AES.MODE_GCM, nonce=nonce)
+		cipher.update(key_id.encode("ascii") + master_salt)
+		wrapped, tag = cipher.encrypt_and_digest(master_key)
+		with self._lock:
+			self._db.execute("INSERT INTO data_keys (id, wrapped, master_salt, created) VALUES (?, ?, ?, ?)",
+							 (key_id, nonce + wrapped + tag, master_salt, time.time()))
+		self._remember(key_id, (master_key, master_salt))
+		return key_id, master_key, master_salt
+
+	def get(self, key_id: str) -> Tuple[bytes, bytes]:
+		"""-> (master_key, master_salt) del key_id."""
+		with self._cache_lock:
+			entry = self._cache.get(key_id)
+			if entry is not None:
+				self._cache.move_to_end(key_id)
+		record_kdf_cache("data_key", entry is not None)
+		if entry is not None:
+			return entry
+		with self._lock:
+			row = self._db.execute("SELECT wrapped, master_salt FROM data_keys WHERE id = ?", (key_id,)).fetchone()
+		if row is None:
+			raise DataKeyError(key_id)
+		blob, master_salt = row
+		cipher = AES.new(self._kek, AES.MODE_GCM, nonce=blob[:12])
+		cipher.update(key_id.encode("ascii") + master_salt)
+		try:
+			master_key = cipher.decrypt_and_verify(blob[12:-16], blob[-16:])
+		except ValueError:
+			raise DataKeyError(key_id)
+		entry = (master_key, bytes(master_salt))
+		self._remember(key_id, entry)
+		return entry
+
+	def delete(self, key_id: str) -> bool:
+		with self._cache_lock:
+			self._cache.pop(key_id, None)
+		with self._lock:
+			return bool(self._db.execute("DELETE FROM data_keys WHERE id = ?", (key_id,)).rowcount)
+
+	def __len__(self) -> int:
+		with self._lock:
+			return self._db.execute("SELECT COUNT(*) FROM data_keys").fetchone()[0]
+
+	def close(self) -> None:
+		with self._cache_lock:
+			self._cache.clear()
+		with self._lock:
+			self._db.close()
@@ -0,0 +1,225 @@
+# 🌸 FLORA - Motor compartido para servicios
+# Un FloraCryptoSystem de larga vida por proceso (worker), con control de
+# concurrencia, para que la API conserve sesiones y estado entre peticiones.
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+try:
+	from .flora_crypto import FloraCryptoSystem
+except ImportError:
+	from flora_crypto import FloraCryptoSystem
+
+DEFAULT_MAX_SESSIONS = 10000
+CRYPTO_WORKERS_ENV = "FLORA_CRYPTO_WORKERS"
+
+T = TypeVar("T")
+
+
+class FloraEngine:
+	"""FloraCryptoSystem compartido y protegido por un lock.
+
+	La derivación de la clave maestra (PBKDF2, la parte cara) no toca el estado
+	del sistema y se hace fuera del lock; solo cifrado/descifrado y gestión de
+	sesiones se serializan. Las sesiones se aíslan por clave maestra, y cada
+	(principal, ID de sesión) reutiliza su master_salt para que peticiones
+	sucesivas del mismo cliente con la misma contraseña continúen la misma
+	sesión. Sin principal no se recuerda nada: cada cifrado usa un salt nuevo, y
+	dos clientes con el mismo ID de sesión nunca comparten salt.
+
+	El sistema no contabiliza amenazas (track_threats=False): un descifrado
+	fallido solo falla para quien lo pidió, sin bajar la salud compartida ni
+	activar la autodestrucción que bloquearía al resto de clientes.
+	"""
+
+	def __init__(self, use_kyber: bool = True, max_sessions: int = DEFAULT_MAX_SESSIONS, **system_kwargs: Any) -> None:
+		self.system = FloraCryptoSystem(use_kyber=use_kyber, scope_sessions=True, max_sessions=max_sessions,
+										track_threats=False, **system_kwargs)
+		self.max_sessions = max_sessions
+		self._master_salts: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+		self._lock = threading.Lock()
+		self.requests = 0
+
+	def derive_master_key(self, password: str, master_salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+		"""Deriva la clave maestra (sin lock: no modifica estado compartido)."""
+		return self.system.generate_master_key(password, master_salt)
+
+	def _session_master_salt(self, session_id: str, principal: Optional[str]) -> bytes:
+		salt = None
+		if principal is not None:
+			with self._lock:
+				salt = self._master_salts.get((principal, session_id))
+		return salt if salt is not None else os.urandom(self.system.salt_size)
+
+	def _remember_master_salt(self, session_id: str, master_salt: bytes, principal: Optional[str]) -> None:
+		if principal is None:
+			return
+		key = (principal, session_id)
+		self._master_salts.setdefault(key, master_salt)
+		self._master_salts.move_to_end(key)
+		while len(self._master_salts) > self.max_sessions:
+			self._master_salts.popitem(last=False)
+
+	def encrypt(self, message: bytes, password: str, session_id: str,
+				associated_data: Optional[bytes] = None, principal: Optional[str] = None) -> Dict[str, Any]:
+		"""Cifra con la sesión `session_id` del usuario y añade master_salt al bundle."""
+		master_key, master_salt = self.session_master_key(password, session_id, principal)
+		return self.encrypt_with_key(message, master_key, master_salt, session_id, associated_data, principal)
+
+	def session_master_key(self, password: str, session_id: str,
+						   principal: Optional[str] = None) -> Tuple[bytes, bytes]:
+		"""Clave maestra para cifrar en `session_id` -> (master_key, master_salt).
+
+		`principal` identifica al cliente (p. ej. su API key); sin él el salt es nuevo.
+		"""
+		return self.derive_master_key(password, self._session_master_salt(session_id, principal))
+
+	def encrypt_with_key(self, message: bytes, master_key: bytes, master_salt: bytes, session_id: str,
+						 associated_data: Optional[bytes] = None, principal: Optional[str] = None) -> Dict[str, Any]:
+		with self._lock:
+			self.requests += 1
+			bundle = self.system.encrypt_message(message, master_key, session_id, associated_data)
+			self._remember_master_salt(session_id, master_salt, principal)
+		bundle['master_salt'] = master_salt.hex()
+		return bundle
+
+	def encrypt_many_with_key(self, messages: Sequence[bytes], master_key: bytes, master_salt: bytes, session_id: str,
+							  associated_data: Optional[Sequence[Optional[bytes]]] = None,
+							  principal: Optional[str] = None) -> List[Union[Dict[str, Any], Exception]]:
+		"""Lote de cifrados en una sesión, bajo una única adquisición del lock."""
+		with self._lock:
+			self.requests += 1
+			results = self.system.encrypt_many(messages, master_key, session_id, associated_data)
+			self._remember_master_salt(session_id, master_salt, principal)
+		for result in results:
+			if isinstance(result, dict):
+				result['master_salt'] = master_salt.hex()
+		return results
+
+	def decrypt_many_with_key(self, bundles: Sequence[Dict[str, Any]], master_key: bytes) -> List[Union[bytes, Exception]]:
+		"""Lote de descifrados; los fallos se devuelven por elemento y no afectan al motor."""
+		with self._lock:
+			self.requests += 1
+			return self.system.decrypt_many(bundles, master_key)
+
+	def decrypt(self, bundle: Dict[str, Any], password: str) -> bytes:
+		"""Descifra un bundle con master_salt (formato de la CLI y la API)."""
+		master_salt_hex = bundle.get('master_salt')
+		if not master_salt_hex:
+			raise ValueError("Bundle inválido: falta master_salt")
+		master_key, _ = self.derive_master_key(password, bytes.fromhex(master_salt_hex))
+		return self.decrypt_with_key(bundle, master_key)
+
+	def decrypt_with_key(self, bundle: Dict[str, Any], master_key: bytes) -> bytes:
+		with self._lock:
+			self.requests += 1
+			return self.system.decrypt_message(bundle, master_key)
+
+	def status(self) -> Dict[str, Any]:
+		with self._lock:
+			status = self.system.get_system_status()
+			status['requests'] = self.requests
+			return status
+
+	def close(self) -> None:
+		"""Descarta el material de claves en memoria."""
+		with self._lock:
+			self.system.session_keys.clear()
+			self._master_salts.clear()
+
+
+class EnginePool:
+	"""Motores del proceso, uno por modo (con y sin Kyber), creados bajo demanda.
+
+	Los bundles con campo `kem` se descifran con el motor Kyber y el resto con
+	el motor PBKDF2, de modo que cada sesión vive siempre en el mismo motor.
+	"""
+
+	def __init__(self, **engine_kwargs: Any) -> None:
+		self._engine_kwargs = engine_kwargs
+		self._engines: Dict[bool, FloraEngine] = {}
+		self._lock = threading.Lock()
+
+	def engine(self, use_kyber: bool = True) -> FloraEngine:
+		engine = self._engines.get(use_kyber)
+		if engine is None:
+			with self._lock:
+				engine = self._engines.get(use_kyber)
+				if engine is None:
+					engine = FloraEngine(use_kyber=use_kyber, **self._engine_kwargs)
+					self._engines[use_kyber] = engine
+		return engine
+
+	def engine_for_bundle(self, bundle: Dict[str, Any]) -> FloraEngine:
+		return self.engine(use_kyber=bool(bundle.get('kem')))
+
+	def warm(self) -> None:
+		"""Crea los motores y prepara Kyber (backend, clave de destinatario, cachés)."""
+		for use_kyber in (True, False):
+			engine = self.engine(use_kyber)
+			system = engine.system
+			if system.kyber_enabled:
+				variant = system.kyber.prefer_variant
+				system.kyber_keyring.current_key_id(variant)
+				key_id, ct, _ = system.kyber_keyring.encapsulate(variant)
+				system.kyber_keyring.decapsulate(key_id, ct)
+
+	def status(self) -> Dict[str, Any]:
+		engines = {("kyber" if k else "pbkdf2"): e.status() for k, e in sorted(self._engines.items())}
+		return {
+			'system_health': min((s['system_health'] for s in engines.values()), default=1.0),
+			'threat_level': max((s['threat_level'] for s in engines.values()), default=0.0),
+			'active_sessions': sum(s['active_sessions'] for s in engines.values()),
+			'pid': os.getpid(),
+			'engines': engines,
+		}
+
+	def close(self) -> None:
+		with self._lock:
+			for engine in self._engines.values():
+				engine.close()
+			self._engines.clear()
+
+
+class EngineWorkers:
+	"""Pool de hilos para el trabajo criptográfico, con un EnginePool por hilo.
+
+	Cada hilo tiene sus propios motores, de modo que las peticiones concurrentes
+	no se serializan en el lock de un único FloraEngine. El tamaño se toma de
+	$FLORA_CRYPTO_WORKERS (por defecto, el número de CPUs).
+	"""
+
+	def __init__(self, workers: Optional[int] = None, **engine_kwargs: Any) -> None:
+		workers = workers or int(os.getenv(CRYPTO_WORKERS_ENV, "0")) or min(32, os.cpu_count() or 1)
+		self.workers = workers
+		self._engine_kwargs = engine_kwargs
+		self._local = threading.local()
+		self._pools: List[EnginePool] = []
+		self._lock = threading.Lock()
+		self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flora-crypto")
+
+	def _engines(self) -> EnginePool:
+		pool = getattr(self._local, "pool", None)
+		if pool is None:
+			pool = self._local.pool = EnginePool(**self._engine_kwargs)
+			with self._lock:
+				self._pools.append(pool)
+		return pool
+
+	def _call(self, fn: Callable[..., T], args: Tuple[Any, ...]) -> T:
+		return fn(self._engines(), *args)
+
+	async def run(self, fn: Callable[..., T], *args: Any) -> T:
+		"""Ejecuta fn(engines, *args) en un hilo del pool y espera el resultado."""
+		return await asyncio.wrap_future(self._executor.submit(self._call, fn, args))
+
+	def close(self) -> None:
+		self._executor.shutdown(wait=True)
+		with self._lock:
+			for pool in self._pools:
+				pool.close()
+			self._pools.clear()
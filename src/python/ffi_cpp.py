@@ -1,118 +1,392 @@
 # 🌸 FLORA - Wrapper ctypes para C++ (flora_c)
-# Carga flora_c.dll/.so y expone AES-GCM encrypt/decrypt
+# Carga flora_c.dll/.so y expone AES-GCM encrypt/decrypt: por llamada, con un
+# contexto reutilizable (AesGcmContext) que conserva la clave inicializada, o
+# por lotes (aes_gcm_*_batch) en una sola llamada nativa con hilos nativos.
+#
+# Sin copias: las entradas (bytes, bytearray, memoryview) se pasan por puntero
+# y la salida se escribe en un bytearray reservado de antemano que es el
+# propio resultado.
 
 import os
 import sys
 import ctypes
-from ctypes import c_uint8, c_size_t, c_int, POINTER
-from typing import Tuple, Optional
+from array import array
+from ctypes import c_uint8, c_size_t, c_int, c_void_p, POINTER
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
 
 # Ruta de la DLL/SO
 # 1) Variable de entorno FLORA_CPP_DLL
-# 2) build por defecto en Windows
+# 2) build por defecto (Windows: build/Release/flora_c.dll; Linux: build/libflora_c.so)
 # 3) LD_LIBRARY_PATH / PATH
 
 def _default_library_path() -> str:
+	build = os.path.join(os.path.dirname(__file__), "..", "cpp", "build")
 	cand = [
 		os.environ.get("FLORA_CPP_DLL", ""),
-		os.path.join(os.path.dirname(__file__), "..", "..", "cpp", "build", "Release", "flora_c.dll"),
-		os.path.join(os.path.dirname(__file__), "..", "..", "cpp", "build", "flora_c.so"),
+		os.path.join(build, "Release", "flora_c.dll"),
+		os.path.join(build, "libflora_c.so"),
+		os.path.join(build, "flora_c.so"),
 	]
 	for p in cand:
 		if p and os.path.exists(p):
 			return os.path.abspath(p)
-	return "flora_c.dll"  # confiar en PATH
+	return "flora_c.dll" if sys.platform == "win32" else "libflora_c.so"  # confiar en PATH
 
 _lib_path = _default_library_path()
 _lib = ctypes.CDLL(_lib_path)
 
-# firmas
+# firmas (punteros como void*: admiten bytes directamente y arrays de ctypes)
 _lib.flora_aes_gcm_encrypt.argtypes = [
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), POINTER(c_size_t),
-	POINTER(c_uint8), c_size_t
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, POINTER(c_size_t),
+	c_void_p, c_size_t
 ]
 _lib.flora_aes_gcm_encrypt.restype = c_int
 
 _lib.flora_aes_gcm_decrypt.argtypes = [
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), c_size_t,
-	POINTER(c_uint8), POINTER(c_size_t)
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, c_size_t,
+	c_void_p, POINTER(c_size_t)
 ]
 _lib.flora_aes_gcm_decrypt.restype = c_int
 
+_BATCH_ARGS = [
+	c_void_p, c_size_t,
+	c_void_p,
+	c_void_p, c_size_t,
+	c_void_p, POINTER(c_size_t), POINTER(c_size_t), c_size_t,
+	c_void_p, c_void_p,
+	POINTER(c_int), c_size_t
+]
+_lib.flora_aes_gcm_encrypt_batch.argtypes = _BATCH_ARGS
+_lib.flora_aes_gcm_encrypt_batch.restype = c_int
+_lib.flora_aes_gcm_decrypt_batch.argtypes = _BATCH_ARGS
+_lib.flora_aes_gcm_decrypt_batch.restype = c_int
+
+_lib.flora_ctx_new.argtypes = [c_void_p, c_size_t]
+_lib.flora_ctx_new.restype = c_void_p
+
+_lib.flora_ctx_encrypt.argtypes = [c_void_p] + _lib.flora_aes_gcm_encrypt.argtypes[2:]
+_lib.flora_ctx_encrypt.restype = c_int
+
+_lib.flora_ctx_decrypt.argtypes = [c_void_p] + _lib.flora_aes_gcm_decrypt.argtypes[2:]
+_lib.flora_ctx_decrypt.restype = c_int
+
+_lib.flora_ctx_free.argtypes = [c_void_p]
+_lib.flora_ctx_free.restype = None
 
-def _to_ptr(buf: Optional[bytes]):
-	if not buf:
-		return None
-	arr = (c_uint8 * len(buf)).from_buffer_copy(buf)
-	return ctypes.cast(arr, POINTER(c_uint8))
 
+def _in(buf: Optional[Buffer]) -> Tuple[Any, int]:
+	"""Argumento de entrada sin copia -> (puntero para ctypes, longitud en bytes).
 
-def aes_gcm_encrypt(key: bytes, nonce: bytes, plaintext: bytes, associated_data: bytes = b"") -> Tuple[bytes, bytes]:
-	if len(nonce) != 12:
+	- bytes: ctypes pasa el puntero al contenido del objeto.
+	- bytearray / memoryview escribible: array ctypes sobre el mismo buffer.
+	- memoryview de solo lectura (p. ej. un trozo de bytes): dirección vía numpy.
+	El objeto devuelto debe mantenerse vivo durante la llamada.
+	"""
+	if buf is None:
+		return None, 0
+	if isinstance(buf, bytes):
+		return buf or None, len(buf)
+	view = memoryview(buf)
+	if not view.nbytes:
+		return None, 0
+	if not view.c_contiguous:
+		raise BufferError("El buffer debe ser contiguo")
+	if view.readonly:
+		if isinstance(view.obj, bytes) and view.nbytes == len(view.obj):
+			return view.obj, view.nbytes
+		import numpy as np
+		return np.frombuffer(view, dtype=np.uint8).ctypes.data, view.nbytes
+	return (c_uint8 * view.nbytes).from_buffer(view.cast("B")), view.nbytes
+
+
+def _out(size: int) -> Tuple[bytearray, Any]:
+	"""bytearray de `size` bytes y su puntero para que el código nativo escriba en él."""
+	out = bytearray(size)
+	return out, ((c_uint8 * size).from_buffer(out) if size else None)
+
+
+def _encrypt_into(key: Buffer, nonce: Buffer, plaintext: Buffer, associated_data: Buffer,
+				  ct_ptr: Any, tag_ptr: Any) -> None:
+	k, k_len = _in(key)
+	n, n_len = _in(nonce)
+	a, a_len = _in(associated_data)
+	p, p_len = _in(plaintext)
+	if n_len != 12:
 		raise ValueError("nonce debe ser 12 bytes")
-	if len(key) not in (16, 24, 32):
+	if k_len not in (16, 24, 32):
 		raise ValueError("key debe ser 16/24/32 bytes")
-	ct_buf = (c_uint8 * (len(plaintext) + 16))()
-	ct_len = c_size_t(len(plaintext) + 16)
-	tag_buf = (c_uint8 * 16)()
+	ct_len = c_size_t(p_len)
 	res = _lib.flora_aes_gcm_encrypt(
-		_to_ptr(key), len(key),
-		_to_ptr(nonce), len(nonce),
-		_to_ptr(associated_data), len(associated_data),
-		_to_ptr(plaintext), len(plaintext),
-		ct_buf, ctypes.byref(ct_len),
-		tag_buf, 16
+		k, k_len,
+		n, n_len,
+		a, a_len,
+		p, p_len,
+		ct_ptr, ctypes.byref(ct_len),
+		tag_ptr, 16
 	)
 	if res != 0:
 		raise RuntimeError(f"flora_aes_gcm_encrypt error={res}")
-	ciphertext = bytes(ct_buf)[: ct_len.value]
-	tag = bytes(tag_buf)
+
+
+def aes_gcm_encrypt(key: Buffer, nonce: Buffer, plaintext: Buffer, associated_data: Buffer = b"") -> Tuple[bytearray, bytearray]:
+	"""Cifra -> (ciphertext, tag); el ciphertext tiene la longitud del texto plano."""
+	ciphertext, ct_ptr = _out(memoryview(plaintext).nbytes)
+	tag, tag_ptr = _out(16)
+	_encrypt_into(key, nonce, plaintext, associated_data, ct_ptr, tag_ptr)
 	return ciphertext, tag
 
 
-def aes_gcm_decrypt(key: bytes, nonce: bytes, ciphertext: bytes, tag: bytes, associated_data: bytes = b"") -> bytes:
-	if len(nonce) != 12:
+def aes_gcm_decrypt(key: Buffer, nonce: Buffer, ciphertext: Buffer, tag: Buffer, associated_data: Buffer = b"") -> bytearray:
+	"""Descifra y verifica el tag -> texto plano (RuntimeError si no autentica)."""
+	k, k_len = _in(key)
+	n, n_len = _in(nonce)
+	a, a_len = _in(associated_data)
+	c, c_len = _in(ciphertext)
+	t, t_len = _in(tag)
+	if n_len != 12:
 		raise ValueError("nonce debe ser 12 bytes")
-	if len(tag) != 16:
+	if t_len != 16:
 		raise ValueError("tag debe ser 16 bytes")
-	pt_buf = (c_uint8 * (len(ciphertext)))()
-	pt_len = c_size_t(len(ciphertext))
+	plaintext, pt_ptr = _out(c_len)
+	pt_len = c_size_t(c_len)
 	res = _lib.flora_aes_gcm_decrypt(
-		_to_ptr(key), len(key),
-		_to_ptr(nonce), len(nonce),
-		_to_ptr(associated_data), len(associated_data),
-		_to_ptr(ciphertext), len(ciphertext),
-		_to_ptr(tag), len(tag),
-		pt_buf, ctypes.byref(pt_len)
+		k, k_len,
+		n, n_len,
+		a, a_len,
+		c, c_len,
+		t, t_len,
+		pt_ptr, ctypes.byref(pt_len)
 	)
 	if res != 0:
 		raise RuntimeError(f"flora_aes_gcm_decrypt error={res}")
-	return bytes(pt_buf)[: pt_len.value]
+	return plaintext
+
+
+class AeadBatch(NamedTuple):
+	"""Resultado de un lote: `output` empaquetado con los offsets/lengths de la entrada.
+
+	`status[i]` es 0 si el mensaje i se procesó bien; en descifrado, la región
+	de un mensaje que no autentica queda a cero.
+	"""
+	output: bytearray
+	offsets: Sequence[int]
+	lengths: Sequence[int]
+	nonces: bytes
+	tags: Union[bytes, bytearray]
+	status: List[int]
+
+	@property
+	def ok(self) -> bool:
+		return not any(self.status)
+
+	def message(self, i: int) -> memoryview:
+		"""Resultado del mensaje i (vista sobre `output`, sin copia)."""
+		return memoryview(self.output)[self.offsets[i]:self.offsets[i] + self.lengths[i]]
+
+	def tag(self, i: int) -> bytes:
+		return bytes(self.tags[16 * i:16 * i + 16])
+
+	def nonce(self, i: int) -> bytes:
+		return self.nonces[12 * i:12 * i + 12]
+
+
+def _pack(data: Union[Buffer, Sequence[Buffer]], offsets: Optional[Sequence[int]],
+		  lengths: Optional[Sequence[int]]) -> Tuple[Buffer, List[int], List[int]]:
+	"""-> (buffer contiguo, offsets, lengths) desde una lista de mensajes o buffer + offsets."""
+	if offsets is None:
+		if isinstance(data, (bytes, bytearray, memoryview)):
+			raise ValueError("Con un buffer contiguo hay que indicar offsets")
+		messages = list(data)
+		lengths = [memoryview(m).nbytes for m in messages]
+		offsets, position = [], 0
+		for length in lengths:
+			offsets.append(position)
+			position += length
+		return b"".join(messages), offsets, lengths
+	size = memoryview(data).nbytes
+	offsets = list(offsets)
+	if lengths is None:
+		# offsets consecutivos: cada mensaje llega hasta el siguiente (el último, hasta el final)
+		lengths = [end - start for start, end in zip(offsets, offsets[1:] + [size])]
+	lengths = list(lengths)
+	if len(lengths) != len(offsets):
+		raise ValueError("offsets y lengths deben tener la misma longitud")
+	if any(o < 0 or l < 0 or o + l > size for o, l in zip(offsets, lengths)):
+		raise ValueError("Un mensaje queda fuera del buffer")
+	return data, offsets, lengths
+
+
+def _fixed(values: Union[Buffer, Sequence[Buffer]], n: int, size: int, name: str) -> bytes:
+	packed = values if isinstance(values, (bytes, bytearray, memoryview)) else b"".join(values)
+	if memoryview(packed).nbytes != n * size:
+		raise ValueError(f"{name}: se esperaban {n} x {size} bytes")
+	return packed
+
+
+def _size_array(values: Sequence[int]) -> Any:
+	"""Array size_t para C; vía array('Q') (conversión en C) cuando size_t es de 64 bits."""
+	if ctypes.sizeof(c_size_t) == 8:
+		packed = array("Q", values)
+		return (c_size_t * len(packed)).from_buffer(packed)
+	return (c_size_t * len(values))(*values)
+
+
+def _run_batch(fn, key: Buffer, nonces: Buffer, associated_data: Buffer, data: Buffer, offsets: List[int],
+			   lengths: List[int], tags_in: Any, tags_out: Any, threads: int) -> Tuple[bytearray, List[int]]:
+	n = len(offsets)
+	k, k_len = _in(key)
+	if k_len not in (16, 24, 32):
+		raise ValueError("key debe ser 16/24/32 bytes")
+	nn, _ = _in(nonces)
+	a, a_len = _in(associated_data)
+	d, d_len = _in(data)
+	output, out_ptr = _out(d_len)
+	status = (c_int * n)()
+	res = fn(k, k_len, nn, a, a_len, d, _size_array(offsets), _size_array(lengths), n,
+			 *((out_ptr, tags_out) if tags_in is None else (tags_in, out_ptr)), status, threads)
+	if res < 0:
+		raise RuntimeError(f"{fn.__name__} error={res}")
+	return output, status[:]
+
+
+def aes_gcm_encrypt_batch(key: Buffer, data: Union[Buffer, Sequence[Buffer]], nonces: Optional[Union[Buffer, Sequence[Buffer]]] = None,
+						  associated_data: Buffer = b"", offsets: Optional[Sequence[int]] = None,
+						  lengths: Optional[Sequence[int]] = None, threads: int = 0) -> AeadBatch:
+	"""Cifra N mensajes en una sola llamada nativa.
+
+	`data` es una lista de mensajes o un buffer contiguo con `offsets` (y
+	`lengths`, o se deducen de offsets consecutivos). `nonces`: N*12 bytes o
+	lista; por defecto aleatorios. `threads`: 0 = uno por núcleo, 1 = sin hilos.
+	"""
+	data, offsets, lengths = _pack(data, offsets, lengths)
+	n = len(offsets)
+	nonces = os.urandom(12 * n) if nonces is None else _fixed(nonces, n, 12, "nonces")
+	tags, tags_ptr = _out(16 * n)
+	output, status = _run_batch(_lib.flora_aes_gcm_encrypt_batch, key, nonces, associated_data, data,
+								offsets, lengths, None, tags_ptr, threads)
+	return AeadBatch(output, offsets, lengths, bytes(nonces), tags, status)
+
+
+def aes_gcm_decrypt_batch(key: Buffer, data: Union[Buffer, Sequence[Buffer]], nonces: Union[Buffer, Sequence[Buffer]],
+						  tags: Union[Buffer, Sequence[Buffer]], associated_data: Buffer = b"",
+						  offsets: Optional[Sequence[int]] = None, lengths: Optional[Sequence[int]] = None,
+						  threads: int = 0) -> AeadBatch:
+	"""Descifra N mensajes en una sola llamada nativa (mismas convenciones que el cifrado).
+
+	Un mensaje que no autentica no aborta el lote: su status es != 0.
+	"""
+	data, offsets, lengths = _pack(data, offsets, lengths)
+	n = len(offsets)
+	nonces = _fixed(nonces, n, 12, "nonces")
+	tags = _fixed(tags, n, 16, "tags")
+	t, _ = _in(tags)
+	output, status = _run_batch(_lib.flora_aes_gcm_decrypt_batch, key, nonces, associated_data, data,
+								offsets, lengths, t, None, threads)
+	return AeadBatch(output, offsets, lengths, bytes(nonces), tags, status)
+
+
+class AesGcmContext:
+	"""Contexto AES-GCM nativo con la clave ya inicializada (flora_ctx).
+
+	Evita crear el EVP_CIPHER_CTX y expandir la clave en cada mensaje; útil
+	para muchos mensajes pequeños con la misma clave. No compartir entre
+	hilos: cada hilo debe usar su propio contexto.
+
+		with AesGcmContext(key) as ctx:
+			ct, tag = ctx.encrypt(nonce, plaintext, ad)
+	"""
+
+	def __init__(self, key: Buffer) -> None:
+		k, k_len = _in(key)
+		if k_len not in (16, 24, 32):
+			raise ValueError("key debe ser 16/24/32 bytes")
+		self._ctx = _lib.flora_ctx_new(k, k_len)
+		if not self._ctx:
+			raise RuntimeError("flora_ctx_new falló")
+
+	def _handle(self) -> int:
+		if not self._ctx:
+			raise ValueError("El contexto está cerrado")
+		return self._ctx
+
+	def encrypt(self, nonce: Buffer, plaintext: Buffer, associated_data: Buffer = b"") -> Tuple[bytearray, bytearray]:
+		"""Cifra -> (ciphertext, tag), como aes_gcm_encrypt."""
+		n, n_len = _in(nonce)
+		a, a_len = _in(associated_data)
+		p, p_len = _in(plaintext)
+		if n_len != 12:
+			raise ValueError("nonce debe ser 12 bytes")
+		ciphertext, ct_ptr = _out(p_len)
+		tag, tag_ptr = _out(16)
+		ct_len = c_size_t(p_len)
+		res = _lib.flora_ctx_encrypt(self._handle(), n, n_len, a, a_len, p, p_len,
+									 ct_ptr, ctypes.byref(ct_len), tag_ptr, 16)
+		if res != 0:
+			raise RuntimeError(f"flora_ctx_encrypt error={res}")
+		return ciphertext, tag
+
+	def decrypt(self, nonce: Buffer, ciphertext: Buffer, tag: Buffer, associated_data: Buffer = b"") -> bytearray:
+		"""Descifra y verifica el tag, como aes_gcm_decrypt."""
+		n, n_len = _in(nonce)
+		a, a_len = _in(associated_data)
+		c, c_len = _in(ciphertext)
+		t, t_len = _in(tag)
+		if n_len != 12:
+			raise ValueError("nonce debe ser 12 bytes")
+		if t_len != 16:
+			raise ValueError("tag debe ser 16 bytes")
+		plaintext, pt_ptr = _out(c_len)
+		pt_len = c_size_t(c_len)
+		res = _lib.flora_ctx_decrypt(self._handle(), n, n_len, a, a_len, c, c_len, t, t_len,
+									 pt_ptr, ctypes.byref(pt_len))
+		if res != 0:
+			raise RuntimeError(f"flora_ctx_decrypt error={res}")
+		return plaintext
+
+	def close(self) -> None:
+		"""Libera el contexto nativo (idempotente)."""
+		ctx, self._ctx = getattr(self, "_ctx", None), None
+		if ctx:
+			_lib.flora_ctx_free(ctx)
+
+	def __enter__(self) -> "AesGcmContext":
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+	def __del__(self) -> None:
+		self.close()
 
 
 # Funciones wrapper para benchmarks
-def cpp_encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b'') -> Tuple[bytes, bytes]:
-    """Wrapper simple para encriptación C++"""
+def cpp_encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b'') -> Tuple[bytes, bytearray]:
+    """Wrapper simple para encriptación C++ -> (nonce, ciphertext || tag)"""
     import secrets
     nonce = secrets.token_bytes(12)
-    ciphertext, tag = aes_gcm_encrypt(key, nonce, plaintext, associated_data)
-    return nonce, ciphertext + tag
+    size = memoryview(plaintext).nbytes
+    # Un solo buffer de salida: el tag se escribe a continuación del ciphertext
+    out, ptr = _out(size + 16)
+    _encrypt_into(key, nonce, plaintext, associated_data, ptr, ctypes.addressof(ptr) + size)
+    return nonce, out
 
-def cpp_decrypt(key: bytes, nonce: bytes, ciphertext: bytes, associated_data: bytes = b'') -> bytes:
-    """Wrapper simple para desencriptación C++"""
-    if len(ciphertext) < 16:
+def cpp_decrypt(key: bytes, nonce: bytes, ciphertext: bytes, associated_data: bytes = b'') -> bytearray:
+    """Wrapper simple para desencriptación C++ (ciphertext || tag)"""
+    view = memoryview(ciphertext)
+    if view.nbytes < 16:
         raise ValueError("Ciphertext too short")
-    tag = ciphertext[-16:]
-    ciphertext_only = ciphertext[:-16]
-    return aes_gcm_decrypt(key, nonce, ciphertext_only, tag, associated_data)
+    # Trozos del memoryview: sin copiar ciphertext ni tag
+    return aes_gcm_decrypt(key, nonce, view[:-16], view[-16:], associated_data)
 
 if __name__ == "__main__":
 	k = b"\x11" * 32
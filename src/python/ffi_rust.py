@@ -1,10 +1,26 @@
 """
 Wrapper Python para el módulo Rust flora_rs
+
+flora_rs acepta cualquier objeto con protocolo de buffer (bytes, bytearray,
+memoryview), devuelve bytes construidos directamente por Rust y libera el GIL
+mientras cifra: varios hilos de Python pueden cifrar en paralelo.
+
+Los lotes y el contenedor por segmentos se cifran además en paralelo dentro de
+Rust (Rayon). encrypt_segmented produce el mismo formato FLS1 que
+stream_container, así que cada lado descifra lo que cifra el otro.
 """
+import struct
 import flora_rs
-from typing import Tuple, Union
+from typing import List, Tuple, Union
+
+try:
+    from .stream_container import DEFAULT_CHUNK_SIZE
+except ImportError:
+    from stream_container import DEFAULT_CHUNK_SIZE
+
+Buffer = Union[bytes, bytearray, memoryview]
 
-def rust_encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b'') -> Tuple[bytes, bytes]:
+def rust_encrypt(key: Buffer, plaintext: Buffer, associated_data: Buffer = b'') -> Tuple[bytes, bytes]:
     """
     Encripta datos usando el backend Rust
     
@@ -14,44 +30,103 @@ def rust_encrypt(key: bytes, plaintext: bytes, associated_data: bytes = b'') ->
         associated_data: Datos asociados (opcional)
     
     Returns:
-        Tuple[bytes, bytes]: (nonce, ciphertext)
+        Tuple[bytes, bytes]: (nonce, ciphertext || tag)
     """
-    if len(key) != 32:
+    if memoryview(key).nbytes != 32:
         raise ValueError("La clave debe tener exactamente 32 bytes")
     
-    nonce, ciphertext = flora_rs.py_encrypt(key, plaintext, associated_data)
-    
-    # Convertir listas a bytes si es necesario
-    if isinstance(nonce, list):
-        nonce = bytes(nonce)
-    if isinstance(ciphertext, list):
-        ciphertext = bytes(ciphertext)
-    
-    return nonce, ciphertext
+    return flora_rs.py_encrypt(key, plaintext, associated_data)
 
-def rust_decrypt(key: bytes, nonce: bytes, ciphertext: bytes, associated_data: bytes = b'') -> bytes:
+def rust_decrypt(key: Buffer, nonce: Buffer, ciphertext: Buffer, associated_data: Buffer = b'') -> bytes:
     """
     Desencripta datos usando el backend Rust
     
     Args:
         key: Clave de 32 bytes
         nonce: Nonce usado en la encriptación
-        ciphertext: Datos encriptados
+        ciphertext: Datos encriptados (ciphertext || tag)
         associated_data: Datos asociados (opcional)
     
     Returns:
         bytes: Datos desencriptados
     """
-    if len(key) != 32:
+    if memoryview(key).nbytes != 32:
         raise ValueError("La clave debe tener exactamente 32 bytes")
     
-    plaintext = flora_rs.py_decrypt(key, nonce, ciphertext, associated_data)
+    return flora_rs.py_decrypt(key, nonce, ciphertext, associated_data)
+
+_RECORD_LEN = struct.Struct(">I")
+_RECORD_HEADER = _RECORD_LEN.size + 12
+_TAG_SIZE = 16
+
+def rust_encrypt_batch(key: Buffer, messages: List[Buffer], associated_data: Buffer = b'') -> bytes:
+    """
+    Encripta varios mensajes en paralelo (cada uno con su nonce)
     
-    # Convertir lista a bytes si es necesario
-    if isinstance(plaintext, list):
-        plaintext = bytes(plaintext)
+    Returns:
+        bytes: Por mensaje y en orden: longitud u32 | nonce (12) | ciphertext | tag (16)
+    """
+    if memoryview(key).nbytes != 32:
+        raise ValueError("La clave debe tener exactamente 32 bytes")
     
-    return plaintext
+    return flora_rs.encrypt_batch(key, list(messages), associated_data)
+
+def _batch_records(view: memoryview):
+    """(inicio, fin) de cada registro del lote, validando las longitudes"""
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < _RECORD_HEADER + _TAG_SIZE:
+            raise ValueError("Lote truncado")
+        (length,) = _RECORD_LEN.unpack_from(view, offset)
+        end = offset + _RECORD_HEADER + length + _TAG_SIZE
+        if end > len(view):
+            raise ValueError("Lote truncado")
+        yield offset, end
+        offset = end
+
+def split_batch(packed: Buffer) -> List[Tuple[bytes, bytes]]:
+    """Separa un lote en [(nonce, ciphertext || tag)], lo que espera rust_decrypt"""
+    view = memoryview(packed).cast("B")
+    return [(bytes(view[start + _RECORD_LEN.size:start + _RECORD_HEADER]), bytes(view[start + _RECORD_HEADER:end]))
+            for start, end in _batch_records(view)]
+
+def rust_decrypt_batch(key: Buffer, packed: Buffer, associated_data: Buffer = b'') -> List[bytes]:
+    """
+    Desencripta en paralelo un lote de rust_encrypt_batch
+    
+    Returns:
+        List[bytes]: Textos planos en el orden del lote (ValueError si alguno no autentica)
+    """
+    if memoryview(key).nbytes != 32:
+        raise ValueError("La clave debe tener exactamente 32 bytes")
+    
+    plaintext = memoryview(flora_rs.decrypt_batch(key, packed, associated_data))
+    messages = []
+    offset = 0
+    for start, end in _batch_records(memoryview(packed).cast("B")):
+        length = end - start - _RECORD_HEADER - _TAG_SIZE
+        messages.append(bytes(plaintext[offset:offset + length]))
+        offset += length
+    return messages
+
+def rust_encrypt_segmented(master_key: Buffer, data: Buffer, segment_size: int = DEFAULT_CHUNK_SIZE,
+                           salt: Buffer = b'') -> bytes:
+    """
+    Cifra `data` como contenedor FLS1 (segmentos en paralelo)
+    
+    El resultado se descifra con stream_container.StreamDecryptor(lambda salt: master_key)
+    o con rust_decrypt_segmented.
+    """
+    return flora_rs.encrypt_segmented(master_key, data, segment_size, salt)
+
+def rust_decrypt_segmented(master_key: Buffer, container: Buffer) -> bytes:
+    """
+    Descifra un contenedor FLS1 completo (de Rust o de stream_container)
+    
+    Raises:
+        ValueError: Contenedor truncado, manipulado o clave incorrecta
+    """
+    return flora_rs.decrypt_segmented(master_key, container)
 
 def test_rust_backend():
     """Prueba el backend Rust"""
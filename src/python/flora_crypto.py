@@ -4,7 +4,7 @@
 import os
 import hashlib
 import hmac
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List, Sequence, Union, Callable
 from Crypto.Cipher import AES
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
@@ -12,6 +12,7 @@ from Crypto.Util.Padding import pad, unpad
 from Crypto.Hash import SHA256
 import json
 import time
+from collections import OrderedDict, deque
 
 try:
 	from .chaotic_map import ChaoticDestructionEngine
@@ -21,11 +22,15 @@ except ImportError:
 # Integración Kyber opcional
 try:
 	from .kyber_kem import try_create_kyber
+	from .kyber_keyring import KyberKeyring, get_default_keyring
 except ImportError:
 	try:
 		from kyber_kem import try_create_kyber
+		from kyber_keyring import KyberKeyring, get_default_keyring
 	except Exception:
 		try_create_kyber = None  # type: ignore
+		KyberKeyring = None  # type: ignore
+		get_default_keyring = None  # type: ignore
 
 class FloraCryptoSystem:
 	"""
@@ -43,8 +48,14 @@ class FloraCryptoSystem:
 				 key_size: int = 32,  # 256 bits
 				 salt_size: int = 32,
 				 iterations: int = 100000,
-				 use_kyber: bool = True,
-				 session_max_uses: int = 3):
+				 use_kyber: bool = False,
+				 session_max_uses: int = 3,
+				 kyber_variant: str = "kyber512",
+				 kyber_keyring: Optional[Union["KyberKeyring", str]] = None,
+				 scope_sessions: bool = False,
+				 max_sessions: Optional[int] = None,
+				 stage_observer: Optional[Callable[[str, float], None]] = None,
+				 track_threats: bool = True):
 		"""
 		Inicializa el sistema de cifrado FLORA.
 		
@@ -52,8 +63,24 @@ class FloraCryptoSystem:
 			key_size: Tamaño de clave en bytes (32 = 256 bits)
 			salt_size: Tamaño del salt para derivación de claves
 			iterations: Iteraciones para PBKDF2
-			use_kyber: Intentar usar Kyber KEM para claves de sesión
+			use_kyber: Usar Kyber KEM para claves de sesión (opcional: un bundle Kyber
+				necesita la clave secreta del destinatario, que el bundle no lleva)
 			session_max_uses: Número máximo de usos por clave de sesión antes de rotarla
+			kyber_variant: Variante Kyber (512/768/1024); el backend se resuelve una
+				vez por proceso y se comparte entre instancias
+			kyber_keyring: Keyring de claves de destinatario (instancia o ruta a
+				un JSON); por defecto, el keyring compartido del proceso, que solo
+				se persiste si $FLORA_KYBER_KEYRING indica un fichero
+			scope_sessions: Aislar las sesiones por clave maestra (necesario cuando
+				un mismo sistema atiende a varios usuarios, p. ej. en la API)
+			max_sessions: Máximo de sesiones en memoria; se descartan las menos
+				usadas recientemente (None = sin límite)
+			stage_observer: Callback (etapa, segundos) con la duración de cada
+				etapa: master_key, session_cached, session_create,
+				session_recover, session_rotate, aead_encrypt, aead_decrypt
+			track_threats: Contabilizar los fallos (nivel de amenaza, bloqueo y
+				autodestrucción). Desactivar en sistemas compartidos por varios
+				clientes, donde el fallo de uno no debe bloquear a los demás
 		"""
 		self.key_size = key_size
 		self.salt_size = salt_size
@@ -63,7 +90,11 @@ class FloraCryptoSystem:
 		self.destruction_engine = ChaoticDestructionEngine()
 		
 		# Estado del sistema
-		self.session_keys: Dict[str, Dict[str, Any]] = {}
+		self.session_keys: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+		self.scope_sessions = scope_sessions
+		self.max_sessions = max_sessions
+		self.stage_observer = stage_observer
+		self.track_threats = track_threats
 		self.threat_level = 0.0
 		self.attack_history = []
 		self.system_health = 1.0
@@ -78,15 +109,31 @@ class FloraCryptoSystem:
 		self.kyber = None
 		if use_kyber and 'try_create_kyber' in globals() and callable(try_create_kyber):  # type: ignore
 			try:
-				self.kyber = try_create_kyber()
+				self.kyber = try_create_kyber(kyber_variant)
 			except Exception:
 				self.kyber = None
 		self.kyber_enabled = self.kyber is not None
 		
+		# Keyring de destinatario: siempre disponible para descifrar bundles Kyber,
+		# aunque esta instancia no use Kyber para cifrar
+		self.kyber_keyring = None
+		if KyberKeyring is not None:
+			if isinstance(kyber_keyring, KyberKeyring):
+				self.kyber_keyring = kyber_keyring
+			elif kyber_keyring:
+				self.kyber_keyring = KyberKeyring(kyber_keyring)
+			else:
+				self.kyber_keyring = get_default_keyring()
+		if self.kyber_keyring is None:
+			self.kyber_enabled = False
+		# Encapsulaciones precalculadas en lote por encrypt_many()
+		self._kyber_prefetch = deque()
+		
 	def generate_master_key(self, password: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
 		"""
 		Genera una clave maestra usando PBKDF2.
 		"""
+		started = time.perf_counter()
 		if salt is None:
 			salt = get_random_bytes(self.salt_size)
 		master_key = PBKDF2(
@@ -96,8 +143,17 @@ class FloraCryptoSystem:
 			count=self.iterations,
 			hmac_hash_module=SHA256
 		)
+		self._observe("master_key", started)
 		return master_key, salt
 	
+	def _observe(self, stage: str, started: float):
+		"""Notifica al stage_observer la duración de una etapa (sin afectar al cifrado)."""
+		if self.stage_observer is not None:
+			try:
+				self.stage_observer(stage, time.perf_counter() - started)
+			except Exception:
+				pass
+	
 	def _derive_session_key_pbkdf2(self, master_key: bytes, session_id: str) -> bytes:
 		"""Deriva clave de sesión con PBKDF2 (fallback si no se usa Kyber)."""
 		session_salt = hashlib.sha256(
@@ -122,14 +178,48 @@ class FloraCryptoSystem:
 			hmac_hash_module=SHA256
 		)
 	
-	def _encapsulate_session_key_kyber(self) -> Tuple[bytes, bytes, bytes]:
-		"""Si Kyber está disponible, genera (pk, c_L, ss)."""
+	def _kyber_session_key(self, master_key: bytes, shared_secret: bytes) -> bytes:
+		"""Clave de sesión ligada a la clave maestra: HMAC(master_key, ss)."""
+		return hmac.new(master_key, b"flora-kyber-session" + shared_secret, hashlib.sha256).digest()[:self.key_size]
+	
+	def _encapsulate_session_key_kyber(self, master_key: bytes) -> Tuple[bytes, Dict[str, Any]]:
+		"""Encapsula contra la clave vigente del keyring -> (clave_sesión, kem_info)."""
 		if not self.kyber_enabled:
 			raise RuntimeError("Kyber no está habilitado")
-		pk, sk = self.kyber.keygen()
-		c_L, ss = self.kyber.encaps(pk)
-		self._last_kyber_sk = sk  # type: ignore[attr-defined]
-		return pk, c_L, ss
+		variant = self.kyber.prefer_variant
+		if self._kyber_prefetch:
+			key_id, c_L, ss = self._kyber_prefetch.popleft()
+		else:
+			key_id, c_L, ss = self.kyber_keyring.encapsulate(variant)
+		kem_info = {'ciphertext': c_L.hex(), 'key_id': key_id, 'variant': variant}
+		return self._kyber_session_key(master_key, ss), kem_info
+	
+	def _recover_session_key(self, master_key: bytes, encrypted_data: Dict[str, Any]) -> bytes:
+		"""Reconstruye la clave de sesión a partir del bundle (Kyber por key ID o salt PBKDF2)."""
+		kem_info = encrypted_data.get('kem')
+		if kem_info and kem_info.get('key_id') and self.kyber_keyring is not None:
+			ss = self.kyber_keyring.decapsulate(kem_info['key_id'], bytes.fromhex(kem_info['ciphertext']))
+			return self._kyber_session_key(master_key, ss)
+		salt_hex = encrypted_data.get('session_salt')
+		if not salt_hex:
+			raise ValueError("Sesión no válida o expirada")
+		return self._derive_session_key_pbkdf2_with_salt(master_key, bytes.fromhex(salt_hex))
+	
+	@staticmethod
+	def _bundle_matches_session(session: Dict[str, Any], encrypted_data: Dict[str, Any]) -> bool:
+		"""True si el bundle se cifró con la clave de sesión almacenada (no con una ya rotada)."""
+		kem_info = encrypted_data.get('kem')
+		salt_hex = encrypted_data.get('session_salt')
+		if not kem_info and not salt_hex:
+			return True
+		return session.get('kem') == kem_info and session.get('session_salt') == salt_hex
+	
+	def _session_slot(self, master_key: bytes, session_id: str) -> str:
+		"""Clave interna de la sesión: el ID tal cual o, con scope_sessions, ligado a la clave maestra."""
+		if not self.scope_sessions:
+			return session_id
+		scope = hmac.new(master_key, b"flora-session-scope:" + session_id.encode(), hashlib.sha256).hexdigest()[:16]
+		return f"{session_id}#{scope}"
 	
 	def _store_session(self, session_id: str, session_key: bytes, kem_info: Optional[Dict[str, Any]] = None, session_salt: Optional[bytes] = None):
 		self.session_keys[session_id] = {
@@ -140,12 +230,17 @@ class FloraCryptoSystem:
 			'kem': kem_info or None,
 			'session_salt': session_salt.hex() if session_salt else None
 		}
+		self.session_keys.move_to_end(session_id)
+		if self.max_sessions is not None:
+			while len(self.session_keys) > max(1, self.max_sessions):
+				self.session_keys.popitem(last=False)
 	
 	def _rotate_session_key(self, master_key: bytes, session_id: str):
 		"""Rota la clave de sesión al alcanzar max_uses."""
 		old = self.session_keys.get(session_id)
 		if not old:
 			return
+		started = time.perf_counter()
 		# Borrado lógico del material de la clave antigua
 		old['key'] = b"\x00" * len(old.get('key', b''))
 		old['uses'] = old.get('max_uses', self.session_max_uses)
@@ -153,11 +248,10 @@ class FloraCryptoSystem:
 		# Crear nueva clave de sesión
 		new_key = None
 		kem_info = None
+		new_salt = None
 		if self.kyber_enabled:
 			try:
-				_, c_L, ss = self._encapsulate_session_key_kyber()
-				new_key = hashlib.sha256(ss).digest()[:self.key_size]
-				kem_info = {'ciphertext': c_L.hex()}
+				new_key, kem_info = self._encapsulate_session_key_kyber(master_key)
 			except Exception:
 				new_key = None
 		if new_key is None:
@@ -165,16 +259,18 @@ class FloraCryptoSystem:
 			new_salt = hashlib.sha256((session_id + str(time.time())).encode()).digest()
 			new_key = self._derive_session_key_pbkdf2_with_salt(master_key, new_salt)
 		self._store_session(session_id, new_key, kem_info, session_salt=(None if kem_info else new_salt))
+		self._observe("session_rotate", started)
 	
 	def create_session_key(self, master_key: bytes, session_id: str) -> bytes:
 		"""
 		Crea una clave de sesión única (Kyber si está disponible; PBKDF2 en fallback).
 		"""
+		return self._create_session_key(master_key, self._session_slot(master_key, session_id))
+	
+	def _create_session_key(self, master_key: bytes, session_id: str) -> bytes:
 		if self.kyber_enabled:
 			try:
-				_, c_L, ss = self._encapsulate_session_key_kyber()
-				session_key = hashlib.sha256(ss).digest()[:self.key_size]
-				kem_info = {'ciphertext': c_L.hex()}
+				session_key, kem_info = self._encapsulate_session_key_kyber(master_key)
 				self._store_session(session_id, session_key, kem_info)
 				return session_key
 			except Exception:
@@ -207,20 +303,29 @@ class FloraCryptoSystem:
 				raise RuntimeError("Sistema comprometido - autodestrucción activada")
 			
 			# Crear/obtener clave de sesión
-			session_key = self.session_keys.get(session_id, {}).get('key')
-			if not session_key:
-				session_key = self.create_session_key(master_key, session_id)
+			started = time.perf_counter()
+			slot = self._session_slot(master_key, session_id)
+			session_key = self.session_keys.get(slot, {}).get('key')
+			if session_key:
+				self.session_keys.move_to_end(slot)
+				self._observe("session_cached", started)
+			else:
+				session_key = self._create_session_key(master_key, slot)
+				self._observe("session_create", started)
+			# Datos de reconstrucción de la clave usada (antes de una posible rotación)
+			info = dict(self.session_keys[slot])
 			
+			started = time.perf_counter()
 			nonce = get_random_bytes(12)
 			cipher = AES.new(session_key, AES.MODE_GCM, nonce=nonce)
 			if associated_data:
 				cipher.update(associated_data)
 			ciphertext, tag = cipher.encrypt_and_digest(message)
+			self._observe("aead_encrypt", started)
 			
 			# Marcar uso (y posible rotación)
-			self._touch_session_use(master_key, session_id)
+			self._touch_session_use(master_key, slot)
 			
-			info = self.session_keys.get(session_id, {})
 			return {
 				'session_id': session_id,
 				'nonce': nonce.hex(),
@@ -230,13 +335,14 @@ class FloraCryptoSystem:
 				'timestamp': time.time(),
 				'threat_level': self.threat_level,
 				'system_health': self.system_health,
-				'session_uses': info.get('uses'),
+				'session_uses': info.get('uses', 0) + 1,
 				'session_max_uses': info.get('max_uses'),
 				'kem': info.get('kem'),
 				'session_salt': info.get('session_salt')
 			}
 		except Exception as e:
-			self._record_failed_attempt("encryption", str(e))
+			if self.track_threats:
+				self._record_failed_attempt("encryption", str(e))
 			raise
 	
 	def decrypt_message(self, 
@@ -255,30 +361,147 @@ class FloraCryptoSystem:
 			tag = bytes.fromhex(encrypted_data['tag'])
 			associated_data = bytes.fromhex(encrypted_data['associated_data']) if encrypted_data.get('associated_data') else None
 			
-			if session_id not in self.session_keys:
-				# Intento de reconstrucción stateless (solo PBKDF2)
-				salt_hex = encrypted_data.get('session_salt')
-				if not salt_hex:
-					raise ValueError("Sesión no válida o expirada")
-				session_salt = bytes.fromhex(salt_hex)
-				recovered_key = self._derive_session_key_pbkdf2_with_salt(master_key, session_salt)
-				self._store_session(session_id, recovered_key, session_salt=session_salt)
+			started = time.perf_counter()
+			slot = self._session_slot(master_key, session_id)
+			stored = self.session_keys.get(slot)
+			recovered = False
+			if stored is not None and self._bundle_matches_session(stored, encrypted_data):
+				session_key = stored['key']
+				self._observe("session_cached", started)
+			else:
+				# Reconstrucción stateless (Kyber vía keyring o salt PBKDF2)
+				session_key = self._recover_session_key(master_key, encrypted_data)
+				recovered = True
+				self._observe("session_recover", started)
 			
-			session_key = self.session_keys[session_id]['key']
+			started = time.perf_counter()
 			cipher = AES.new(session_key, AES.MODE_GCM, nonce=nonce)
 			if associated_data:
 				cipher.update(associated_data)
 			plaintext = cipher.decrypt_and_verify(ciphertext, tag)
+			self._observe("aead_decrypt", started)
 			
-			# Marcar uso (y posible rotación)
-			self._touch_session_use(master_key, session_id)
+			if recovered and stored is None:
+				# Solo se adopta la sesión reconstruida tras verificar el tag
+				salt_hex = encrypted_data.get('session_salt')
+				self._store_session(slot, session_key, encrypted_data.get('kem'),
+									session_salt=bytes.fromhex(salt_hex) if salt_hex else None)
+			
+			# Marcar uso (y posible rotación); un bundle de una clave ya rotada
+			# no cuenta como uso de la vigente
+			if not recovered or stored is None:
+				self.session_keys.move_to_end(slot)
+				self._touch_session_use(master_key, slot)
 			
 			return plaintext
 		except Exception as e:
-			self._record_failed_attempt("decryption", str(e))
-			if "tag" in str(e).lower() or "verification" in str(e).lower():
-				self._trigger_autodestruction("authentication_failure", encrypted_data)
+			if self.track_threats:
+				self._record_failed_attempt("decryption", str(e))
+				if "tag" in str(e).lower() or "verification" in str(e).lower():
+					self._trigger_autodestruction("authentication_failure", encrypted_data)
 			raise
+
+	def verify_message(self, encrypted_data: Dict[str, Any], master_key: bytes) -> bool:
+		"""
+		Comprueba el tag GCM de un bundle sin efectos secundarios.
+
+		A diferencia de decrypt_message, un tag inválido devuelve False: no
+		cuenta como intento fallido, no activa la autodestrucción ni guarda o
+		consume sesiones. El texto plano se descarta en cuanto se verifica.
+		Un bundle mal formado lanza ValueError/KeyError.
+		"""
+		nonce = bytes.fromhex(encrypted_data['nonce'])
+		ciphertext = bytes.fromhex(encrypted_data['ciphertext'])
+		tag = bytes.fromhex(encrypted_data['tag'])
+		associated_data = bytes.fromhex(encrypted_data['associated_data']) if encrypted_data.get('associated_data') else None
+		stored = self.session_keys.get(self._session_slot(master_key, encrypted_data['session_id']))
+		if stored is not None and self._bundle_matches_session(stored, encrypted_data):
+			session_key = stored['key']
+		else:
+			session_key = self._recover_session_key(master_key, encrypted_data)
+		cipher = AES.new(session_key, AES.MODE_GCM, nonce=nonce)
+		if associated_data:
+			cipher.update(associated_data)
+		try:
+			cipher.decrypt_and_verify(ciphertext, tag)
+		except ValueError:
+			return False
+		return True
+
+	def encrypt_many(self,
+					 messages: Sequence[bytes],
+					 master_key: bytes,
+					 session_id: str,
+					 associated_data: Optional[Union[bytes, Sequence[Optional[bytes]]]] = None) -> List[Union[Dict[str, Any], Exception]]:
+		"""
+		Encripta varios mensajes en la misma sesión.
+		
+		Las encapsulaciones Kyber que necesitarán la creación y las rotaciones de
+		la sesión se calculan de una vez (KyberKEM.encaps_many). Devuelve un
+		resultado por mensaje: el bundle, o la excepción que impidió cifrarlo.
+		"""
+		if associated_data is None or isinstance(associated_data, (bytes, bytearray)):
+			ads = [associated_data] * len(messages)
+		else:
+			ads = list(associated_data)
+			if len(ads) != len(messages):
+				raise ValueError("associated_data debe tener un elemento por mensaje")
+		
+		if self.kyber_enabled and messages:
+			stored = self.session_keys.get(self._session_slot(master_key, session_id))
+			uses = stored['uses'] if stored and stored.get('key') else 0
+			needed = (uses + len(messages)) // self.session_max_uses + (0 if stored and stored.get('key') else 1)
+			try:
+				self._kyber_prefetch.extend(self.kyber_keyring.encapsulate_many(needed, self.kyber.prefer_variant))
+			except Exception:
+				pass
+		
+		results: List[Union[Dict[str, Any], Exception]] = []
+		try:
+			for message, ad in zip(messages, ads):
+				try:
+					results.append(self.encrypt_message(message, master_key, session_id, ad))
+				except Exception as e:
+					results.append(e)
+		finally:
+			self._kyber_prefetch.clear()
+		return results
+	
+	def decrypt_many(self, bundles: Sequence[Dict[str, Any]], master_key: bytes) -> List[Union[bytes, Exception]]:
+		"""
+		Desencripta varios bundles con la misma clave maestra.
+		
+		Los ciphertexts Kyber de sesiones que no están en memoria se decapsulan
+		en lote por key ID antes de descifrar. Devuelve un resultado por bundle:
+		el texto plano, o la excepción correspondiente. Con track_threats cada
+		fallo cuenta como intento fallido, igual que en decrypt_message.
+		"""
+		if self.kyber_keyring is not None:
+			pending: Dict[str, List[bytes]] = {}
+			for bundle in bundles:
+				kem_info = bundle.get('kem') if isinstance(bundle, dict) else None
+				if not kem_info or not kem_info.get('key_id') or not kem_info.get('ciphertext'):
+					continue
+				stored = self.session_keys.get(self._session_slot(master_key, str(bundle.get('session_id'))))
+				if stored is not None and self._bundle_matches_session(stored, bundle):
+					continue
+				try:
+					pending.setdefault(kem_info['key_id'], []).append(bytes.fromhex(kem_info['ciphertext']))
+				except ValueError:
+					continue
+			for key_id, ciphertexts in pending.items():
+				try:
+					self.kyber_keyring.decapsulate_many(key_id, ciphertexts)
+				except Exception:
+					pass
+		
+		results: List[Union[bytes, Exception]] = []
+		for bundle in bundles:
+			try:
+				results.append(self.decrypt_message(bundle, master_key))
+			except Exception as e:
+				results.append(e)
+		return results
 	
 	def _record_failed_attempt(self, operation: str, error: str):
 		self.failed_attempts += 1
@@ -337,6 +560,9 @@ class FloraCryptoSystem:
 			'threat_level': self.threat_level,
 			'failed_attempts': self.failed_attempts,
 			'active_sessions': len(self.session_keys),
+			'max_sessions': self.max_sessions,
+			'kyber_enabled': self.kyber_enabled,
+			'kyber_backend': self.kyber.variant if self.kyber is not None else None,
 			'lockout_active': time.time() < self.lockout_until,
 			'lockout_remaining': max(0, self.lockout_until - time.time()),
 			'recent_attacks': len([a for a in self.attack_history if time.time() - a['timestamp'] < 300]),
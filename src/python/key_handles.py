@@ -0,0 +1,249 @@
+# 🌸 FLORA - Handles de clave maestra
+# Un cliente deriva su clave maestra (PBKDF2) una sola vez en POST /keys y
+# recibe un handle opaco y con caducidad; las peticiones siguientes lo usan en
+# lugar de la contraseña. El almacén es SQLite (compartido por los workers de
+# uvicorn) y guarda la clave envuelta con AES-GCM bajo una clave derivada del
+# secreto del handle, que nunca se persiste.
+
+import base64
+import hashlib
+import hmac
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from Crypto.Cipher import AES
+
+KEY_STORE_ENV = "FLORA_KEY_STORE"
+HANDLE_PREFIX = "fkh_"
+DEFAULT_TTL = 3600
+MAX_TTL = 7 * 24 * 3600
+DEFAULT_MAX_HANDLES = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS key_handles (
+	id TEXT PRIMARY KEY,
+	wrapped BLOB NOT NULL,
+	master_salt BLOB NOT NULL,
+	created REAL NOT NULL,
+	expires INTEGER NOT NULL,
+	last_used REAL NOT NULL,
+	uses INTEGER NOT NULL DEFAULT 0,
+	principal TEXT
+);
+CREATE INDEX IF NOT EXISTS key_handles_expires ON key_handles (expires);
+CREATE INDEX IF NOT EXISTS key_handles_last_used ON key_handles (last_used);
+CREATE TABLE IF NOT EXISTS key_handle_counters (
+	name TEXT PRIMARY KEY,
+	value INTEGER NOT NULL
+);
+"""
+
+COUNTERS = ("created", "resolved", "rejected", "expired", "revoked", "evicted")
+
+
+class KeyHandleError(ValueError):
+	"""Handle desconocido, caducado, revocado o con secreto incorrecto."""
+	pass
+
+
+def default_key_store_path() -> Path:
+	"""Ruta del almacén: $FLORA_KEY_STORE o ~/.cache/flora/key_handles.db."""
+	env = os.getenv(KEY_STORE_ENV)
+	if env:
+		return Path(env).expanduser()
+	return Path.home() / ".cache" / "flora" / "key_handles.db"
+
+
+def _b64(data: bytes) -> str:
+	return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(text: str) -> bytes:
+	return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def parse_handle(handle: str) -> Tuple[str, bytes]:
+	"""Separa un handle "fkh_<id>.<secreto>" -> (id, secreto)."""
+	try:
+		if not handle.startswith(HANDLE_PREFIX):
+			raise ValueError
+		handle_id, secret = handle[len(HANDLE_PREFIX):].split(".", 1)
+		secret_bytes = _unb64(secret)
+		if len(handle_id) != 32 or len(secret_bytes) != 32:
+			raise ValueError
+		int(handle_id, 16)
+	except ValueError:
+		raise KeyHandleError("Handle de clave mal formado")
+	return handle_id, secret_bytes
+
+
+def _scoped(query: str, params: Tuple[Any, ...], principal: Optional[str]) -> Tuple[str, Tuple[Any, ...]]:
+	"""Añade el filtro por principal a una consulta sobre un handle."""
+	if principal is None:
+		return query, params
+	return query + " AND principal = ?", params + (principal,)
+
+
+def _wrapping_key(secret: bytes, handle_id: str) -> bytes:
+	return hmac.new(secret, b"flora-key-handle-wrap" + handle_id.encode("ascii"), hashlib.sha256).digest()
+
+
+def _wrap_aad(handle_id: str, master_salt: bytes, expires: int) -> bytes:
+	# La caducidad va autenticada: editar la fila no alarga la vida del handle
+	return handle_id.encode("ascii") + master_salt + expires.to_bytes(8, "big")
+
+
+class KeyHandleStore:
+	"""Almacén acotado y con TTL de claves maestras envueltas.
+
+	- Acotado: al superar `max_handles` se expulsan los menos usados recientemente.
+	- TTL: cada handle caduca (por defecto una hora, máximo una semana).
+	- Revocación: revoke() borra la fila; ningún worker puede volver a usarla.
+	- Métricas: usos y último uso por handle, y contadores globales en stats().
+
+	Con `path=None` el almacén vive en memoria (un solo proceso).
+	"""
+
+	def __init__(self, path: Optional[Union[str, Path]] = None, default_ttl: int = DEFAULT_TTL,
+				 max_handles: int = DEFAULT_MAX_HANDLES) -> None:
+		self.path = Path(path).expanduser() if path else None
+		self.default_ttl = default_ttl
+		self.max_handles = max(1, max_handles)
+		if self.path is not None:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			self.path.touch(mode=0o600, exist_ok=True)
+		self._db = sqlite3.connect(str(self.path) if self.path else ":memory:", timeout=30,
+								   isolation_level=None, check_same_thread=False)
+		self._lock = threading.Lock()
+		with self._lock:
+			if self.path is not None:
+				self._db.execute("PRAGMA journal_mode=WAL")
+				self._db.execute("PRAGMA synchronous=NORMAL")
+			self._db.executescript(_SCHEMA)
+			# Almacenes anteriores a la columna principal: sus handles no
+			# pertenecen a nadie y solo se pueden revocar sin principal
+			columns = {row[1] for row in self._db.execute("PRAGMA table_info(key_handles)")}
+			if "principal" not in columns:
+				self._db.execute("ALTER TABLE key_handles ADD COLUMN principal TEXT")
+
+	def _bump(self, name: str, amount: int = 1) -> None:
+		if amount:
+			self._db.execute("INSERT INTO key_handle_counters (name, value) VALUES (?, ?) "
+							 "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+	def _purge_expired(self, now: float) -> None:
+		self._bump("expired", self._db.execute("DELETE FROM key_handles WHERE expires <= ?", (now,)).rowcount)
+
+	# ===== Ciclo de vida =====
+
+	def create(self, master_key: bytes, master_salt: bytes, ttl: Optional[int] = None,
+			   principal: Optional[str] = None) -> Dict[str, Any]:
+		"""Guarda la clave envuelta -> {'key_handle', 'key_id', 'expires_at', 'ttl'}.
+
+		El handle completo (id + secreto) solo se devuelve aquí. `principal`
+		identifica a quien lo crea; info() y revoke() con principal solo ven
+		sus propios handles.
+		"""
+		ttl = self.default_ttl if ttl is None else int(ttl)
+		if not 0 < ttl <= MAX_TTL:
+			raise ValueError(f"ttl debe estar entre 1 y {MAX_TTL} segundos")
+		handle_id = os.urandom(16).hex()
+		secret = os.urandom(32)
+		now = time.time()
+		expires = int(now) + ttl
+		nonce = os.urandom(12)
+		cipher = AES.new(_wrapping_key(secret, handle_id), AES.MODE_GCM, nonce=nonce)
+		cipher.update(_wrap_aad(handle_id, master_salt, expires))
+		wrapped, tag = cipher.encrypt_and_digest(master_key)
+		with self._lock:
+			self._db.execute("BEGIN IMMEDIATE")
+			try:
+				self._purge_expired(now)
+				(count,) = self._db.execute("SELECT COUNT(*) FROM key_handles").fetchone()
+				overflow = count + 1 - self.max_handles
+				if overflow > 0:
+					self._db.execute("DELETE FROM key_handles WHERE id IN "
+									 "(SELECT id FROM key_handles ORDER BY last_used LIMIT ?)", (overflow,))
+					self._bump("evicted", overflow)
+				self._db.execute("INSERT INTO key_handles (id, wrapped, master_salt, created, expires, last_used, principal) "
+								 "VALUES (?, ?, ?, ?, ?, ?, ?)",
+								 (handle_id, nonce + wrapped + tag, master_salt, now, expires, now, principal))
+				self._bump("created")
+				self._db.execute("COMMIT")
+			except BaseException:
+				self._db.execute("ROLLBACK")
+				raise
+		return {
+			'key_handle': f"{HANDLE_PREFIX}{handle_id}.{_b64(secret)}",
+			'key_id': handle_id,
+			'expires_at': expires,
+			'ttl': ttl,
+		}
+
+	def resolve(self, handle: str) -> Tuple[bytes, bytes]:
+		"""Desenvuelve la clave de un handle -> (master_key, master_salt) y anota el uso."""
+		handle_id, secret = parse_handle(handle)
+		now = time.time()
+		with self._lock:
+			row = self._db.execute("SELECT wrapped, master_salt, expires FROM key_handles WHERE id = ?",
+								   (handle_id,)).fetchone()
+			if row is None or row[2] <= now:
+				self._bump("rejected")
+				raise KeyHandleError("Handle de clave desconocido, caducado o revocado")
+			blob, master_salt, expires = row
+			cipher = AES.new(_wrapping_key(secret, handle_id), AES.MODE_GCM, nonce=blob[:12])
+			cipher.update(_wrap_aad(handle_id, master_salt, expires))
+			try:
+				master_key = cipher.decrypt_and_verify(blob[12:-16], blob[-16:])
+			except ValueError:
+				self._bump("rejected")
+				raise KeyHandleError("Handle de clave desconocido, caducado o revocado")
+			self._db.execute("UPDATE key_handles SET uses = uses + 1, last_used = ? WHERE id = ?", (now, handle_id))
+			self._bump("resolved")
+		return master_key, bytes(master_salt)
+
+	def revoke(self, key_id: str, principal: Optional[str] = None) -> bool:
+		"""Revoca un handle por su key_id (o por el handle completo).
+
+		Con `principal`, solo si lo creó ese principal; si no, se comporta como
+		un handle desconocido (False).
+		"""
+		if key_id.startswith(HANDLE_PREFIX):
+			key_id = parse_handle(key_id)[0]
+		query, params = _scoped("DELETE FROM key_handles WHERE id = ?", (key_id,), principal)
+		with self._lock:
+			removed = self._db.execute(query, params).rowcount
+			self._bump("revoked", removed)
+		return bool(removed)
+
+	# ===== Métricas =====
+
+	def info(self, key_id: str, principal: Optional[str] = None) -> Dict[str, Any]:
+		"""Metadatos y uso de un handle (sin material de claves), limitado a `principal` si se indica."""
+		query, params = _scoped("SELECT created, expires, last_used, uses FROM key_handles WHERE id = ? AND expires > ?",
+								(key_id, time.time()), principal)
+		with self._lock:
+			row = self._db.execute(query, params).fetchone()
+		if row is None:
+			raise KeyHandleError("Handle de clave desconocido, caducado o revocado")
+		created, expires, last_used, uses = row
+		return {'key_id': key_id, 'created': created, 'expires_at': expires, 'last_used': last_used, 'uses': uses}
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			(active,) = self._db.execute("SELECT COUNT(*) FROM key_handles WHERE expires > ?", (time.time(),)).fetchone()
+			counters = dict(self._db.execute("SELECT name, value FROM key_handle_counters").fetchall())
+		stats = {name: counters.get(name, 0) for name in COUNTERS}
+		stats.update(active=active, max_handles=self.max_handles)
+		return stats
+
+	def __len__(self) -> int:
+		return self.stats()['active']
+
+	def close(self) -> None:
+		with self._lock:
+			self._db.close()
@@ -1,33 +1,181 @@
 # 🌸 FLORA - Kyber KEM (Integración Opcional)
 # Encapsulamiento/decapsulamiento de claves usando CRYSTALS-Kyber si está disponible.
 
-from typing import Optional, Tuple
+import importlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# Niveles de seguridad soportados (nombre canónico -> parámetro n·k)
+KYBER_VARIANTS = {"kyber512": 512, "kyber768": 768, "kyber1024": 1024}
+DEFAULT_VARIANT = "kyber512"
+
 
 class KyberNotAvailable(Exception):
 	"""Excepción cuando Kyber no está disponible en el entorno."""
 	pass
 
 
-def _import_kyber_impl():
+def normalize_variant(variant: Union[str, int, None]) -> str:
+	"""Normaliza 512 / "512" / "Kyber-512" / "kyber512" al nombre canónico."""
+	if variant is None:
+		return DEFAULT_VARIANT
+	text = str(variant).strip().lower().replace("-", "").replace("_", "")
+	if text.isdigit():
+		text = "kyber" + text
+	if text not in KYBER_VARIANTS:
+		raise ValueError(f"Variante Kyber no soportada: {variant!r} (use 512, 768 o 1024)")
+	return text
+
+
+# Un loader recibe el nivel (512/768/1024) y devuelve (impl, nombre_backend)
+# o lanza una excepción si el backend no está disponible.
+BackendLoader = Callable[[int], Tuple[Any, str]]
+
+
+def _load_pykyber(level: int) -> Tuple[Any, str]:
+	import pykyber as kyb  # type: ignore
+	impl = getattr(kyb, f"Kyber{level}", None)
+	if impl is None:
+		if level != 512:
+			raise ImportError(f"pykyber no expone Kyber{level}")
+		impl = kyb
+	return impl, f"pykyber-kyber{level}"
+
+
+def _load_pqcrypto(level: int) -> Tuple[Any, str]:
+	# pqcrypto expone pqcrypto.kem.kyber* (versiones antiguas) o ml_kem_* (FIPS 203)
+	try:
+		return importlib.import_module(f"pqcrypto.kem.kyber{level}"), f"pqcrypto-kyber{level}"
+	except ImportError:
+		return importlib.import_module(f"pqcrypto.kem.ml_kem_{level}"), f"pqcrypto-ml-kem-{level}"
+
+
+def _load_numpy_mlkem(level: int) -> Tuple[Any, str]:
+	# Backend integrado (NumPy puro): último recurso, siempre disponible con numpy
+	try:
+		from . import mlkem_numpy
+	except ImportError:
+		import mlkem_numpy  # type: ignore
+	return mlkem_numpy.BACKENDS[level], f"numpy-ml-kem-{level}"
+
+
+class KyberBackendRegistry:
+	"""Registro de backends Kyber compartido por todo el proceso.
+
+	Cada variante se resuelve una sola vez, de forma perezosa (en el primer uso)
+	y protegida por un lock; el resultado, incluido "no disponible", queda
+	cacheado para que crear un KyberKEM no vuelva a intentar importaciones.
+	"""
+
+	def __init__(self) -> None:
+		self._loaders: List[Tuple[str, BackendLoader]] = []
+		self._resolved: Dict[str, Tuple[Any, Optional[str]]] = {}
+		self._lock = threading.Lock()
+
+	def register(self, name: str, loader: BackendLoader, first: bool = False) -> None:
+		"""Registra un backend; invalida las resoluciones cacheadas."""
+		with self._lock:
+			self._loaders = [(n, l) for n, l in self._loaders if n != name]
+			if first:
+				self._loaders.insert(0, (name, loader))
+			else:
+				self._loaders.append((name, loader))
+			self._resolved.clear()
+
+	def resolve(self, variant: Union[str, int, None] = DEFAULT_VARIANT) -> Tuple[Any, Optional[str]]:
+		"""Devuelve (impl, nombre_backend) o (None, None) para la variante pedida."""
+		name = normalize_variant(variant)
+		cached = self._resolved.get(name)
+		if cached is not None:
+			return cached
+		with self._lock:
+			cached = self._resolved.get(name)
+			if cached is None:
+				cached = (None, None)
+				for _, loader in self._loaders:
+					try:
+						cached = loader(KYBER_VARIANTS[name])
+						break
+					except Exception:
+						continue
+				self._resolved[name] = cached
+			return cached
+
+	def reset(self) -> None:
+		"""Olvida las resoluciones (p. ej. tras instalar un backend en caliente)."""
+		with self._lock:
+			self._resolved.clear()
+
+	def snapshot(self) -> Dict[str, Optional[str]]:
+		"""Variantes ya resueltas y su backend (None si no hay ninguno)."""
+		return {name: backend for name, (_, backend) in self._resolved.items()}
+
+
+_registry = KyberBackendRegistry()
+_registry.register("pykyber", _load_pykyber)
+_registry.register("pqcrypto", _load_pqcrypto)
+_registry.register("numpy-ml-kem", _load_numpy_mlkem)
+
+
+def get_backend_registry() -> KyberBackendRegistry:
+	"""Registro de backends del proceso."""
+	return _registry
+
+
+def _import_kyber_impl(variant: Union[str, int, None] = DEFAULT_VARIANT):
 	"""Intenta importar una implementación de Kyber disponible en Python.
 	Devuelve (modulo, variant) o (None, None) si no hay implementación.
 	"""
-	# Intento 1: pykyber (hipotético)
-	try:
-		import pykyber as kyb  # type: ignore
-		return kyb, "pykyber"
-	except Exception:
-		pass
+	return _registry.resolve(variant)
+
+
+class KyberBatch(NamedTuple):
+	"""Resultado de una operación por lotes: ciphertexts y secretos empaquetados.
+
+	`ciphertexts` y `shared_secrets` son buffers contiguos de `count` elementos
+	de tamaño fijo; el elemento i ocupa [i*size, (i+1)*size).
+	"""
+	ciphertexts: bytes
+	shared_secrets: bytes
+	ciphertext_size: int
+	shared_secret_size: int
+	count: int
+
+	def ciphertext(self, index: int) -> bytes:
+		return _unpack_one(self.ciphertexts, self.ciphertext_size, self.count, index)
+
+	def shared_secret(self, index: int) -> bytes:
+		return _unpack_one(self.shared_secrets, self.shared_secret_size, self.count, index)
+
+	def pairs(self) -> List[Tuple[bytes, bytes]]:
+		"""Lista de (ciphertext, shared_secret), como devolvería encaps()."""
+		return list(zip(_unpack(self.ciphertexts, self.ciphertext_size),
+						_unpack(self.shared_secrets, self.shared_secret_size)))
+
+
+def _unpack_one(packed: bytes, size: int, count: int, index: int) -> bytes:
+	if not -count <= index < count:
+		raise IndexError("índice fuera del lote")
+	index %= count
+	return packed[index * size:(index + 1) * size]
+
+
+def _unpack(packed: bytes, size: int) -> List[bytes]:
+	return [packed[i:i + size] for i in range(0, len(packed), size)] if size else []
+
+
+def _pack(items: Sequence[bytes]) -> Tuple[bytes, int]:
+	"""Empaqueta elementos de tamaño fijo -> (buffer, tamaño_elemento)."""
+	size = len(items[0]) if items else 0
+	if any(len(item) != size for item in items):
+		raise ValueError("Los elementos del lote no tienen tamaño uniforme")
+	return b"".join(items), size
 
-	# Intento 2: pqcrypto (algunas distros exponen pqcrypto.kem.kyber*
-	try:
-		from pqcrypto.kem import kyber512 as kyb  # type: ignore
-		return kyb, "pqcrypto-kyber512"
-	except Exception:
-		pass
 
-	# Sin implementación
-	return None, None
+# Umbral a partir del cual compensa repartir un lote entre hilos
+_PARALLEL_MIN_ITEMS = 32
 
 
 class KyberKEM:
@@ -41,9 +189,10 @@ class KyberKEM:
 			ss2 = kem.decaps(sk, c)
 	"""
 
-	def __init__(self, prefer_variant: str = "kyber512") -> None:
-		self.prefer_variant = prefer_variant
-		self.impl, self.variant = _import_kyber_impl()
+	def __init__(self, prefer_variant: Union[str, int] = DEFAULT_VARIANT) -> None:
+		self.prefer_variant = normalize_variant(prefer_variant)
+		self.level = KYBER_VARIANTS[self.prefer_variant]
+		self.impl, self.variant = _import_kyber_impl(self.prefer_variant)
 		self.available = self.impl is not None
 
 	def keygen(self) -> Tuple[bytes, bytes]:
@@ -83,12 +232,91 @@ class KyberKEM:
 			shared_secret = res  # type: ignore[assignment]
 		return bytes(shared_secret)
 
+	# ===== Operaciones por lotes =====
 
-def try_create_kyber() -> Optional[KyberKEM]:
-	"""Crea instancia si hay backend disponible; de lo contrario, None."""
-	kem = KyberKEM()
-	return kem if kem.available else None
+	@property
+	def releases_gil(self) -> bool:
+		"""True si el backend es nativo (pykyber/pqcrypto liberan el GIL en C)."""
+		return self.available and not str(self.variant).startswith("numpy-")
+
+	def _ciphertext_size(self) -> Optional[int]:
+		return getattr(self.impl, "ciphertext_size", None) or getattr(self.impl, "CIPHERTEXT_SIZE", None)
+
+	def _run_batched(self, func: Callable[[Any], Any], items: Sequence[Any], workers: Optional[int]) -> List[Any]:
+		"""Aplica func a cada elemento, en un pool de hilos si el backend suelta el GIL."""
+		workers = workers or min(32, os.cpu_count() or 1)
+		if workers <= 1 or not self.releases_gil or len(items) < _PARALLEL_MIN_ITEMS:
+			return [func(item) for item in items]
+		# Trozos contiguos: un submit por hilo, no uno por operación
+		step = -(-len(items) // workers)
+		chunks = [items[i:i + step] for i in range(0, len(items), step)]
+		with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="flora-kyber") as pool:
+			results = pool.map(lambda chunk: [func(item) for item in chunk], chunks)
+			return [value for chunk in results for value in chunk]
+
+	def encaps_many(self,
+					public_keys: Union[bytes, Sequence[bytes]],
+					count: Optional[int] = None,
+					workers: Optional[int] = None) -> KyberBatch:
+		"""Encapsula contra una lista de claves públicas, o `count` veces contra una.
+
+		Usa el camino vectorizado del backend (encrypt_many) si existe; si no,
+		reparte el trabajo en `workers` hilos cuando el backend libera el GIL.
+		"""
+		if not self.available:
+			raise KyberNotAvailable("Kyber no disponible en este entorno")
+		if count is not None and count < 0:
+			raise ValueError("count debe ser >= 0")
+		if isinstance(public_keys, (bytes, bytearray, memoryview)):
+			keys = [bytes(public_keys)] * (1 if count is None else count)
+		else:
+			if count is not None:
+				raise ValueError("count solo se admite con una única clave pública")
+			keys = [bytes(pk) for pk in public_keys]
+
+		batch_impl = getattr(self.impl, "encrypt_many", None)
+		if callable(batch_impl) and keys:
+			ciphertexts, shared = batch_impl(keys)
+			ciphertexts = [bytes(c) for c in ciphertexts]
+			shared = [bytes(ss) for ss in shared]
+		else:
+			pairs = self._run_batched(self.encaps, keys, workers)
+			ciphertexts = [c for c, _ in pairs]
+			shared = [ss for _, ss in pairs]
+		packed_ct, ct_size = _pack(ciphertexts)
+		packed_ss, ss_size = _pack(shared)
+		return KyberBatch(packed_ct, packed_ss, ct_size, ss_size, len(keys))
 
+	def decaps_many(self,
+					secret_key: bytes,
+					ciphertexts: Union[bytes, Sequence[bytes]],
+					workers: Optional[int] = None) -> KyberBatch:
+		"""Decapsula varios ciphertexts dirigidos a la misma clave secreta.
 
+		`ciphertexts` puede ser una lista o un buffer empaquetado (p. ej.
+		`KyberBatch.ciphertexts`) si el backend publica el tamaño de ciphertext.
+		"""
+		if not self.available:
+			raise KyberNotAvailable("Kyber no disponible en este entorno")
+		if isinstance(ciphertexts, (bytes, bytearray, memoryview)):
+			size = self._ciphertext_size()
+			if not size or len(ciphertexts) % size:
+				raise ValueError("Buffer de ciphertexts empaquetado con tamaño inválido")
+			items = _unpack(bytes(ciphertexts), size)
+		else:
+			items = [bytes(c) for c in ciphertexts]
 
+		batch_impl = getattr(self.impl, "decrypt_many", None)
+		if callable(batch_impl) and items:
+			shared = [bytes(ss) for ss in batch_impl(secret_key, items)]
+		else:
+			shared = self._run_batched(lambda c: self.decaps(secret_key, c), items, workers)
+		packed_ct, ct_size = _pack(items)
+		packed_ss, ss_size = _pack(shared)
+		return KyberBatch(packed_ct, packed_ss, ct_size, ss_size, len(items))
 
+
+def try_create_kyber(variant: Union[str, int] = DEFAULT_VARIANT) -> Optional[KyberKEM]:
+	"""Crea instancia si hay backend disponible; de lo contrario, None."""
+	kem = KyberKEM(variant)
+	return kem if kem.available else None
@@ -0,0 +1,292 @@
+# 🌸 FLORA - Keyring Kyber
+# Pares de claves Kyber de destinatario, persistentes y direccionados por key ID.
+# Cifrar solo encapsula contra la clave pública vigente; descifrar localiza la
+# clave secreta por el key ID que viaja en el campo `kem` del bundle.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+	import fcntl
+except ImportError:  # pragma: no cover - Windows
+	fcntl = None  # type: ignore
+
+try:
+	from .kyber_kem import DEFAULT_VARIANT, KyberKEM, KyberNotAvailable, normalize_variant, try_create_kyber
+except ImportError:
+	from kyber_kem import DEFAULT_VARIANT, KyberKEM, KyberNotAvailable, normalize_variant, try_create_kyber
+
+KEYRING_ENV = "FLORA_KYBER_KEYRING"
+KEYRING_FORMAT_VERSION = 1
+
+
+def default_keyring_path() -> Optional[Path]:
+	"""Ruta del keyring por defecto: $FLORA_KYBER_KEYRING, o None si no está definida."""
+	env = os.getenv(KEYRING_ENV)
+	if env:
+		return Path(env).expanduser()
+	return None
+
+
+def key_id_for(public_key: bytes) -> str:
+	"""Identificador estable de una clave pública (128 bits de SHA-256, hex)."""
+	return hashlib.sha256(b"flora-kyber-key" + public_key).hexdigest()[:32]
+
+
+class KyberKeyring:
+	"""Keyring de pares Kyber de destinatario.
+
+	Las claves se conservan tras rotar (para poder descifrar bundles antiguos) y,
+	si se indica `path`, se persisten en un JSON con permisos 0600. Los secretos
+	compartidos se cachean por (key_id, ciphertext) en un LRU acotado.
+
+	Varios procesos (p. ej. los workers de uvicorn) pueden compartir el fichero:
+	las escrituras se serializan con un lock fcntl y fusionan lo que haya en
+	disco, y un key ID desconocido se busca de nuevo en el fichero antes de fallar.
+
+	Uso:
+		keyring = KyberKeyring("~/.config/flora/kyber_keyring.json")
+		key_id, ct, ss = keyring.encapsulate("kyber768")
+		assert keyring.decapsulate(key_id, ct) == ss
+	"""
+
+	def __init__(self, path: Optional[Union[str, Path]] = None, cache_size: int = 4096) -> None:
+		self.path = Path(path).expanduser() if path else None
+		self.cache_size = max(0, cache_size)
+		self._keys: Dict[str, Dict[str, Any]] = {}
+		self._current: Dict[str, str] = {}
+		self._kems: Dict[str, KyberKEM] = {}
+		self._shared_cache: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+		self._lock = threading.RLock()
+		if self.path is not None and self.path.exists():
+			self._load()
+
+	def __len__(self) -> int:
+		return len(self._keys)
+
+	def __contains__(self, key_id: object) -> bool:
+		return key_id in self._keys
+
+	def key_ids(self) -> List[str]:
+		return list(self._keys)
+
+	def _kem(self, variant: str) -> KyberKEM:
+		kem = self._kems.get(variant)
+		if kem is None:
+			kem = try_create_kyber(variant)
+			if kem is None:
+				raise KyberNotAvailable(f"Kyber no disponible para {variant}")
+			self._kems[variant] = kem
+		return kem
+
+	# ===== Gestión de claves =====
+
+	def generate(self, variant: Union[str, int] = DEFAULT_VARIANT) -> str:
+		"""Genera un par nuevo, lo marca como vigente para su variante y devuelve su key ID."""
+		variant = normalize_variant(variant)
+		with self._lock, self._file_lock():
+			self._refresh()
+			return self._generate(variant)
+
+	def _generate(self, variant: str) -> str:
+		kem = self._kem(variant)
+		pk, sk = kem.keygen()
+		key_id = key_id_for(pk)
+		self._keys[key_id] = {
+			'variant': variant,
+			'backend': kem.variant,
+			'public_key': pk,
+			'secret_key': sk,
+			'created': time.time(),
+		}
+		self._current[variant] = key_id
+		self._save()
+		return key_id
+
+	def rotate(self, variant: Union[str, int] = DEFAULT_VARIANT) -> str:
+		"""Sustituye la clave vigente; las anteriores siguen disponibles para descifrar."""
+		return self.generate(variant)
+
+	def current_key_id(self, variant: Union[str, int] = DEFAULT_VARIANT) -> str:
+		"""Key ID vigente para la variante (lo genera en el primer uso)."""
+		variant = normalize_variant(variant)
+		key_id = self._current.get(variant)
+		if key_id is not None:
+			return key_id
+		with self._lock, self._file_lock():
+			# Otro proceso puede haber generado ya la clave vigente
+			self._refresh()
+			key_id = self._current.get(variant)
+			return key_id if key_id is not None else self._generate(variant)
+
+	def public_key(self, key_id: str) -> bytes:
+		return self._entry(key_id)['public_key']
+
+	def _entry(self, key_id: str) -> Dict[str, Any]:
+		entry = self._keys.get(key_id)
+		if entry is None and self.path is not None:
+			# Clave generada por otro proceso después de nuestra última lectura
+			with self._lock:
+				self._refresh()
+			entry = self._keys.get(key_id)
+		if entry is None:
+			raise ValueError(f"Clave Kyber desconocida: {key_id}")
+		return entry
+
+	# ===== KEM =====
+
+	def encapsulate(self, variant: Union[str, int] = DEFAULT_VARIANT) -> Tuple[str, bytes, bytes]:
+		"""Encapsula contra la clave pública vigente -> (key_id, ciphertext, shared_secret)."""
+		key_id = self.current_key_id(variant)
+		entry = self._keys[key_id]
+		ciphertext, shared_secret = self._kem(entry['variant']).encaps(entry['public_key'])
+		self._remember(key_id, ciphertext, shared_secret)
+		return key_id, ciphertext, shared_secret
+
+	def encapsulate_many(self, count: int, variant: Union[str, int] = DEFAULT_VARIANT) -> List[Tuple[str, bytes, bytes]]:
+		"""Como encapsulate(), `count` veces en un solo lote (KyberKEM.encaps_many)."""
+		if count <= 0:
+			return []
+		key_id = self.current_key_id(variant)
+		entry = self._keys[key_id]
+		batch = self._kem(entry['variant']).encaps_many(entry['public_key'], count=count)
+		out = []
+		for ciphertext, shared_secret in batch.pairs():
+			self._remember(key_id, ciphertext, shared_secret)
+			out.append((key_id, ciphertext, shared_secret))
+		return out
+
+	def decapsulate(self, key_id: str, ciphertext: bytes) -> bytes:
+		"""Recupera el secreto compartido de un ciphertext dirigido a `key_id`."""
+		ciphertext = bytes(ciphertext)
+		cache_key = (key_id, ciphertext)
+		with self._lock:
+			cached = self._shared_cache.get(cache_key)
+			if cached is not None:
+				self._shared_cache.move_to_end(cache_key)
+				return cached
+		entry = self._entry(key_id)
+		shared_secret = self._kem(entry['variant']).decaps(entry['secret_key'], ciphertext)
+		self._remember(key_id, ciphertext, shared_secret)
+		return shared_secret
+
+	def decapsulate_many(self, key_id: str, ciphertexts: List[bytes]) -> List[bytes]:
+		"""Decapsula en lote los ciphertexts aún no cacheados de una misma clave."""
+		ciphertexts = [bytes(c) for c in ciphertexts]
+		with self._lock:
+			missing = list(dict.fromkeys(c for c in ciphertexts if (key_id, c) not in self._shared_cache))
+		fresh: Dict[bytes, bytes] = {}
+		if missing:
+			entry = self._entry(key_id)
+			batch = self._kem(entry['variant']).decaps_many(entry['secret_key'], missing)
+			fresh = dict(batch.pairs())
+			for ciphertext, shared_secret in fresh.items():
+				self._remember(key_id, ciphertext, shared_secret)
+		return [fresh.get(c) or self.decapsulate(key_id, c) for c in ciphertexts]
+
+	def _remember(self, key_id: str, ciphertext: bytes, shared_secret: bytes) -> None:
+		if not self.cache_size:
+			return
+		with self._lock:
+			self._shared_cache[(key_id, ciphertext)] = shared_secret
+			self._shared_cache.move_to_end((key_id, ciphertext))
+			while len(self._shared_cache) > self.cache_size:
+				self._shared_cache.popitem(last=False)
+
+	# ===== Persistencia =====
+
+	@contextmanager
+	def _file_lock(self) -> Iterator[None]:
+		"""Lock exclusivo entre procesos sobre <keyring>.lock (sin efecto en memoria)."""
+		if self.path is None or fcntl is None:
+			yield
+			return
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		fd = os.open(str(self.path) + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+		try:
+			fcntl.flock(fd, fcntl.LOCK_EX)
+			yield
+		finally:
+			os.close(fd)
+
+	def _refresh(self) -> None:
+		"""Incorpora las claves y rotaciones que otros procesos hayan escrito."""
+		if self.path is not None and self.path.exists():
+			self._load()
+
+	def _load(self) -> None:
+		data = json.loads(self.path.read_text())
+		if data.get('version') != KEYRING_FORMAT_VERSION:
+			raise ValueError(f"Formato de keyring Kyber no soportado: {data.get('version')!r}")
+		for key_id, entry in data.get('keys', {}).items():
+			if key_id in self._keys:
+				continue
+			self._keys[key_id] = {
+				'variant': entry['variant'],
+				'backend': entry.get('backend'),
+				'public_key': bytes.fromhex(entry['public_key']),
+				'secret_key': bytes.fromhex(entry['secret_key']),
+				'created': entry.get('created', 0.0),
+			}
+		self._current.update((v, k) for v, k in data.get('current', {}).items() if k in self._keys)
+
+	def _save(self) -> None:
+		if self.path is None:
+			return
+		data = {
+			'version': KEYRING_FORMAT_VERSION,
+			'current': self._current,
+			'keys': {
+				key_id: {
+					'variant': entry['variant'],
+					'backend': entry['backend'],
+					'public_key': entry['public_key'].hex(),
+					'secret_key': entry['secret_key'].hex(),
+					'created': entry['created'],
+				}
+				for key_id, entry in self._keys.items()
+			},
+		}
+		# Escritura atómica con permisos 0600: el fichero contiene claves secretas
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=".kyber_keyring.")
+		try:
+			os.chmod(tmp, 0o600)
+			with os.fdopen(fd, "w") as fh:
+				json.dump(data, fh, indent=2)
+			os.replace(tmp, self.path)
+		except BaseException:
+			try:
+				os.unlink(tmp)
+			except OSError:
+				pass
+			raise
+
+
+_default_keyring: Optional[KyberKeyring] = None
+_default_lock = threading.Lock()
+
+
+def get_default_keyring() -> KyberKeyring:
+	"""Keyring compartido por el proceso.
+
+	Solo se persiste si $FLORA_KYBER_KEYRING indica un fichero; si no, vive en
+	memoria y nada se escribe en disco, así que los bundles Kyber cifrados con él
+	dejan de poder descifrarse al terminar el proceso. El fichero guarda las
+	claves secretas sin cifrar (0600): hay que hacer copia de seguridad de él,
+	porque perderlo deja ilegibles todos los bundles Kyber que dependen de él.
+	"""
+	global _default_keyring
+	if _default_keyring is None:
+		with _default_lock:
+			if _default_keyring is None:
+				_default_keyring = KyberKeyring(default_keyring_path())
+	return _default_keyring
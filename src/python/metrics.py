@@ -0,0 +1,420 @@
+# 🌸 FLORA - Métricas operativas (formato de texto de Prometheus)
+# Contadores, gauges e histogramas con etiquetas, sin dependencias externas.
+#
+# Escritura sin locks: contadores e histogramas acumulan en un fragmento por
+# hilo y solo la lectura suma los fragmentos. Con varios workers de uvicorn,
+# definir FLORA_METRICS_DIR: cada proceso vuelca su instantánea a
+# <dir>/flora-metrics-<pid>.json (una vez por segundo, al exportar y al salir) y
+# /metrics agrega los ficheros de todos los procesos. Los gauges de procesos
+# que ya no existen se descartan; los contadores se conservan (vaciar el
+# directorio al desplegar, como con el modo multiproceso de prometheus_client).
+
+import atexit
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+METRICS_DIR_ENV = "FLORA_METRICS_DIR"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latencias de petición HTTP (segundos)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Etapas criptográficas (de microsegundos a PBKDF2)
+STAGE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+				 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class _ShardedChild:
+	"""Valores de una combinación de etiquetas, con un fragmento por hilo."""
+
+	__slots__ = ("_size", "_shards")
+
+	def __init__(self, size: int) -> None:
+		self._size = size
+		self._shards: Dict[int, List[float]] = {}
+
+	def _shard(self) -> List[float]:
+		# Cada hilo solo escribe en su propio fragmento: no hace falta lock
+		ident = threading.get_ident()
+		shard = self._shards.get(ident)
+		if shard is None:
+			shard = self._shards.setdefault(ident, [0.0] * self._size)
+		return shard
+
+	def _totals(self) -> List[float]:
+		totals = [0.0] * self._size
+		for shard in list(self._shards.values()):
+			for i, value in enumerate(shard):
+				totals[i] += value
+		return totals
+
+
+class CounterChild(_ShardedChild):
+	def __init__(self) -> None:
+		super().__init__(1)
+
+	def inc(self, amount: float = 1.0) -> None:
+		if amount < 0:
+			raise ValueError("Un contador solo puede incrementarse")
+		self._shard()[0] += amount
+
+	def value(self) -> float:
+		return self._totals()[0]
+
+
+class HistogramChild(_ShardedChild):
+	"""Fragmento = conteos por bucket (no acumulados) + [+Inf, count, sum]."""
+
+	def __init__(self, buckets: Sequence[float]) -> None:
+		self._buckets = buckets
+		super().__init__(len(buckets) + 3)
+
+	def observe(self, value: float) -> None:
+		shard = self._shard()
+		shard[bisect_left(self._buckets, value)] += 1
+		shard[-2] += 1
+		shard[-1] += value
+
+	def value(self) -> List[float]:
+		return self._totals()
+
+
+class GaugeChild:
+	"""Gauge con lock propio (se actualiza poco y admite set())."""
+
+	__slots__ = ("_value", "_lock")
+
+	def __init__(self) -> None:
+		self._value = 0.0
+		self._lock = threading.Lock()
+
+	def inc(self, amount: float = 1.0) -> None:
+		with self._lock:
+			self._value += amount
+
+	def dec(self, amount: float = 1.0) -> None:
+		with self._lock:
+			self._value -= amount
+
+	def set(self, value: float) -> None:
+		with self._lock:
+			self._value = float(value)
+
+	def value(self) -> float:
+		return self._value
+
+
+class Metric:
+	"""Familia de métricas con etiquetas: metric.labels(...).inc()/observe()."""
+
+	def __init__(self, kind: str, name: str, documentation: str, labelnames: Sequence[str] = (),
+				 buckets: Optional[Sequence[float]] = None) -> None:
+		if kind not in ("counter", "gauge", "histogram"):
+			raise ValueError(kind)
+		self.kind = kind
+		self.name = name
+		self.documentation = documentation
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS)) if kind == "histogram" else ()
+		self._children: Dict[Tuple[str, ...], Any] = {}
+		self._lock = threading.Lock()
+
+	def _new_child(self):
+		if self.kind == "counter":
+			return CounterChild()
+		if self.kind == "gauge":
+			return GaugeChild()
+		return HistogramChild(self.buckets)
+
+	def labels(self, *values: Any, **kwargs: Any):
+		if kwargs:
+			values = tuple(kwargs[name] for name in self.labelnames)
+		if len(values) != len(self.labelnames):
+			raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+		key = tuple(str(v) for v in values)
+		child = self._children.get(key)
+		if child is None:
+			with self._lock:
+				child = self._children.get(key)
+				if child is None:
+					child = self._children[key] = self._new_child()
+		return child
+
+	def samples(self) -> List[Tuple[Tuple[str, ...], Any]]:
+		return [(key, child.value()) for key, child in list(self._children.items())]
+
+
+class MetricsRegistry:
+	"""Registro de métricas de un proceso, con agregación multiproceso opcional.
+
+	Uso:
+		registry = MetricsRegistry()
+		requests = registry.counter("flora_requests_total", "Peticiones", ["route"])
+		requests.labels("/encrypt").inc()
+		text = registry.render()
+	"""
+
+	def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0) -> None:
+		self.directory = directory
+		self.flush_interval = flush_interval
+		self._metrics: Dict[str, Metric] = {}
+		self._lock = threading.Lock()
+		self._flusher_pid: Optional[int] = None
+
+	# ===== Definición =====
+
+	def _register(self, kind: str, name: str, documentation: str, labelnames: Sequence[str],
+				  buckets: Optional[Sequence[float]] = None) -> Metric:
+		with self._lock:
+			metric = self._metrics.get(name)
+			if metric is None:
+				metric = self._metrics[name] = Metric(kind, name, documentation, labelnames, buckets)
+			elif metric.kind != kind or metric.labelnames != tuple(labelnames):
+				raise ValueError(f"Métrica {name} ya registrada con otro tipo o etiquetas")
+		self._ensure_flusher()
+		return metric
+
+	def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Metric:
+		return self._register("counter", name, documentation, labelnames)
+
+	def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Metric:
+		return self._register("gauge", name, documentation, labelnames)
+
+	def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+				  buckets: Optional[Sequence[float]] = None) -> Metric:
+		return self._register("histogram", name, documentation, labelnames, buckets)
+
+	# ===== Instantáneas y multiproceso =====
+
+	def snapshot(self) -> Dict[str, Any]:
+		return {
+			'pid': os.getpid(),
+			'metrics': {
+				name: {
+					'kind': metric.kind,
+					'help': metric.documentation,
+					'labelnames': list(metric.labelnames),
+					'buckets': list(metric.buckets),
+					'samples': [[list(key), value] for key, value in metric.samples()],
+				}
+				for name, metric in list(self._metrics.items())
+			},
+		}
+
+	def _snapshot_path(self, pid: int) -> str:
+		return os.path.join(self.directory, f"flora-metrics-{pid}.json")
+
+	def flush(self) -> None:
+		"""Vuelca la instantánea del proceso al directorio compartido (escritura atómica)."""
+		if not self.directory:
+			return
+		os.makedirs(self.directory, exist_ok=True)
+		fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".flora-metrics.")
+		try:
+			with os.fdopen(fd, "w") as fh:
+				json.dump(self.snapshot(), fh)
+			os.replace(tmp, self._snapshot_path(os.getpid()))
+		except BaseException:
+			try:
+				os.unlink(tmp)
+			except OSError:
+				pass
+			raise
+
+	def _ensure_flusher(self) -> None:
+		# Un hilo por proceso (se vuelve a crear tras un fork)
+		if not self.directory or self._flusher_pid == os.getpid():
+			return
+		self._flusher_pid = os.getpid()
+
+		def loop() -> None:
+			while True:
+				time.sleep(self.flush_interval)
+				try:
+					self.flush()
+				except OSError:
+					pass
+
+		threading.Thread(target=loop, name="flora-metrics-flush", daemon=True).start()
+		atexit.register(self.flush)
+
+	def collect(self) -> Dict[str, Dict[str, Any]]:
+		"""Métricas agregadas: las del proceso o, en multiproceso, las de todos los workers."""
+		if not self.directory:
+			return self.snapshot()['metrics']
+		self.flush()
+		merged: Dict[str, Dict[str, Any]] = {}
+		for path in sorted(glob.glob(os.path.join(self.directory, "flora-metrics-*.json"))):
+			try:
+				with open(path) as fh:
+					data = json.load(fh)
+			except (OSError, ValueError):
+				continue
+			alive = _pid_alive(data.get('pid', 0))
+			for name, metric in data.get('metrics', {}).items():
+				if metric['kind'] == "gauge" and not alive:
+					continue
+				target = merged.setdefault(name, dict(metric, samples={}))
+				for key, value in metric['samples']:
+					key = tuple(key)
+					previous = target['samples'].get(key)
+					if previous is None:
+						target['samples'][key] = value
+					elif isinstance(value, list):
+						target['samples'][key] = [a + b for a, b in zip(previous, value)]
+					else:
+						target['samples'][key] = previous + value
+		for metric in merged.values():
+			metric['samples'] = list(metric['samples'].items())
+		return merged
+
+	def render(self) -> str:
+		"""Exposición en formato de texto de Prometheus (0.0.4)."""
+		lines: List[str] = []
+		for name, metric in sorted(self.collect().items()):
+			lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+			lines.append(f"# TYPE {name} {metric['kind']}")
+			labelnames = metric['labelnames']
+			for key, value in sorted(metric['samples'], key=lambda s: tuple(s[0])):
+				pairs = list(zip(labelnames, key))
+				if metric['kind'] != "histogram":
+					lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+					continue
+				cumulative = 0.0
+				for bound, count in zip(metric['buckets'], value):
+					cumulative += count
+					lines.append(f"{name}_bucket{_labels(pairs + [('le', _number(bound))])} {_number(cumulative)}")
+				lines.append(f"{name}_bucket{_labels(pairs + [('le', '+Inf')])} {_number(value[-2])}")
+				lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+				lines.append(f"{name}_count{_labels(pairs)} {_number(value[-2])}")
+		return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+	if pid == os.getpid():
+		return True
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except (PermissionError, OSError):
+		return True
+	return True
+
+
+def _escape_help(text: str) -> str:
+	return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+	items = [f'{k}="{_escape_label(str(v))}"' for k, v in pairs]
+	return "{" + ",".join(items) + "}" if items else ""
+
+
+def _number(value: float) -> str:
+	if value == math.inf:
+		return "+Inf"
+	if float(value).is_integer():
+		return str(int(value))
+	return repr(float(value))
+
+
+# ===== Registro y métricas de FLORA =====
+
+REGISTRY = MetricsRegistry(os.getenv(METRICS_DIR_ENV) or None)
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+	"flora_http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta y estado",
+	["app", "route", "method", "status"])
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+	"flora_http_requests_in_flight", "Peticiones HTTP en curso", ["app"])
+RATE_LIMIT_REJECTIONS = REGISTRY.counter(
+	"flora_rate_limit_rejections_total", "Peticiones rechazadas por el rate limiter", ["app", "route", "reason"])
+CRYPTO_STAGE_DURATION = REGISTRY.histogram(
+	"flora_crypto_stage_duration_seconds", "Duración de las etapas de FloraCryptoSystem", ["stage"],
+	buckets=STAGE_BUCKETS)
+KDF_CACHE_REQUESTS = REGISTRY.counter(
+	"flora_kdf_cache_requests_total", "Derivaciones de clave evitadas (hit) o ejecutadas (miss) por caché",
+	["cache", "result"])
+
+# Etapas de FloraCryptoSystem que equivalen a un acierto/fallo de caché de KDF
+_STAGE_CACHE_RESULTS = {
+	'master_key': ("master_key", "miss"),
+	'session_cached': ("session_key", "hit"),
+	'session_create': ("session_key", "miss"),
+	'session_recover': ("session_key", "miss"),
+}
+
+
+def observe_crypto_stage(stage: str, seconds: float) -> None:
+	"""Observador de etapas para FloraCryptoSystem(stage_observer=...)."""
+	CRYPTO_STAGE_DURATION.labels(stage).observe(seconds)
+	cache = _STAGE_CACHE_RESULTS.get(stage)
+	if cache is not None:
+		KDF_CACHE_REQUESTS.labels(*cache).inc()
+
+
+def record_kdf_cache(cache: str, hit: bool) -> None:
+	KDF_CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class MetricsMiddleware:
+	"""Middleware ASGI puro: latencia por plantilla de ruta y estado, y peticiones en curso.
+
+	Se etiqueta con la plantilla de la ruta (/keys/{key_id}), nunca con la ruta
+	real, para acotar la cardinalidad; lo que no corresponde a ninguna ruta
+	cuenta como "unmatched".
+	"""
+
+	def __init__(self, app: Callable, app_name: str = "flora") -> None:
+		self.app = app
+		self.app_name = app_name
+		self._in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(app_name)
+
+	async def __call__(self, scope, receive, send) -> None:
+		if scope["type"] != "http":
+			await self.app(scope, receive, send)
+			return
+		status = [500]
+
+		async def send_wrapper(message) -> None:
+			if message["type"] == "http.response.start":
+				status[0] = message["status"]
+			await send(message)
+
+		started = time.perf_counter()
+		self._in_flight.inc()
+		try:
+			await self.app(scope, receive, send_wrapper)
+		finally:
+			self._in_flight.dec()
+			route = getattr(scope.get("route"), "path", None) or _match_route(scope)
+			HTTP_REQUEST_DURATION.labels(self.app_name, route, scope["method"], status[0]).observe(
+				time.perf_counter() - started)
+
+
+def _match_route(scope) -> str:
+	"""Plantilla de ruta de una petición respondida antes del router (p. ej. un 429)."""
+	router = getattr(scope.get("app"), "router", None)
+	for route in getattr(router, "routes", ()):
+		try:
+			match, _ = route.matches(scope)
+		except Exception:
+			continue
+		if match.name == "FULL":
+			return getattr(route, "path", "unmatched")
+	return "unmatched"
+
+
+def metrics_response_body() -> bytes:
+	return REGISTRY.render().encode("utf-8")
@@ -0,0 +1,361 @@
+# 🌸 FLORA - ML-KEM (Kyber) en NumPy
+# Backend Kyber integrado (FIPS 203) sin dependencias nativas: NTT vectorizada,
+# aritmética de polinomios y muestreo por lotes con NumPy.
+
+import hashlib
+import hmac
+import os
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+Q = 3329
+N = 256
+
+# Tamaño máximo de lote vectorizado (acota la memoria de las matrices apiladas)
+BATCH_CHUNK = 256
+
+# (k, eta1, eta2, du, dv) por nivel de seguridad (FIPS 203, tabla 2)
+PARAMETER_SETS = {
+	512: (2, 3, 2, 10, 4),
+	768: (3, 2, 2, 10, 4),
+	1024: (4, 2, 2, 11, 5),
+}
+
+
+def _bitrev7(i: int) -> int:
+	return int(f"{i:07b}"[::-1], 2)
+
+
+_ZETAS = [pow(17, _bitrev7(i), Q) for i in range(128)]
+_GAMMAS = np.array([pow(17, 2 * _bitrev7(i) + 1, Q) for i in range(128)], dtype=np.int64)
+_N_INV = 3303  # 128^-1 mod q
+
+# Zetas por capa, con forma (grupos, 1) para difundir sobre cada mariposa
+_NTT_LAYERS = []
+_INTT_LAYERS = []
+_k = 1
+for _len in (128, 64, 32, 16, 8, 4, 2):
+	_groups = 128 // _len
+	_NTT_LAYERS.append((_len, np.array(_ZETAS[_k:_k + _groups], dtype=np.int64).reshape(_groups, 1)))
+	_k += _groups
+_k = 127
+for _len in (2, 4, 8, 16, 32, 64, 128):
+	_groups = 128 // _len
+	_INTT_LAYERS.append((_len, np.array(_ZETAS[_k - _groups + 1:_k + 1][::-1], dtype=np.int64).reshape(_groups, 1)))
+	_k -= _groups
+del _k, _len, _groups
+
+
+def ntt(f: np.ndarray) -> np.ndarray:
+	"""NTT (algoritmo 9) sobre el último eje; admite cualquier número de lotes."""
+	f = np.array(f, dtype=np.int64)
+	shape = f.shape
+	for length, zetas in _NTT_LAYERS:
+		v = f.reshape(shape[:-1] + (128 // length, 2, length))
+		t = v[..., 1, :] * zetas
+		t %= Q
+		v[..., 1, :] = v[..., 0, :] - t
+		v[..., 0, :] += t
+	f %= Q
+	return f
+
+
+def intt(f: np.ndarray) -> np.ndarray:
+	"""NTT inversa (algoritmo 10) sobre el último eje."""
+	f = np.array(f, dtype=np.int64)
+	shape = f.shape
+	for length, zetas in _INTT_LAYERS:
+		v = f.reshape(shape[:-1] + (128 // length, 2, length))
+		t = v[..., 0, :].copy()
+		v[..., 0, :] += v[..., 1, :]
+		v[..., 1, :] -= t
+		v[..., 1, :] *= zetas
+		f %= Q
+	f *= _N_INV
+	f %= Q
+	return f
+
+
+def multiply_ntts(f: np.ndarray, g: np.ndarray) -> np.ndarray:
+	"""Producto en el dominio NTT (algoritmos 11 y 12), con difusión de lotes."""
+	a0, a1 = f[..., 0::2], f[..., 1::2]
+	b0, b1 = g[..., 0::2], g[..., 1::2]
+	c0 = a0 * b0 + (a1 * b1 % Q) * _GAMMAS
+	c1 = a0 * b1 + a1 * b0
+	out = np.empty(np.broadcast_shapes(f.shape, g.shape), dtype=np.int64)
+	out[..., 0::2] = c0 % Q
+	out[..., 1::2] = c1 % Q
+	return out
+
+
+def byte_encode(a: np.ndarray, d: int) -> np.ndarray:
+	"""ByteEncode_d sobre el último eje: (..., 256) -> (..., 32*d) uint8."""
+	bits = ((a[..., None] >> np.arange(d)) & 1).astype(np.uint8)
+	return np.packbits(bits.reshape(a.shape[:-1] + (N * d,)), axis=-1, bitorder="little")
+
+
+def byte_decode(b: np.ndarray, d: int) -> np.ndarray:
+	"""ByteDecode_d sobre el último eje: (..., 32*d) uint8 -> (..., 256)."""
+	bits = np.unpackbits(b, axis=-1, bitorder="little").reshape(b.shape[:-1] + (N, d))
+	values = (bits.astype(np.int64) << np.arange(d)).sum(axis=-1)
+	if d == 12:
+		values %= Q
+	return values
+
+
+def compress(x: np.ndarray, d: int) -> np.ndarray:
+	return (((x << d) + (Q // 2)) // Q) & ((1 << d) - 1)
+
+
+def decompress(y: np.ndarray, d: int) -> np.ndarray:
+	return (Q * y + (1 << (d - 1))) >> d
+
+
+def sample_ntt(seed: bytes) -> np.ndarray:
+	"""SampleNTT (algoritmo 7): muestreo por rechazo vectorizado sobre SHAKE128."""
+	nbytes = 504  # 3 bloques de SHAKE128; casi siempre suficiente
+	while True:
+		b = np.frombuffer(hashlib.shake_128(seed).digest(nbytes), dtype=np.uint8).astype(np.int64)
+		b = b.reshape(-1, 3)
+		d1 = b[:, 0] | ((b[:, 1] & 15) << 8)
+		d2 = (b[:, 1] >> 4) | (b[:, 2] << 4)
+		candidates = np.stack((d1, d2), axis=1).ravel()
+		candidates = candidates[candidates < Q]
+		if candidates.size >= N:
+			return candidates[:N]
+		nbytes += 168
+
+
+def sample_cbd(prf_output: np.ndarray, eta: int) -> np.ndarray:
+	"""SamplePolyCBD_eta (algoritmo 8) sobre el último eje: (..., 64*eta) -> (..., 256)."""
+	bits = np.unpackbits(prf_output, axis=-1, bitorder="little")
+	bits = bits.reshape(prf_output.shape[:-1] + (N, 2 * eta)).astype(np.int64)
+	return (bits[..., :eta].sum(axis=-1) - bits[..., eta:].sum(axis=-1)) % Q
+
+
+def _prf_batch(seeds: Sequence[bytes], first: int, count: int, eta: int) -> np.ndarray:
+	"""PRF_eta(s, b) para cada semilla y b en [first, first+count): (len(seeds), count, 64*eta)."""
+	out = b"".join(
+		hashlib.shake_256(s + bytes([b])).digest(64 * eta)
+		for s in seeds for b in range(first, first + count)
+	)
+	return np.frombuffer(out, dtype=np.uint8).reshape(len(seeds), count, 64 * eta)
+
+
+def _g(data: bytes) -> Tuple[bytes, bytes]:
+	digest = hashlib.sha3_512(data).digest()
+	return digest[:32], digest[32:]
+
+
+def _h(data: bytes) -> bytes:
+	return hashlib.sha3_256(data).digest()
+
+
+def _j(data: bytes) -> bytes:
+	return hashlib.shake_256(data).digest(32)
+
+
+@lru_cache(maxsize=128)
+def _expand_matrix(rho: bytes, k: int) -> np.ndarray:
+	"""Matriz Â (k, k, 256) generada a partir de rho; cacheada por clave pública."""
+	a_hat = np.empty((k, k, N), dtype=np.int64)
+	for i in range(k):
+		for j in range(k):
+			a_hat[i, j] = sample_ntt(rho + bytes([j, i]))
+	a_hat.flags.writeable = False
+	return a_hat
+
+
+class MLKEM:
+	"""ML-KEM (FIPS 203) para un nivel de seguridad dado.
+
+	Expone la API de backend que espera KyberKEM (generate_keypair / encrypt /
+	decrypt) y los algoritmos internos deterministas usados por los vectores KAT.
+	"""
+
+	def __init__(self, level: int) -> None:
+		if level not in PARAMETER_SETS:
+			raise ValueError(f"Nivel ML-KEM no soportado: {level}")
+		self.level = level
+		self.k, self.eta1, self.eta2, self.du, self.dv = PARAMETER_SETS[level]
+		self.ek_size = 384 * self.k + 32
+		self.dk_size = 768 * self.k + 96
+		self.ciphertext_size = 32 * (self.du * self.k + self.dv)
+		self.shared_secret_size = 32
+		self._parse_ek = lru_cache(maxsize=64)(self._parse_ek_uncached)
+		self._parse_dk = lru_cache(maxsize=64)(self._parse_dk_uncached)
+
+	def __repr__(self) -> str:
+		return f"MLKEM({self.level})"
+
+	# ===== API de backend (compatible con KyberKEM) =====
+
+	def generate_keypair(self) -> Tuple[bytes, bytes]:
+		return self.keygen_internal(os.urandom(32), os.urandom(32))
+
+	def encrypt(self, public_key: bytes) -> Tuple[bytes, bytes]:
+		shared_secret, ciphertext = self.encaps_internal(public_key, os.urandom(32))
+		return ciphertext, shared_secret
+
+	def decrypt(self, secret_key: bytes, ciphertext: bytes) -> bytes:
+		return self.decaps_internal(secret_key, ciphertext)
+
+	def encrypt_many(self, public_keys: Sequence[bytes]) -> Tuple[List[bytes], List[bytes]]:
+		"""Encapsula contra varias claves públicas en lotes vectorizados -> (cts, sss)."""
+		public_keys = [bytes(pk) for pk in public_keys]
+		ciphertexts: List[bytes] = []
+		shared: List[bytes] = []
+		for start in range(0, len(public_keys), BATCH_CHUNK):
+			chunk = public_keys[start:start + BATCH_CHUNK]
+			messages = [os.urandom(32) for _ in chunk]
+			if all(pk == chunk[0] for pk in chunk):
+				keys, cts = self._encaps_batch(chunk[0], messages)
+			else:
+				keys, cts = self._encaps_multi(chunk, messages)
+			ciphertexts.extend(cts)
+			shared.extend(keys)
+		return ciphertexts, shared
+
+	def decrypt_many(self, secret_key: bytes, ciphertexts: Sequence[bytes]) -> List[bytes]:
+		"""Decapsula varios ciphertexts dirigidos a la misma clave secreta."""
+		ciphertexts = [bytes(c) for c in ciphertexts]
+		shared: List[bytes] = []
+		for start in range(0, len(ciphertexts), BATCH_CHUNK):
+			shared.extend(self._decaps_batch(secret_key, ciphertexts[start:start + BATCH_CHUNK]))
+		return shared
+
+	# ===== Algoritmos internos (FIPS 203, sección 6) =====
+
+	def keygen_internal(self, d: bytes, z: bytes) -> Tuple[bytes, bytes]:
+		"""ML-KEM.KeyGen_internal(d, z) -> (ek, dk)."""
+		if len(d) != 32 or len(z) != 32:
+			raise ValueError("d y z deben tener 32 bytes")
+		k = self.k
+		rho, sigma = _g(d + bytes([k]))
+		a_hat = _expand_matrix(rho, k)
+		noise = sample_cbd(_prf_batch([sigma], 0, 2 * k, self.eta1)[0], self.eta1)
+		s_hat = ntt(noise[:k])
+		e_hat = ntt(noise[k:])
+		t_hat = (multiply_ntts(a_hat, s_hat[None, :, :]).sum(axis=1) + e_hat) % Q
+		ek = byte_encode(t_hat, 12).tobytes() + rho
+		dk_pke = byte_encode(s_hat, 12).tobytes()
+		return ek, dk_pke + ek + _h(ek) + z
+
+	def encaps_internal(self, ek: bytes, m: bytes) -> Tuple[bytes, bytes]:
+		"""ML-KEM.Encaps_internal(ek, m) -> (K, c)."""
+		shared, cts = self._encaps_batch(ek, [m])
+		return shared[0], cts[0]
+
+	def decaps_internal(self, dk: bytes, c: bytes) -> bytes:
+		"""ML-KEM.Decaps_internal(dk, c) -> K (con rechazo implícito)."""
+		return self._decaps_batch(dk, [c])[0]
+
+	# ===== K-PKE vectorizado por lotes =====
+
+	def _parse_ek_uncached(self, ek: bytes) -> Tuple[np.ndarray, np.ndarray, bytes]:
+		if len(ek) != self.ek_size:
+			raise ValueError(f"Clave pública ML-KEM-{self.level} inválida: {len(ek)} bytes")
+		raw = np.frombuffer(ek, dtype=np.uint8, count=384 * self.k).reshape(self.k, 384)
+		t_hat = byte_decode(raw, 12)
+		# Comprobación de módulo (FIPS 203, 7.2): coeficientes < q
+		if byte_encode(t_hat, 12).tobytes() != ek[:384 * self.k]:
+			raise ValueError("Clave pública ML-KEM inválida: coeficientes fuera de rango")
+		t_hat.flags.writeable = False
+		return t_hat, _expand_matrix(ek[384 * self.k:], self.k), _h(ek)
+
+	def _parse_dk_uncached(self, dk: bytes) -> Tuple[np.ndarray, bytes, bytes, bytes]:
+		if len(dk) != self.dk_size:
+			raise ValueError(f"Clave secreta ML-KEM-{self.level} inválida: {len(dk)} bytes")
+		k = self.k
+		ek = dk[384 * k:768 * k + 32]
+		h = dk[768 * k + 32:768 * k + 64]
+		z = dk[768 * k + 64:]
+		# Comprobación de hash (FIPS 203, 7.3)
+		if _h(ek) != h:
+			raise ValueError("Clave secreta ML-KEM inválida: hash de ek incorrecto")
+		s_hat = byte_decode(np.frombuffer(dk, dtype=np.uint8, count=384 * k).reshape(k, 384), 12)
+		s_hat.flags.writeable = False
+		return s_hat, ek, h, z
+
+	def _pke_encrypt(self, t_hat: np.ndarray, a_hat: np.ndarray,
+					 messages: np.ndarray, seeds: Sequence[bytes]) -> np.ndarray:
+		"""K-PKE.Encrypt para un lote: messages (B, 32) uint8 -> (B, ciphertext_size) uint8.
+
+		t_hat/a_hat pueden ser de una sola clave ((k,256) / (k,k,256)) o por
+		elemento del lote ((B,k,256) / (B,k,k,256)).
+		"""
+		k = self.k
+		batch = len(seeds)
+		y_hat = ntt(sample_cbd(_prf_batch(seeds, 0, k, self.eta1), self.eta1))
+		errors = sample_cbd(_prf_batch(seeds, k, k + 1, self.eta2), self.eta2)
+		e1, e2 = errors[:, :k], errors[:, k]
+
+		a_t = np.swapaxes(a_hat, -3, -2)
+		u = intt(multiply_ntts(a_t, y_hat[:, None, :, :]).sum(axis=-2)) + e1
+		v = intt(multiply_ntts(t_hat, y_hat).sum(axis=-2)) + e2
+		mu = decompress(byte_decode(messages, 1), 1)
+		v = (v + mu) % Q
+		u %= Q
+
+		c1 = byte_encode(compress(u, self.du), self.du).reshape(batch, -1)
+		c2 = byte_encode(compress(v, self.dv), self.dv)
+		return np.concatenate((c1, c2), axis=-1)
+
+	def _pke_decrypt(self, s_hat: np.ndarray, ciphertexts: np.ndarray) -> np.ndarray:
+		"""K-PKE.Decrypt para un lote: (B, ciphertext_size) uint8 -> (B, 32) uint8."""
+		k = self.k
+		batch = ciphertexts.shape[0]
+		split = 32 * self.du * k
+		u = decompress(byte_decode(ciphertexts[:, :split].reshape(batch, k, 32 * self.du), self.du), self.du)
+		v = decompress(byte_decode(ciphertexts[:, split:], self.dv), self.dv)
+		w = (v - intt(multiply_ntts(s_hat, ntt(u)).sum(axis=-2))) % Q
+		return byte_encode(compress(w, 1), 1)
+
+	def _encaps_batch(self, ek: bytes, messages: Sequence[bytes]) -> Tuple[List[bytes], List[bytes]]:
+		"""Encapsula varios mensajes m contra la misma clave pública."""
+		t_hat, a_hat, h_ek = self._parse_ek(bytes(ek))
+		if any(len(m) != 32 for m in messages):
+			raise ValueError("m debe tener 32 bytes")
+		derived = [_g(m + h_ek) for m in messages]
+		m_arr = np.frombuffer(b"".join(messages), dtype=np.uint8).reshape(len(messages), 32)
+		cts = self._pke_encrypt(t_hat, a_hat, m_arr, [r for _, r in derived])
+		return [key for key, _ in derived], [row.tobytes() for row in cts]
+
+	def _encaps_multi(self, eks: Sequence[bytes], messages: Sequence[bytes]) -> Tuple[List[bytes], List[bytes]]:
+		"""Encapsula un mensaje por clave pública, apilando las claves en el lote."""
+		parsed = [self._parse_ek(ek) for ek in eks]
+		if any(len(m) != 32 for m in messages):
+			raise ValueError("m debe tener 32 bytes")
+		derived = [_g(m + h_ek) for m, (_, _, h_ek) in zip(messages, parsed)]
+		t_hat = np.stack([p[0] for p in parsed])
+		a_hat = np.stack([p[1] for p in parsed])
+		m_arr = np.frombuffer(b"".join(messages), dtype=np.uint8).reshape(len(messages), 32)
+		cts = self._pke_encrypt(t_hat, a_hat, m_arr, [r for _, r in derived])
+		return [key for key, _ in derived], [row.tobytes() for row in cts]
+
+	def _decaps_batch(self, dk: bytes, ciphertexts: Sequence[bytes]) -> List[bytes]:
+		"""Decapsula varios ciphertexts con la misma clave secreta."""
+		s_hat, ek, h, z = self._parse_dk(bytes(dk))
+		if any(len(c) != self.ciphertext_size for c in ciphertexts):
+			raise ValueError(f"Ciphertext ML-KEM-{self.level} inválido")
+		c_arr = np.frombuffer(b"".join(ciphertexts), dtype=np.uint8).reshape(len(ciphertexts), -1)
+		m_prime = self._pke_decrypt(s_hat, c_arr)
+		derived = [_g(row.tobytes() + h) for row in m_prime]
+		t_hat, a_hat, _ = self._parse_ek(ek)
+		c_prime = self._pke_encrypt(t_hat, a_hat, m_prime, [r for _, r in derived])
+		out = []
+		for (key, _), c, c_re in zip(derived, ciphertexts, c_prime):
+			if hmac.compare_digest(c, c_re.tobytes()):
+				out.append(key)
+			else:
+				out.append(_j(z + c))
+		return out
+
+
+ML_KEM_512 = MLKEM(512)
+ML_KEM_768 = MLKEM(768)
+ML_KEM_1024 = MLKEM(1024)
+
+BACKENDS = {512: ML_KEM_512, 768: ML_KEM_768, 1024: ML_KEM_1024}
@@ -0,0 +1,339 @@
+# 🌸 FLORA - Rate limiting por ventana deslizante
+# Contador de ventana deslizante (ventana actual + anterior ponderada): O(1)
+# en memoria y en tiempo por petición, en lugar de una lista de timestamps por
+# cliente. Dos almacenes con la misma interfaz (RateLimitStore):
+#   - SlidingWindowRateLimiter: en el proceso, fragmentos con lock propio y
+#     expulsión periódica de clientes inactivos.
+#   - SharedMemoryRateLimitStore: tabla hash en un fichero mapeado en memoria,
+#     compartida por todos los workers del host (cuota global, no por worker).
+
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, List, NamedTuple, Optional
+
+try:
+	import fcntl
+except ImportError:  # Windows: solo almacén en proceso
+	fcntl = None  # type: ignore
+
+RATE_LIMIT_STORE_ENV = "FLORA_RATE_LIMIT_STORE"
+# Número de workers que uvicorn y gunicorn leen del entorno
+WORKERS_ENV = "WEB_CONCURRENCY"
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARDS = 64
+DEFAULT_SWEEP_INTERVAL = 30.0
+
+
+class RateLimitDecision(NamedTuple):
+	allowed: bool
+	count: float  # peticiones estimadas en la ventana (incluida esta si se admite)
+
+
+class _Shard:
+	__slots__ = ("lock", "entries", "next_sweep")
+
+	def __init__(self, next_sweep: float) -> None:
+		self.lock = threading.Lock()
+		# clave -> [índice de ventana, contador actual, contador anterior, ventana]
+		self.entries: Dict[Hashable, List[float]] = {}
+		self.next_sweep = next_sweep
+
+
+class RateLimitStore(ABC):
+	"""Interfaz de los almacenes de rate limiting.
+
+	hit() comprueba y consume cuota de forma atómica; release() devuelve una
+	petición admitida en la ventana actual.
+	"""
+
+	@abstractmethod
+	def hit(self, key: Hashable, limit: int, window: float, now: Optional[float] = None) -> RateLimitDecision:
+		...
+
+	@abstractmethod
+	def release(self, key: Hashable, window: float, now: Optional[float] = None) -> None:
+		...
+
+	@abstractmethod
+	def reset(self) -> None:
+		...
+
+	def close(self) -> None:
+		pass
+
+
+def _slide(counters: List[float], current: int, elapsed: float, limit: int) -> bool:
+	"""Desplaza [ventana, actual, anterior] a `current` y consume cuota si cabe."""
+	if counters[0] != current:
+		# La actual pasa a ser la anterior (o ambas caducan)
+		counters[2] = counters[1] if counters[0] == current - 1 else 0
+		counters[1] = 0
+		counters[0] = current
+	if counters[2] * (1.0 - elapsed) + counters[1] + 1 > limit:
+		return False
+	counters[1] += 1
+	return True
+
+
+class SlidingWindowRateLimiter(RateLimitStore):
+	"""Limitador O(1) por clave (p. ej. (ip, ruta)) con ventana deslizante.
+
+	La estimación es anterior * (1 - fracción transcurrida) + actual, la
+	aproximación habitual de la ventana deslizante con dos contadores. Las
+	peticiones rechazadas no consumen cuota.
+
+	Uso:
+		limiter = SlidingWindowRateLimiter()
+		decision = limiter.hit(("1.2.3.4", "/api/v1/encrypt"), limit=60, window=60)
+		if not decision.allowed: ...  # 429
+	"""
+
+	def __init__(self, shards: int = DEFAULT_SHARDS, sweep_interval: float = DEFAULT_SWEEP_INTERVAL) -> None:
+		self.sweep_interval = sweep_interval
+		now = time.monotonic()
+		self._shards = [_Shard(now + sweep_interval) for _ in range(max(1, shards))]
+
+	def _shard_for(self, key: Hashable) -> _Shard:
+		return self._shards[hash(key) % len(self._shards)]
+
+	def hit(self, key: Hashable, limit: int, window: float, now: Optional[float] = None) -> RateLimitDecision:
+		"""Registra una petición de `key` si cabe en `limit` por `window` segundos."""
+		now = time.monotonic() if now is None else now
+		shard = self._shard_for(key)
+		current = int(now // window)
+		elapsed = (now % window) / window
+		with shard.lock:
+			if now >= shard.next_sweep:
+				self._sweep(shard, now)
+			entry = shard.entries.get(key)
+			if entry is None:
+				entry = shard.entries[key] = [current, 0, 0, window]
+			allowed = _slide(entry, current, elapsed, limit)
+			return RateLimitDecision(allowed, entry[2] * (1.0 - elapsed) + entry[1])
+
+	def release(self, key: Hashable, window: float, now: Optional[float] = None) -> None:
+		"""Devuelve una petición admitida en la ventana actual (p. ej. si la rechazó otro límite)."""
+		now = time.monotonic() if now is None else now
+		shard = self._shard_for(key)
+		with shard.lock:
+			entry = shard.entries.get(key)
+			if entry is not None and entry[0] == int(now // window) and entry[1] > 0:
+				entry[1] -= 1
+
+	def _sweep(self, shard: _Shard, now: float) -> None:
+		"""Elimina los clientes sin peticiones en las dos últimas ventanas."""
+		stale = [key for key, (index, _, _, window) in shard.entries.items() if int(now // window) - index >= 2]
+		for key in stale:
+			del shard.entries[key]
+		shard.next_sweep = now + self.sweep_interval
+
+	def sweep(self, now: Optional[float] = None) -> None:
+		now = time.monotonic() if now is None else now
+		for shard in self._shards:
+			with shard.lock:
+				self._sweep(shard, now)
+
+	def reset(self) -> None:
+		for shard in self._shards:
+			with shard.lock:
+				shard.entries.clear()
+
+	def __len__(self) -> int:
+		return sum(len(shard.entries) for shard in self._shards)
+
+
+# ===== Almacén compartido entre procesos =====
+
+_MAGIC = b"FLRL"
+_HEADER = struct.Struct("<4sIII")  # magic, versión, slots, franjas
+_HEADER_SIZE = 64
+_SLOT = struct.Struct("<QqIId")  # hash de la clave, índice de ventana, actual, anterior, ventana (s)
+MAX_PROBE = 16
+HASH_CACHE_SIZE = 65536
+
+
+def _key_hash(key: Hashable) -> int:
+	text = "\x00".join(map(str, key)) if isinstance(key, tuple) else str(key)
+	value = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+	return value or 1  # 0 marca un slot vacío
+
+
+class SharedMemoryRateLimitStore(RateLimitStore):
+	"""Tabla de contadores en un fichero mapeado (mmap), compartida entre procesos.
+
+	La tabla tiene `slots` entradas de tamaño fijo repartidas en franjas; cada
+	franja se protege con un lock de registro fcntl (entre procesos) y un
+	threading.Lock (entre hilos del mismo proceso). Una clave se busca con
+	sondeo lineal acotado dentro de su franja; los slots sin actividad en dos
+	ventanas se reutilizan y, con la franja llena, se expulsa el cliente más
+	antiguo, de modo que la memoria es fija.
+
+	Todos los procesos deben usar el mismo reloj: time.monotonic() es común a
+	todo el host en Linux y macOS.
+	"""
+
+	def __init__(self, path: str, slots: int = 1 << 17, stripes: int = 256) -> None:
+		if fcntl is None:
+			raise RuntimeError("SharedMemoryRateLimitStore necesita fcntl (POSIX)")
+		if slots & (slots - 1) or stripes & (stripes - 1) or stripes > slots:
+			raise ValueError("slots y stripes deben ser potencias de dos (stripes <= slots)")
+		self.path = path
+		size = _HEADER_SIZE + slots * _SLOT.size
+		self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+		# Inicialización bajo lock exclusivo del fichero completo
+		fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, 0)
+		try:
+			if os.fstat(self._fd).st_size == 0:
+				os.ftruncate(self._fd, size)
+				os.pwrite(self._fd, _HEADER.pack(_MAGIC, 1, slots, stripes), 0)
+			magic, version, slots, stripes = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+			if magic != _MAGIC or version != 1:
+				raise ValueError(f"{path} no es una tabla de rate limiting de FLORA")
+		finally:
+			fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, 0)
+		self.slots = slots
+		self.stripes = stripes
+		self._stripe_size = slots // stripes
+		self._size = _HEADER_SIZE + slots * _SLOT.size
+		self._map = mmap.mmap(self._fd, self._size)
+		self._locks = [threading.Lock() for _ in range(stripes)]
+		self._hashes: Dict[Hashable, int] = {}
+
+	def _key(self, key: Hashable) -> int:
+		"""Hash de 64 bits de la clave (con caché acotada: blake2b domina el coste)."""
+		key_hash = self._hashes.get(key)
+		if key_hash is None:
+			if len(self._hashes) >= HASH_CACHE_SIZE:
+				self._hashes.clear()
+			key_hash = self._hashes[key] = _key_hash(key)
+		return key_hash
+
+	def _acquire(self, stripe: int) -> None:
+		self._locks[stripe].acquire()
+		try:
+			fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, self._size + stripe)
+		except BaseException:
+			self._locks[stripe].release()
+			raise
+
+	def _release(self, stripe: int) -> None:
+		try:
+			fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._size + stripe)
+		finally:
+			self._locks[stripe].release()
+
+	def _find(self, key_hash: int, stripe: int, now: float, insert: bool) -> Optional[int]:
+		"""Offset del slot de la clave (o del que la alojará si `insert`), o None."""
+		base = stripe * self._stripe_size
+		home = key_hash % self._stripe_size
+		free = victim = None
+		victim_start = 0.0
+		for i in range(min(MAX_PROBE, self._stripe_size)):
+			offset = _HEADER_SIZE + (base + (home + i) % self._stripe_size) * _SLOT.size
+			slot_hash, index, _, _, window = _SLOT.unpack_from(self._map, offset)
+			if slot_hash == key_hash:
+				return offset
+			if slot_hash == 0:
+				# Ninguna clave se aloja más allá de un slot nunca usado
+				return (free if free is not None else offset) if insert else None
+			if free is None:
+				if int(now // window) - index >= 2:
+					free = offset
+				elif victim is None or index * window < victim_start:
+					victim, victim_start = offset, index * window
+		if not insert:
+			return None
+		return free if free is not None else victim
+
+	def hit(self, key: Hashable, limit: int, window: float, now: Optional[float] = None) -> RateLimitDecision:
+		now = time.monotonic() if now is None else now
+		key_hash = self._key(key)
+		stripe = (key_hash >> 32) % self.stripes
+		current = int(now // window)
+		elapsed = (now % window) / window
+		self._acquire(stripe)
+		try:
+			offset = self._find(key_hash, stripe, now, insert=True)
+			slot_hash, index, cur, prev, _ = _SLOT.unpack_from(self._map, offset)
+			counters = [index, cur, prev] if slot_hash == key_hash else [current, 0, 0]
+			allowed = _slide(counters, current, elapsed, limit)
+			_SLOT.pack_into(self._map, offset, key_hash, counters[0], counters[1], counters[2], window)
+		finally:
+			self._release(stripe)
+		return RateLimitDecision(allowed, counters[2] * (1.0 - elapsed) + counters[1])
+
+	def release(self, key: Hashable, window: float, now: Optional[float] = None) -> None:
+		now = time.monotonic() if now is None else now
+		key_hash = self._key(key)
+		stripe = (key_hash >> 32) % self.stripes
+		self._acquire(stripe)
+		try:
+			offset = self._find(key_hash, stripe, now, insert=False)
+			if offset is None:
+				return
+			slot_hash, index, cur, prev, slot_window = _SLOT.unpack_from(self._map, offset)
+			if index == int(now // window) and cur > 0:
+				_SLOT.pack_into(self._map, offset, slot_hash, index, cur - 1, prev, slot_window)
+		finally:
+			self._release(stripe)
+
+	def reset(self) -> None:
+		fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, 0)
+		try:
+			self._map[_HEADER_SIZE:self._size] = bytes(self._size - _HEADER_SIZE)
+		finally:
+			fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, 0)
+
+	def __len__(self) -> int:
+		return sum(1 for i in range(self.slots)
+				   if _SLOT.unpack_from(self._map, _HEADER_SIZE + i * _SLOT.size)[0])
+
+	def close(self) -> None:
+		self._map.close()
+		os.close(self._fd)
+
+
+def default_rate_limit_store_path() -> str:
+	"""Tabla compartida por defecto: <tmp>/flora-rate-limit-<uid>.shm, común a los workers del host."""
+	uid = os.getuid() if hasattr(os, "getuid") else 0
+	return os.path.join(tempfile.gettempdir(), f"flora-rate-limit-{uid}.shm")
+
+
+def configured_workers() -> int:
+	"""Workers del servidor: $WEB_CONCURRENCY o, si este proceso lo lanzó un
+	supervisor de multiprocessing (uvicorn --workers N), al menos 2."""
+	try:
+		workers = int(os.getenv(WORKERS_ENV, "1"))
+	except ValueError:
+		workers = 1
+	if workers <= 1 and multiprocessing.parent_process() is not None:
+		workers = 2  # el número exacto no se conoce; basta con saber que hay más de uno
+	return max(1, workers)
+
+
+def create_rate_limit_store(path: Optional[str] = None, workers: Optional[int] = None) -> RateLimitStore:
+	"""Almacén compartido si se indica ruta (o $FLORA_RATE_LIMIT_STORE) o hay varios workers.
+
+	Con el almacén en proceso cada worker aplicaría su propia cuota (N veces el
+	límite), así que con más de un worker se usa por defecto la tabla de
+	default_rate_limit_store_path(). Sin fcntl (Windows) se avisa en el log.
+	"""
+	path = path or os.getenv(RATE_LIMIT_STORE_ENV)
+	workers = configured_workers() if workers is None else workers
+	if not path and workers > 1:
+		path = default_rate_limit_store_path()
+	if path and fcntl is not None:
+		return SharedMemoryRateLimitStore(path)
+	if workers > 1:
+		logger.warning("Rate limiting en proceso con %d workers: cada worker aplica su propia cuota", workers)
+	return SlidingWindowRateLimiter()
@@ -0,0 +1,213 @@
+# 🌸 FLORA - Canal de sesión por WebSocket
+# Una conexión = una sesión FLORA autenticada una vez. El cliente envía tramas
+# binarias de cifrado/descifrado sin esperar respuesta (pipelining) y recibe
+# las respuestas etiquetadas con su request ID.
+#
+# Protocolo (enteros big-endian):
+#   1. Texto JSON de saludo: {"password" | "key_handle", "session_id", "use_kyber"}
+#      (la API key va en X-API-Key / Authorization o en el campo "api_key")
+#      -> {"type": "ready", "session_id", "master_salt", "max_in_flight", "max_frame"}
+#   2. Petición:   op u8 | request_id u32 | len_ad u16 | ad | payload
+#        op 1 (cifrar):    payload = texto plano        -> respuesta: bundle JSON (utf-8)
+#        op 2 (descifrar): payload = bundle JSON (utf-8) -> respuesta: texto plano
+#   3. Respuesta:  status u8 (0 = ok, 1 = error) | request_id u32 | cuerpo
+#      (en error, el cuerpo es el mensaje utf-8)
+#
+# Control de flujo: como mucho `max_in_flight` peticiones pendientes y otras
+# tantas respuestas por enviar. Con las colas llenas se deja de leer del
+# socket, de modo que un cliente que no consume respuestas queda frenado por
+# TCP en lugar de acumular memoria en el servidor.
+
+import json
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+
+try:
+	from .engine import EnginePool, FloraEngine
+	from .metrics import REGISTRY
+except ImportError:
+	from engine import EnginePool, FloraEngine
+	from metrics import REGISTRY
+
+OP_ENCRYPT = 1
+OP_DECRYPT = 2
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+DEFAULT_MAX_IN_FLIGHT = 64
+DEFAULT_MAX_FRAME = 256 * 1024
+
+_REQUEST = struct.Struct(">BIH")
+_RESPONSE = struct.Struct(">BI")
+
+WS_CONNECTIONS = REGISTRY.gauge("flora_ws_connections", "Canales de sesión WebSocket abiertos")
+WS_MESSAGES = REGISTRY.counter("flora_ws_messages_total", "Peticiones del canal de sesión", ["op", "result"])
+
+
+class ChannelProtocolError(ValueError):
+	"""Trama mal formada en el canal de sesión."""
+	pass
+
+
+def pack_request(op: int, request_id: int, payload: bytes, associated_data: bytes = b"") -> bytes:
+	return _REQUEST.pack(op, request_id, len(associated_data)) + associated_data + payload
+
+
+def unpack_request(frame: bytes) -> Tuple[int, int, bytes, bytes]:
+	"""-> (op, request_id, associated_data, payload)."""
+	if len(frame) < _REQUEST.size:
+		raise ChannelProtocolError("Trama demasiado corta")
+	op, request_id, ad_len = _REQUEST.unpack_from(frame)
+	end = _REQUEST.size + ad_len
+	if len(frame) < end:
+		raise ChannelProtocolError("Trama truncada (datos asociados)")
+	return op, request_id, bytes(frame[_REQUEST.size:end]), bytes(frame[end:])
+
+
+def pack_response(status: int, request_id: int, body: bytes) -> bytes:
+	return _RESPONSE.pack(status, request_id) + body
+
+
+def unpack_response(frame: bytes) -> Tuple[int, int, bytes]:
+	"""-> (status, request_id, body)."""
+	if len(frame) < _RESPONSE.size:
+		raise ChannelProtocolError("Trama de respuesta demasiado corta")
+	status, request_id = _RESPONSE.unpack_from(frame)
+	return status, request_id, bytes(frame[_RESPONSE.size:])
+
+
+def _request_id_of(frame: bytes) -> int:
+	return _REQUEST.unpack_from(frame)[1] if len(frame) >= _REQUEST.size else 0
+
+
+class SessionChannel:
+	"""Estado de una conexión: sesión, clave maestra y colas acotadas (anyio).
+
+	La clave maestra se obtiene una vez al abrir el canal; las peticiones que
+	llegan juntas se procesan en lote (encrypt_many/decrypt_many del motor) en
+	un solo salto al threadpool. Las tramas que no descifran se responden con
+	error en esta conexión; los motores del pool no contabilizan amenazas, así
+	que un cliente con tramas falsificadas no bloquea el worker a los demás.
+	"""
+
+	def __init__(self, engines: EnginePool, engine: FloraEngine, master_key: bytes, master_salt: bytes,
+				 session_id: str, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+				 max_frame: int = DEFAULT_MAX_FRAME, principal: Optional[str] = None) -> None:
+		self.engines = engines
+		self.engine = engine
+		self.master_key = master_key
+		self.master_salt = master_salt
+		self.session_id = session_id
+		self.principal = principal
+		self.max_in_flight = max(1, max_in_flight)
+		self.max_frame = max_frame
+
+	def ready_message(self) -> Dict[str, Any]:
+		return {
+			'type': "ready",
+			'session_id': self.session_id,
+			'master_salt': self.master_salt.hex(),
+			'max_in_flight': self.max_in_flight,
+			'max_frame': self.max_frame,
+		}
+
+	# ===== Procesamiento (en el threadpool) =====
+
+	def process_batch(self, frames: List[bytes]) -> List[bytes]:
+		"""Procesa un lote de tramas y devuelve las respuestas en el mismo orden."""
+		responses: List[Optional[bytes]] = [None] * len(frames)
+		encrypts: List[Tuple[int, int, bytes, Optional[bytes]]] = []
+		decrypts: Dict[bool, List[Tuple[int, int, Dict[str, Any]]]] = {}
+		for index, frame in enumerate(frames):
+			try:
+				if len(frame) > self.max_frame:
+					raise ChannelProtocolError(f"Trama mayor que max_frame ({self.max_frame} bytes)")
+				op, request_id, ad, payload = unpack_request(frame)
+				if op == OP_ENCRYPT:
+					encrypts.append((index, request_id, payload, ad or None))
+				elif op == OP_DECRYPT:
+					bundle = json.loads(payload.decode("utf-8"))
+					if not isinstance(bundle, dict):
+						raise ChannelProtocolError("El bundle debe ser un objeto JSON")
+					if bundle.get('master_salt') != self.master_salt.hex():
+						raise ChannelProtocolError("El bundle no pertenece a la clave maestra de este canal")
+					decrypts.setdefault(bool(bundle.get('kem')), []).append((index, request_id, bundle))
+				else:
+					raise ChannelProtocolError(f"Operación desconocida: {op}")
+			except ValueError as e:
+				responses[index] = self._error("invalid", _request_id_of(frame), e)
+
+		if encrypts:
+			results = self.engine.encrypt_many_with_key([e[2] for e in encrypts], self.master_key, self.master_salt,
+														self.session_id, [e[3] for e in encrypts], self.principal)
+			for (index, request_id, _, _), result in zip(encrypts, results):
+				if isinstance(result, Exception):
+					responses[index] = self._error("encrypt", request_id, result)
+				else:
+					responses[index] = self._ok("encrypt", request_id, json.dumps(result).encode("utf-8"))
+		for use_kyber, items in decrypts.items():
+			results = self.engines.engine(use_kyber).decrypt_many_with_key([i[2] for i in items], self.master_key)
+			for (index, request_id, _), result in zip(items, results):
+				if isinstance(result, Exception):
+					responses[index] = self._error("decrypt", request_id, result)
+				else:
+					responses[index] = self._ok("decrypt", request_id, result)
+		return responses  # type: ignore[return-value]
+
+	@staticmethod
+	def _ok(op: str, request_id: int, body: bytes) -> bytes:
+		WS_MESSAGES.labels(op, "ok").inc()
+		return pack_response(STATUS_OK, request_id, body)
+
+	@staticmethod
+	def _error(op: str, request_id: int, error: Exception) -> bytes:
+		WS_MESSAGES.labels(op, "error").inc()
+		return pack_response(STATUS_ERROR, request_id, (str(error) or type(error).__name__).encode("utf-8"))
+
+	# ===== Bucle de la conexión =====
+
+	async def run(self, websocket) -> None:
+		"""Lee tramas, las procesa en lotes y envía respuestas hasta que el cliente cierra."""
+		requests_tx, requests_rx = anyio.create_memory_object_stream(self.max_in_flight)
+		responses_tx, responses_rx = anyio.create_memory_object_stream(self.max_in_flight)
+
+		async def process() -> None:
+			async for frame in requests_rx:
+				batch = [frame]
+				while True:
+					try:
+						batch.append(requests_rx.receive_nowait())
+					except (anyio.WouldBlock, anyio.EndOfStream):
+						break
+				for response in await run_in_threadpool(self.process_batch, batch):
+					await responses_tx.send(response)
+
+		async def send() -> None:
+			try:
+				async for response in responses_rx:
+					await websocket.send_bytes(response)
+			except Exception:
+				# Cliente desconectado a mitad de envío: se cierra el canal
+				tasks.cancel_scope.cancel()
+
+		WS_CONNECTIONS.labels().inc()
+		try:
+			async with requests_tx, requests_rx, responses_tx, responses_rx, anyio.create_task_group() as tasks:
+				tasks.start_soon(process)
+				tasks.start_soon(send)
+				while True:
+					message = await websocket.receive()
+					if message["type"] == "websocket.disconnect":
+						break
+					frame = message.get("bytes")
+					if frame is None:
+						await websocket.close(code=1003, reason="Solo se admiten tramas binarias")
+						break
+					# Con la cola llena se deja de leer del socket (contrapresión)
+					await requests_tx.send(frame)
+				tasks.cancel_scope.cancel()
+		finally:
+			WS_CONNECTIONS.labels().dec()
@@ -0,0 +1,248 @@
+# 🌸 FLORA - Contenedor cifrado por segmentos (streaming)
+# Cifrado AES-256-GCM incremental para ficheros grandes: memoria constante,
+# detección de reordenación (contador en el nonce) y de truncado (flag final en AAD).
+#
+# Formato (enteros big-endian):
+#   cabecera:  b"FLS1" | versión u8 | len_salt u8 | salt | chunk_size u32 | nonce_prefix (8)
+#   segmento:  longitud u32 (bit alto = segmento final) | ciphertext | tag (16)
+#   nonce del segmento i = nonce_prefix || i (u32);  AAD = cabecera || flag_final (u8)
+# El último segmento lleva el flag final (puede estar vacío).
+
+import hashlib
+import hmac
+import os
+import struct
+from typing import BinaryIO, Callable, Optional
+
+from Crypto.Cipher import AES
+
+MAGIC = b"FLS1"
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+NONCE_PREFIX_SIZE = 8
+TAG_SIZE = 16
+FINAL_FLAG = 0x80000000
+MAX_SEGMENTS = 2 ** 32
+
+_FIXED_HEADER = struct.Struct(">4sBB")
+_SEGMENT_LEN = struct.Struct(">I")
+
+
+class StreamFormatError(ValueError):
+	"""Contenedor corrupto, truncado o manipulado."""
+	pass
+
+
+def derive_stream_key(master_key: bytes, nonce_prefix: bytes) -> bytes:
+	"""Clave AES del contenedor: HMAC(master_key, etiqueta || nonce_prefix)."""
+	return hmac.new(master_key, b"flora-stream-v1" + nonce_prefix, hashlib.sha256).digest()
+
+
+def _segment_nonce(prefix: bytes, counter: int) -> bytes:
+	if counter >= MAX_SEGMENTS:
+		raise StreamFormatError("Demasiados segmentos en el contenedor")
+	return prefix + counter.to_bytes(4, "big")
+
+
+class StreamEncryptor:
+	"""Cifrado incremental: header() + update()* + finalize().
+
+	Mantiene como mucho un segmento de texto plano en memoria.
+	"""
+
+	def __init__(self, master_key: bytes, salt: bytes,
+				 chunk_size: int = DEFAULT_CHUNK_SIZE,
+				 nonce_prefix: Optional[bytes] = None) -> None:
+		if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+			raise ValueError(f"chunk_size debe estar entre 1 y {MAX_CHUNK_SIZE}")
+		if len(salt) > 255:
+			raise ValueError("salt demasiado largo")
+		self.chunk_size = chunk_size
+		self.nonce_prefix = nonce_prefix or os.urandom(NONCE_PREFIX_SIZE)
+		if len(self.nonce_prefix) != NONCE_PREFIX_SIZE:
+			raise ValueError("nonce_prefix debe tener 8 bytes")
+		self._key = derive_stream_key(master_key, self.nonce_prefix)
+		self._header = (_FIXED_HEADER.pack(MAGIC, VERSION, len(salt)) + salt
+						+ struct.pack(">I", chunk_size) + self.nonce_prefix)
+		self._buffer = bytearray()
+		self._counter = 0
+		self._header_sent = False
+		self._finished = False
+		self.bytes_in = 0
+
+	def header(self) -> bytes:
+		self._header_sent = True
+		return self._header
+
+	def _seal(self, plaintext, final: bool) -> bytes:
+		cipher = AES.new(self._key, AES.MODE_GCM, nonce=_segment_nonce(self.nonce_prefix, self._counter))
+		cipher.update(self._header + (b"\x01" if final else b"\x00"))
+		ciphertext, tag = cipher.encrypt_and_digest(plaintext)
+		self._counter += 1
+		length = len(plaintext) | (FINAL_FLAG if final else 0)
+		return _SEGMENT_LEN.pack(length) + ciphertext + tag
+
+	def update(self, data: bytes) -> bytes:
+		"""Añade texto plano; devuelve los segmentos completos (incluye la cabecera la primera vez)."""
+		if self._finished:
+			raise RuntimeError("El contenedor ya está finalizado")
+		self.bytes_in += len(data)
+		out = [] if self._header_sent else [self.header()]
+		view = memoryview(data)
+		# Completar primero el segmento pendiente del buffer
+		if self._buffer:
+			need = self.chunk_size - len(self._buffer)
+			self._buffer += view[:need]
+			view = view[need:]
+			if len(self._buffer) < self.chunk_size or not len(view):
+				# Un segmento completo sin más datos detrás espera: podría ser el final
+				return b"".join(out)
+			out.append(self._seal(self._buffer, False))
+			self._buffer.clear()
+		# Resto cifrado directamente desde la entrada (sin copias); siempre se
+		# retiene el último segmento completo para poder marcarlo como final
+		while len(view) > self.chunk_size:
+			out.append(self._seal(view[:self.chunk_size], False))
+			view = view[self.chunk_size:]
+		self._buffer += view
+		return b"".join(out)
+
+	def finalize(self) -> bytes:
+		"""Emite el último segmento (con flag final)."""
+		if self._finished:
+			raise RuntimeError("El contenedor ya está finalizado")
+		out = [] if self._header_sent else [self.header()]
+		out.append(self._seal(self._buffer, True))
+		self._buffer.clear()
+		self._finished = True
+		return b"".join(out)
+
+
+class StreamDecryptor:
+	"""Descifrado incremental: update()* + finalize().
+
+	`key_for_salt` recibe el salt de la cabecera y devuelve la clave maestra
+	(p. ej. PBKDF2 de la contraseña). Cada segmento se entrega solo tras
+	verificar su tag; finalize() falla si el contenedor está truncado.
+	"""
+
+	def __init__(self, key_for_salt: Callable[[bytes], bytes]) -> None:
+		self._key_for_salt = key_for_salt
+		self._buffer = bytearray()
+		self._header: Optional[bytes] = None
+		self._key: Optional[bytes] = None
+		self._counter = 0
+		self._finished = False
+		self.salt: Optional[bytes] = None
+		self.chunk_size = 0
+		self.nonce_prefix = b""
+		self.bytes_out = 0
+
+	@property
+	def header_parsed(self) -> bool:
+		return self._header is not None
+
+	@property
+	def segments(self) -> int:
+		"""Segmentos ya verificados."""
+		return self._counter
+
+	def _parse_header(self) -> bool:
+		if len(self._buffer) < _FIXED_HEADER.size:
+			return False
+		magic, version, salt_len = _FIXED_HEADER.unpack_from(self._buffer)
+		if magic != MAGIC:
+			raise StreamFormatError("No es un contenedor FLORA (magic incorrecto)")
+		if version != VERSION:
+			raise StreamFormatError(f"Versión de contenedor no soportada: {version}")
+		total = _FIXED_HEADER.size + salt_len + 4 + NONCE_PREFIX_SIZE
+		if len(self._buffer) < total:
+			return False
+		header = bytes(self._buffer[:total])
+		offset = _FIXED_HEADER.size
+		self.salt = header[offset:offset + salt_len]
+		(self.chunk_size,) = struct.unpack_from(">I", header, offset + salt_len)
+		if not 0 < self.chunk_size <= MAX_CHUNK_SIZE:
+			raise StreamFormatError(f"chunk_size inválido: {self.chunk_size}")
+		self.nonce_prefix = header[total - NONCE_PREFIX_SIZE:]
+		self._key = derive_stream_key(self._key_for_salt(self.salt), self.nonce_prefix)
+		self._header = header
+		del self._buffer[:total]
+		return True
+
+	def update(self, data: bytes) -> bytes:
+		"""Añade bytes del contenedor; devuelve el texto plano de los segmentos completos."""
+		if self._finished:
+			if data:
+				raise StreamFormatError("Datos después del segmento final")
+			return b""
+		self._buffer += data
+		if self._header is None and not self._parse_header():
+			return b""
+		out = []
+		offset = 0
+		buffer = memoryview(self._buffer)
+		try:
+			while len(buffer) - offset >= _SEGMENT_LEN.size:
+				(raw_len,) = _SEGMENT_LEN.unpack_from(buffer, offset)
+				final = bool(raw_len & FINAL_FLAG)
+				length = raw_len & ~FINAL_FLAG
+				if length > self.chunk_size:
+					raise StreamFormatError("Segmento mayor que chunk_size")
+				end = offset + _SEGMENT_LEN.size + length + TAG_SIZE
+				if len(buffer) < end:
+					break
+				cipher = AES.new(self._key, AES.MODE_GCM, nonce=_segment_nonce(self.nonce_prefix, self._counter))
+				cipher.update(self._header + (b"\x01" if final else b"\x00"))
+				# Vistas sin copia; se liberan antes de redimensionar el buffer
+				with buffer[offset + _SEGMENT_LEN.size:end - TAG_SIZE] as body, buffer[end - TAG_SIZE:end] as tag:
+					try:
+						out.append(cipher.decrypt_and_verify(body, tag))
+					except ValueError:
+						raise StreamFormatError(f"Autenticación fallida en el segmento {self._counter}")
+				self._counter += 1
+				offset = end
+				if final:
+					self._finished = True
+					if len(buffer) > offset:
+						raise StreamFormatError("Datos después del segmento final")
+					break
+		finally:
+			buffer.release()
+		del self._buffer[:offset]
+		plaintext = b"".join(out)
+		self.bytes_out += len(plaintext)
+		return plaintext
+
+	def finalize(self) -> None:
+		"""Comprueba que el contenedor terminó con su segmento final."""
+		if not self._finished:
+			raise StreamFormatError("Contenedor truncado: falta el segmento final")
+
+
+def encrypt_stream(src: BinaryIO, dst: BinaryIO, master_key: bytes, salt: bytes,
+				   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+	"""Cifra src -> dst (ficheros binarios); devuelve los bytes de texto plano leídos."""
+	enc = StreamEncryptor(master_key, salt, chunk_size)
+	dst.write(enc.header())
+	while True:
+		block = src.read(chunk_size)
+		if not block:
+			break
+		dst.write(enc.update(block))
+	dst.write(enc.finalize())
+	return enc.bytes_in
+
+
+def decrypt_stream(src: BinaryIO, dst: BinaryIO, key_for_salt: Callable[[bytes], bytes],
+				   read_size: int = DEFAULT_CHUNK_SIZE) -> int:
+	"""Descifra src -> dst; devuelve los bytes de texto plano escritos."""
+	dec = StreamDecryptor(key_for_salt)
+	while True:
+		block = src.read(read_size)
+		if not block:
+			break
+		dst.write(dec.update(block))
+	dec.finalize()
+	return dec.bytes_out
@@ -1,5 +1,18 @@
-use aes_gcm::aead::{Aead, KeyInit};
-use aes_gcm::{Aes256Gcm, Nonce}; // Or Aes128Gcm, Aes192Gcm
+use aes_gcm::aead::{Aead, AeadInPlace, KeyInit};
+use aes_gcm::{Aes256Gcm, Nonce, Tag}; // Or Aes128Gcm, Aes192Gcm
+use hmac::{Hmac, Mac};
+use rayon::prelude::*;
+use sha2::Sha256;
+
+pub const NONCE_LEN: usize = 12;
+pub const TAG_LEN: usize = 16;
+
+fn new_cipher(key: &[u8]) -> Result<Aes256Gcm, String> {
+	match key.len() {
+		32 => Aes256Gcm::new_from_slice(key).map_err(|e| e.to_string()),
+		_ => Err("key must be 32 bytes for Aes256Gcm".into()),
+	}
+}
 
 pub struct AesGcmResult {
 	pub nonce: Vec<u8>,
@@ -7,10 +20,7 @@ pub struct AesGcmResult {
 }
 
 pub fn aes_gcm_encrypt(key: &[u8], plaintext: &[u8], associated_data: &[u8]) -> Result<AesGcmResult, String> {
-	let cipher = match key.len() {
-		32 => Aes256Gcm::new_from_slice(key).map_err(|e| e.to_string())?,
-		_ => return Err("key must be 32 bytes for Aes256Gcm".into()),
-	};
+	let cipher = new_cipher(key)?;
 	let nonce_bytes: [u8; 12] = rand::random();
 	let nonce = Nonce::from_slice(&nonce_bytes);
 	let ct = cipher
@@ -20,10 +30,7 @@ pub fn aes_gcm_encrypt(key: &[u8], plaintext: &[u8], associated_data: &[u8]) ->
 }
 
 pub fn aes_gcm_decrypt(key: &[u8], nonce: &[u8], ciphertext: &[u8], associated_data: &[u8]) -> Result<Vec<u8>, String> {
-	let cipher = match key.len() {
-		32 => Aes256Gcm::new_from_slice(key).map_err(|e| e.to_string())?,
-		_ => return Err("key must be 32 bytes for Aes256Gcm".into()),
-	};
+	let cipher = new_cipher(key)?;
 	if nonce.len() != 12 { return Err("nonce must be 12 bytes".into()); }
 	let nonce = Nonce::from_slice(nonce);
 	let pt = cipher
@@ -32,26 +39,459 @@ pub fn aes_gcm_decrypt(key: &[u8], nonce: &[u8], ciphertext: &[u8], associated_d
 	Ok(pt)
 }
 
+/// Cifra `buf` en el sitio y devuelve el tag; sin reservar memoria.
+pub fn aes_gcm_encrypt_in_place(key: &[u8], nonce: &[u8; NONCE_LEN], buf: &mut [u8], associated_data: &[u8]) -> Result<[u8; TAG_LEN], String> {
+	let tag = new_cipher(key)?
+		.encrypt_in_place_detached(Nonce::from_slice(nonce), associated_data, buf)
+		.map_err(|e| e.to_string())?;
+	let mut out = [0u8; TAG_LEN];
+	out.copy_from_slice(&tag);
+	Ok(out)
+}
+
+/// Descifra `buf` en el sitio tras verificar `tag`; si no autentica, `buf` no se toca.
+pub fn aes_gcm_decrypt_in_place(key: &[u8], nonce: &[u8], buf: &mut [u8], tag: &[u8], associated_data: &[u8]) -> Result<(), String> {
+	if nonce.len() != NONCE_LEN { return Err("nonce must be 12 bytes".into()); }
+	if tag.len() != TAG_LEN { return Err("tag must be 16 bytes".into()); }
+	new_cipher(key)?
+		.decrypt_in_place_detached(Nonce::from_slice(nonce), associated_data, buf, Tag::from_slice(tag))
+		.map_err(|e| e.to_string())
+}
+
+// ===== Lotes y contenedor por segmentos (Rayon) =====
+// Ambos escriben en un único buffer de salida ya dimensionado: se trocea en
+// rangos disjuntos y cada mensaje/segmento se cifra en su hilo de Rayon.
+//
+// Lote: por mensaje  len u32 BE | nonce (12) | ciphertext | tag (16)
+// Segmentado: el contenedor FLS1 de src/python/stream_container.py
+//   cabecera:  b"FLS1" | versión u8 | len_salt u8 | salt | chunk_size u32 | nonce_prefix (8)
+//   segmento:  longitud u32 (bit alto = final) | ciphertext | tag (16)
+//   clave = HMAC-SHA256(master_key, "flora-stream-v1" || nonce_prefix)
+//   nonce del segmento i = nonce_prefix || i (u32);  AAD = cabecera || flag_final (u8)
+
+pub const RECORD_HEADER_LEN: usize = 4 + NONCE_LEN;
+pub const FLS_MAGIC: &[u8; 4] = b"FLS1";
+pub const FLS_VERSION: u8 = 1;
+pub const FLS_NONCE_PREFIX_LEN: usize = 8;
+pub const FLS_DEFAULT_CHUNK_SIZE: usize = 256 * 1024;
+pub const FLS_MAX_CHUNK_SIZE: usize = 16 * 1024 * 1024;
+pub const FLS_FINAL_FLAG: u32 = 0x8000_0000;
+const FLS_FIXED_HEADER_LEN: usize = 6;
+const FLS_MAX_SEGMENTS: u64 = 1 << 32;
+const SEGMENT_LEN: usize = 4;
+// Mensajes por tarea de Rayon: con mensajes pequeños el reparto cuesta más que el cifrado
+const BATCH_GRAIN: usize = 16;
+
+/// Trocea `out` en rangos consecutivos de los tamaños dados.
+fn split_slots<'a>(mut out: &'a mut [u8], sizes: impl IntoIterator<Item = usize>) -> Vec<&'a mut [u8]> {
+	let mut slots = Vec::new();
+	for size in sizes {
+		let (slot, rest) = std::mem::take(&mut out).split_at_mut(size);
+		slots.push(slot);
+		out = rest;
+	}
+	slots
+}
+
+fn read_u32(buf: &[u8], offset: usize) -> u32 {
+	u32::from_be_bytes([buf[offset], buf[offset + 1], buf[offset + 2], buf[offset + 3]])
+}
+
+/// Tamaño del lote cifrado para mensajes de estas longitudes.
+pub fn batch_len(messages: &[&[u8]]) -> usize {
+	messages.iter().map(|m| RECORD_HEADER_LEN + m.len() + TAG_LEN).sum()
+}
+
+/// Cifra cada mensaje con un nonce aleatorio propio; `out` mide `batch_len(messages)`.
+pub fn aes_gcm_encrypt_batch_into(key: &[u8], messages: &[&[u8]], associated_data: &[u8], out: &mut [u8]) -> Result<(), String> {
+	let cipher = new_cipher(key)?;
+	if messages.iter().any(|m| m.len() > u32::MAX as usize) {
+		return Err("message too large for a batch record".into());
+	}
+	let slots = split_slots(out, messages.iter().map(|m| RECORD_HEADER_LEN + m.len() + TAG_LEN));
+	slots.into_par_iter().zip(messages.par_iter()).with_min_len(BATCH_GRAIN).try_for_each(|(slot, msg)| {
+		let (head, rest) = slot.split_at_mut(RECORD_HEADER_LEN);
+		let (body, tag_out) = rest.split_at_mut(msg.len());
+		head[..4].copy_from_slice(&(msg.len() as u32).to_be_bytes());
+		head[4..].copy_from_slice(&rand::random::<[u8; NONCE_LEN]>());
+		body.copy_from_slice(msg);
+		let tag = cipher
+			.encrypt_in_place_detached(Nonce::from_slice(&head[4..]), associated_data, body)
+			.map_err(|e| e.to_string())?;
+		tag_out.copy_from_slice(&tag);
+		Ok(())
+	})
+}
+
+pub fn aes_gcm_encrypt_batch(key: &[u8], messages: &[&[u8]], associated_data: &[u8]) -> Result<Vec<u8>, String> {
+	let mut out = vec![0u8; batch_len(messages)];
+	aes_gcm_encrypt_batch_into(key, messages, associated_data, &mut out)?;
+	Ok(out)
+}
+
+/// Registro de un lote: (nonce, ciphertext, tag).
+pub type BatchRecord<'a> = (&'a [u8], &'a [u8], &'a [u8]);
+
+/// Valida y recorre los registros de un lote (sin descifrar).
+pub fn parse_batch(packed: &[u8]) -> Result<Vec<BatchRecord<'_>>, String> {
+	let mut records = Vec::new();
+	let mut offset = 0;
+	while offset < packed.len() {
+		if packed.len() - offset < RECORD_HEADER_LEN + TAG_LEN {
+			return Err("truncated batch record".into());
+		}
+		let len = read_u32(packed, offset) as usize;
+		let body = offset + RECORD_HEADER_LEN;
+		let end = body + len + TAG_LEN;
+		if end > packed.len() {
+			return Err("truncated batch record".into());
+		}
+		records.push((&packed[offset + 4..body], &packed[body..body + len], &packed[body + len..end]));
+		offset = end;
+	}
+	Ok(records)
+}
+
+/// Descifra los registros en `out` (textos planos concatenados en orden).
+pub fn aes_gcm_decrypt_batch_into(key: &[u8], records: &[BatchRecord<'_>], associated_data: &[u8], out: &mut [u8]) -> Result<(), String> {
+	let cipher = new_cipher(key)?;
+	let slots = split_slots(out, records.iter().map(|r| r.1.len()));
+	slots.into_par_iter().zip(records.par_iter()).enumerate().with_min_len(BATCH_GRAIN).try_for_each(|(i, (slot, &(nonce, body, tag)))| {
+		slot.copy_from_slice(body);
+		cipher
+			.decrypt_in_place_detached(Nonce::from_slice(nonce), associated_data, slot, Tag::from_slice(tag))
+			.map_err(|_| format!("authentication failed for batch message {}", i))
+	})
+}
+
+pub fn aes_gcm_decrypt_batch(key: &[u8], packed: &[u8], associated_data: &[u8]) -> Result<Vec<Vec<u8>>, String> {
+	let records = parse_batch(packed)?;
+	let mut out = vec![0u8; records.iter().map(|r| r.1.len()).sum()];
+	aes_gcm_decrypt_batch_into(key, &records, associated_data, &mut out)?;
+	let mut rest = &out[..];
+	Ok(records.iter().map(|r| {
+		let (msg, tail) = rest.split_at(r.1.len());
+		rest = tail;
+		msg.to_vec()
+	}).collect())
+}
+
+/// Clave AES del contenedor (igual que stream_container.derive_stream_key).
+pub fn derive_stream_key(master_key: &[u8], nonce_prefix: &[u8]) -> [u8; 32] {
+	let mut mac = <Hmac<Sha256> as Mac>::new_from_slice(master_key).expect("HMAC admite claves de cualquier longitud");
+	mac.update(b"flora-stream-v1");
+	mac.update(nonce_prefix);
+	let mut key = [0u8; 32];
+	key.copy_from_slice(&mac.finalize().into_bytes());
+	key
+}
+
+fn segment_nonce(prefix: &[u8], counter: usize) -> [u8; NONCE_LEN] {
+	let mut nonce = [0u8; NONCE_LEN];
+	nonce[..FLS_NONCE_PREFIX_LEN].copy_from_slice(prefix);
+	nonce[FLS_NONCE_PREFIX_LEN..].copy_from_slice(&(counter as u32).to_be_bytes());
+	nonce
+}
+
+fn segment_aad(header: &[u8], last: bool) -> Vec<u8> {
+	let mut aad = Vec::with_capacity(header.len() + 1);
+	aad.extend_from_slice(header);
+	aad.push(last as u8);
+	aad
+}
+
+/// Cabecera FLS1 para este salt, tamaño de segmento y prefijo de nonce.
+pub fn fls_header(salt: &[u8], chunk_size: usize, nonce_prefix: &[u8; FLS_NONCE_PREFIX_LEN]) -> Result<Vec<u8>, String> {
+	if chunk_size == 0 || chunk_size > FLS_MAX_CHUNK_SIZE {
+		return Err(format!("segment_size must be between 1 and {}", FLS_MAX_CHUNK_SIZE));
+	}
+	if salt.len() > 255 {
+		return Err("salt too long".into());
+	}
+	let mut header = Vec::with_capacity(FLS_FIXED_HEADER_LEN + salt.len() + 4 + FLS_NONCE_PREFIX_LEN);
+	header.extend_from_slice(FLS_MAGIC);
+	header.push(FLS_VERSION);
+	header.push(salt.len() as u8);
+	header.extend_from_slice(salt);
+	header.extend_from_slice(&(chunk_size as u32).to_be_bytes());
+	header.extend_from_slice(nonce_prefix);
+	Ok(header)
+}
+
+/// Segmentos del texto plano; siempre hay al menos uno (el final puede ir vacío).
+fn plaintext_segments(plaintext: &[u8], chunk_size: usize) -> Vec<&[u8]> {
+	if plaintext.is_empty() {
+		vec![plaintext]
+	} else {
+		plaintext.chunks(chunk_size).collect()
+	}
+}
+
+/// Tamaño del contenedor para `plaintext_len` bytes con esta cabecera.
+pub fn segmented_len(header_len: usize, plaintext_len: usize, chunk_size: usize) -> usize {
+	let segments = ((plaintext_len + chunk_size - 1) / chunk_size).max(1);
+	header_len + segments * (SEGMENT_LEN + TAG_LEN) + plaintext_len
+}
+
+/// Escribe el contenedor completo (cabecera incluida) en `out`, de `segmented_len` bytes.
+pub fn encrypt_segmented_into(master_key: &[u8], plaintext: &[u8], chunk_size: usize, header: &[u8], out: &mut [u8]) -> Result<(), String> {
+	let segments = plaintext_segments(plaintext, chunk_size);
+	if segments.len() as u64 > FLS_MAX_SEGMENTS {
+		return Err("too many segments for the container".into());
+	}
+	let prefix = &header[header.len() - FLS_NONCE_PREFIX_LEN..];
+	let cipher = new_cipher(&derive_stream_key(master_key, prefix))?;
+	let (aad, final_aad) = (segment_aad(header, false), segment_aad(header, true));
+	let last = segments.len() - 1;
+	let (head, body) = out.split_at_mut(header.len());
+	head.copy_from_slice(header);
+	let slots = split_slots(body, segments.iter().map(|s| SEGMENT_LEN + s.len() + TAG_LEN));
+	slots.into_par_iter().zip(segments.par_iter()).enumerate().try_for_each(|(i, (slot, segment))| {
+		let (len_out, rest) = slot.split_at_mut(SEGMENT_LEN);
+		let (ct, tag_out) = rest.split_at_mut(segment.len());
+		let raw_len = segment.len() as u32 | if i == last { FLS_FINAL_FLAG } else { 0 };
+		len_out.copy_from_slice(&raw_len.to_be_bytes());
+		ct.copy_from_slice(segment);
+		let tag = cipher
+			.encrypt_in_place_detached(Nonce::from_slice(&segment_nonce(prefix, i)), if i == last { &final_aad } else { &aad }, ct)
+			.map_err(|e| e.to_string())?;
+		tag_out.copy_from_slice(&tag);
+		Ok(())
+	})
+}
+
+pub fn encrypt_segmented(master_key: &[u8], plaintext: &[u8], chunk_size: usize, salt: &[u8]) -> Result<Vec<u8>, String> {
+	let header = fls_header(salt, chunk_size, &rand::random())?;
+	let mut out = vec![0u8; segmented_len(header.len(), plaintext.len(), chunk_size)];
+	encrypt_segmented_into(master_key, plaintext, chunk_size, &header, &mut out)?;
+	Ok(out)
+}
+
+/// Contenedor FLS1 ya validado estructuralmente (cabecera y límites de segmentos).
+pub struct SegmentedContainer<'a> {
+	pub header: &'a [u8],
+	pub salt: &'a [u8],
+	pub segments: Vec<(&'a [u8], &'a [u8], bool)>,
+	pub plaintext_len: usize,
+}
+
+/// Mismas comprobaciones que StreamDecryptor: magic, versión, chunk_size,
+/// segmentos no mayores que chunk_size, flag final presente y nada detrás.
+pub fn parse_segmented(container: &[u8]) -> Result<SegmentedContainer<'_>, String> {
+	if container.len() < FLS_FIXED_HEADER_LEN || &container[..4] != FLS_MAGIC {
+		return Err("not a FLORA container (bad magic)".into());
+	}
+	if container[4] != FLS_VERSION {
+		return Err(format!("unsupported container version: {}", container[4]));
+	}
+	let salt_len = container[5] as usize;
+	let header_len = FLS_FIXED_HEADER_LEN + salt_len + 4 + FLS_NONCE_PREFIX_LEN;
+	if container.len() < header_len {
+		return Err("truncated container header".into());
+	}
+	let chunk_size = read_u32(container, FLS_FIXED_HEADER_LEN + salt_len) as usize;
+	if chunk_size == 0 || chunk_size > FLS_MAX_CHUNK_SIZE {
+		return Err(format!("invalid chunk_size: {}", chunk_size));
+	}
+	let mut segments = Vec::new();
+	let mut plaintext_len = 0;
+	let mut offset = header_len;
+	loop {
+		if container.len() - offset < SEGMENT_LEN {
+			return Err("truncated container: missing final segment".into());
+		}
+		let raw_len = read_u32(container, offset);
+		let last = raw_len & FLS_FINAL_FLAG != 0;
+		let len = (raw_len & !FLS_FINAL_FLAG) as usize;
+		if len > chunk_size {
+			return Err("segment larger than chunk_size".into());
+		}
+		let body = offset + SEGMENT_LEN;
+		let end = body + len + TAG_LEN;
+		if end > container.len() {
+			return Err("truncated container: missing final segment".into());
+		}
+		if segments.len() as u64 == FLS_MAX_SEGMENTS {
+			return Err("too many segments in the container".into());
+		}
+		segments.push((&container[body..body + len], &container[body + len..end], last));
+		plaintext_len += len;
+		offset = end;
+		if last {
+			break;
+		}
+	}
+	if offset != container.len() {
+		return Err("data after the final segment".into());
+	}
+	Ok(SegmentedContainer {
+		header: &container[..header_len],
+		salt: &container[FLS_FIXED_HEADER_LEN..FLS_FIXED_HEADER_LEN + salt_len],
+		segments,
+		plaintext_len,
+	})
+}
+
+/// Descifra los segmentos en paralelo en `out` (de `plaintext_len` bytes).
+pub fn decrypt_segmented_into(master_key: &[u8], container: &SegmentedContainer<'_>, out: &mut [u8]) -> Result<(), String> {
+	let header = container.header;
+	let prefix = &header[header.len() - FLS_NONCE_PREFIX_LEN..];
+	let cipher = new_cipher(&derive_stream_key(master_key, prefix))?;
+	let (aad, final_aad) = (segment_aad(header, false), segment_aad(header, true));
+	let slots = split_slots(out, container.segments.iter().map(|s| s.0.len()));
+	slots.into_par_iter().zip(container.segments.par_iter()).enumerate().try_for_each(|(i, (slot, &(body, tag, last)))| {
+		slot.copy_from_slice(body);
+		cipher
+			.decrypt_in_place_detached(Nonce::from_slice(&segment_nonce(prefix, i)), if last { &final_aad } else { &aad }, slot, Tag::from_slice(tag))
+			.map_err(|_| format!("authentication failed in segment {}", i))
+	})
+}
+
+pub fn decrypt_segmented(master_key: &[u8], container: &[u8]) -> Result<Vec<u8>, String> {
+	let parsed = parse_segmented(container)?;
+	let mut out = vec![0u8; parsed.plaintext_len];
+	decrypt_segmented_into(master_key, &parsed, &mut out)?;
+	Ok(out)
+}
+
 // ===== Python bindings (pyo3) =====
+// Las entradas admiten cualquier objeto con protocolo de buffer (bytes,
+// bytearray, memoryview...). La salida se escribe directamente en el PyBytes
+// que se devuelve y el cifrado corre sin el GIL, de modo que varios hilos de
+// Python pueden cifrar en paralelo.
+use pyo3::buffer::PyBuffer;
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
 
+/// Vista de solo lectura del buffer; vive lo que viva `buf`.
+fn buffer_slice(buf: &PyBuffer<u8>) -> PyResult<&[u8]> {
+	if !buf.is_c_contiguous() {
+		return Err(PyValueError::new_err("buffer must be C-contiguous"));
+	}
+	if buf.len_bytes() == 0 {
+		return Ok(&[]);
+	}
+	// SAFETY: buffer contiguo de u8 exportado por Python; el PyBuffer lo mantiene
+	// vivo (y un bytearray no puede redimensionarse) mientras exista la vista.
+	Ok(unsafe { std::slice::from_raw_parts(buf.buf_ptr() as *const u8, buf.len_bytes()) })
+}
+
+fn value_error(e: String) -> PyErr {
+	PyValueError::new_err(e)
+}
+
+/// -> (nonce, ciphertext || tag) como bytes.
 #[pyfunction]
-fn py_encrypt(key: &[u8], plaintext: &[u8], associated_data: Option<&[u8]>) -> PyResult<(Vec<u8>, Vec<u8>)> {
-	let ad = associated_data.unwrap_or(&[]);
-	let out = aes_gcm_encrypt(key, plaintext, ad).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))?;
-	Ok((out.nonce, out.ciphertext))
+#[pyo3(signature = (key, plaintext, associated_data=None))]
+fn py_encrypt<'py>(py: Python<'py>, key: PyBuffer<u8>, plaintext: PyBuffer<u8>, associated_data: Option<PyBuffer<u8>>) -> PyResult<(Bound<'py, PyBytes>, Bound<'py, PyBytes>)> {
+	let key = buffer_slice(&key)?;
+	let plaintext = buffer_slice(&plaintext)?;
+	let ad: &[u8] = match &associated_data {
+		Some(buf) => buffer_slice(buf)?,
+		None => &[],
+	};
+	let nonce: [u8; NONCE_LEN] = rand::random();
+	let ciphertext = PyBytes::new_bound_with(py, plaintext.len() + TAG_LEN, |out: &mut [u8]| {
+		let (body, tag_out) = out.split_at_mut(plaintext.len());
+		let tag = py.allow_threads(|| {
+			body.copy_from_slice(plaintext);
+			aes_gcm_encrypt_in_place(key, &nonce, body, ad)
+		}).map_err(value_error)?;
+		tag_out.copy_from_slice(&tag);
+		Ok(())
+	})?;
+	Ok((PyBytes::new_bound(py, &nonce), ciphertext))
 }
 
+/// ciphertext || tag -> texto plano como bytes (ValueError si no autentica).
 #[pyfunction]
-fn py_decrypt(key: &[u8], nonce: &[u8], ciphertext: &[u8], associated_data: Option<&[u8]>) -> PyResult<Vec<u8>> {
-	let ad = associated_data.unwrap_or(&[]);
-	let out = aes_gcm_decrypt(key, nonce, ciphertext, ad).map_err(|e| PyErr::new::<pyo3::exceptions::PyValueError, _>(e))?;
-	Ok(out)
+#[pyo3(signature = (key, nonce, ciphertext, associated_data=None))]
+fn py_decrypt<'py>(py: Python<'py>, key: PyBuffer<u8>, nonce: PyBuffer<u8>, ciphertext: PyBuffer<u8>, associated_data: Option<PyBuffer<u8>>) -> PyResult<Bound<'py, PyBytes>> {
+	let key = buffer_slice(&key)?;
+	let nonce = buffer_slice(&nonce)?;
+	let ciphertext = buffer_slice(&ciphertext)?;
+	let ad: &[u8] = match &associated_data {
+		Some(buf) => buffer_slice(buf)?,
+		None => &[],
+	};
+	if ciphertext.len() < TAG_LEN {
+		return Err(PyValueError::new_err("ciphertext too short"));
+	}
+	let (body, tag) = ciphertext.split_at(ciphertext.len() - TAG_LEN);
+	PyBytes::new_bound_with(py, body.len(), |out: &mut [u8]| {
+		py.allow_threads(|| {
+			out.copy_from_slice(body);
+			aes_gcm_decrypt_in_place(key, nonce, out, tag, ad)
+		}).map_err(value_error)
+	})
+}
+
+/// [len u32 | nonce | ciphertext | tag] por mensaje, concatenados; cifrado en paralelo sin el GIL.
+#[pyfunction]
+#[pyo3(name = "encrypt_batch", signature = (key, messages, associated_data=None))]
+fn py_encrypt_batch<'py>(py: Python<'py>, key: PyBuffer<u8>, messages: Vec<PyBuffer<u8>>, associated_data: Option<PyBuffer<u8>>) -> PyResult<Bound<'py, PyBytes>> {
+	let key = buffer_slice(&key)?;
+	let messages = messages.iter().map(buffer_slice).collect::<PyResult<Vec<&[u8]>>>()?;
+	let ad: &[u8] = match &associated_data {
+		Some(buf) => buffer_slice(buf)?,
+		None => &[],
+	};
+	PyBytes::new_bound_with(py, batch_len(&messages), |out: &mut [u8]| {
+		py.allow_threads(|| aes_gcm_encrypt_batch_into(key, &messages, ad, out)).map_err(value_error)
+	})
+}
+
+/// Lote de encrypt_batch -> textos planos concatenados en orden (ValueError si alguno no autentica).
+#[pyfunction]
+#[pyo3(name = "decrypt_batch", signature = (key, packed, associated_data=None))]
+fn py_decrypt_batch<'py>(py: Python<'py>, key: PyBuffer<u8>, packed: PyBuffer<u8>, associated_data: Option<PyBuffer<u8>>) -> PyResult<Bound<'py, PyBytes>> {
+	let key = buffer_slice(&key)?;
+	let records = parse_batch(buffer_slice(&packed)?).map_err(value_error)?;
+	let ad: &[u8] = match &associated_data {
+		Some(buf) => buffer_slice(buf)?,
+		None => &[],
+	};
+	let total = records.iter().map(|r| r.1.len()).sum();
+	PyBytes::new_bound_with(py, total, |out: &mut [u8]| {
+		py.allow_threads(|| aes_gcm_decrypt_batch_into(key, &records, ad, out)).map_err(value_error)
+	})
+}
+
+/// Contenedor FLS1 completo de `buffer`, con los segmentos cifrados en paralelo sin el GIL.
+#[pyfunction]
+#[pyo3(name = "encrypt_segmented", signature = (key, buffer, segment_size=FLS_DEFAULT_CHUNK_SIZE, salt=None))]
+fn py_encrypt_segmented<'py>(py: Python<'py>, key: PyBuffer<u8>, buffer: PyBuffer<u8>, segment_size: usize, salt: Option<PyBuffer<u8>>) -> PyResult<Bound<'py, PyBytes>> {
+	let key = buffer_slice(&key)?;
+	let plaintext = buffer_slice(&buffer)?;
+	let salt: &[u8] = match &salt {
+		Some(buf) => buffer_slice(buf)?,
+		None => &[],
+	};
+	let header = fls_header(salt, segment_size, &rand::random()).map_err(value_error)?;
+	PyBytes::new_bound_with(py, segmented_len(header.len(), plaintext.len(), segment_size), |out: &mut [u8]| {
+		py.allow_threads(|| encrypt_segmented_into(key, plaintext, segment_size, &header, out)).map_err(value_error)
+	})
+}
+
+/// Contenedor FLS1 (de Rust o de stream_container) -> texto plano; ValueError si está truncado o manipulado.
+#[pyfunction]
+#[pyo3(name = "decrypt_segmented")]
+fn py_decrypt_segmented<'py>(py: Python<'py>, key: PyBuffer<u8>, container: PyBuffer<u8>) -> PyResult<Bound<'py, PyBytes>> {
+	let key = buffer_slice(&key)?;
+	let parsed = parse_segmented(buffer_slice(&container)?).map_err(value_error)?;
+	PyBytes::new_bound_with(py, parsed.plaintext_len, |out: &mut [u8]| {
+		py.allow_threads(|| decrypt_segmented_into(key, &parsed, out)).map_err(value_error)
+	})
 }
 
 #[pymodule]
-fn flora_rs(_py: Python, m: &PyModule) -> PyResult<()> {
+fn flora_rs(m: &Bound<'_, PyModule>) -> PyResult<()> {
 	m.add_function(wrap_pyfunction!(py_encrypt, m)?)?;
 	m.add_function(wrap_pyfunction!(py_decrypt, m)?)?;
+	m.add_function(wrap_pyfunction!(py_encrypt_batch, m)?)?;
+	m.add_function(wrap_pyfunction!(py_decrypt_batch, m)?)?;
+	m.add_function(wrap_pyfunction!(py_encrypt_segmented, m)?)?;
+	m.add_function(wrap_pyfunction!(py_decrypt_segmented, m)?)?;
 	Ok(())
 }
@@ -0,0 +1,24 @@
+# 🌸 FLORA - Configuración de pytest
+# Permite importar el paquete desde src/ sin instalarlo
+
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "src")
+if SRC_DIR not in sys.path:
+	sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _kyber_keyring_env(tmp_path_factory):
+	"""Keyring Kyber por defecto (get_default_keyring) en un directorio temporal."""
+	env = "FLORA_KYBER_KEYRING"
+	previous = os.environ.get(env)
+	os.environ[env] = str(tmp_path_factory.mktemp("flora-keyring") / "kyber_keyring.json")
+	yield
+	if previous is None:
+		os.environ.pop(env, None)
+	else:
+		os.environ[env] = previous
@@ -0,0 +1,143 @@
+import json
+import os
+
+import pytest
+
+from python.bulk_ops import (MANIFEST_NAME, REKEY_JOURNAL_NAME, BulkError, decrypt_tree, encrypt_tree, rekey_tree,
+							 verify_paths)
+from python.flora_crypto import FloraCryptoSystem
+
+
+def make_tree(root):
+	for i in range(12):
+		path = root / f"d{i % 3}" / f"f{i}.bin"
+		path.parent.mkdir(parents=True, exist_ok=True)
+		path.write_bytes(os.urandom(i * 700))
+	(root / "vacio").write_bytes(b"")
+
+
+def read_tree(root):
+	return {str(p.relative_to(root)): p.read_bytes() for p in root.rglob("*") if p.is_file() and p.name != MANIFEST_NAME}
+
+
+def test_tree_round_trip_with_process_pool_and_resume(tmp_path):
+	src, enc, dec = tmp_path / "src", tmp_path / "enc", tmp_path / "dec"
+	make_tree(src)
+	totals = []
+	result = encrypt_tree(src, enc, "pw", workers=2, total=lambda files, size: totals.append(files))
+	assert result['files'] == 13 and not result['failed'] and totals == [13]
+	assert (enc / "d1" / "f1.bin.flora").exists()
+
+	# Interrupción simulada: el manifiesto solo registra los 5 primeros ficheros
+	manifest = (enc / MANIFEST_NAME).read_text().splitlines(keepends=True)
+	(enc / MANIFEST_NAME).write_text("".join(manifest[:6]) + '{"path": "d0/f0.b')
+	resumed = encrypt_tree(src, enc, "pw", workers=2)
+	assert (resumed['skipped'], resumed['files']) == (5, 8)
+	with pytest.raises(BulkError):
+		encrypt_tree(src, enc, "otra", workers=1)
+
+	result = decrypt_tree(enc, dec, "pw", workers=2)
+	assert result['files'] == 13 and not result['failed']
+	assert read_tree(dec) == read_tree(src)
+	with pytest.raises(BulkError):
+		decrypt_tree(enc, tmp_path / "dec2", "otra")
+
+
+def test_tampered_container_is_reported_without_stopping_the_tree(tmp_path):
+	src, enc, dec = tmp_path / "src", tmp_path / "enc", tmp_path / "dec"
+	make_tree(src)
+	encrypt_tree(src, enc, "pw", workers=1)
+	os.remove(enc / MANIFEST_NAME)
+	target = enc / "d2" / "f5.bin.flora"
+	data = bytearray(target.read_bytes())
+	data[-1] ^= 1
+	target.write_bytes(bytes(data))
+
+	# Sin manifiesto de origen el salt se lee de la cabecera de un contenedor
+	result = decrypt_tree(enc, dec, "pw", workers=2)
+	assert [f['path'] for f in result['failed']] == ["d2/f5.bin.flora"]
+	assert result['files'] == 12
+	assert not (dec / "d2" / "f5.bin").exists()
+	assert not list(dec.rglob("*.flora-tmp"))
+
+
+def make_bundles(root, password, salts=2, count=6):
+	flora = FloraCryptoSystem(use_kyber=False)
+	keys = [(salt, flora.generate_master_key(password, salt)[0]) for salt in (os.urandom(32) for _ in range(salts))]
+	for i in range(count):
+		salt, key = keys[i % salts]
+		bundle = flora.encrypt_message(f"mensaje {i}".encode(), key, f"s{i}", b"ad" if i == 0 else None)
+		bundle['master_salt'] = salt.hex()
+		path = root / f"d{i % 2}" / f"m{i}.enc.json"
+		path.parent.mkdir(parents=True, exist_ok=True)
+		path.write_text(json.dumps(bundle))
+
+
+def open_bundles(root, password):
+	flora = FloraCryptoSystem(use_kyber=False, scope_sessions=True)
+	out = {}
+	for path in sorted(root.rglob("*.enc.json")):
+		bundle = json.loads(path.read_text())
+		key, _ = flora.generate_master_key(password, bytes.fromhex(bundle['master_salt']))
+		out[path.name] = flora.decrypt_message(bundle, key)
+	return out
+
+
+def test_rekey_derives_once_per_salt_and_resumes(tmp_path):
+	make_bundles(tmp_path, "vieja")
+	target = tmp_path / "d1" / "m3.enc.json"
+	original = target.read_text()
+	broken = json.loads(original)
+	broken['tag'] = "00" * 16
+	target.write_text(json.dumps(broken))
+
+	result = rekey_tree(tmp_path, "vieja", "nueva", workers=2)
+	assert (result['files'], result['distinct_salts'], result['kdf_derivations']) == (5, 2, 3)
+	assert [f['path'] for f in result['failed']] == ["d1/m3.enc.json"]
+	assert (tmp_path / REKEY_JOURNAL_NAME).exists()
+	with pytest.raises(BulkError):
+		rekey_tree(tmp_path, "vieja", "otra")
+
+	# Reanudación: los bundles con el master_salt nuevo se saltan
+	target.write_text(original)
+	resumed = rekey_tree(tmp_path, "vieja", "nueva", workers=1)
+	assert (resumed['skipped'], resumed['files'], resumed['failed']) == (5, 1, [])
+	assert not (tmp_path / REKEY_JOURNAL_NAME).exists()
+	assert len({json.loads(p.read_text())['master_salt'] for p in tmp_path.rglob("*.enc.json")}) == 1
+	assert open_bundles(tmp_path, "nueva") == {f"m{i}.enc.json": f"mensaje {i}".encode() for i in range(6)}
+
+
+def test_rekey_wrong_old_password_leaves_bundles_untouched(tmp_path):
+	make_bundles(tmp_path, "vieja", salts=1, count=3)
+	before = {p: p.read_bytes() for p in tmp_path.rglob("*.enc.json")}
+	result = rekey_tree(tmp_path, "mala", "nueva", workers=1)
+	assert result['files'] == 0 and len(result['failed']) == 3
+	assert {p: p.read_bytes() for p in tmp_path.rglob("*.enc.json")} == before
+
+
+def test_verify_reports_tampered_files_without_autodestruction(tmp_path):
+	make_bundles(tmp_path / "b", "pw")
+	make_tree(tmp_path / "src")
+	encrypt_tree(tmp_path / "src", tmp_path / "enc", "pw", workers=1)
+	bundle_path = tmp_path / "b" / "d0" / "m2.enc.json"
+	bundle = json.loads(bundle_path.read_text())
+	bundle['tag'] = "00" * 16
+	bundle_path.write_text(json.dumps(bundle))
+	container = tmp_path / "enc" / "d1" / "f4.bin.flora"
+	data = bytearray(container.read_bytes())
+	data[-1] ^= 1
+	container.write_bytes(bytes(data))
+
+	result = verify_paths([tmp_path / "b", tmp_path / "enc"], "pw", workers=2)
+	assert not result['ok'] and result['files'] == 5 + 12
+	assert sorted(f['path'] for f in result['failed']) == sorted([str(bundle_path), str(container)])
+	assert result['kdf_derivations'] == 3
+	assert not list(tmp_path.rglob("*.flora-tmp"))
+
+	flora = FloraCryptoSystem(use_kyber=False)
+	key, _ = flora.generate_master_key("pw", bytes.fromhex(bundle['master_salt']))
+	assert flora.verify_message(bundle, key) is False
+	assert (flora.system_health, flora.failed_attempts) == (1.0, 0)
+	assert verify_paths([bundle_path.with_name("m0.enc.json")], "pw", workers=1)['ok']
+	with pytest.raises(BulkError):
+		verify_paths([tmp_path / "no-existe"], "pw")
@@ -0,0 +1,64 @@
+# 🌸 FLORA - Pruebas del análisis de parámetros caóticos
+
+import numpy as np
+import pytest
+
+from python.chaos_analysis import ChaosAnalyzer, ChaosExclusionTable, load_or_build_exclusion_table
+from python.chaotic_map import ChaoticDestructionEngine, R_CHAOS_MIN, R_CHAOS_MAX
+
+pytestmark = pytest.mark.chaos
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+	return ChaosAnalyzer(transient=500, iterations=1000)
+
+
+def test_lyapunov_sign_matches_known_regimes(analyzer):
+	lyap = analyzer.lyapunov_exponents([3.83, 3.9, 3.99])
+	assert lyap[0] < 0  # ventana de periodo 3
+	assert lyap[1] > 0 and lyap[2] > 0
+
+
+def test_detect_periods(analyzer):
+	periods = analyzer.detect_periods([3.2, 3.5, 3.83, 3.99])
+	assert list(periods) == [2, 4, 3, 0]
+
+
+def test_grid_streams_to_disk(analyzer, tmp_path):
+	analyzer.chunk_size = 7
+	r = np.linspace(3.8, 3.9, 10)
+	x0 = [0.2, 0.4, 0.6]
+	result = analyzer.analyze_grid(r, x0, out_dir=str(tmp_path))
+	on_disk = np.load(tmp_path / "lyapunov.npy")
+	assert on_disk.shape == (10, 3)
+	np.testing.assert_allclose(on_disk, np.asarray(result.lyapunov))
+	assert np.load(tmp_path / "period.npy").shape == (10, 3)
+
+
+def test_bifurcation_data_shape(analyzer):
+	data = analyzer.bifurcation_data([3.2, 3.5], samples=8)
+	assert data.shape == (2, 8)
+	assert len(np.unique(np.round(data[0], 6))) == 2
+
+
+def test_exclusion_table_lookup_and_cache(analyzer, tmp_path):
+	cache = str(tmp_path / "table.npz")
+	table = load_or_build_exclusion_table(cache, analyzer=analyzer, resolution=1e-3)
+	assert table.contains(3.835)
+	assert not table.contains(3.99)
+	shifted = table.nearest_chaotic(3.835)
+	assert not table.contains(shifted)
+	assert R_CHAOS_MIN <= shifted <= R_CHAOS_MAX
+
+	reloaded = ChaosExclusionTable.load(cache)
+	assert reloaded.intervals == table.intervals
+	assert reloaded.metadata["resolution"] == pytest.approx(1e-3)
+
+
+def test_engine_consults_exclusion_table():
+	table = ChaosExclusionTable([3.8], [3.9], metadata={"resolution": 0.02})
+	engine = ChaoticDestructionEngine(exclusion_table=table)
+	assert engine._clamp_chaotic_r(3.82) == pytest.approx(3.79)
+	assert engine._clamp_chaotic_r(3.89) == pytest.approx(3.91)
+	assert engine._clamp_chaotic_r(3.95) == 3.95
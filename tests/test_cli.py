@@ -0,0 +1,67 @@
+import os
+
+from click.testing import CliRunner
+
+from python.cli import main
+from python.stream_container import MAGIC
+
+
+def test_stdin_stdout_streaming_round_trip(tmp_path):
+	runner = CliRunner()
+	env = {"FLORA_PASSWORD": "pw"}
+	data = os.urandom(700_000)
+	encrypted = runner.invoke(main, ["encrypt", "-", "-"], input=data, env=env)
+	assert encrypted.exit_code == 0, encrypted.output
+	container = encrypted.stdout_bytes
+	assert container.startswith(MAGIC)
+
+	decrypted = runner.invoke(main, ["decrypt", "-", "-"], input=container, env=env)
+	assert decrypted.exit_code == 0
+	assert decrypted.stdout_bytes == data
+
+	# Desde fichero (formato detectado por la cabecera) y con contraseña incorrecta
+	(tmp_path / "in.flora").write_bytes(container)
+	out = tmp_path / "out.bin"
+	assert runner.invoke(main, ["decrypt", str(tmp_path / "in.flora"), str(out)], env=env).exit_code == 0
+	assert out.read_bytes() == data
+	bad = runner.invoke(main, ["decrypt", "-", str(tmp_path / "bad.bin")], input=container, env={"FLORA_PASSWORD": "x"})
+	assert bad.exit_code == 1
+	assert not (tmp_path / "bad.bin").exists()
+
+
+def test_json_format_still_works_with_files(tmp_path):
+	runner = CliRunner()
+	(tmp_path / "msg.txt").write_bytes(b"hola")
+	args = ["--password", "pw"]
+	assert runner.invoke(main, ["encrypt", *args, "--no-kyber", str(tmp_path / "msg.txt"), str(tmp_path / "msg.json")]).exit_code == 0
+	assert (tmp_path / "msg.json").read_text().lstrip().startswith("{")
+	result = runner.invoke(main, ["decrypt", *args, str(tmp_path / "msg.json"), "-"])
+	assert result.exit_code == 0
+	assert result.stdout_bytes == b"hola"
+
+
+def test_default_bundle_is_password_only_and_kyber_needs_its_keyring(tmp_path):
+	runner = CliRunner()
+	(tmp_path / "msg.txt").write_bytes(b"hola")
+	args = ["--password", "pw"]
+	assert runner.invoke(main, ["encrypt", *args, str(tmp_path / "msg.txt"), str(tmp_path / "plain.json")]).exit_code == 0
+	# Sin --use-kyber el bundle no depende de ningún keyring
+	other = ["--keyring", str(tmp_path / "otro.json")]
+	result = runner.invoke(main, ["decrypt", *args, *other, str(tmp_path / "plain.json"), "-"])
+	assert result.exit_code == 0 and result.stdout_bytes == b"hola"
+
+	encrypted = runner.invoke(main, ["encrypt", *args, "--use-kyber", "--keyring", str(tmp_path / "a.json"),
+									 str(tmp_path / "msg.txt"), str(tmp_path / "kyber.json")])
+	assert encrypted.exit_code == 0
+	result = runner.invoke(main, ["decrypt", *args, *other, str(tmp_path / "kyber.json"), str(tmp_path / "out.txt")])
+	assert result.exit_code == 1 and isinstance(result.exception, SystemExit)
+	assert "--keyring" in result.output and "Traceback" not in result.output
+	assert not (tmp_path / "out.txt").exists()
+	assert runner.invoke(main, ["decrypt", *args, "--keyring", str(tmp_path / "a.json"), str(tmp_path / "kyber.json"),
+								"-"]).stdout_bytes == b"hola"
+
+	# Sin keyring explícito no se cifra con Kyber (la clave secreta solo viviría en memoria)
+	result = runner.invoke(main, ["encrypt", *args, "--use-kyber", str(tmp_path / "msg.txt"), str(tmp_path / "k2.json")],
+						   env={"FLORA_KYBER_KEYRING": None})
+	assert result.exit_code == 1 and "--keyring" in result.output
+	assert not (tmp_path / "k2.json").exists()
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+from python.data_keys import DataKeyError, DataKeyStore
+
+
+def test_keys_persist_by_key_id_and_hot_keys_are_cached(tmp_path):
+	path = tmp_path / "data_keys.db"
+	store = DataKeyStore(path, cache_size=2)
+	created = [store.create() for _ in range(3)]
+	for key_id, master_key, master_salt in created:
+		assert store.get(key_id) == (master_key, master_salt)
+	assert len(store._cache) == 2
+	store.close()
+
+	# Otro proceso (nueva instancia) lee la misma KEK de <almacén>.kek
+	other = DataKeyStore(path)
+	key_id, master_key, master_salt = created[0]
+	assert other.get(key_id) == (master_key, master_salt)
+	assert len(other) == 3
+	assert other.delete(key_id)
+	with pytest.raises(DataKeyError):
+		other.get(key_id)
+	other.close()
+
+
+def test_tampered_rows_are_rejected(tmp_path):
+	path = tmp_path / "data_keys.db"
+	store = DataKeyStore(path, cache_size=0)
+	first, _, _ = store.create()
+	second, _, _ = store.create()
+	with pytest.raises(DataKeyError):
+		store.get("fdk_desconocido")
+
+	# Copiar la clave envuelta de una fila a otra no sirve: la AAD incluye el key_id
+	db = sqlite3.connect(str(path))
+	db.execute("UPDATE data_keys SET (wrapped, master_salt) = (SELECT wrapped, master_salt FROM data_keys WHERE id = ?) "
+			   "WHERE id = ?", (first, second))
+	db.commit()
+	db.close()
+	with pytest.raises(DataKeyError):
+		store.get(second)
+	store.get(first)
+	store.close()
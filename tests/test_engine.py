@@ -0,0 +1,168 @@
+# 🌸 FLORA - Pruebas del motor compartido y la API con lifespan
+
+import asyncio
+
+import pytest
+
+from python.engine import EnginePool, EngineWorkers, FloraEngine
+
+pytestmark = pytest.mark.integration
+
+
+def test_sessions_persist_and_are_scoped_by_password():
+	engine = FloraEngine(use_kyber=False, iterations=1000)
+	first = engine.encrypt(b"uno", "pw-a", "compartida", principal="cliente")
+	second = engine.encrypt(b"dos", "pw-a", "compartida", principal="cliente")
+	other = engine.encrypt(b"tres", "pw-b", "compartida", principal="cliente")
+
+	assert first['master_salt'] == second['master_salt']
+	assert (first['session_uses'], second['session_uses']) == (1, 2)
+	# Mismo ID de sesión con otra contraseña: sesión distinta, no la de pw-a
+	assert other['session_uses'] == 1 and other['session_salt'] != first['session_salt']
+	assert engine.status()['active_sessions'] == 2
+
+	assert engine.decrypt(second, "pw-a") == b"dos"
+	assert engine.decrypt(other, "pw-b") == b"tres"
+	with pytest.raises(ValueError):
+		engine.decrypt(first, "pw-b")
+
+
+def test_master_salt_is_only_reused_by_the_same_principal():
+	engine = FloraEngine(use_kyber=False, iterations=1000)
+	alice = engine.encrypt(b"a", "pw", "compartida", principal="alice")
+	bob = engine.encrypt(b"b", "pw", "compartida", principal="bob")
+	assert alice['master_salt'] != bob['master_salt']
+	assert engine.encrypt(b"c", "pw", "compartida", principal="alice")['master_salt'] == alice['master_salt']
+	# Sin principal no se recuerda ni se reutiliza ningún salt
+	anonymous = [engine.encrypt(b"d", "pw", "compartida")['master_salt'] for _ in range(2)]
+	assert len(set(anonymous) | {alice['master_salt'], bob['master_salt']}) == 4
+
+
+def test_failed_decrypts_do_not_lock_out_other_clients():
+	engine = EnginePool(iterations=1000).engine(False)
+	bundle = engine.encrypt(b"x", "alice", "t")
+	for _ in range(6):
+		with pytest.raises(ValueError):
+			engine.decrypt(bundle, "mallory")
+		with pytest.raises(ValueError):
+			engine.decrypt(dict(bundle, tag="00" * 16), "alice")
+	status = engine.status()
+	assert status['system_health'] == 1.0 and status['failed_attempts'] == 0
+	assert engine.decrypt(engine.encrypt(b"x", "bob", "t"), "bob") == b"x"
+	assert engine.decrypt(bundle, "alice") == b"x"
+
+
+def test_engine_workers_do_not_lock_out_after_failed_decrypts():
+	workers = EngineWorkers(workers=1, iterations=1000)
+
+	def attack(engines):
+		engine = engines.engine(False)
+		bundle = engine.encrypt(b"x", "alice", "t")
+		for _ in range(6):
+			with pytest.raises(ValueError):
+				engine.decrypt(dict(bundle, tag="00" * 16), "alice")
+		return engine.decrypt(engine.encrypt(b"y", "bob", "t"), "bob")
+
+	try:
+		assert asyncio.run(workers.run(attack)) == b"y"
+		assert asyncio.run(workers.run(lambda engines: engines.engine(False).status()['system_health'])) == 1.0
+	finally:
+		workers.close()
+
+
+def test_max_sessions_evicts_least_recently_used():
+	engine = FloraEngine(use_kyber=False, max_sessions=2, iterations=1000)
+	bundles = [engine.encrypt(b"x", "pw", f"s{i}") for i in range(3)]
+	assert engine.status()['active_sessions'] == 2
+	# La sesión expulsada se reconstruye desde el bundle
+	assert engine.decrypt(bundles[0], "pw") == b"x"
+
+
+def test_api_shares_engine_between_requests():
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+	from python.api import app
+
+	headers = {"X-API-Key": "flora-dev-key"}
+	with TestClient(app) as client:
+		assert isinstance(app.state.engines, EnginePool)
+		bodies = [client.post("/encrypt", headers=headers, json={"password": "p", "message": m, "session_id": "t"}).json()
+				  for m in ("a", "b")]
+		assert [b['session_uses'] for b in bodies] == [1, 2]
+		plain = client.post("/decrypt", headers=headers, json={"password": "p", "bundle": bodies[1]})
+		assert plain.json() == {"plaintext": "b"}
+		status = client.get("/status", headers=headers).json()
+		assert status['active_sessions'] >= 1 and status['engines']['pbkdf2']['requests'] == 3
+
+
+def test_api_default_session_does_not_share_master_salt(monkeypatch):
+	pytest.importorskip("httpx")
+	import json
+	from fastapi.testclient import TestClient
+	from python import api
+
+	monkeypatch.setattr(api, "API_KEYS", ("clave-alice", "clave-bob"))
+	alice, bob = {"X-API-Key": "clave-alice"}, {"X-API-Key": "clave-bob"}
+	with TestClient(api.app) as client:
+		salts = [client.post("/encrypt", headers=headers, json={"password": "p", "message": "m"}).json()['master_salt']
+				 for headers in (alice, alice, bob)]
+		assert len(set(salts)) == 3
+		named = [client.post("/encrypt", headers=headers, json={"password": "p", "message": "m", "session_id": "s"}).json()
+				 for headers in (alice, bob, alice)]
+		assert named[0]['master_salt'] == named[2]['master_salt'] != named[1]['master_salt']
+		batch = client.post("/encrypt/batch", headers=bob, json={"password": "p", "items": [{"message": "m"}]})
+		assert json.loads(batch.text.splitlines()[0])['bundle']['master_salt'] not in salts
+
+
+def test_encrypt_many_prefetches_exact_kyber_encapsulations():
+	from python.flora_crypto import FloraCryptoSystem
+	from python.kyber_keyring import KyberKeyring
+
+	keyring = KyberKeyring()
+	flora = FloraCryptoSystem(iterations=1000, use_kyber=True, kyber_keyring=keyring, session_max_uses=3)
+	master_key, _ = flora.generate_master_key("pw", b"s" * 32)
+	calls = []
+	original = keyring.encapsulate_many
+	keyring.encapsulate_many = lambda count, variant: calls.append(count) or original(count, variant)
+
+	results = flora.encrypt_many([b"m%d" % i for i in range(7)], master_key, "lote", [b"ad"] * 7)
+	assert calls == [3] and not flora._kyber_prefetch
+	assert len({r['kem']['ciphertext'] for r in results}) == 3
+
+	results[1] = dict(results[1], tag="00" * 16)
+	plain = flora.decrypt_many(results, master_key)
+	assert isinstance(plain[1], Exception)
+	assert [p for i, p in enumerate(plain) if i != 1] == [b"m%d" % i for i in range(7) if i != 1]
+
+
+def test_api_batch_endpoints_stream_per_item_results():
+	pytest.importorskip("httpx")
+	import json
+	from fastapi.testclient import TestClient
+	from python.api import app
+
+	headers = {"X-API-Key": "flora-dev-key"}
+	items = [{"message": f"m{i}"} for i in range(5)] + [{"message": "x", "associated_data_hex": "zz"}]
+	with TestClient(app) as client:
+		response = client.post("/encrypt/batch", headers=headers, json={"password": "p", "items": items})
+		assert response.headers["content-type"].startswith("application/x-ndjson")
+		lines = [json.loads(line) for line in response.text.splitlines()]
+		assert [line['index'] for line in lines] == list(range(6))
+		assert "error" in lines[5] and len({line['bundle']['master_salt'] for line in lines[:5]}) == 1
+
+		bundles = [line['bundle'] for line in lines[:5]] + [dict(lines[0]['bundle'], master_salt="00" * 32)]
+		response = client.post("/decrypt/batch", headers=headers, json={"password": "p", "bundles": bundles})
+		decoded = [json.loads(line) for line in response.text.splitlines()]
+		assert [d.get('plaintext') for d in decoded[:5]] == [f"m{i}" for i in range(5)]
+		assert "error" in decoded[5]
+
+		# Bundles manipulados en un lote: error por elemento, el worker sigue sano
+		tampered = [dict(b, tag="00" * 16) for b in bundles[:5]] * 2
+		response = client.post("/decrypt/batch", headers=headers, json={"password": "p", "bundles": tampered})
+		assert all("error" in json.loads(line) for line in response.text.splitlines())
+		assert client.get("/status", headers=headers).json()['system_health'] == 1.0
+		other = client.post("/encrypt", headers=headers, json={"password": "otro", "message": "ok", "session_id": "t"})
+		assert other.status_code == 200
+
+		too_many = [{"message": "x"}] * 1001
+		assert client.post("/encrypt/batch", headers=headers, json={"password": "p", "items": too_many}).status_code == 422
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+try:
+	from python import ffi_cpp
+except OSError:
+	pytest.skip("flora_c no está compilada (cmake -S src/cpp -B src/cpp/build)", allow_module_level=True)
+
+from Crypto.Cipher import AES
+
+KEY = bytes(range(32))
+NONCE = bytes(12)
+
+
+def reference(plaintext, ad=b""):
+	cipher = AES.new(KEY, AES.MODE_GCM, nonce=NONCE)
+	cipher.update(ad)
+	return cipher.encrypt_and_digest(plaintext)
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview, lambda b: memoryview(b"_" + b)[1:]])
+def test_buffers_are_passed_without_copies_and_match_reference(wrap):
+	for size in (0, 1, 1000, 70000):
+		plaintext = os.urandom(size)
+		ct, tag = ffi_cpp.aes_gcm_encrypt(KEY, NONCE, wrap(plaintext), wrap(b"ad"))
+		assert isinstance(ct, bytearray) and len(ct) == size
+		assert (bytes(ct), bytes(tag)) == reference(plaintext, b"ad")
+		assert ffi_cpp.aes_gcm_decrypt(wrap(KEY), NONCE, wrap(bytes(ct)), tag, b"ad") == plaintext
+
+
+def test_combined_helpers_and_tag_failure():
+	nonce, out = ffi_cpp.cpp_encrypt(KEY, b"hola flora")
+	assert len(out) == 10 + 16
+	assert ffi_cpp.cpp_decrypt(KEY, nonce, bytes(out)) == b"hola flora"
+	out[-1] ^= 1
+	with pytest.raises(RuntimeError):
+		ffi_cpp.cpp_decrypt(KEY, nonce, out)
+
+
+def test_context_reuses_key_across_messages_and_closes():
+	with ffi_cpp.AesGcmContext(KEY) as ctx:
+		for i in range(3):
+			ct, tag = ctx.encrypt(NONCE, b"m" * i, b"ad")
+			assert (bytes(ct), bytes(tag)) == reference(b"m" * i, b"ad")
+			assert ctx.decrypt(NONCE, ct, tag, b"ad") == b"m" * i
+		with pytest.raises(RuntimeError):
+			ctx.decrypt(NONCE, ct, bytes(16), b"ad")
+		# Un fallo de tag no deja el contexto inutilizable
+		assert ctx.decrypt(NONCE, ct, tag, b"ad") == b"mm"
+	with pytest.raises(ValueError):
+		ctx.encrypt(NONCE, b"x")
+	with pytest.raises(ValueError):
+		ffi_cpp.AesGcmContext(b"corta")
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_batch_matches_single_calls_and_reports_per_message_status(threads):
+	messages = [os.urandom(i * 5000) for i in range(40)]
+	batch = ffi_cpp.aes_gcm_encrypt_batch(KEY, messages, associated_data=b"ad", threads=threads)
+	assert batch.ok and len(batch.output) == sum(map(len, messages))
+	for i, message in enumerate(messages):
+		ct, tag = ffi_cpp.aes_gcm_encrypt(KEY, batch.nonce(i), message, b"ad")
+		assert (bytes(batch.message(i)), batch.tag(i)) == (bytes(ct), bytes(tag))
+
+	# Buffer contiguo + offsets (las longitudes se deducen); un tag alterado solo falla su mensaje
+	tags = bytearray(batch.tags)
+	tags[16 * 7] ^= 1
+	result = ffi_cpp.aes_gcm_decrypt_batch(KEY, batch.output, batch.nonces, tags, b"ad",
+										   offsets=batch.offsets, threads=threads)
+	assert [i for i, status in enumerate(result.status) if status] == [7]
+	assert result.message(7) == bytes(len(messages[7]))
+	assert [bytes(result.message(i)) for i in range(40) if i != 7] == messages[:7] + messages[8:]
+	with pytest.raises(ValueError):
+		ffi_cpp.aes_gcm_decrypt_batch(KEY, messages, batch.nonces[:-1], batch.tags)
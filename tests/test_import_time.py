@@ -0,0 +1,64 @@
+# 🌸 FLORA - Pruebas del tiempo de importación (CLI y paquete flora perezosos)
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Módulos que `flora --help` e `import flora` no deben cargar
+HEAVY = ("numpy", "Crypto", "cffi", "python.flora_crypto", "python.chaotic_map", "python.mlkem_numpy",
+		 "python.ffi_cpp", "python.ffi_rust")
+
+
+def importtime(*args):
+	"""Ejecuta python -X importtime -> {módulo: tiempo acumulado en µs}."""
+	env = dict(os.environ, PYTHONPATH=SRC)
+	result = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True,
+							env=env, cwd=SRC, check=True)
+	modules = {}
+	for line in result.stderr.splitlines():
+		if line.startswith("import time:") and "|" in line:
+			_, cumulative, name = line[len("import time:"):].split("|")
+			if cumulative.strip().isdigit():
+				modules[name.strip()] = int(cumulative)
+	return modules, result.stdout
+
+
+def assert_light(modules):
+	loaded = [name for name in modules if name.split(".")[0] in HEAVY or name in HEAVY]
+	assert not loaded, f"importaciones pesadas al arrancar: {loaded}"
+
+
+def test_cli_help_does_not_load_crypto_stack():
+	modules, output = importtime("-m", "python.cli", "--help")
+	assert "encrypt-tree" in output
+	assert_light(modules)
+	modules, _ = importtime("-c", "import python.cli")
+	assert_light(modules)
+
+
+def test_import_flora_is_lazy():
+	modules, _ = importtime("-c", "import flora, python; python.__version__")
+	assert_light(modules)
+	# El primer uso carga el símbolo real
+	modules, output = importtime("-c", "import flora; print(flora.FloraCryptoSystem.__name__)")
+	assert output.strip() == "FloraCryptoSystem"
+	assert "python.chaotic_map" in modules
+
+
+def test_import_errors_in_required_sources_propagate(monkeypatch):
+	import flora
+	real_import = flora.importlib.import_module
+
+	def broken(name):
+		if name == "python.flora_crypto":
+			raise ImportError("Crypto no instalado")
+		return real_import(name)
+
+	monkeypatch.setattr(flora.importlib, "import_module", broken)
+	monkeypatch.delitem(flora.__dict__, "FloraCryptoSystem", raising=False)
+	with pytest.raises(ImportError, match="Crypto no instalado"):
+		flora.FloraCryptoSystem
@@ -0,0 +1,112 @@
+import sqlite3
+import time
+
+import pytest
+
+from python.key_handles import KeyHandleError, KeyHandleStore
+
+
+def test_handle_roundtrip_and_usage_metrics(tmp_path):
+	store = KeyHandleStore(tmp_path / "keys.db")
+	created = store.create(b"k" * 32, b"s" * 32, ttl=60)
+	assert created['key_handle'].startswith("fkh_") and created['key_id'] in created['key_handle']
+
+	# Otro proceso/worker con el mismo fichero resuelve el mismo handle
+	other = KeyHandleStore(tmp_path / "keys.db")
+	assert other.resolve(created['key_handle']) == (b"k" * 32, b"s" * 32)
+	assert store.resolve(created['key_handle'])[0] == b"k" * 32
+	assert store.info(created['key_id'])['uses'] == 2
+
+	# El secreto no se persiste: la fila sola no basta para desenvolver la clave
+	forged = created['key_handle'][:-4] + ("AAAA" if not created['key_handle'].endswith("AAAA") else "BBBB")
+	with pytest.raises(KeyHandleError):
+		store.resolve(forged)
+	stats = other.stats()
+	assert (stats['created'], stats['resolved'], stats['rejected'], stats['active']) == (1, 2, 1, 1)
+
+
+def test_revocation_expiry_and_bound(tmp_path):
+	store = KeyHandleStore(tmp_path / "keys.db", max_handles=2)
+	first = store.create(b"1" * 32, b"s" * 32)
+	assert store.revoke(first['key_id']) and not store.revoke(first['key_id'])
+	with pytest.raises(KeyHandleError):
+		store.resolve(first['key_handle'])
+
+	handles = [store.create(b"%d" % i * 32, b"s" * 32) for i in range(3)]
+	with pytest.raises(KeyHandleError):
+		store.resolve(handles[0]['key_handle'])
+	assert store.stats()['evicted'] == 1 and len(store) == 2
+
+	# Alargar la caducidad editando la base de datos invalida el handle
+	db = sqlite3.connect(str(tmp_path / "keys.db"))
+	db.execute("UPDATE key_handles SET expires = expires + 100")
+	db.commit()
+	with pytest.raises(KeyHandleError):
+		store.resolve(handles[2]['key_handle'])
+
+	short = store.create(b"x" * 32, b"s" * 32, ttl=1)
+	time.sleep(1.1)
+	with pytest.raises(KeyHandleError):
+		store.resolve(short['key_handle'])
+
+
+def test_info_and_revoke_are_scoped_to_the_creating_principal(tmp_path):
+	# Almacén creado antes de la columna principal: se migra al abrirlo
+	db = sqlite3.connect(str(tmp_path / "keys.db"))
+	db.execute("CREATE TABLE key_handles (id TEXT PRIMARY KEY, wrapped BLOB NOT NULL, master_salt BLOB NOT NULL, "
+			   "created REAL NOT NULL, expires INTEGER NOT NULL, last_used REAL NOT NULL, uses INTEGER NOT NULL DEFAULT 0)")
+	db.commit()
+	store = KeyHandleStore(tmp_path / "keys.db")
+	mine = store.create(b"k" * 32, b"s" * 32, principal="alice")
+	with pytest.raises(KeyHandleError):
+		store.info(mine['key_id'], principal="bob")
+	assert not store.revoke(mine['key_id'], principal="bob")
+	assert store.info(mine['key_id'], principal="alice")['uses'] == 0
+	assert store.revoke(mine['key_handle'], principal="alice")
+
+
+def test_api_key_handles_replace_password(tmp_path, monkeypatch):
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+	from python.api import app
+
+	monkeypatch.setenv("FLORA_KEY_STORE", str(tmp_path / "api_keys.db"))
+	headers = {"X-API-Key": "flora-dev-key"}
+	with TestClient(app) as client:
+		key = client.post("/keys", headers=headers, json={"password": "p", "ttl_seconds": 120}).json()
+		handle = key['key_handle']
+		bundle = client.post("/encrypt", headers=headers, json={"key_handle": handle, "message": "hola"}).json()
+		assert bundle['master_salt'] == key['master_salt']
+		assert client.post("/decrypt", headers=headers, json={"password": "p", "bundle": bundle}).json() == {"plaintext": "hola"}
+		assert client.post("/decrypt", headers=headers, json={"key_handle": handle, "bundle": bundle}).json() == {"plaintext": "hola"}
+
+		other = client.post("/encrypt", headers=headers, json={"password": "p", "message": "x", "session_id": "o"}).json()
+		assert client.post("/decrypt", headers=headers, json={"key_handle": handle, "bundle": other}).status_code == 400
+		assert client.post("/encrypt", headers=headers, json={"message": "x"}).status_code == 400
+
+		streamed = client.post("/encrypt/stream", headers={**headers, "X-Flora-Key-Handle": handle}, content=b"datos" * 1000)
+		plain = client.post("/decrypt/stream", headers={**headers, "X-Flora-Password": "p"}, content=streamed.content)
+		assert plain.content == b"datos" * 1000
+
+		assert client.get(f"/keys/{key['key_id']}", headers=headers).json()['uses'] == 4
+		assert client.delete(f"/keys/{key['key_id']}", headers=headers).json()['revoked']
+		assert client.post("/encrypt", headers=headers, json={"key_handle": handle, "message": "x"}).status_code == 401
+		assert client.get("/keys", headers=headers).json()['revoked'] == 1
+
+
+def test_api_keys_cannot_be_inspected_or_revoked_by_other_api_keys(tmp_path, monkeypatch):
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+	from python import api
+
+	monkeypatch.setenv("FLORA_KEY_STORE", str(tmp_path / "api_keys.db"))
+	monkeypatch.setattr(api, "API_KEYS", ("clave-alice", "clave-bob"))
+	alice, bob = {"X-API-Key": "clave-alice"}, {"Authorization": "Bearer clave-bob"}
+	with TestClient(api.app) as client:
+		key = client.post("/keys", headers=alice, json={"password": "p"}).json()
+		assert client.get(f"/keys/{key['key_id']}", headers=bob).status_code == 404
+		assert client.delete(f"/keys/{key['key_id']}", headers=bob).status_code == 404
+		assert client.get(f"/keys/{key['key_id']}", headers=alice).status_code == 200
+		assert client.post("/encrypt", headers=bob, json={"key_handle": key['key_handle'], "message": "x"}).status_code == 200
+		assert client.delete(f"/keys/{key['key_id']}", headers=alice).json()['revoked']
+		assert client.delete(f"/keys/{key['key_id']}", headers={"X-API-Key": "otra"}).status_code == 401
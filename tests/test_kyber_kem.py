@@ -0,0 +1,105 @@
+# 🌸 FLORA - Pruebas del wrapper Kyber KEM
+
+import threading
+
+import pytest
+
+from python.kyber_kem import KyberBackendRegistry, KyberKEM, normalize_variant
+
+pytestmark = pytest.mark.crypto
+
+
+def test_normalize_variant():
+	assert normalize_variant(512) == "kyber512"
+	assert normalize_variant("Kyber-768") == "kyber768"
+	assert normalize_variant("1024") == "kyber1024"
+	with pytest.raises(ValueError):
+		normalize_variant(256)
+
+
+def test_registry_resolves_once_per_variant():
+	calls = []
+
+	def loader(level):
+		calls.append(level)
+		raise ImportError("sin backend")
+
+	registry = KyberBackendRegistry()
+	registry.register("missing", loader)
+	threads = [threading.Thread(target=registry.resolve, args=(768,)) for _ in range(16)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	assert registry.resolve("kyber768") == (None, None)
+	assert calls == [768]
+	assert registry.snapshot() == {"kyber768": None}
+
+	registry.reset()
+	registry.resolve(768)
+	assert calls == [768, 768]
+
+
+def test_registry_falls_through_to_next_backend():
+	registry = KyberBackendRegistry()
+	registry.register("broken", lambda level: (_ for _ in ()).throw(ImportError()))
+	registry.register("fake", lambda level: (object(), f"fake-{level}"))
+	impl, name = registry.resolve(1024)
+	assert impl is not None and name == "fake-1024"
+
+
+def test_kem_records_selected_variant():
+	kem = KyberKEM(prefer_variant=768)
+	assert kem.prefer_variant == "kyber768"
+	assert kem.level == 768
+
+
+class _LoopOnlyBackend:
+	"""Backend mínimo sin API por lotes (como pqcrypto)."""
+
+	CIPHERTEXT_SIZE = 8
+
+	def generate_keypair(self):
+		return b"pk" * 4, b"sk" * 4
+
+	def encrypt(self, pk):
+		ct = bytes(reversed(pk))
+		return ct, b"ss" + ct
+
+	def decrypt(self, sk, ct):
+		return b"ss" + ct
+
+
+def _kem_with(impl, name):
+	kem = KyberKEM()
+	kem.impl, kem.variant, kem.available = impl, name, True
+	return kem
+
+
+@pytest.mark.parametrize("name", ["numpy-fake", "native-fake"])
+def test_encaps_many_loop_and_threaded(name):
+	kem = _kem_with(_LoopOnlyBackend(), name)
+	keys = [bytes([i] * 8) for i in range(100)]
+	batch = kem.encaps_many(keys, workers=4)
+	assert kem.releases_gil == (name == "native-fake")
+	assert batch.count == 100 and batch.ciphertext_size == 8 and batch.shared_secret_size == 10
+	assert batch.pairs() == [kem.encaps(pk) for pk in keys]
+	assert batch.ciphertext(-1) == keys[-1]
+
+	dec = kem.decaps_many(b"sk", batch.ciphertexts, workers=4)
+	assert dec.shared_secrets == batch.shared_secrets
+
+
+def test_encaps_many_with_single_key_and_count():
+	kem = KyberKEM(768)
+	pk, sk = kem.keygen()
+	batch = kem.encaps_many(pk, count=20)
+	assert batch.count == 20
+	assert len({batch.ciphertext(i) for i in range(20)}) == 20
+	assert kem.decaps_many(sk, batch.ciphertexts).shared_secrets == batch.shared_secrets
+	assert kem.decaps(sk, batch.ciphertext(3)) == batch.shared_secret(3)
+	assert kem.encaps_many(pk, count=0).count == 0
+	with pytest.raises(ValueError):
+		kem.encaps_many([pk], count=2)
+	with pytest.raises(ValueError):
+		kem.decaps_many(sk, batch.ciphertexts[:-1])
@@ -0,0 +1,116 @@
+# 🌸 FLORA - Pruebas del keyring Kyber y su integración con FloraCryptoSystem
+
+import os
+import stat
+
+import pytest
+
+from python.flora_crypto import FloraCryptoSystem
+from python.kyber_keyring import KyberKeyring, key_id_for
+
+pytestmark = pytest.mark.crypto
+
+
+def _system(keyring, **kwargs):
+	flora = FloraCryptoSystem(iterations=1000, use_kyber=True, kyber_keyring=keyring, **kwargs)
+	assert flora.kyber_enabled
+	return flora
+
+
+def test_keyring_persists_keys_and_rotations(tmp_path):
+	path = tmp_path / "keyring.json"
+	keyring = KyberKeyring(path)
+	key_id, ct, ss = keyring.encapsulate(768)
+	assert key_id == key_id_for(keyring.public_key(key_id))
+	assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+	new_id = keyring.rotate(768)
+	assert new_id != key_id and keyring.current_key_id(768) == new_id
+
+	reloaded = KyberKeyring(path)
+	assert set(reloaded.key_ids()) == {key_id, new_id}
+	assert reloaded.current_key_id("kyber768") == new_id
+	assert reloaded.decapsulate(key_id, ct) == ss
+	with pytest.raises(ValueError):
+		reloaded.decapsulate("0" * 32, ct)
+
+
+def test_processes_sharing_a_keyring_file_see_each_others_keys(tmp_path):
+	path = tmp_path / "keyring.json"
+	first, second = KyberKeyring(path), KyberKeyring(path)
+	# Ambos se crearon antes de que existiera ninguna clave: el segundo adopta la del primero
+	key_id, ct, ss = first.encapsulate()
+	assert second.current_key_id() == key_id
+	# Una rotación en un proceso no pisa las claves que el otro escribió antes
+	rotated = second.rotate()
+	other = first.generate(768)
+	reloaded = KyberKeyring(path)
+	assert set(reloaded.key_ids()) == {key_id, rotated, other}
+	assert first.decapsulate(rotated, second.encapsulate()[1]) is not None
+	assert second.decapsulate(key_id, ct) == ss
+
+
+def test_default_keyring_is_persistent(monkeypatch, tmp_path):
+	from python import kyber_keyring
+	monkeypatch.setenv(kyber_keyring.KEYRING_ENV, str(tmp_path / "default.json"))
+	monkeypatch.setattr(kyber_keyring, "_default_keyring", None)
+	flora = _system(None)
+	master_key, _ = flora.generate_master_key("pw", b"s" * 32)
+	bundle = flora.encrypt_message(b"tras reiniciar", master_key, "s1")
+	assert _system(KyberKeyring(tmp_path / "default.json")).decrypt_message(bundle, master_key) == b"tras reiniciar"
+
+
+def test_default_keyring_without_env_stays_in_memory(monkeypatch, tmp_path):
+	from python import kyber_keyring
+	monkeypatch.setenv("HOME", str(tmp_path))
+	monkeypatch.delenv(kyber_keyring.KEYRING_ENV, raising=False)
+	monkeypatch.setattr(kyber_keyring, "_default_keyring", None)
+	flora = _system(None)
+	master_key, _ = flora.generate_master_key("pw", b"s" * 32)
+	bundle = flora.encrypt_message(b"solo en memoria", master_key, "s1")
+	assert flora.decrypt_message(bundle, master_key) == b"solo en memoria"
+	assert flora.kyber_keyring.path is None
+	assert list(tmp_path.iterdir()) == []
+
+
+def test_encaps_reuses_key_and_caches_shared_secrets(monkeypatch):
+	keyring = KyberKeyring()
+	first = keyring.encapsulate()
+	second = keyring.encapsulate()
+	assert first[0] == second[0] and len(keyring) == 1
+
+	fresh = KyberKeyring()
+	fresh._keys, fresh._current = keyring._keys, keyring._current
+	calls = []
+	kem = fresh._kem("kyber512")
+	original = kem.decaps
+	monkeypatch.setattr(kem, "decaps", lambda sk, ct: calls.append(ct) or original(sk, ct))
+	assert fresh.decapsulate(first[0], first[1]) == first[2]
+	assert fresh.decapsulate(first[0], first[1]) == first[2]
+	assert len(calls) == 1
+
+
+def test_stateless_decrypt_across_instances_and_rotations(tmp_path):
+	path = tmp_path / "keyring.json"
+	sender = _system(str(path), session_max_uses=2, kyber_variant="kyber768")
+	master_key, _ = sender.generate_master_key("pw", b"s" * 32)
+	bundles = [sender.encrypt_message(b"msg-%d" % i, master_key, "s1") for i in range(5)]
+	assert all(b['kem']['key_id'] and b['kem']['variant'] == "kyber768" for b in bundles)
+	# Cada bundle describe la clave con la que se cifró, no la rotada después
+	assert bundles[0]['kem'] == bundles[1]['kem'] != bundles[2]['kem']
+
+	receiver = _system(KyberKeyring(path))
+	for i, bundle in enumerate(bundles):
+		assert receiver.decrypt_message(bundle, master_key) == b"msg-%d" % i
+	# El emisor también descifra bundles de claves ya rotadas
+	assert sender.decrypt_message(bundles[0], master_key) == b"msg-0"
+
+
+def test_kyber_session_key_is_bound_to_master_key():
+	keyring = KyberKeyring()
+	flora = _system(keyring)
+	master_key, _ = flora.generate_master_key("pw", b"s" * 32)
+	other_key, _ = flora.generate_master_key("otra", b"s" * 32)
+	bundle = flora.encrypt_message(b"secreto", master_key, "s1")
+	with pytest.raises(ValueError):
+		_system(keyring).decrypt_message(bundle, other_key)
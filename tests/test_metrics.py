@@ -0,0 +1,91 @@
+import importlib.util
+import json
+import os
+import threading
+
+import pytest
+
+from python.metrics import MetricsRegistry
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_render_prometheus_text_and_threaded_counters():
+	registry = MetricsRegistry()
+	hits = registry.counter("t_hits_total", "Aciertos", ["route"])
+	latency = registry.histogram("t_latency_seconds", "Latencia", ["route"], buckets=(0.1, 1.0))
+	in_flight = registry.gauge("t_in_flight", "En curso")
+
+	def work():
+		for _ in range(1000):
+			hits.labels("/a").inc()
+	threads = [threading.Thread(target=work) for _ in range(8)]
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	for value in (0.05, 0.5, 5.0):
+		latency.labels(route='/a"b').observe(value)
+	in_flight.labels().inc(3)
+	in_flight.labels().dec()
+
+	text = registry.render()
+	assert "# TYPE t_hits_total counter" in text
+	assert 't_hits_total{route="/a"} 8000' in text
+	assert 't_latency_seconds_bucket{route="/a\\"b",le="0.1"} 1' in text
+	assert 't_latency_seconds_bucket{route="/a\\"b",le="1"} 2' in text
+	assert 't_latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in text
+	assert 't_latency_seconds_count{route="/a\\"b"} 3' in text
+	assert "t_in_flight 2" in text
+
+
+def test_multiprocess_snapshots_are_merged(tmp_path):
+	registry = MetricsRegistry(str(tmp_path))
+	registry.counter("t_ops_total", "Operaciones", ["op"]).labels("enc").inc(2)
+	registry.gauge("t_busy", "Ocupados").labels().set(1)
+
+	# Instantánea de otro worker ya terminado: cuenta su contador, no su gauge
+	other = registry.snapshot()
+	other['pid'] = 2 ** 22 + 12345
+	(tmp_path / f"flora-metrics-{other['pid']}.json").write_text(json.dumps(other))
+
+	text = registry.render()
+	assert 't_ops_total{op="enc"} 4' in text
+	assert "t_busy 1" in text
+
+
+def test_api_metrics_endpoint_reports_routes_and_crypto_stages():
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+	from python.api import app
+
+	headers = {"X-API-Key": "flora-dev-key"}
+	with TestClient(app) as client:
+		bundle = client.post("/encrypt", headers=headers, json={"password": "p", "message": "m", "session_id": "met"}).json()
+		client.post("/decrypt", headers=headers, json={"password": "p", "bundle": bundle})
+		client.get("/keys/desconocido", headers=headers)
+		response = client.get("/metrics")
+	assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+	text = response.text
+	assert 'flora_http_request_duration_seconds_count{app="api",route="/encrypt",method="POST",status="200"}' in text
+	assert 'route="/keys/{key_id}",method="GET",status="404"' in text
+	assert 'flora_crypto_stage_duration_seconds_count{stage="aead_encrypt"}' in text
+	assert 'flora_kdf_cache_requests_total{cache="master_key",result="miss"}' in text
+	assert 'flora_http_requests_in_flight{app="api"}' in text
+
+
+def test_secure_api_counts_rate_limit_rejections():
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+
+	spec = importlib.util.spec_from_file_location("flora_secure_api_main", os.path.join(ROOT, "api", "main.py"))
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	module.SECURITY_CONFIG["rate_limits"]["default"] = {"requests": 2, "window": 60}
+
+	with TestClient(module.app, base_url="http://localhost") as client:
+		codes = [client.get("/health").status_code for _ in range(3)]
+		text = client.get("/metrics").text
+	assert codes == [200, 200, 429]
+	assert 'flora_rate_limit_rejections_total{app="secure_api",route="default",reason="window"}' in text
+	assert 'app="secure_api",route="/health",method="GET",status="429"' in text
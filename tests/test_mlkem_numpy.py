@@ -0,0 +1,116 @@
+# 🌸 FLORA - Pruebas del backend ML-KEM en NumPy (vectores KAT de NIST ACVP)
+
+import json
+from pathlib import Path
+
+import pytest
+
+from python.kyber_kem import KyberBackendRegistry, KyberKEM, _load_numpy_mlkem
+from python.mlkem_numpy import BACKENDS, MLKEM, intt, ntt
+
+pytestmark = pytest.mark.crypto
+
+KAT_PATH = Path(__file__).parent / "data" / "mlkem_acvp_kat.json"
+KAT = json.loads(KAT_PATH.read_text())
+
+
+def _backend(parameter_set: str) -> MLKEM:
+	return BACKENDS[int(parameter_set.rsplit("-", 1)[1])]
+
+
+def _h(value: str) -> bytes:
+	return bytes.fromhex(value)
+
+
+@pytest.mark.parametrize("case", KAT["keyGen"], ids=lambda c: f"{c['parameterSet']}-{c['tcId']}")
+def test_keygen_kat(case):
+	ek, dk = _backend(case["parameterSet"]).keygen_internal(_h(case["d"]), _h(case["z"]))
+	assert ek == _h(case["ek"])
+	assert dk == _h(case["dk"])
+
+
+@pytest.mark.parametrize("case", KAT["encapsulation"], ids=lambda c: f"{c['parameterSet']}-{c['tcId']}")
+def test_encapsulation_kat(case):
+	key, ct = _backend(case["parameterSet"]).encaps_internal(_h(case["ek"]), _h(case["m"]))
+	assert ct == _h(case["c"])
+	assert key == _h(case["k"])
+
+
+@pytest.mark.parametrize("group", KAT["decapsulation"], ids=lambda g: g["parameterSet"])
+def test_decapsulation_kat_with_implicit_rejection(group):
+	kem = _backend(group["parameterSet"])
+	for case in group["tests"]:
+		assert kem.decaps_internal(_h(group["dk"]), _h(case["c"])) == _h(case["k"]), case["reason"]
+
+
+def test_ntt_roundtrip():
+	import numpy as np
+
+	f = np.random.default_rng(1).integers(0, 3329, size=(3, 256))
+	assert np.array_equal(intt(ntt(f)), f)
+
+
+@pytest.mark.parametrize("level", [512, 768, 1024])
+def test_roundtrip_and_sizes(level):
+	kem = BACKENDS[level]
+	pk, sk = kem.generate_keypair()
+	ct, ss = kem.encrypt(pk)
+	assert (len(pk), len(sk), len(ct)) == (kem.ek_size, kem.dk_size, kem.ciphertext_size)
+	assert kem.decrypt(sk, ct) == ss
+
+
+def test_rejects_malformed_keys():
+	kem = BACKENDS[512]
+	pk, sk = kem.generate_keypair()
+	with pytest.raises(ValueError):
+		kem.encrypt(pk[:-1])
+	# Coeficiente 0xFFF >= q en el primer polinomio: falla la comprobación de módulo
+	with pytest.raises(ValueError):
+		kem.encrypt(b"\xff\xff" + pk[2:])
+	tampered = bytearray(sk)
+	tampered[-40] ^= 1
+	with pytest.raises(ValueError):
+		kem.decrypt(bytes(tampered), kem.encrypt(pk)[0])
+
+
+def test_kyberkem_falls_back_to_numpy_backend():
+	registry = KyberBackendRegistry()
+	registry.register("missing", lambda level: (_ for _ in ()).throw(ImportError()))
+	registry.register("numpy-ml-kem", _load_numpy_mlkem)
+	impl, name = registry.resolve(768)
+	assert impl is BACKENDS[768] and name == "numpy-ml-kem-768"
+
+	kem = KyberKEM(1024)
+	assert kem.available
+	pk, sk = kem.keygen()
+	ct, ss = kem.encaps(pk)
+	assert kem.decaps(sk, ct) == ss
+
+
+def test_batched_encaps_with_mixed_recipients():
+	kem = BACKENDS[768]
+	keypairs = [kem.generate_keypair() for _ in range(3)]
+	cts, shared = kem.encrypt_many([pk for pk, _ in keypairs] * 2)
+	for i, (ct, ss) in enumerate(zip(cts, shared)):
+		assert kem.decrypt(keypairs[i % 3][1], ct) == ss
+	sk = keypairs[0][1]
+	assert kem.decrypt_many(sk, cts[0::3]) == shared[0::3]
+
+
+def test_default_bundles_stay_password_only_and_decrypt_in_a_fresh_process():
+	# Con el backend integrado Kyber está siempre disponible, pero sigue siendo
+	# opcional: el bundle por defecto solo depende de la contraseña
+	import os
+	import subprocess
+	import sys
+
+	src = Path(__file__).parent.parent / "src"
+	env = dict(os.environ, PYTHONPATH=str(src))
+	prelude = ("import json, sys; from python.flora_crypto import FloraCryptoSystem; "
+			   "flora = FloraCryptoSystem(iterations=1000); key, _ = flora.generate_master_key('pw', b's' * 32); ")
+	bundle = subprocess.run([sys.executable, "-c", prelude + "print(json.dumps(flora.encrypt_message(b'hola', key, 's1')))"],
+							env=env, capture_output=True, text=True, check=True).stdout.splitlines()[-1]
+	assert not json.loads(bundle).get('kem')
+	plain = subprocess.run([sys.executable, "-c", prelude + "print(flora.decrypt_message(json.loads(sys.stdin.read()), key).decode())"],
+						   env=env, input=bundle, capture_output=True, text=True, check=True).stdout
+	assert plain.splitlines()[-1] == "hola"
@@ -0,0 +1,107 @@
+# 🌸 FLORA - Pruebas del rate limiting compartido entre workers (ventana deslizante)
+
+import multiprocessing
+
+import pytest
+
+from python.rate_limit import SharedMemoryRateLimitStore, SlidingWindowRateLimiter, create_rate_limit_store, fcntl
+
+shared_only = pytest.mark.skipif(fcntl is None or "fork" not in multiprocessing.get_all_start_methods(),
+								 reason="la tabla compartida necesita fcntl y fork")
+
+
+def test_limit_slides_with_weighted_previous_window():
+	limiter = SlidingWindowRateLimiter(shards=4)
+	key = ("10.0.0.1", "/api/v1/encrypt")
+	assert all(limiter.hit(key, 5, 10, now=100.0 + i * 0.1).allowed for i in range(5))
+	assert not limiter.hit(key, 5, 10, now=101.0).allowed
+	# Otra clave tiene su propia cuota
+	assert limiter.hit(("10.0.0.2", "/api/v1/encrypt"), 5, 10, now=101.0).allowed
+	# A mitad de la ventana siguiente la anterior pesa 5 * 0.5 = 2.5 -> caben 2
+	assert [limiter.hit(key, 5, 10, now=115.0).allowed for _ in range(3)] == [True, True, False]
+	# Dos ventanas después la cuota está libre de nuevo
+	assert all(limiter.hit(key, 5, 10, now=130.0).allowed for _ in range(5))
+
+
+def test_release_and_idle_eviction():
+	limiter = SlidingWindowRateLimiter(shards=2, sweep_interval=5)
+	key = "cliente"
+	assert limiter.hit(key, 1, 60, now=0.0).allowed
+	limiter.release(key, 60, now=1.0)
+	assert limiter.hit(key, 1, 60, now=2.0).allowed
+
+	for i in range(1000):
+		limiter.hit(f"10.1.{i // 256}.{i % 256}", 10, 1, now=3.0)
+	assert len(limiter) == 1001
+	# Los clientes sin actividad en dos ventanas se eliminan al barrer cada fragmento
+	limiter.hit("otro", 10, 1, now=10.0)
+	limiter.sweep(now=10.0)
+	assert len(limiter) == 2
+
+
+def _worker_hits(path, start, results, hits):
+	store = SharedMemoryRateLimitStore(path, slots=1024, stripes=16)
+	start.wait()
+	allowed = sum(store.hit(("10.0.0.1", "/api/v1/encrypt"), 500, 60).allowed for _ in range(hits))
+	results.put(allowed)
+	store.close()
+
+
+@shared_only
+def test_shared_store_enforces_global_limit_across_workers(tmp_path):
+	path = str(tmp_path / "limits.shm")
+	context = multiprocessing.get_context("fork")
+	start, results = context.Event(), context.Queue()
+	workers = [context.Process(target=_worker_hits, args=(path, start, results, 300)) for _ in range(4)]
+	for worker in workers:
+		worker.start()
+	start.set()
+	allowed = [results.get(timeout=30) for _ in workers]
+	for worker in workers:
+		worker.join(timeout=30)
+	# 4 workers x 300 peticiones contra un límite global de 500
+	assert sum(allowed) == 500
+
+
+@shared_only
+def test_shared_store_matches_in_process_semantics(tmp_path):
+	store = create_rate_limit_store(str(tmp_path / "limits.shm"))
+	assert isinstance(store, SharedMemoryRateLimitStore)
+	key = ("10.0.0.1", "/api/v1/encrypt")
+	assert all(store.hit(key, 5, 10, now=100.0).allowed for _ in range(5))
+	assert not store.hit(key, 5, 10, now=101.0).allowed
+	assert [store.hit(key, 5, 10, now=115.0).allowed for _ in range(3)] == [True, True, False]
+	store.release(key, 10, now=115.0)
+	assert store.hit(key, 5, 10, now=115.0).allowed
+	# Otro proceso (u otra instancia) ve los mismos contadores
+	other = SharedMemoryRateLimitStore(store.path)
+	assert not other.hit(key, 5, 10, now=115.0).allowed
+	other.close()
+
+	# Tabla llena: se reutilizan los slots caducados y la memoria no crece
+	small = SharedMemoryRateLimitStore(str(tmp_path / "small.shm"), slots=64, stripes=4)
+	for i in range(1000):
+		assert small.hit(f"10.2.{i // 256}.{i % 256}", 1, 1, now=float(i // 50)).allowed
+	assert len(small) <= 64
+	small.close()
+	store.close()
+
+
+def test_store_interface_is_abstract_and_multi_worker_defaults_to_shared(tmp_path, monkeypatch, caplog):
+	from python import rate_limit
+
+	with pytest.raises(TypeError):
+		rate_limit.RateLimitStore()
+	monkeypatch.delenv(rate_limit.RATE_LIMIT_STORE_ENV, raising=False)
+	monkeypatch.setattr(rate_limit, "default_rate_limit_store_path", lambda: str(tmp_path / "default.shm"))
+	assert isinstance(create_rate_limit_store(workers=1), SlidingWindowRateLimiter)
+
+	monkeypatch.setenv(rate_limit.WORKERS_ENV, "4")
+	assert rate_limit.configured_workers() == 4
+	if fcntl is not None:
+		store = create_rate_limit_store()
+		assert isinstance(store, SharedMemoryRateLimitStore) and store.path == str(tmp_path / "default.shm")
+		store.close()
+	monkeypatch.setattr(rate_limit, "fcntl", None)
+	assert isinstance(create_rate_limit_store(), SlidingWindowRateLimiter)
+	assert "cada worker aplica su propia cuota" in caplog.text
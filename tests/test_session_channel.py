@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from python.session_channel import OP_DECRYPT, OP_ENCRYPT, STATUS_ERROR, STATUS_OK, pack_request, unpack_response
+
+
+def _client():
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+	from python.api import app
+	return TestClient(app)
+
+
+def test_pipelined_encrypt_decrypt_tagged_by_request_id():
+	with _client() as client, client.websocket_connect("/ws/session", headers={"X-API-Key": "flora-dev-key"}) as ws:
+		ws.send_text(json.dumps({"password": "p", "session_id": "ws"}))
+		ready = ws.receive_json()
+		assert ready['type'] == "ready" and ready['session_id'] == "ws"
+
+		# Se envían todas las peticiones antes de leer ninguna respuesta
+		for i in range(20):
+			ws.send_bytes(pack_request(OP_ENCRYPT, 100 + i, b"msg-%d" % i, associated_data=b"ad" if i % 2 else b""))
+		bundles = {}
+		for _ in range(20):
+			status, request_id, body = unpack_response(ws.receive_bytes())
+			assert status == STATUS_OK
+			bundles[request_id] = json.loads(body)
+		assert sorted(bundles) == list(range(100, 120))
+		assert {b['master_salt'] for b in bundles.values()} == {ready['master_salt']}
+
+		for request_id, bundle in bundles.items():
+			ws.send_bytes(pack_request(OP_DECRYPT, request_id, json.dumps(bundle).encode()))
+		ws.send_bytes(pack_request(OP_DECRYPT, 7, json.dumps(dict(bundles[100], tag="00" * 16)).encode()))
+		ws.send_bytes(pack_request(9, 8, b""))
+		ws.send_bytes(b"\x01")
+		replies = [unpack_response(ws.receive_bytes()) for _ in range(23)]
+		plain = {rid: body for status, rid, body in replies if status == STATUS_OK}
+		assert plain == {100 + i: b"msg-%d" % i for i in range(20)}
+		assert [(s, rid) for s, rid, _ in replies[20:]] == [(STATUS_ERROR, 7), (STATUS_ERROR, 8), (STATUS_ERROR, 0)]
+
+
+def test_channel_rejects_bad_credentials():
+	from starlette.websockets import WebSocketDisconnect
+
+	with _client() as client:
+		with client.websocket_connect("/ws/session") as ws:
+			ws.send_text(json.dumps({"password": "p"}))
+			assert ws.receive_json()['detail'] == "Unauthorized"
+			with pytest.raises(WebSocketDisconnect) as closed:
+				ws.receive_bytes()
+			assert closed.value.code == 1008
+		with client.websocket_connect("/ws/session") as ws:
+			ws.send_text(json.dumps({"api_key": "flora-dev-key", "key_handle": "fkh_invalido"}))
+			assert ws.receive_json()['type'] == "error"
+
+
+def test_forged_decrypt_frames_only_fail_on_their_own_channel():
+	from python.engine import EnginePool
+	from python.session_channel import SessionChannel
+
+	pool = EnginePool(iterations=1000)
+	engine = pool.engine(False)
+	master_key, master_salt = engine.derive_master_key("mallory")
+	channel = SessionChannel(pool, engine, master_key, master_salt, "ataque")
+	bundle = json.loads(unpack_response(channel.process_batch([pack_request(OP_ENCRYPT, 1, b"x")])[0])[2])
+	forged = [pack_request(OP_DECRYPT, i, json.dumps(dict(bundle, tag="%032x" % i)).encode()) for i in range(10)]
+	assert {unpack_response(r)[0] for r in channel.process_batch(forged)} == {STATUS_ERROR}
+
+	assert pool.status()['system_health'] == 1.0
+	other_key, other_salt = engine.derive_master_key("alice")
+	other = SessionChannel(pool, engine, other_key, other_salt, "legitimo")
+	assert unpack_response(other.process_batch([pack_request(OP_ENCRYPT, 1, b"hola")])[0])[0] == STATUS_OK
+
+
+def test_slow_consumer_stops_reading_from_socket():
+	import asyncio
+	from python.engine import EnginePool
+	from python.session_channel import SessionChannel
+
+	pool = EnginePool(iterations=1000)
+	engine = pool.engine(False)
+	master_key, master_salt = engine.derive_master_key("p")
+	channel = SessionChannel(pool, engine, master_key, master_salt, "lento", max_in_flight=4)
+
+	class StalledClient:
+		"""Envía peticiones sin parar y nunca lee las respuestas."""
+		received = 0
+
+		async def receive(self):
+			self.received += 1
+			return {"type": "websocket.receive", "bytes": pack_request(OP_ENCRYPT, self.received, b"x")}
+
+		async def send_bytes(self, data):
+			await asyncio.Event().wait()
+
+	client = StalledClient()
+
+	async def scenario():
+		with pytest.raises(asyncio.TimeoutError):
+			await asyncio.wait_for(channel.run(client), timeout=0.5)
+
+	asyncio.run(scenario())
+	# Cola de peticiones + lote en proceso + cola de respuestas + envío bloqueado
+	assert client.received <= 3 * 4 + 2
@@ -0,0 +1,89 @@
+# 🌸 FLORA - Pruebas del contenedor cifrado por segmentos
+
+import io
+import os
+
+import pytest
+
+from python.stream_container import (
+	StreamDecryptor,
+	StreamEncryptor,
+	StreamFormatError,
+	decrypt_stream,
+	encrypt_stream,
+)
+
+pytestmark = pytest.mark.crypto
+
+KEY = bytes(range(32))
+CHUNK = 1024
+
+
+def _encrypt(data: bytes, pieces: int = 7) -> bytes:
+	enc = StreamEncryptor(KEY, b"salt", chunk_size=CHUNK)
+	step = max(1, len(data) // pieces)
+	out = [enc.update(data[i:i + step]) for i in range(0, len(data), step)]
+	return b"".join(out) + enc.finalize()
+
+
+def _decrypt(blob: bytes, step: int = 333) -> bytes:
+	dec = StreamDecryptor(lambda salt: KEY)
+	out = [dec.update(blob[i:i + step]) for i in range(0, len(blob), step)]
+	dec.finalize()
+	return b"".join(out)
+
+
+@pytest.mark.parametrize("size", [0, 1, CHUNK - 1, CHUNK, CHUNK + 1, 5 * CHUNK, 5 * CHUNK + 17])
+def test_roundtrip_with_arbitrary_splits(size):
+	data = os.urandom(size)
+	blob = _encrypt(data)
+	assert _decrypt(blob) == data
+	assert _decrypt(blob, step=len(blob) or 1) == data
+
+
+def test_file_helpers_and_salt_callback():
+	src, dst, out = io.BytesIO(os.urandom(10 * CHUNK + 5)), io.BytesIO(), io.BytesIO()
+	encrypt_stream(src, dst, KEY, b"mi-salt", chunk_size=CHUNK)
+	seen = []
+	decrypt_stream(io.BytesIO(dst.getvalue()), out, lambda salt: seen.append(salt) or KEY)
+	assert out.getvalue() == src.getvalue() and seen == [b"mi-salt"]
+
+
+def test_detects_truncation_reordering_and_tampering():
+	data = os.urandom(4 * CHUNK)
+	blob = _encrypt(data)
+	header_len = 4 + 2 + len(b"salt") + 4 + 8
+	segment = 4 + CHUNK + 16
+
+	with pytest.raises(StreamFormatError):
+		_decrypt(blob[:header_len + 2 * segment])  # truncado en frontera de segmento
+	swapped = blob[:header_len] + blob[header_len + segment:header_len + 2 * segment] \
+		+ blob[header_len:header_len + segment] + blob[header_len + 2 * segment:]
+	with pytest.raises(StreamFormatError):
+		_decrypt(swapped)
+	tampered = bytearray(blob)
+	tampered[header_len + 10] ^= 1
+	with pytest.raises(StreamFormatError):
+		_decrypt(bytes(tampered))
+	with pytest.raises(StreamFormatError):
+		_decrypt(blob + b"x")
+	with pytest.raises(StreamFormatError):
+		StreamDecryptor(lambda salt: os.urandom(32)).update(blob)
+
+
+def test_api_stream_endpoints():
+	pytest.importorskip("httpx")
+	from fastapi.testclient import TestClient
+	from python.api import app
+
+	headers = {"X-API-Key": "flora-dev-key", "X-Flora-Password": "pw"}
+	data = os.urandom(600_000)
+	with TestClient(app) as client:
+		encrypted = client.post("/encrypt/stream", headers=headers, content=data)
+		assert encrypted.status_code == 200 and encrypted.content[:4] == b"FLS1"
+		decrypted = client.post("/decrypt/stream", headers=headers, content=encrypted.content)
+		assert decrypted.status_code == 200 and decrypted.content == data
+
+		wrong = dict(headers, **{"X-Flora-Password": "otra"})
+		assert client.post("/decrypt/stream", headers=wrong, content=encrypted.content).status_code == 400
+		assert client.post("/encrypt/stream", headers={"X-Flora-Password": "pw"}, content=b"x").status_code == 401